@@ -0,0 +1,230 @@
+"""
+Analysis Result Cache - run_analysis 결과 메모이제이션
+같은 ShipmentSpec + 같은 참조 데이터 버전이면 계산 없이 저장된 결과를 반환
+
+이 모듈은:
+- 캐시 키: ShipmentSpec 필드의 정규화(canonical) JSON 해시 + 참조 데이터 버전 + 분석 옵션
+  + 피크 시즌 여부 (리드타임 리스크가 현재 월에 의존)
+- 항목 수와 바이트 수 두 가지 한도로 LRU 제거
+- 참조 데이터 reload 시 자동 무효화 (DataAccessLayer.add_reload_listener)
+- 결과는 pickle 바이트로 저장 → 조회할 때마다 독립된 복사본 반환
+  (호출자가 결과 딕셔너리를 수정해도 캐시에 영향 없음)
+"""
+
+from typing import Dict, Any, Optional, List, Tuple, Callable
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+from core.models import ShipmentSpec
+from core.data_access import get_data_access, SupabaseDataAccessLayer
+from core.risk_scoring import is_peak_season
+
+logger = logging.getLogger(__name__)
+
+# 기본 한도 (ANALYSIS_CACHE_MAX_ENTRIES / ANALYSIS_CACHE_MAX_BYTES로 변경, 항목 수 0이면 비활성화)
+DEFAULT_ANALYSIS_CACHE_MAX_ENTRIES = 1024
+DEFAULT_ANALYSIS_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def analysis_cache_key(spec: ShipmentSpec, data_version: str, **options: Any) -> str:
+    """
+    스펙 + 참조 데이터 버전 + 옵션의 정규화 해시
+
+    data_warnings도 키에 포함합니다. run_analysis 결과의 data_warnings/shipment_spec에
+    입력 시점의 경고가 그대로 들어가기 때문입니다. 리드타임 리스크는 피크 시즌(Q4)에
+    높아지므로 피크 시즌 여부도 포함해, 시즌이 바뀌면 이전 결과를 쓰지 않습니다.
+
+    Args:
+        spec: ShipmentSpec 인스턴스
+        data_version: 참조 데이터 버전 (DataAccessLayer.data_version)
+        **options: 결과에 영향을 주는 분석 옵션 (예: simulation_draws)
+
+    Returns:
+        16진수 해시 문자열
+    """
+    canonical = json.dumps(
+        {
+            "spec": spec.model_dump(mode="json"),
+            "data_version": data_version,
+            "options": options,
+            "peak_season": is_peak_season(),
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str
+    )
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class AnalysisResultCache:
+    """
+    run_analysis 결과 LRU 캐시 (항목 수 + 바이트 한도)
+
+    run_analysis는 가격 범위 경고를 spec.data_warnings에 추가하므로, 결과와 함께
+    그때 추가된 경고도 저장해 두었다가 캐시 적중 시 같은 경고를 스펙에 다시 추가합니다.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_ANALYSIS_CACHE_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_ANALYSIS_CACHE_MAX_BYTES,
+        ttl_seconds: float = 0.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            max_entries: 최대 항목 수
+            max_bytes: 저장된 결과의 최대 총 바이트 수
+            ttl_seconds: 항목 유효 시간 (초, 0 이하면 만료 없음 - 버전 변경/LRU로만 제거)
+            clock: 시간 함수 (테스트용)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], List[str]]]:
+        """
+        저장된 결과의 복사본 조회
+
+        Returns:
+            (결과 딕셔너리, 분석 중 spec.data_warnings에 추가된 경고) 또는 None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds > 0 and entry[0] <= self._clock():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            payload = entry[1]
+        return pickle.loads(payload)
+
+    def put(self, key: str, result: Dict[str, Any], added_warnings: List[str]) -> bool:
+        """
+        결과 저장 (호출 시점의 상태를 직렬화하므로 이후 result 수정은 반영되지 않음)
+
+        Returns:
+            저장했으면 True (결과 하나가 바이트 한도보다 크면 저장하지 않음)
+        """
+        try:
+            payload = pickle.dumps((result, list(added_warnings)), protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.warning(f"분석 결과 캐시 저장 실패 (직렬화 불가): {e}")
+            return False
+        if len(payload) > self.max_bytes:
+            return False
+
+        expires_at = self._clock() + self.ttl_seconds if self.ttl_seconds > 0 else 0.0
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, payload)
+            self._bytes += len(payload)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+        return True
+
+    def _remove(self, key: str) -> None:
+        """항목 제거 (lock 보유 상태에서 호출)"""
+        _, payload = self._entries.pop(key)
+        self._bytes -= len(payload)
+
+    def invalidate(self, *_args: Any) -> int:
+        """
+        모든 항목 제거 (참조 데이터 reload listener로 등록)
+
+        Returns:
+            제거된 항목 수
+        """
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+            self.invalidations += 1
+        if removed:
+            logger.info(f"참조 데이터 변경: 분석 결과 캐시 {removed}개 항목 무효화")
+        return removed
+
+    def clear(self) -> None:
+        """모든 항목 제거 (통계 유지)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """캐시 통계"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total > 0 else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+
+# Singleton instance
+_analysis_cache: Optional[AnalysisResultCache] = None
+_analysis_cache_initialized = False
+_analysis_cache_lock = threading.Lock()
+
+
+def get_analysis_cache() -> Optional[AnalysisResultCache]:
+    """
+    분석 결과 캐시 싱글톤 반환 (비활성화되어 있으면 None)
+
+    처음 호출될 때 데이터 접근 레이어에 reload listener를 등록합니다.
+    Supabase 모드에서는 Supabase 쿼리 캐시 TTL이 지나면 결과도 만료되어,
+    캐시된 결과가 원본 쿼리 결과보다 오래 살아남지 않습니다.
+    """
+    global _analysis_cache, _analysis_cache_initialized
+    if _analysis_cache_initialized:
+        return _analysis_cache
+
+    with _analysis_cache_lock:
+        if _analysis_cache_initialized:
+            return _analysis_cache
+
+        try:
+            max_entries = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", DEFAULT_ANALYSIS_CACHE_MAX_ENTRIES))
+            max_bytes = int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", DEFAULT_ANALYSIS_CACHE_MAX_BYTES))
+        except ValueError:
+            logger.warning("ANALYSIS_CACHE_* 값이 올바르지 않음, 기본값 사용")
+            max_entries = DEFAULT_ANALYSIS_CACHE_MAX_ENTRIES
+            max_bytes = DEFAULT_ANALYSIS_CACHE_MAX_BYTES
+
+        if max_entries > 0 and max_bytes > 0:
+            data_access = get_data_access()
+            ttl_seconds = 0.0
+            if isinstance(data_access, SupabaseDataAccessLayer) and data_access.supabase_client:
+                ttl_seconds = data_access.query_cache.ttl_seconds
+            cache = AnalysisResultCache(max_entries=max_entries, max_bytes=max_bytes, ttl_seconds=ttl_seconds)
+            data_access.add_reload_listener(cache.invalidate)
+            _analysis_cache = cache
+
+        _analysis_cache_initialized = True
+        return _analysis_cache
@@ -9,19 +9,44 @@ ShipmentSpec을 받아서 AnalysisResult를 생성하는 순수 Python 모듈
 - 리스크 스코어링 통합
 """
 
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, Optional, Tuple, List, Sequence, Union
+from dataclasses import dataclass, field
+from functools import lru_cache
 import logging
+import os
+import numpy as np
 from core.models import ShipmentSpec, AnalysisResult, CostBreakdown, ParsedInput, RiskLevel
 from core.business_rules import calculate_estimated_costs, assess_risk_level
 from core.errors import NexSupplyError
-from services.analysis_service import enrich_analysis_result, calculate_final_costs
-from core.data_access import get_freight_rate, get_duty_rate, get_extra_costs, get_reference_transactions, get_product_pricing_hint
-from core.risk_scoring import compute_risk_scores
+from services.analysis_service import enrich_analysis_result, calculate_final_costs, calculate_final_costs_batch
+from core.data_access import get_data_access, resolve_reference_data, resolve_reference_data_batch, ReferenceDataBundle, ProductPricingHint
+from core.risk_scoring import compute_risk_scores, combine_risk_scores, compute_price_risk_batch, ContextRiskCache
+from core.analysis_cache import analysis_cache_key, get_analysis_cache
+from core.cost_simulation import (
+    build_cost_distribution, simulate_landed_cost, simulate_landed_cost_batch, DEFAULT_SIMULATION_SEED
+)
 
 logger = logging.getLogger(__name__)
 
+# Best/Worst 시나리오 비용 배수 (Best: -10%, Worst: +15%)
+BEST_CASE_FACTOR = 0.90
+WORST_CASE_FACTOR = 1.15
 
-def run_analysis(spec: ShipmentSpec) -> Dict[str, Any]:
+# 가격 힌트 범위 경고 (spec.data_warnings)
+FOB_OUT_OF_RANGE_WARNING = "Provided FOB price is outside the typical range."
+RETAIL_OUT_OF_RANGE_WARNING = "Provided retail price is outside the typical range."
+
+
+def _default_simulation_draws() -> int:
+    """COST_SIMULATION_DRAWS 환경 변수 (0이면 시뮬레이션 끔, 기본값)"""
+    try:
+        return max(0, int(os.getenv("COST_SIMULATION_DRAWS", "0")))
+    except ValueError:
+        logger.warning("COST_SIMULATION_DRAWS 값이 올바르지 않음, 시뮬레이션 끔")
+        return 0
+
+
+def run_analysis(spec: ShipmentSpec, simulation_draws: Optional[int] = None) -> Dict[str, Any]:
     """
     ShipmentSpec을 받아서 분석 결과를 생성 (Phase 2: 데이터 접근 레이어 통합)
     
@@ -29,11 +54,16 @@ def run_analysis(spec: ShipmentSpec) -> Dict[str, Any]:
     1. 데이터 접근 레이어에서 실제 데이터 조회 (운임, 관세, 부대비용)
     2. 데이터 없을 때만 fallback 사용 + data_warning 플래그
     3. Base/Best/Worst 시나리오 계산
+       (시뮬레이션 모드: Best/Worst = 몬테카를로 P10/P90, result["cost_simulation"] 추가)
     4. 리스크 스코어링 통합
     5. UI 호환 가능한 딕셔너리 형태로 반환
     
+    같은 스펙 + 같은 참조 데이터 버전의 결과는 분석 결과 캐시에서 복사본으로 반환합니다
+    (core.analysis_cache, 참조 데이터 reload 시 무효화).
+    
     Args:
         spec: ShipmentSpec 인스턴스
+        simulation_draws: 몬테카를로 표본 수 (None이면 COST_SIMULATION_DRAWS, 0이면 고정 배수 시나리오)
         
     Returns:
         분석 결과 딕셔너리 (기존 UI와 호환 + 새로운 구조화된 필드)
@@ -41,72 +71,42 @@ def run_analysis(spec: ShipmentSpec) -> Dict[str, Any]:
     Raises:
         NexSupplyError: 분석 실패 시
     """
+    if simulation_draws is None:
+        simulation_draws = _default_simulation_draws()
+    
+    cache = get_analysis_cache()
+    if cache is None:
+        return _run_analysis(spec, simulation_draws)
+    
+    cache_key = analysis_cache_key(spec, get_data_access().data_version, simulation_draws=simulation_draws)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        result, added_warnings = cached
+        spec.data_warnings.extend(added_warnings)  # 계산했을 때와 같은 부수 효과
+        return result
+    
+    warning_count = len(spec.data_warnings)
+    result = _run_analysis(spec, simulation_draws)
+    cache.put(cache_key, result, spec.data_warnings[warning_count:])
+    return result
+
+
+def _run_analysis(spec: ShipmentSpec, simulation_draws: int) -> Dict[str, Any]:
+    """run_analysis 본체 (캐시 없이 계산)"""
     try:
         # Step 1: 수량 정규화 (유닛 타입 고려)
-        normalized_quantity = _normalize_quantity(spec)
-        
-        # Step 2: 데이터 접근 레이어에서 실제 데이터 조회
-        data_quality = {"used_fallbacks": []}
-        
-        # 상품 가격/마진/세금 힌트 조회
-        pricing_hint = get_product_pricing_hint(spec)
-        if not pricing_hint:
-            data_quality["used_fallbacks"].append("product_pricing")
+        normalized_quantity = normalize_quantity(spec)
         
-        # 운임 정보 조회
-        freight_rate = get_freight_rate(spec)
-        if freight_rate.source == "fallback":
-            data_quality["used_fallbacks"].append("freight")
-        
-        # 관세율 조회
-        duty_rate = get_duty_rate(spec)
-        if duty_rate is None:
-            data_quality["used_fallbacks"].append("duty")
-        
-        # 부대비용 조회
-        extra_costs = get_extra_costs(spec)
-        if extra_costs.source == "fallback":
-            data_quality["used_fallbacks"].append("extra_costs")
-        
-        # 유사 거래 데이터 조회
-        reference_transactions = get_reference_transactions(spec, limit=5)
-        data_quality["reference_transaction_count"] = len(reference_transactions)
-        if len(reference_transactions) == 0:
-            data_quality["used_fallbacks"].append("reference_transactions")
+        # Step 2: 데이터 접근 레이어에서 실제 데이터 조회 (가격 힌트/운임/관세/부대비용/유사 거래 일괄 조회)
+        reference_data = resolve_reference_data(spec, transaction_limit=5)
+        pricing_hint = reference_data.pricing_hint
+        freight_rate = reference_data.freight_rate
+        duty_rate = reference_data.duty_rate
+        extra_costs = reference_data.extra_costs
+        data_quality = build_data_quality(reference_data)
         
         # Step 3: 비용 계산 (데이터 접근 레이어 우선 사용)
-        retail_price = spec.target_retail_price
-        if not retail_price and pricing_hint:
-            retail_price = (pricing_hint.typical_retail_price_low_usd + pricing_hint.typical_retail_price_high_usd) / 2
-        elif not retail_price:
-            retail_price = 5.0
-
-        # Manufacturing cost (FOB 단가 우선)
-        manufacturing_cost = spec.fob_price_per_unit
-        if not manufacturing_cost and pricing_hint:
-            manufacturing_cost = (pricing_hint.typical_fob_low_usd + pricing_hint.typical_fob_high_usd) / 2
-        
-        if manufacturing_cost and manufacturing_cost > 0 and manufacturing_cost < retail_price:
-            pass # Use provided manufacturing_cost
-        else:
-            if pricing_hint:
-                 manufacturing_cost = (pricing_hint.typical_fob_low_usd + pricing_hint.typical_fob_high_usd) / 2
-            else:
-                # Fallback: 기존 로직 사용
-                temp_breakdown = calculate_estimated_costs(
-                    user_input=f"{spec.product_name} {spec.quantity} {spec.unit_type}",
-                    retail_price=retail_price,
-                    volume=normalized_quantity
-                )
-                manufacturing_cost = temp_breakdown.get('manufacturing', 0)
-        
-        if pricing_hint:
-            if spec.fob_price_per_unit:
-                if not (pricing_hint.typical_fob_low_usd <= spec.fob_price_per_unit <= pricing_hint.typical_fob_high_usd):
-                    spec.data_warnings.append("Provided FOB price is outside the typical range.")
-            if spec.target_retail_price:
-                if not (pricing_hint.typical_retail_price_low_usd <= spec.target_retail_price <= pricing_hint.typical_retail_price_high_usd):
-                    spec.data_warnings.append("Provided retail price is outside the typical range.")
+        retail_price, manufacturing_cost = resolve_unit_prices(spec, pricing_hint, normalized_quantity)
         
         # Shipping cost (데이터 접근 레이어 사용)
         # 간단한 추정: weight_kg 계산 (기존 로직 활용)
@@ -146,18 +146,18 @@ def run_analysis(spec: ShipmentSpec) -> Dict[str, Any]:
         # Step 4: Best/Worst 시나리오 계산
         # Best case: -10% 변동
         best_cost_breakdown = {
-            "manufacturing": manufacturing_cost * 0.90,
-            "shipping": shipping_cost * 0.90,
-            "duty": duty_cost * 0.90,
-            "misc": misc_cost * 0.90
+            "manufacturing": manufacturing_cost * BEST_CASE_FACTOR,
+            "shipping": shipping_cost * BEST_CASE_FACTOR,
+            "duty": duty_cost * BEST_CASE_FACTOR,
+            "misc": misc_cost * BEST_CASE_FACTOR
         }
         
         # Worst case: +15% 변동
         worst_cost_breakdown = {
-            "manufacturing": manufacturing_cost * 1.15,
-            "shipping": shipping_cost * 1.15,
-            "duty": duty_cost * 1.15,
-            "misc": misc_cost * 1.15
+            "manufacturing": manufacturing_cost * WORST_CASE_FACTOR,
+            "shipping": shipping_cost * WORST_CASE_FACTOR,
+            "duty": duty_cost * WORST_CASE_FACTOR,
+            "misc": misc_cost * WORST_CASE_FACTOR
         }
         
         # 최종 비용 정규화
@@ -177,85 +177,49 @@ def run_analysis(spec: ShipmentSpec) -> Dict[str, Any]:
             retail_price=retail_price
         )
         
-        unit_ddp_base = base_final.get('unit_ddp', 0)
-        unit_ddp_best = best_final.get('unit_ddp', 0)
-        unit_ddp_worst = worst_final.get('unit_ddp', 0)
-        
-        
         cost_scenarios = {
-            "base": unit_ddp_base,
-            "best": unit_ddp_best,
-            "worst": unit_ddp_worst
+            "base": base_final.get('unit_ddp', 0),
+            "best": best_final.get('unit_ddp', 0),
+            "worst": worst_final.get('unit_ddp', 0)
         }
         
+        # Step 4-1: 시뮬레이션 모드 (고정 배수 대신 분포 기반 P10/P90)
+        cost_simulation = None
+        if simulation_draws > 0:
+            distribution = build_cost_distribution(
+                spec=spec,
+                base_final=base_final,
+                retail_price=retail_price,
+                manufacturing_unit_price=manufacturing_cost,
+                reference_data=reference_data,
+                weight_kg=estimated_weight_kg
+            )
+            cost_simulation = simulate_landed_cost(distribution, draws=simulation_draws)
+            cost_scenarios["best"] = cost_simulation.p10
+            cost_scenarios["worst"] = cost_simulation.p90
+        
         # Step 5: 리스크 스코어링
         risk_scores = compute_risk_scores(spec, cost_scenarios, data_quality, pricing_hint)
         
-        # Step 6: 기존 리스크 평가 (하위 호환성)
-        risk_level, risk_notes = assess_risk_level(
-            cost_breakdown=base_final,
-            volume=normalized_quantity,
-            market=spec.destination_country
+        # Step 6~9: 기존 리스크 평가, 수익성, 리드타임, 결과 딕셔너리
+        result = _assemble_result(
+            spec=spec,
+            normalized_quantity=normalized_quantity,
+            retail_price=retail_price,
+            base_final=base_final,
+            cost_scenarios=cost_scenarios,
+            risk_scores=risk_scores,
+            transit_days=freight_rate.transit_days,
+            data_quality=data_quality,
+            data_warnings=spec.data_warnings
         )
-        
-        # Step 7: 수익성 계산
-        net_profit_per_unit = retail_price - unit_ddp_base if retail_price > 0 else 0
-        net_margin = (net_profit_per_unit / retail_price * 100) if retail_price > 0 else 0
-        
-        # Step 8: 리드타임 (운임 데이터에서 가져오기)
-        lead_time_days = freight_rate.transit_days if freight_rate.transit_days else 45
-        
-        # Step 9: 결과 딕셔너리 구성 (기존 UI 호환 + 새로운 필드)
-        result = {
-            # 기존 필드 (하위 호환성)
-            "cost_breakdown": {
-                "manufacturing": base_final.get('manufacturing', 0),
-                "shipping": base_final.get('shipping', 0),
-                "duty": base_final.get('duty', 0),
-                "misc": base_final.get('misc', 0),
-                "total_landed_cost": unit_ddp_base,
-                "currency": "USD"
-            },
-            "profitability": {
-                "retail_price": retail_price,
-                "unit_ddp": unit_ddp_base,
-                "net_profit_per_unit": net_profit_per_unit,
-                "net_profit_percent": net_margin,
-                "total_profit": net_profit_per_unit * normalized_quantity
-            },
-            "risk_analysis": {
-                "level": risk_level,
-                "notes": risk_notes
-            },
-            "lead_time": {
-                "total_days": lead_time_days,
-                "breakdown": f"Production (15d) + Shipping ({freight_rate.transit_days - 20}d) + Customs (5d)"
-            },
-            "ai_context": {
-                "assumptions": {
-                    "volume": normalized_quantity,
-                    "market": spec.destination_country,
-                    "origin": spec.origin_country,
-                    "product_name": spec.product_name,
-                    "unit_type": spec.unit_type,
-                    "channel": spec.channel or "Amazon FBA"
-                }
-            },
-            # 새로운 구조화된 필드 (Phase 2)
-            "cost_scenarios": cost_scenarios,  # base, best, worst
-            "risk_scores": risk_scores,  # success_probability, overall_risk_score, sub-scores
-            "data_quality": data_quality,  # used_fallbacks, reference_transaction_count
-            "shipment_spec": spec.model_dump(),
-            "data_warnings": spec.data_warnings + (
-                [f"데이터 부족: {', '.join(data_quality['used_fallbacks'])}"] 
-                if data_quality['used_fallbacks'] else []
-            ),
-            "is_estimated": spec.is_estimated or len(data_quality['used_fallbacks']) > 0
-        }
+        if cost_simulation is not None:
+            result["cost_simulation"] = cost_simulation.to_dict()
         
         logger.info(
-            f"분석 완료: {spec.product_name}, 랜디드 코스트 ${unit_ddp_base:.2f}, "
-            f"마진 {net_margin:.1f}%, 성공 확률 {risk_scores['success_probability']:.1%}, "
+            f"분석 완료: {spec.product_name}, 랜디드 코스트 ${cost_scenarios['base']:.2f}, "
+            f"마진 {result['profitability']['net_profit_percent']:.1f}%, "
+            f"성공 확률 {risk_scores['success_probability']:.1%}, "
             f"리스크 점수 {risk_scores['overall_risk_score']:.1f}/100"
         )
         
@@ -266,6 +230,569 @@ def run_analysis(spec: ShipmentSpec) -> Dict[str, Any]:
         raise NexSupplyError(f"분석 실패: {str(e)}") from e
 
 
+def build_data_quality(reference_data: ReferenceDataBundle) -> Dict[str, Any]:
+    """참조 데이터 묶음에서 data_quality 딕셔너리 생성 (민감도 분석도 같은 형태로 사용)"""
+    return {
+        "used_fallbacks": reference_data.used_fallbacks,
+        "reference_transaction_count": len(reference_data.reference_transactions),
+        "provenance": dict(reference_data.provenance),
+    }
+
+
+def resolve_unit_prices(
+    spec: ShipmentSpec,
+    pricing_hint: Optional[ProductPricingHint],
+    normalized_quantity: int
+) -> Tuple[float, float]:
+    """
+    소매 가격과 제조 원가(FOB) 결정 + 가격 힌트 범위 검사
+    
+    범위를 벗어나면 spec.data_warnings에 경고를 추가합니다.
+    run_analysis_batch는 같은 규칙을 배열 연산으로 적용하므로 함께 수정해야 합니다.
+    
+    Returns:
+        (retail_price, manufacturing_cost)
+    """
+    retail_price = spec.target_retail_price
+    if not retail_price and pricing_hint:
+        retail_price = (pricing_hint.typical_retail_price_low_usd + pricing_hint.typical_retail_price_high_usd) / 2
+    elif not retail_price:
+        retail_price = 5.0
+
+    # Manufacturing cost (FOB 단가 우선)
+    manufacturing_cost = spec.fob_price_per_unit
+    if not manufacturing_cost and pricing_hint:
+        manufacturing_cost = (pricing_hint.typical_fob_low_usd + pricing_hint.typical_fob_high_usd) / 2
+    
+    if manufacturing_cost and manufacturing_cost > 0 and manufacturing_cost < retail_price:
+        pass # Use provided manufacturing_cost
+    else:
+        if pricing_hint:
+             manufacturing_cost = (pricing_hint.typical_fob_low_usd + pricing_hint.typical_fob_high_usd) / 2
+        else:
+            # Fallback: 기존 로직 사용
+            temp_breakdown = calculate_estimated_costs(
+                user_input=f"{spec.product_name} {spec.quantity} {spec.unit_type}",
+                retail_price=retail_price,
+                volume=normalized_quantity
+            )
+            manufacturing_cost = temp_breakdown.get('manufacturing', 0)
+    
+    if pricing_hint:
+        if spec.fob_price_per_unit:
+            if not (pricing_hint.typical_fob_low_usd <= spec.fob_price_per_unit <= pricing_hint.typical_fob_high_usd):
+                spec.data_warnings.append(FOB_OUT_OF_RANGE_WARNING)
+        if spec.target_retail_price:
+            if not (pricing_hint.typical_retail_price_low_usd <= spec.target_retail_price <= pricing_hint.typical_retail_price_high_usd):
+                spec.data_warnings.append(RETAIL_OUT_OF_RANGE_WARNING)
+    
+    return retail_price, manufacturing_cost
+
+
+def _assemble_result(
+    spec: ShipmentSpec,
+    normalized_quantity: int,
+    retail_price: float,
+    base_final: Dict[str, Any],
+    cost_scenarios: Dict[str, float],
+    risk_scores: Dict[str, Any],
+    transit_days: int,
+    data_quality: Dict[str, Any],
+    data_warnings: List[str]
+) -> Dict[str, Any]:
+    """기존 리스크 평가, 수익성, 리드타임을 계산해 UI 호환 결과 딕셔너리 구성"""
+    unit_ddp_base = cost_scenarios["base"]
+    
+    # Step 6: 기존 리스크 평가 (하위 호환성)
+    risk_level, risk_notes = assess_risk_level(
+        cost_breakdown=base_final,
+        volume=normalized_quantity,
+        market=spec.destination_country
+    )
+    
+    # Step 7: 수익성 계산
+    net_profit_per_unit = retail_price - unit_ddp_base if retail_price > 0 else 0
+    net_margin = (net_profit_per_unit / retail_price * 100) if retail_price > 0 else 0
+    
+    # Step 8: 리드타임 (운임 데이터에서 가져오기)
+    lead_time_days = transit_days if transit_days else 45
+    
+    # Step 9: 결과 딕셔너리 구성 (기존 UI 호환 + 새로운 필드)
+    return {
+        # 기존 필드 (하위 호환성)
+        "cost_breakdown": {
+            "manufacturing": base_final.get('manufacturing', 0),
+            "shipping": base_final.get('shipping', 0),
+            "duty": base_final.get('duty', 0),
+            "misc": base_final.get('misc', 0),
+            "total_landed_cost": unit_ddp_base,
+            "currency": "USD"
+        },
+        "profitability": {
+            "retail_price": retail_price,
+            "unit_ddp": unit_ddp_base,
+            "net_profit_per_unit": net_profit_per_unit,
+            "net_profit_percent": net_margin,
+            "total_profit": net_profit_per_unit * normalized_quantity
+        },
+        "risk_analysis": {
+            "level": risk_level,
+            "notes": risk_notes
+        },
+        "lead_time": {
+            "total_days": lead_time_days,
+            "breakdown": f"Production (15d) + Shipping ({transit_days - 20}d) + Customs (5d)"
+        },
+        "ai_context": {
+            "assumptions": {
+                "volume": normalized_quantity,
+                "market": spec.destination_country,
+                "origin": spec.origin_country,
+                "product_name": spec.product_name,
+                "unit_type": spec.unit_type,
+                "channel": spec.channel or "Amazon FBA"
+            }
+        },
+        # 새로운 구조화된 필드 (Phase 2)
+        "cost_scenarios": cost_scenarios,  # base, best, worst
+        "risk_scores": risk_scores,  # success_probability, overall_risk_score, sub-scores
+        "data_quality": data_quality,  # used_fallbacks, reference_transaction_count, provenance
+        "shipment_spec": spec.model_dump(),
+        "data_warnings": data_warnings + (
+            [f"데이터 부족: {', '.join(data_quality['used_fallbacks'])}"] 
+            if data_quality['used_fallbacks'] else []
+        ),
+        "is_estimated": spec.is_estimated or len(data_quality['used_fallbacks']) > 0
+    }
+
+
+# ============================================================================
+# Batch Analysis: 카탈로그(수천~수만 SKU) 일괄 분석
+# ============================================================================
+
+@dataclass
+class BatchAnalysisResult:
+    """
+    run_analysis_batch 결과 (스펙별 값을 NumPy 배열로 보관)
+    
+    비용/수익성/리스크 배열은 그대로 집계·정렬·차트에 사용하고, 스펙별 딕셔너리가
+    필요할 때만 to_dict(i)로 run_analysis와 같은 형태를 만듭니다.
+    리스크 점수 배열은 반올림 전 값입니다 (딕셔너리는 run_analysis와 같이 반올림).
+    
+    run_analysis가 실패했을 행(0 이하 수량, 음수/0 단가, 잘못된 패키징 등)은 errors에
+    행 번호별 NexSupplyError로 남고 나머지 행은 정상 처리됩니다. 실패한 행의 배열 값은
+    의미가 없으므로 집계 전에 ok 마스크로 걸러야 합니다.
+    """
+    specs: List[ShipmentSpec]
+    quantity: np.ndarray  # 정규화된 수량
+    retail_price: np.ndarray
+    manufacturing: np.ndarray  # 이하 base 시나리오 단가 (USD per unit)
+    shipping: np.ndarray
+    duty: np.ndarray
+    misc: np.ndarray
+    unit_ddp_base: np.ndarray
+    unit_ddp_best: np.ndarray
+    unit_ddp_worst: np.ndarray
+    total_project_cost: np.ndarray
+    normalized_from_total: np.ndarray
+    net_profit_per_unit: np.ndarray
+    net_margin_percent: np.ndarray
+    price_risk: np.ndarray
+    lead_time_risk: np.ndarray
+    compliance_risk: np.ndarray
+    reputation_risk: np.ndarray
+    overall_risk_score: np.ndarray
+    success_probability: np.ndarray
+    transit_days: np.ndarray
+    data_quality: List[Dict[str, Any]]  # 같은 참조 그룹의 스펙은 같은 객체 공유 (to_dict에서 복사)
+    data_warnings: List[Tuple[str, ...]]  # 분석 시점의 spec.data_warnings 스냅샷
+    cost_simulation: Optional[Dict[str, Any]] = None  # 시뮬레이션 모드: p10/p50/p90/mean/prob_negative_margin 배열
+    errors: Dict[int, NexSupplyError] = field(default_factory=dict)  # 실패한 행 번호 → 오류
+    
+    def __len__(self) -> int:
+        return len(self.specs)
+    
+    @property
+    def ok(self) -> np.ndarray:
+        """정상 처리된 행 마스크"""
+        mask = np.ones(len(self.specs), dtype=bool)
+        mask[list(self.errors)] = False
+        return mask
+    
+    def to_dict(self, index: int) -> Dict[str, Any]:
+        """
+        index번째 스펙의 결과를 run_analysis와 같은 딕셔너리로 변환
+        
+        Raises:
+            NexSupplyError: 그 행의 분석이 실패한 경우 (run_analysis와 같이)
+        """
+        error = self.errors.get(index)
+        if error is not None:
+            raise error
+        spec = self.specs[index]
+        base_final = {
+            'unit_ddp': float(self.unit_ddp_base[index]),
+            'total_project_cost': float(self.total_project_cost[index]),
+            'manufacturing': float(self.manufacturing[index]),
+            'shipping': float(self.shipping[index]),
+            'duty': float(self.duty[index]),
+            'misc': float(self.misc[index]),
+            'currency': "USD",
+            '_normalized_from_total': bool(self.normalized_from_total[index])
+        }
+        cost_scenarios = {
+            "base": base_final['unit_ddp'],
+            "best": float(self.unit_ddp_best[index]),
+            "worst": float(self.unit_ddp_worst[index])
+        }
+        risk_scores = combine_risk_scores(
+            float(self.price_risk[index]),
+            float(self.lead_time_risk[index]),
+            float(self.compliance_risk[index]),
+            float(self.reputation_risk[index])
+        )
+        group_quality = self.data_quality[index]
+        data_quality = {
+            "used_fallbacks": list(group_quality["used_fallbacks"]),
+            "reference_transaction_count": group_quality["reference_transaction_count"],
+            "provenance": dict(group_quality["provenance"]),
+        }
+        result = _assemble_result(
+            spec=spec,
+            normalized_quantity=int(self.quantity[index]),
+            retail_price=float(self.retail_price[index]),
+            base_final=base_final,
+            cost_scenarios=cost_scenarios,
+            risk_scores=risk_scores,
+            transit_days=int(self.transit_days[index]),
+            data_quality=data_quality,
+            data_warnings=list(self.data_warnings[index])
+        )
+        if self.cost_simulation is not None:
+            simulation = self.cost_simulation
+            result["cost_simulation"] = {
+                "p10": float(simulation["p10"][index]),
+                "p50": float(simulation["p50"][index]),
+                "p90": float(simulation["p90"][index]),
+                "mean": float(simulation["mean"][index]),
+                "prob_negative_margin": float(simulation["prob_negative_margin"][index]),
+                "draws": simulation["draws"],
+                "seed": simulation["seed"],
+                "fob_source": simulation["fob_source"][index],
+                "freight_basis": simulation["freight_basis"][index],
+            }
+        return result
+    
+    def to_dicts(self) -> List[Union[Dict[str, Any], NexSupplyError]]:
+        """모든 스펙의 결과 딕셔너리 리스트 (실패한 행은 그 NexSupplyError)"""
+        return [self.errors.get(index) or self.to_dict(index) for index in range(len(self))]
+
+
+def run_analysis_batch(
+    specs: Sequence[ShipmentSpec],
+    simulation_draws: Optional[int] = None
+) -> BatchAnalysisResult:
+    """
+    여러 ShipmentSpec을 한 번에 분석 (카탈로그 업로드용)
+    
+    run_analysis와 같은 결과를 내지만:
+    - 참조 데이터는 레인 단위로 묶어 필드별 키로 한 번만 조회 (DataAccessLayer.resolve_batch)
+    - 비용/시나리오/가격 리스크는 NumPy 배열 연산으로 한 번에 계산
+    - 비용과 무관한 리스크 sub-score는 같은 조건의 스펙끼리 재사용
+    
+    run_analysis와 마찬가지로 가격 힌트 범위 경고는 각 spec.data_warnings에 추가됩니다.
+    
+    Args:
+        specs: ShipmentSpec 리스트
+        simulation_draws: 스펙당 몬테카를로 표본 수 (run_analysis와 같은 규칙, 모든 스펙이 같은 난수 공유)
+        
+    Returns:
+        BatchAnalysisResult (to_dict(i)는 run_analysis(specs[i], simulation_draws)와 동일,
+        run_analysis가 실패할 행은 batch.errors에 남고 to_dict(i)가 그 오류를 발생)
+        
+    Raises:
+        NexSupplyError: 배치 전체가 실패한 경우 (참조 데이터 조회 등)
+    """
+    try:
+        specs = list(specs)
+        count = len(specs)
+        row_errors: Dict[int, NexSupplyError] = {}
+        
+        def fail_row(index: int, error: Any) -> None:
+            """그 행만 실패로 기록 (첫 오류 유지)"""
+            if index not in row_errors:
+                row_errors[index] = NexSupplyError(f"분석 실패: {error}")
+        
+        # Step 1: 수량 정규화 (패키징 정보가 없으면 spec.quantity 그대로)
+        quantities = []
+        for index, spec in enumerate(specs):
+            try:
+                quantities.append(int(normalize_quantity(spec)) if spec.packaging else spec.quantity)
+            except Exception as e:
+                fail_row(index, e)
+                quantities.append(0)
+        quantity = np.array(quantities, dtype=np.int64)
+        
+        # Step 2: 참조 데이터 (레인 단위로 묶어 필드별 키로 한 번만 조회)
+        reference_bundles = resolve_reference_data_batch(specs, transaction_limit=5)
+        unique_bundles: Dict[int, Tuple[int, ReferenceDataBundle]] = {}
+        bundle_index_list = [
+            unique_bundles.setdefault(id(bundle), (len(unique_bundles), bundle))[0]
+            for bundle in reference_bundles
+        ]
+        bundles = [bundle for _, bundle in unique_bundles.values()]
+        bundle_data_quality = [build_data_quality(bundle) for bundle in bundles]
+        bundle_index = np.array(bundle_index_list, dtype=np.int64)
+        
+        def bundle_column(values: List[Any], dtype: Any = np.float64) -> np.ndarray:
+            """참조 데이터 묶음별 값을 스펙별 배열로 펼침"""
+            return np.array(values, dtype=dtype)[bundle_index] if bundles else np.zeros(0, dtype=dtype)
+        
+        hints = [bundle.pricing_hint for bundle in bundles]
+        has_hint = bundle_column([hint is not None for hint in hints], bool)
+        hint_fob_low = bundle_column([hint.typical_fob_low_usd if hint else 0.0 for hint in hints])
+        hint_fob_high = bundle_column([hint.typical_fob_high_usd if hint else 0.0 for hint in hints])
+        hint_retail_low = bundle_column([hint.typical_retail_price_low_usd if hint else 0.0 for hint in hints])
+        hint_retail_high = bundle_column([hint.typical_retail_price_high_usd if hint else 0.0 for hint in hints])
+        
+        # Step 3: 소매 가격/제조 원가 (resolve_unit_prices와 같은 규칙)
+        target_retail_price = np.array([spec.target_retail_price or 0.0 for spec in specs], dtype=np.float64)
+        fob_price = np.array([spec.fob_price_per_unit or 0.0 for spec in specs], dtype=np.float64)
+        
+        retail_price = np.where(
+            target_retail_price != 0,
+            target_retail_price,
+            np.where(has_hint, (hint_retail_low + hint_retail_high) / 2, 5.0)
+        )
+        hint_fob_mid = (hint_fob_low + hint_fob_high) / 2
+        manufacturing_cost = np.where(fob_price != 0, fob_price, np.where(has_hint, hint_fob_mid, 0.0))
+        valid_manufacturing = (manufacturing_cost > 0) & (manufacturing_cost < retail_price)
+        manufacturing_cost = np.where(valid_manufacturing | ~has_hint, manufacturing_cost, hint_fob_mid)
+        estimated_costs: Dict[Tuple, float] = {}
+        for index in np.flatnonzero(~valid_manufacturing & ~has_hint):
+            spec = specs[index]
+            estimate_key = (
+                f"{spec.product_name} {spec.quantity} {spec.unit_type}",
+                float(retail_price[index]),
+                int(quantity[index])
+            )
+            try:
+                if estimate_key not in estimated_costs:
+                    estimated_costs[estimate_key] = calculate_estimated_costs(
+                        user_input=estimate_key[0],
+                        retail_price=estimate_key[1],
+                        volume=estimate_key[2]
+                    ).get('manufacturing', 0)
+            except Exception as e:
+                fail_row(index, e)
+                continue
+            manufacturing_cost[index] = estimated_costs[estimate_key]
+        
+        fob_out_of_range = has_hint & (fob_price != 0) & ~((hint_fob_low <= fob_price) & (fob_price <= hint_fob_high))
+        retail_out_of_range = has_hint & (target_retail_price != 0) & ~(
+            (hint_retail_low <= target_retail_price) & (target_retail_price <= hint_retail_high)
+        )
+        for index in np.flatnonzero(fob_out_of_range | retail_out_of_range):
+            if fob_out_of_range[index]:
+                specs[index].data_warnings.append(FOB_OUT_OF_RANGE_WARNING)
+            if retail_out_of_range[index]:
+                specs[index].data_warnings.append(RETAIL_OUT_OF_RANGE_WARNING)
+        data_warnings = [tuple(spec.data_warnings) if spec.data_warnings else () for spec in specs]
+        
+        # 비용과 무관한 리스크 sub-score (ContextRiskCache가 sub-score별 실제 입력으로 재사용)
+        context_risk_cache = ContextRiskCache()
+        context_risk_rows = []
+        for row, (spec, index) in enumerate(zip(specs, bundle_index_list, strict=True)):
+            try:
+                risks = context_risk_cache.get(spec, bundle_data_quality[index])
+            except Exception as e:
+                fail_row(row, e)
+                risks = (0.0, 0.0, 0.0)
+            context_risk_rows.append(risks)
+        context_risks = np.array(context_risk_rows, dtype=np.float64).reshape(count, 3)
+        
+        freight_rates = [bundle.freight_rate for bundle in bundles]
+        rate_per_kg = bundle_column([rate.rate_per_kg or 0.0 for rate in freight_rates])
+        rate_per_cbm = bundle_column([rate.rate_per_cbm or 0.0 for rate in freight_rates])
+        transit_days = bundle_column([rate.transit_days for rate in freight_rates], np.int64)
+        duty_rate = bundle_column([bundle.duty_rate or 0.0 for bundle in bundles])
+        has_duty_rate = bundle_column([bundle.duty_rate is not None for bundle in bundles], bool)
+        misc_cost = bundle_column([
+            bundle.extra_costs.terminal_handling + bundle.extra_costs.customs_clearance + bundle.extra_costs.inland_transport
+            for bundle in bundles
+        ])
+        freight_fallback = bundle_column(['freight' in quality["used_fallbacks"] for quality in bundle_data_quality], bool)
+        duty_fallback = bundle_column(['duty' in quality["used_fallbacks"] for quality in bundle_data_quality], bool)
+        estimated_weight_kg = np.array(
+            [unit_weight(spec.product_name, spec.product_category) for spec in specs],
+            dtype=np.float64
+        ) * quantity
+        
+        # Shipping cost (run_analysis와 같은 우선순위: kg 단가 → CBM 단가 → $5/kg)
+        shipping_cost = np.where(
+            rate_per_kg != 0,
+            estimated_weight_kg * rate_per_kg,
+            np.where(rate_per_cbm != 0, estimated_weight_kg / 200.0 * rate_per_cbm, estimated_weight_kg * 5.0)
+        )
+        
+        # Duty cost
+        duty_cost = np.where(
+            has_duty_rate,
+            (manufacturing_cost + shipping_cost) * duty_rate,
+            manufacturing_cost * 0.038
+        )
+
+        # Step 4: Base/Best/Worst 시나리오
+        scenarios = {
+            "base": calculate_final_costs_batch(
+                manufacturing_cost, shipping_cost, duty_cost, misc_cost, quantity, retail_price
+            ),
+            "best": calculate_final_costs_batch(
+                manufacturing_cost * BEST_CASE_FACTOR,
+                shipping_cost * BEST_CASE_FACTOR,
+                duty_cost * BEST_CASE_FACTOR,
+                misc_cost * BEST_CASE_FACTOR,
+                quantity,
+                retail_price
+            ),
+            "worst": calculate_final_costs_batch(
+                manufacturing_cost * WORST_CASE_FACTOR,
+                shipping_cost * WORST_CASE_FACTOR,
+                duty_cost * WORST_CASE_FACTOR,
+                misc_cost * WORST_CASE_FACTOR,
+                quantity,
+                retail_price
+            ),
+        }
+        base = scenarios["base"]
+        unit_ddp_base = base["unit_ddp"]
+        unit_ddp_best = scenarios["best"]["unit_ddp"]
+        unit_ddp_worst = scenarios["worst"]["unit_ddp"]
+        
+        # calculate_final_costs가 실패할 행, 그리고 기존 리스크 평가는 단가 합계로 나누므로
+        # 단가가 0인 행은 run_analysis와 같이 실패 (그 행만)
+        for index in np.flatnonzero(base["invalid"]):
+            fail_row(int(index), "Failed to calculate costs: invalid cost breakdown or volume")
+        for index in np.flatnonzero(unit_ddp_base == 0):
+            fail_row(int(index), "unit cost is zero")
+        
+        # Step 4-1: 시뮬레이션 모드 (Best/Worst = P10/P90, 실패한 행은 NaN)
+        if simulation_draws is None:
+            simulation_draws = _default_simulation_draws()
+        cost_simulation = None
+        if simulation_draws > 0:
+            distributions = {}
+            for index, spec in enumerate(specs):
+                if index in row_errors:
+                    continue
+                try:
+                    distributions[index] = build_cost_distribution(
+                        spec=spec,
+                        base_final={
+                            'manufacturing': base["manufacturing"][index],
+                            'shipping': base["shipping"][index],
+                            'duty': base["duty"][index],
+                            'misc': base["misc"][index],
+                        },
+                        retail_price=float(retail_price[index]),
+                        manufacturing_unit_price=float(manufacturing_cost[index]),
+                        reference_data=reference_bundles[index],
+                        weight_kg=float(estimated_weight_kg[index])
+                    )
+                except Exception as e:
+                    fail_row(index, e)
+            # 공통 난수를 쓰므로 성공한 행만 시뮬레이션해도 행별 결과는 같음
+            simulated_rows = np.fromiter(distributions, dtype=np.int64, count=len(distributions))
+            simulated = simulate_landed_cost_batch(list(distributions.values()), draws=simulation_draws)
+            cost_simulation = {}
+            for key, values in simulated.items():
+                cost_simulation[key] = np.full(count, np.nan)
+                cost_simulation[key][simulated_rows] = values
+            cost_simulation.update({
+                "draws": simulation_draws,
+                "seed": DEFAULT_SIMULATION_SEED,
+                "fob_source": [
+                    distributions[index].fob_source if index in distributions else None for index in range(count)
+                ],
+                "freight_basis": [
+                    distributions[index].freight_basis if index in distributions else None for index in range(count)
+                ],
+            })
+            unit_ddp_best = cost_simulation["p10"]
+            unit_ddp_worst = cost_simulation["p90"]
+        
+        ok = np.ones(count, dtype=bool)
+        ok[list(row_errors)] = False
+        
+        # Step 5: 리스크 스코어링 (가격 리스크만 비용에 의존, 실패한 행은 0 나누기를 피해 1로 대체)
+        price_risk = compute_price_risk_batch(
+            np.where(ok, unit_ddp_base, 1.0),
+            np.where(ok, unit_ddp_best, 1.0),
+            np.where(ok, unit_ddp_worst, 1.0),
+            freight_fallback,
+            duty_fallback,
+            np.array([spec.fob_price_per_unit is None or spec.is_estimated for spec in specs], dtype=bool),
+            target_retail_price,
+            fob_out_of_range,
+            retail_out_of_range
+        )
+        lead_time_risk = context_risks[:, 0]
+        compliance_risk = context_risks[:, 1]
+        reputation_risk = context_risks[:, 2]
+        overall_risk_score = (
+            price_risk * 0.30 +
+            lead_time_risk * 0.25 +
+            compliance_risk * 0.25 +
+            reputation_risk * 0.20
+        )
+        success_probability = np.maximum(0.1, np.minimum(0.95, 1.0 - (overall_risk_score / 100.0)))
+        
+        # Step 7: 수익성
+        has_retail = retail_price > 0
+        net_profit_per_unit = np.where(has_retail, retail_price - unit_ddp_base, 0.0)
+        net_margin = np.divide(
+            net_profit_per_unit, retail_price, out=np.zeros(count), where=has_retail
+        ) * 100
+        
+        logger.info(
+            f"배치 분석 완료: {count}개 스펙, 참조 데이터 그룹 {len(bundles)}개"
+        )
+        if row_errors:
+            logger.warning(f"배치 분석: {len(row_errors)}개 행 실패 (첫 행 {min(row_errors)}: {row_errors[min(row_errors)]})")
+        
+        return BatchAnalysisResult(
+            specs=specs,
+            quantity=quantity,
+            retail_price=retail_price,
+            manufacturing=base["manufacturing"],
+            shipping=base["shipping"],
+            duty=base["duty"],
+            misc=base["misc"],
+            unit_ddp_base=unit_ddp_base,
+            unit_ddp_best=unit_ddp_best,
+            unit_ddp_worst=unit_ddp_worst,
+            total_project_cost=base["total_project_cost"],
+            normalized_from_total=base["_normalized_from_total"],
+            net_profit_per_unit=net_profit_per_unit,
+            net_margin_percent=net_margin,
+            price_risk=price_risk,
+            lead_time_risk=lead_time_risk,
+            compliance_risk=compliance_risk,
+            reputation_risk=reputation_risk,
+            overall_risk_score=overall_risk_score,
+            success_probability=success_probability,
+            transit_days=transit_days,
+            data_quality=[bundle_data_quality[index] for index in bundle_index_list],
+            data_warnings=data_warnings,
+            cost_simulation=cost_simulation,
+            errors=row_errors
+        )
+        
+    except Exception as e:
+        logger.error(f"run_analysis_batch 실패: {e}", exc_info=True)
+        raise NexSupplyError(f"분석 실패: {str(e)}") from e
+
+
 def _estimate_weight(spec: ShipmentSpec, quantity: int) -> float:
     """
     제품 무게 추정 (Phase 5: product_category 우선 사용)
@@ -277,21 +804,27 @@ def _estimate_weight(spec: ShipmentSpec, quantity: int) -> float:
     Returns:
         총 무게 (kg)
     """
+    return unit_weight(spec.product_name, spec.product_category) * quantity
+
+
+@lru_cache(maxsize=4096)
+def unit_weight(product_name: str, product_category: Optional[str]) -> float:
+    """단위당 무게 (kg) - 제품명/카테고리별 메모이제이션 (민감도 분석/주문량 최적화도 사용)"""
     # Phase 5: product_category가 있으면 우선 사용
-    if spec.product_category:
+    if product_category:
         category_weights = {
             'korean_snack': 0.1,  # 과자류: 100g
             'korean_ramen': 0.12,  # 라면: 120g
             'korean_confectionery': 0.15,  # 제과류: 150g
         }
-        weight_per_unit = category_weights.get(spec.product_category)
+        weight_per_unit = category_weights.get(product_category)
         if weight_per_unit:
-            return weight_per_unit * quantity
+            return weight_per_unit
     
     # Fallback: 기존 키워드 매칭
     from core.business_rules import PRODUCT_KEYWORD_DATABASE
     
-    product_lower = spec.product_name.lower()
+    product_lower = product_name.lower()
     
     best_match = "default"
     for keyword in PRODUCT_KEYWORD_DATABASE:
@@ -300,12 +833,10 @@ def _estimate_weight(spec: ShipmentSpec, quantity: int) -> float:
             break
     
     product_data = PRODUCT_KEYWORD_DATABASE[best_match]
-    weight_per_unit = product_data["weight_kg"]
-    
-    return weight_per_unit * quantity
+    return product_data["weight_kg"]
 
 
-def _normalize_quantity(spec: ShipmentSpec) -> int:
+def normalize_quantity(spec: ShipmentSpec) -> int:
     """
     수량 정규화 (유닛 타입 및 패키징 정보 고려)
     
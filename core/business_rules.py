@@ -35,6 +35,17 @@ PRODUCT_KEYWORD_DATABASE: Dict[str, Dict[str, Any]] = {
 
 # --- 2. DYNAMIC COST CALCULATION ENGINE ---
 
+# Price patterns in the user input, compiled once (called per spec in batch analysis)
+_TON_NUMBER_PATTERN = re.compile(r'(\d+)')
+_WON_PRICE_PATTERN = re.compile(r'(\d{1,3}(?:,\d{3})*|\d+(?:\.\d+)?)\s*원')
+_USD_PRICE_PATTERNS = [
+    re.compile(r'(?:fob|출고가|unit\s*fob|price)[\s:]*\$?(\d+(?:\.\d+)?)'),  # "FOB 0.40" or "출고가: 0.40"
+    re.compile(r'\$(\d+(?:\.\d+)?)'),  # "$0.40"
+    re.compile(r'(\d+\.\d+)\s*usd'),  # "0.40 USD"
+]
+# Every price pattern needs one of these literals; inputs without any skip the regex search
+_PRICE_MARKERS = ('원', 'fob', '출고가', 'price', '$', 'usd')
+
 def calculate_estimated_costs(user_input: str, retail_price: float, volume: int) -> Dict[str, Any]:
     """
     The core of the estimation engine. Parses user input and calculates realistic costs.
@@ -57,7 +68,7 @@ def calculate_estimated_costs(user_input: str, retail_price: float, volume: int)
     # Handle massive weights (e.g., "1000 tons of sand")
     if "ton" in user_input_lower:
         try:
-            tons = float(re.findall(r'(\d+)', user_input_lower)[0])
+            tons = float(_TON_NUMBER_PATTERN.findall(user_input_lower)[0])
             estimated_weight_kg *= tons * 1000 # Convert tons to kg
         except (IndexError, ValueError):
             pass # Use default weight if parsing fails
@@ -65,9 +76,10 @@ def calculate_estimated_costs(user_input: str, retail_price: float, volume: int)
     # CRITICAL FIX: Try to extract FOB price from user input first
     # Look for patterns like "550원", "0.40 USD", "FOB price: 0.40", "출고가: 550원"
     fob_price = None
+    has_price_marker = any(marker in user_input_lower for marker in _PRICE_MARKERS)
     
     # Pattern 1: "550원" or "550 원" (Korean won)
-    won_match = re.search(r'(\d{1,3}(?:,\d{3})*|\d+(?:\.\d+)?)\s*원', user_input)
+    won_match = _WON_PRICE_PATTERN.search(user_input) if has_price_marker else None
     if won_match:
         try:
             won_amount = float(won_match.group(1).replace(',', ''))
@@ -77,14 +89,9 @@ def calculate_estimated_costs(user_input: str, retail_price: float, volume: int)
             pass
     
     # Pattern 2: "0.40 USD" or "$0.40" or "FOB 0.40"
-    if fob_price is None:
-        usd_patterns = [
-            r'(?:fob|출고가|unit\s*fob|price)[\s:]*\$?(\d+(?:\.\d+)?)',  # "FOB 0.40" or "출고가: 0.40"
-            r'\$(\d+(?:\.\d+)?)',  # "$0.40"
-            r'(\d+\.\d+)\s*usd',  # "0.40 USD"
-        ]
-        for pattern in usd_patterns:
-            match = re.search(pattern, user_input_lower)
+    if fob_price is None and has_price_marker:
+        for pattern in _USD_PRICE_PATTERNS:
+            match = pattern.search(user_input_lower)
             if match:
                 try:
                     fob_price = float(match.group(1))
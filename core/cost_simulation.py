@@ -0,0 +1,356 @@
+"""
+Cost Simulation Module - 몬테카를로 랜디드 코스트 시뮬레이션
+고정 배수(Best -10% / Worst +15%) 대신 비용 요소별 분포에서 표본을 뽑아
+단위 DDP의 P10/P50/P90과 역마진(손실) 확률을 계산
+
+이 모듈은:
+- FOB: 견적(FOB 입력) → 가격 힌트 범위 → 유사 거래(reference_transactions) 분산 → 기본값 순으로 분포 결정
+- 환율: 원산지와 도착지가 다르면 FOB에 로그정규 변동 적용
+- 운임: LogisticsCalculator의 standard/spot 범위 (FCL/LCL/항공)
+- 관세: 제조+운임 변동에 비례, 관세율이 fallback이면 관세율 자체도 변동
+- 모든 표본 계산은 NumPy 배열 연산 (스펙 N개 × 표본 수 행렬, 루프 없음)
+"""
+
+from typing import Dict, Any, Optional, Sequence
+from dataclasses import dataclass, asdict
+import logging
+import numpy as np
+from core.country_normalizer import normalize_country_name
+from core.data_access import ReferenceDataBundle
+from services.logistics_calculator import LogisticsCalculator
+
+logger = logging.getLogger(__name__)
+
+# 기본 표본 수 / 시드 (같은 입력은 같은 결과를 내도록 고정 시드)
+DEFAULT_SIMULATION_DRAWS = 100_000
+DEFAULT_SIMULATION_SEED = 20241
+
+# 보고 백분위수
+SIMULATION_PERCENTILES = (10, 50, 90)
+
+# FOB 분포 (로그정규 sigma)
+QUOTED_FOB_SIGMA = 0.03  # 공급사 견적가: 작은 변동
+DEFAULT_FOB_SIGMA = 0.10  # 근거 데이터 없음
+MIN_FOB_SIGMA = 0.03
+MAX_FOB_SIGMA = 0.50
+
+# 환율 변동 (로그정규 sigma, 발주~결제 기간 기준)
+FX_SIGMA = 0.03
+
+# 해상 FCL 운임이 spot 요율로 체결될 확률
+SPOT_RATE_PROBABILITY = 0.30
+
+# 관세율이 fallback일 때 관세율 배수 범위 (균등분포)
+FALLBACK_DUTY_FACTOR_RANGE = (0.5, 1.5)
+
+# 부대비용 배수 (삼각분포, 기존 Best/Worst 배수와 동일한 범위)
+MISC_FACTOR_RANGE = (0.90, 1.0, 1.15)
+
+# 배치 시뮬레이션 한 번에 만드는 행렬 원소 수 상한 (메모리 제한)
+_BATCH_CHUNK_ELEMENTS = 2_000_000
+
+
+@dataclass
+class CostDistribution:
+    """
+    스펙 하나의 비용 요소 분포 파라미터
+
+    비용(manufacturing ~ misc)은 calculate_final_costs가 정규화한 단위 비용이고,
+    나머지는 기준 비용에 곱하는 배수 분포입니다.
+    """
+    manufacturing: float
+    shipping: float
+    duty: float
+    misc: float
+    retail_price: float
+    fob_kind: str = "lognormal"  # "triangular" 또는 "lognormal"
+    fob_low: float = 1.0
+    fob_mode: float = 1.0
+    fob_high: float = 1.0
+    fob_sigma: float = DEFAULT_FOB_SIGMA
+    fob_source: str = "default"  # "quote", "pricing_hint", "reference_transactions", "default"
+    fx_sigma: float = 0.0
+    freight_basis: str = "lcl"  # "fcl", "lcl", "air"
+    freight_low: float = 1.0
+    freight_high: float = 1.0
+    spot_low: float = 1.0
+    spot_high: float = 1.0
+    spot_probability: float = 0.0
+    duty_low: float = 1.0
+    duty_high: float = 1.0
+    misc_low: float = MISC_FACTOR_RANGE[0]
+    misc_mode: float = MISC_FACTOR_RANGE[1]
+    misc_high: float = MISC_FACTOR_RANGE[2]
+
+
+@dataclass
+class CostSimulationResult:
+    """시뮬레이션 요약 (단위 DDP 백분위수 + 역마진 확률)"""
+    p10: float
+    p50: float
+    p90: float
+    mean: float
+    prob_negative_margin: float
+    draws: int
+    seed: Optional[int]
+    fob_source: str
+    freight_basis: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def build_cost_distribution(
+    spec: Any,
+    base_final: Dict[str, Any],
+    retail_price: float,
+    manufacturing_unit_price: float,
+    reference_data: ReferenceDataBundle,
+    weight_kg: float
+) -> CostDistribution:
+    """
+    run_analysis 중간 결과로 스펙의 비용 분포 구성
+
+    Args:
+        spec: ShipmentSpec 인스턴스
+        base_final: Base 시나리오 calculate_final_costs 결과 (단위 비용)
+        retail_price: 소매 가격
+        manufacturing_unit_price: 결정된 FOB 단가 (가격 힌트 범위와 비교용)
+        reference_data: 참조 데이터 묶음 (가격 힌트/운임/관세 출처/유사 거래)
+        weight_kg: 총 추정 무게 (FCL/LCL 판별)
+
+    Returns:
+        CostDistribution 인스턴스
+    """
+    distribution = CostDistribution(
+        manufacturing=float(base_final.get('manufacturing', 0) or 0),
+        shipping=float(base_final.get('shipping', 0) or 0),
+        duty=float(base_final.get('duty', 0) or 0),
+        misc=float(base_final.get('misc', 0) or 0),
+        retail_price=float(retail_price or 0)
+    )
+
+    # 1. FOB 분포
+    pricing_hint = reference_data.pricing_hint
+    fob_prices = [
+        transaction.fob_price_per_unit
+        for transaction in reference_data.reference_transactions
+        if transaction.fob_price_per_unit > 0
+    ]
+    if spec.fob_price_per_unit and spec.fob_price_per_unit == manufacturing_unit_price:
+        distribution.fob_sigma = QUOTED_FOB_SIGMA
+        distribution.fob_source = "quote"
+    elif (
+        pricing_hint
+        and manufacturing_unit_price > 0
+        and 0 < pricing_hint.typical_fob_low_usd < pricing_hint.typical_fob_high_usd
+    ):
+        low = pricing_hint.typical_fob_low_usd / manufacturing_unit_price
+        high = pricing_hint.typical_fob_high_usd / manufacturing_unit_price
+        distribution.fob_kind = "triangular"
+        distribution.fob_low = low
+        distribution.fob_mode = min(max(1.0, low), high)
+        distribution.fob_high = high
+        distribution.fob_source = "pricing_hint"
+    elif len(fob_prices) >= 2:
+        sigma = float(np.std(np.log(fob_prices)))
+        distribution.fob_sigma = min(max(sigma, MIN_FOB_SIGMA), MAX_FOB_SIGMA)
+        distribution.fob_source = "reference_transactions"
+
+    # 2. 환율 (국경 간 거래만)
+    origin = normalize_country_name(spec.origin_country or "")
+    destination = normalize_country_name(spec.destination_country or "")
+    if origin and destination and origin != destination:
+        distribution.fx_sigma = FX_SIGMA
+
+    # 3. 운임 (LogisticsCalculator 범위를 standard 중간값 기준 배수로 변환)
+    freight_mode = (reference_data.freight_rate.mode or "").lower()
+    if freight_mode == "air":
+        low, high = LogisticsCalculator.AIR_FREIGHT_RATES["standard"]["rate_range"]
+        distribution.freight_basis = "air"
+        distribution.freight_low, distribution.freight_high = _relative_range(low, high, (low + high) / 2)
+    else:
+        volume_cbm = weight_kg / 200.0  # LogisticsCalculator.estimate_cbm 기본 밀도
+        if volume_cbm >= 15 or weight_kg >= 10000:
+            fcl_rates = LogisticsCalculator.SEA_FREIGHT_RATES["40ft_fcl"]
+            low, high = fcl_rates["standard_range"]
+            midpoint = (low + high) / 2
+            distribution.freight_basis = "fcl"
+            distribution.freight_low, distribution.freight_high = _relative_range(low, high, midpoint)
+            distribution.spot_low, distribution.spot_high = _relative_range(*fcl_rates["spot_range"], midpoint)
+            distribution.spot_probability = SPOT_RATE_PROBABILITY
+        else:
+            low, high = LogisticsCalculator.SEA_FREIGHT_RATES["lcl_per_cbm"]["standard_range"]
+            distribution.freight_basis = "lcl"
+            distribution.freight_low, distribution.freight_high = _relative_range(low, high, (low + high) / 2)
+
+    # 4. 관세율 (fallback 관세율은 자체 불확실성 추가)
+    if reference_data.provenance.get("duty", "fallback") in ("fallback", "missing"):
+        distribution.duty_low, distribution.duty_high = FALLBACK_DUTY_FACTOR_RANGE
+
+    return distribution
+
+
+def _relative_range(low: float, high: float, reference: float):
+    return low / reference, high / reference
+
+
+def simulate_landed_cost(
+    distribution: CostDistribution,
+    draws: int = DEFAULT_SIMULATION_DRAWS,
+    seed: Optional[int] = DEFAULT_SIMULATION_SEED
+) -> CostSimulationResult:
+    """
+    스펙 하나의 랜디드 코스트 시뮬레이션
+
+    Args:
+        distribution: build_cost_distribution 결과
+        draws: 표본 수
+        seed: 난수 시드 (None이면 매번 다른 결과)
+
+    Returns:
+        CostSimulationResult 인스턴스
+    """
+    summary = simulate_landed_cost_batch([distribution], draws=draws, seed=seed)
+    return CostSimulationResult(
+        p10=float(summary["p10"][0]),
+        p50=float(summary["p50"][0]),
+        p90=float(summary["p90"][0]),
+        mean=float(summary["mean"][0]),
+        prob_negative_margin=float(summary["prob_negative_margin"][0]),
+        draws=draws,
+        seed=seed,
+        fob_source=distribution.fob_source,
+        freight_basis=distribution.freight_basis
+    )
+
+
+def simulate_landed_cost_batch(
+    distributions: Sequence[CostDistribution],
+    draws: int = DEFAULT_SIMULATION_DRAWS,
+    seed: Optional[int] = DEFAULT_SIMULATION_SEED
+) -> Dict[str, np.ndarray]:
+    """
+    여러 스펙의 랜디드 코스트 시뮬레이션 (run_analysis_batch용)
+
+    모든 스펙이 같은 기저 난수(common random numbers)를 공유하므로 스펙 간 비교가
+    안정적이고, 난수 생성 비용은 스펙 수와 무관합니다. 스펙 × 표본 행렬은
+    메모리 상한에 맞춰 나눠서 계산합니다.
+
+    Args:
+        distributions: CostDistribution 목록
+        draws: 스펙당 표본 수
+        seed: 난수 시드
+
+    Returns:
+        p10, p50, p90, mean, prob_negative_margin 배열 딕셔너리 (길이 = 스펙 수)
+    """
+    if draws <= 0:
+        raise ValueError(f"draws must be positive, got: {draws}")
+
+    count = len(distributions)
+    summary = {
+        key: np.empty(count)
+        for key in ("p10", "p50", "p90", "mean", "prob_negative_margin")
+    }
+    if count == 0:
+        return summary
+
+    variates = _draw_variates(np.random.default_rng(seed), draws)
+    chunk_size = max(1, _BATCH_CHUNK_ELEMENTS // draws)
+
+    for start in range(0, count, chunk_size):
+        chunk = distributions[start:start + chunk_size]
+        params = _stack_parameters(chunk)
+        unit_ddp = _sample_unit_ddp(params, variates)
+
+        stop = start + len(chunk)
+        p10, p50, p90 = np.percentile(unit_ddp, SIMULATION_PERCENTILES, axis=1)
+        summary["p10"][start:stop] = p10
+        summary["p50"][start:stop] = p50
+        summary["p90"][start:stop] = p90
+        summary["mean"][start:stop] = unit_ddp.mean(axis=1)
+
+        # 수익성 계산과 동일: 소매가가 0 이하이면 순이익 0 (손실 아님)
+        retail = params["retail_price"]
+        negative = (unit_ddp > retail) & (retail > 0)
+        summary["prob_negative_margin"][start:stop] = negative.mean(axis=1)
+
+    return summary
+
+
+def _draw_variates(rng: np.random.Generator, draws: int) -> Dict[str, np.ndarray]:
+    """스펙 공통 기저 난수 (형태: 1 × draws, 스펙 축으로 브로드캐스트)"""
+    uniforms = rng.random((5, draws))
+    normals = rng.standard_normal((2, draws))
+    return {
+        "fob_u": uniforms[0:1],
+        "freight_u": uniforms[1:2],
+        "spot_u": uniforms[2:3],
+        "duty_u": uniforms[3:4],
+        "misc_u": uniforms[4:5],
+        "fob_z": normals[0:1],
+        "fx_z": normals[1:2],
+    }
+
+
+def _stack_parameters(distributions: Sequence[CostDistribution]) -> Dict[str, np.ndarray]:
+    """분포 파라미터를 (스펙 수 × 1) 열 벡터로 변환"""
+    numeric_fields = (
+        "manufacturing", "shipping", "duty", "misc", "retail_price",
+        "fob_low", "fob_mode", "fob_high", "fob_sigma", "fx_sigma",
+        "freight_low", "freight_high", "spot_low", "spot_high", "spot_probability",
+        "duty_low", "duty_high", "misc_low", "misc_mode", "misc_high",
+    )
+    params = {
+        name: np.array([getattr(d, name) for d in distributions], dtype=np.float64)[:, None]
+        for name in numeric_fields
+    }
+    params["fob_triangular"] = np.array(
+        [d.fob_kind == "triangular" for d in distributions]
+    )[:, None]
+    return params
+
+
+def _triangular(u: np.ndarray, low: np.ndarray, mode: np.ndarray, high: np.ndarray) -> np.ndarray:
+    """삼각분포 역CDF (행마다 다른 파라미터 지원)"""
+    width = high - low
+    safe_width = np.where(width > 0, width, 1.0)
+    split = (mode - low) / safe_width
+    left = low + np.sqrt(u * width * (mode - low))
+    right = high - np.sqrt((1.0 - u) * width * (high - mode))
+    return np.where(u < split, left, right)
+
+
+def _sample_unit_ddp(params: Dict[str, np.ndarray], variates: Dict[str, np.ndarray]) -> np.ndarray:
+    """단위 DDP 표본 행렬 (스펙 수 × 표본 수)"""
+    # FOB × 환율
+    fob_factor = np.where(
+        params["fob_triangular"],
+        _triangular(variates["fob_u"], params["fob_low"], params["fob_mode"], params["fob_high"]),
+        np.exp(params["fob_sigma"] * variates["fob_z"])
+    )
+    fob_factor *= np.exp(params["fx_sigma"] * variates["fx_z"])
+    manufacturing = params["manufacturing"] * fob_factor
+
+    # 운임 (FCL은 spot 요율 혼합)
+    use_spot = variates["spot_u"] < params["spot_probability"]
+    freight_low = np.where(use_spot, params["spot_low"], params["freight_low"])
+    freight_high = np.where(use_spot, params["spot_high"], params["freight_high"])
+    shipping = params["shipping"] * (freight_low + variates["freight_u"] * (freight_high - freight_low))
+
+    # 관세: 과세 기준(제조+운임) 변동에 비례
+    base_dutiable = params["manufacturing"] + params["shipping"]
+    dutiable_factor = np.divide(
+        manufacturing + shipping, base_dutiable,
+        out=np.ones_like(manufacturing), where=base_dutiable > 0
+    )
+    duty_factor = params["duty_low"] + variates["duty_u"] * (params["duty_high"] - params["duty_low"])
+    duty = params["duty"] * dutiable_factor * duty_factor
+
+    # 부대비용
+    misc = params["misc"] * _triangular(
+        variates["misc_u"], params["misc_low"], params["misc_mode"], params["misc_high"]
+    )
+
+    return manufacturing + shipping + duty + misc
@@ -0,0 +1,312 @@
+"""
+Country Name Normalizer - Phase 5: CSV 매칭 개선
+국가 이름 변형을 표준 이름으로 변환하는 모듈
+
+이 모듈은:
+- 별칭 테이블을 모듈 로드 시 한 번만 컴파일 (호출마다 dict 재생성 없음)
+- 정확 매칭은 해시 조회 한 번, 결과는 LRU 메모이제이션
+- 부분 매칭은 토큰 단위 (모든 별칭을 스캔하지 않음, "in"이 "spain"에 매칭되지 않음)
+- 별칭은 data/country_aliases.csv에서 추가 로드 (코드 수정 없이 ISO-3166 이름/코드 추가)
+"""
+
+from typing import Dict, Optional, Tuple
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+import csv
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+
+# 기본 별칭 (데이터 파일이 없어도 항상 사용)
+_BUILTIN_COUNTRY_ALIASES: Dict[str, str] = {
+    # South Korea variants
+    "korea": "South Korea",
+    "south korea": "South Korea",
+    "republic of korea": "South Korea",
+    "rok": "South Korea",
+    "kr": "South Korea",
+    "한국": "South Korea",
+    "대한민국": "South Korea",
+
+    # United States variants
+    "usa": "United States",
+    "us": "United States",
+    "united states": "United States",
+    "united states of america": "United States",
+    "america": "United States",
+    "미국": "United States",
+
+    # Germany variants
+    "germany": "Germany",
+    "deutschland": "Germany",
+    "de": "Germany",
+    "독일": "Germany",
+
+    # Japan variants
+    "japan": "Japan",
+    "jp": "Japan",
+    "日本": "Japan",
+    "일본": "Japan",
+
+    # China variants
+    "china": "China",
+    "prc": "China",
+    "people's republic of china": "China",
+    "중국": "China",
+
+    # United Kingdom variants
+    "united kingdom": "United Kingdom",
+    "uk": "United Kingdom",
+    "great britain": "United Kingdom",
+    "britain": "United Kingdom",
+    "england": "United Kingdom",
+    "영국": "United Kingdom",
+
+    # France variants
+    "france": "France",
+    "fr": "France",
+    "프랑스": "France",
+
+    # Italy variants
+    "italy": "Italy",
+    "it": "Italy",
+    "이탈리아": "Italy",
+
+    # Spain variants
+    "spain": "Spain",
+    "es": "Spain",
+    "스페인": "Spain",
+
+    # Netherlands variants
+    "netherlands": "Netherlands",
+    "holland": "Netherlands",
+    "nl": "Netherlands",
+    "네덜란드": "Netherlands",
+
+    # Vietnam variants
+    "vietnam": "Vietnam",
+    "vn": "Vietnam",
+    "베트남": "Vietnam",
+
+    # India variants
+    "india": "India",
+    "in": "India",
+    "인도": "India",
+}
+
+# 추가 별칭 파일 기본 경로 (COUNTRY_ALIASES_PATH 환경 변수로 변경 가능)
+DEFAULT_ALIASES_PATH = Path(__file__).resolve().parent.parent / "data" / "country_aliases.csv"
+
+# 이보다 짧은 ASCII 별칭 (us, in, de, usa 등)은 일반 단어와 겹치므로
+# 부분 매칭 시 원문에서 대문자로 쓰인 경우에만 코드로 인정
+_MIN_PARTIAL_ALIAS_LENGTH = 4
+
+# 메모이제이션 크기
+_NORMALIZE_CACHE_SIZE = 4096
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def _alias_key(text: str) -> str:
+    """비교용 키: 소문자 + 구두점 제거 + 공백 정리 ("People's  Republic" → "people s republic")"""
+    return " ".join(_TOKEN_PATTERN.findall(text.lower()))
+
+
+def _is_ascii(text: str) -> bool:
+    return all(ord(c) < 128 for c in text)
+
+
+@dataclass(frozen=True)
+class CountryAliasTable:
+    """컴파일된 별칭 테이블"""
+    exact: Dict[str, str]  # 모든 별칭 키 → 표준 이름
+    phrases: Dict[str, str]  # 부분 매칭용 ASCII 별칭 (토큰 n-gram 단위)
+    codes: Dict[str, str]  # 짧은 ASCII 코드 (대문자 토큰일 때만 부분 매칭)
+    cjk_prefixes: Dict[str, str]  # 한글/한자 별칭 (조사가 붙은 토큰의 접두사로 매칭, 예: "미국에")
+    max_phrase_tokens: int
+    max_cjk_length: int
+
+
+def compile_country_aliases(aliases: Dict[str, str]) -> CountryAliasTable:
+    """
+    별칭 dict를 조회용 테이블로 컴파일
+
+    Args:
+        aliases: 별칭 → 표준 국가 이름
+
+    Returns:
+        CountryAliasTable 인스턴스
+    """
+    exact: Dict[str, str] = {}
+    phrases: Dict[str, str] = {}
+    codes: Dict[str, str] = {}
+    cjk_prefixes: Dict[str, str] = {}
+
+    for alias, canonical in aliases.items():
+        key = _alias_key(alias)
+        if not key or not canonical:
+            continue
+        exact[key] = canonical
+        if not _is_ascii(key):
+            cjk_prefixes[key] = canonical
+        elif len(key) >= _MIN_PARTIAL_ALIAS_LENGTH:
+            phrases[key] = canonical
+        else:
+            codes[key] = canonical
+
+    return CountryAliasTable(
+        exact=exact,
+        phrases=phrases,
+        codes=codes,
+        cjk_prefixes=cjk_prefixes,
+        max_phrase_tokens=max((len(key.split()) for key in phrases), default=0),
+        max_cjk_length=max((len(key) for key in cjk_prefixes), default=0)
+    )
+
+
+def read_country_aliases(path: Path) -> Dict[str, str]:
+    """
+    별칭 CSV 파일 읽기 (컬럼: alias, canonical)
+
+    Args:
+        path: CSV 파일 경로
+
+    Returns:
+        별칭 → 표준 이름 dict (파일이 없거나 읽기 실패 시 빈 dict)
+    """
+    if not path.exists():
+        return {}
+
+    aliases: Dict[str, str] = {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                alias = (row.get('alias') or '').strip()
+                canonical = (row.get('canonical') or '').strip()
+                if alias and canonical:
+                    aliases[alias] = canonical
+    except Exception as e:
+        logger.warning(f"국가 별칭 파일 로드 실패 ({path}): {e}, 기본 별칭만 사용")
+        return {}
+    return aliases
+
+
+_alias_table: CountryAliasTable = compile_country_aliases(_BUILTIN_COUNTRY_ALIASES)
+
+
+def load_country_aliases(path: Optional[Path] = None) -> CountryAliasTable:
+    """
+    기본 별칭 + 데이터 파일 별칭으로 모듈 테이블을 다시 컴파일
+
+    데이터 파일의 항목이 같은 별칭의 기본값을 덮어씁니다. 메모이제이션 결과도 비웁니다.
+
+    Args:
+        path: 별칭 CSV 경로 (없으면 COUNTRY_ALIASES_PATH 또는 data/country_aliases.csv)
+
+    Returns:
+        새로 컴파일된 CountryAliasTable
+    """
+    global _alias_table
+    if path is None:
+        path = Path(os.getenv("COUNTRY_ALIASES_PATH", str(DEFAULT_ALIASES_PATH)))
+
+    aliases = dict(_BUILTIN_COUNTRY_ALIASES)
+    aliases.update(read_country_aliases(Path(path)))
+
+    _alias_table = compile_country_aliases(aliases)
+    _normalize_cached.cache_clear()
+    return _alias_table
+
+
+def _match_partial(country: str, table: CountryAliasTable) -> Optional[str]:
+    """
+    토큰 단위 부분 매칭
+
+    후보 우선순위: 더 긴 별칭 → 더 앞쪽 위치. 토큰 n-gram/접두사만 해시 조회하므로
+    비용은 입력 길이에 비례하고 별칭 수와 무관합니다.
+    """
+    original_tokens = _TOKEN_PATTERN.findall(country)
+    tokens = [token.lower() for token in original_tokens]
+    best: Optional[Tuple[int, int, str]] = None  # (별칭 길이, -위치, 표준 이름)
+
+    def consider(length: int, position: int, canonical: str) -> None:
+        nonlocal best
+        candidate = (length, -position, canonical)
+        if best is None or candidate[:2] > best[:2]:
+            best = candidate
+
+    for i, token in enumerate(tokens):
+        # 1. ASCII 별칭: 가장 긴 n-gram부터
+        for n in range(min(table.max_phrase_tokens, len(tokens) - i), 0, -1):
+            phrase = " ".join(tokens[i:i + n])
+            canonical = table.phrases.get(phrase)
+            if canonical:
+                consider(len(phrase), i, canonical)
+                break
+
+        # 2. 짧은 코드: 원문이 대문자인 경우만 ("Made in KR" → KR, "made in china"의 "in"은 무시)
+        if original_tokens[i].isupper() and token in table.codes:
+            consider(len(token), i, table.codes[token])
+
+        # 3. 한글/한자: 토큰 접두사 ("미국에" → "미국")
+        if not _is_ascii(token):
+            for length in range(min(table.max_cjk_length, len(token)), 0, -1):
+                canonical = table.cjk_prefixes.get(token[:length])
+                if canonical:
+                    consider(length, i, canonical)
+                    break
+
+    return best[2] if best else None
+
+
+@lru_cache(maxsize=_NORMALIZE_CACHE_SIZE)
+def _normalize_cached(country: str) -> str:
+    table = _alias_table
+
+    # 정확한 매칭 시도
+    canonical = table.exact.get(_alias_key(country))
+    if canonical:
+        return canonical
+
+    # 부분 매칭 시도 (예: "South Korea trading co.", "미국에")
+    canonical = _match_partial(country, table)
+    if canonical:
+        return canonical
+
+    # 매칭 실패 시 원본 반환 (대소문자만 정규화)
+    return country.strip().title()
+
+
+def normalize_country_name(country: str) -> str:
+    """
+    국가 이름 정규화 (Phase 5: CSV 매칭 개선)
+
+    다양한 국가 이름 변형을 표준 이름으로 변환합니다.
+    CSV/Supabase에서 일관된 매칭을 위해 사용됩니다.
+
+    Args:
+        country: 원본 국가 이름 (다양한 형식 가능)
+
+    Returns:
+        정규화된 국가 이름 (표준 형식)
+
+    Examples:
+        normalize_country_name("Korea") -> "South Korea"
+        normalize_country_name("USA") -> "United States"
+        normalize_country_name("Deutschland") -> "Germany"
+    """
+    if not country:
+        return country
+    return _normalize_cached(country)
+
+
+def normalize_cache_info():
+    """메모이제이션 통계 (functools.lru_cache CacheInfo)"""
+    return _normalize_cached.cache_info()
+
+
+load_country_aliases()
@@ -8,12 +8,17 @@ Supabase 또는 CSV 기반 데이터 조회 인터페이스
 - 데이터 부족 시 fallback + data_warning 플래그
 """
 
-from typing import Optional, Dict, Any, List
-from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Tuple, Callable
+from dataclasses import dataclass, field, replace
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import csv
+import hashlib
 import logging
+import threading
+import time
 from core.models import ShipmentSpec
+from core.country_normalizer import normalize_country_name
 
 logger = logging.getLogger(__name__)
 
@@ -37,123 +42,6 @@ class ProductPricingHint:
     source: str = "fallback"
 
 
-# ============================================================================
-# Phase 5: Country Name Normalization
-# ============================================================================
-
-def normalize_country_name(country: str) -> str:
-    """
-    국가 이름 정규화 (Phase 5: CSV 매칭 개선)
-    
-    다양한 국가 이름 변형을 표준 이름으로 변환합니다.
-    CSV/Supabase에서 일관된 매칭을 위해 사용됩니다.
-    
-    Args:
-        country: 원본 국가 이름 (다양한 형식 가능)
-        
-    Returns:
-        정규화된 국가 이름 (표준 형식)
-        
-    Examples:
-        normalize_country_name("Korea") -> "South Korea"
-        normalize_country_name("USA") -> "United States"
-        normalize_country_name("Deutschland") -> "Germany"
-    """
-    if not country:
-        return country
-    
-    country_lower = country.strip().lower()
-    
-    # 국가 이름 매핑 테이블
-    country_mapping = {
-        # South Korea variants
-        "korea": "South Korea",
-        "south korea": "South Korea",
-        "republic of korea": "South Korea",
-        "rok": "South Korea",
-        "kr": "South Korea",
-        "한국": "South Korea",
-        "대한민국": "South Korea",
-        
-        # United States variants
-        "usa": "United States",
-        "us": "United States",
-        "united states": "United States",
-        "united states of america": "United States",
-        "america": "United States",
-        "미국": "United States",
-        
-        # Germany variants
-        "germany": "Germany",
-        "deutschland": "Germany",
-        "de": "Germany",
-        "독일": "Germany",
-        
-        # Japan variants
-        "japan": "Japan",
-        "jp": "Japan",
-        "日本": "Japan",
-        "일본": "Japan",
-        
-        # China variants
-        "china": "China",
-        "prc": "China",
-        "people's republic of china": "China",
-        "중국": "China",
-        
-        # United Kingdom variants
-        "united kingdom": "United Kingdom",
-        "uk": "United Kingdom",
-        "great britain": "United Kingdom",
-        "britain": "United Kingdom",
-        "england": "United Kingdom",
-        "영국": "United Kingdom",
-        
-        # France variants
-        "france": "France",
-        "fr": "France",
-        "프랑스": "France",
-        
-        # Italy variants
-        "italy": "Italy",
-        "it": "Italy",
-        "이탈리아": "Italy",
-        
-        # Spain variants
-        "spain": "Spain",
-        "es": "Spain",
-        "스페인": "Spain",
-        
-        # Netherlands variants
-        "netherlands": "Netherlands",
-        "holland": "Netherlands",
-        "nl": "Netherlands",
-        "네덜란드": "Netherlands",
-        
-        # Vietnam variants
-        "vietnam": "Vietnam",
-        "vn": "Vietnam",
-        "베트남": "Vietnam",
-        
-        # India variants
-        "india": "India",
-        "in": "India",
-        "인도": "India",
-    }
-    
-    # 정확한 매칭 시도
-    if country_lower in country_mapping:
-        return country_mapping[country_lower]
-    
-    # 부분 매칭 시도 (예: "South Korea"가 이미 정규화된 경우)
-    for variant, canonical in country_mapping.items():
-        if variant in country_lower or country_lower in variant:
-            return canonical
-    
-    # 매칭 실패 시 원본 반환 (대소문자만 정규화)
-    return country.strip().title()
-
-
 @dataclass
 class FreightRate:
     """운임 정보"""
@@ -191,11 +79,325 @@ class ReferenceTransaction:
     source: str = "fallback"
 
 
+# ReferenceDataBundle.provenance 키 (run_analysis의 used_fallbacks 이름과 동일)
+BUNDLE_FIELDS = ("product_pricing", "freight", "duty", "extra_costs", "reference_transactions")
+
+
+@dataclass
+class ReferenceDataBundle:
+    """
+    ShipmentSpec 하나에 필요한 참조 데이터 묶음 (DataAccessLayer.resolve 결과)
+
+    provenance는 필드별 출처입니다: "supabase", "csv", "fallback"(하드코딩 기본값),
+    "missing"(데이터 없음).
+    """
+    pricing_hint: Optional[ProductPricingHint] = None
+    freight_rate: FreightRate = field(default_factory=FreightRate)
+    duty_rate: Optional[float] = None
+    extra_costs: ExtraCostsSummary = field(default_factory=ExtraCostsSummary)
+    reference_transactions: List[ReferenceTransaction] = field(default_factory=list)
+    provenance: Dict[str, str] = field(default_factory=dict)
+    data_version: str = ""
+
+    @property
+    def used_fallbacks(self) -> List[str]:
+        """run_analysis data_quality["used_fallbacks"]와 같은 규칙의 fallback 목록"""
+        used = []
+        if not self.pricing_hint:
+            used.append("product_pricing")
+        if self.freight_rate.source == "fallback":
+            used.append("freight")
+        if self.duty_rate is None:
+            used.append("duty")
+        if self.extra_costs.source == "fallback":
+            used.append("extra_costs")
+        if len(self.reference_transactions) == 0:
+            used.append("reference_transactions")
+        return used
+
+
+@dataclass
+class ReferenceTables:
+    """
+    참조 테이블 인덱스 스냅샷
+
+    CSV 파일을 한 번만 읽어 정규화된 키로 해시 인덱싱합니다.
+    모든 국가 키는 normalize_country_name() 결과의 소문자 형태입니다.
+    """
+    freight_by_lane: Dict[Tuple[str, str], FreightRate] = field(default_factory=dict)
+    duty_by_origin_hs: Dict[Tuple[str, str], float] = field(default_factory=dict)
+    extra_costs_by_category: Dict[str, ExtraCostsSummary] = field(default_factory=dict)
+    transactions_by_lane: Dict[Tuple[str, str], List[ReferenceTransaction]] = field(default_factory=dict)
+    transactions_by_origin: Dict[str, List[ReferenceTransaction]] = field(default_factory=dict)
+    pricing_by_lane: Dict[Tuple[str, str], List[ProductPricingHint]] = field(default_factory=dict)
+    row_counts: Dict[str, int] = field(default_factory=dict)
+    version: str = ""  # 원본 CSV 내용 해시 기반 버전 (reload 시 변경)
+    _pricing_memo: Dict[Tuple[str, str, str], Optional[ProductPricingHint]] = field(default_factory=dict, repr=False)
+
+    def find_pricing_hint(self, lane: Tuple[str, str], product_category: str) -> Optional[ProductPricingHint]:
+        """레인 내에서 product_category 부분 일치 힌트 조회 (첫 번째 행 우선, 결과 메모이제이션)"""
+        memo_key = (lane[0], lane[1], product_category)
+        if memo_key in self._pricing_memo:
+            return self._pricing_memo[memo_key]
+
+        hint = None
+        for candidate in self.pricing_by_lane.get(lane, ()):
+            if product_category in (candidate.product_category or ''):
+                hint = candidate
+                break
+
+        if len(self._pricing_memo) >= _PRICING_MEMO_MAX_ENTRIES:
+            self._pricing_memo.clear()
+        self._pricing_memo[memo_key] = hint
+        return hint
+
+
+# 가격 힌트 부분 일치 메모이제이션 최대 크기 (초과 시 전체 비움)
+_PRICING_MEMO_MAX_ENTRIES = 4096
+
+# HS 코드 prefix 매칭 길이 (get_duty_rate는 hs_code[:6]로 비교)
+_HS_PREFIX_LENGTH = 6
+
+# 해시 계산 시 파일 읽기 단위
+_HASH_CHUNK_BYTES = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class FileFingerprint:
+    """참조 CSV 파일 변경 감지용 지문 (mtime + 크기 + 내용 해시)"""
+    mtime_ns: int
+    size: int
+    sha256: str
+
+
+def _content_hashes(fingerprints: Dict[str, Optional[FileFingerprint]]) -> Dict[str, Optional[str]]:
+    """테이블 이름 → 내용 해시 (파일 없으면 None)"""
+    return {name: fingerprint.sha256 if fingerprint else None for name, fingerprint in fingerprints.items()}
+
+
+def fingerprint_file(path: Path, previous: Optional[FileFingerprint] = None) -> Optional[FileFingerprint]:
+    """
+    파일 지문 계산
+
+    mtime과 크기가 이전 지문과 같으면 내용을 다시 해시하지 않고 이전 지문을 반환합니다.
+
+    Args:
+        path: 파일 경로
+        previous: 이전 지문 (선택적)
+
+    Returns:
+        FileFingerprint 또는 None (파일 없음)
+    """
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+
+    if previous and previous.mtime_ns == stat.st_mtime_ns and previous.size == stat.st_size:
+        return previous
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return FileFingerprint(mtime_ns=stat.st_mtime_ns, size=stat.st_size, sha256=digest.hexdigest())
+
+
+def _lane_key(origin: str, destination: str) -> Tuple[str, str]:
+    """정규화된 (origin, destination) 인덱스 키"""
+    return (normalize_country_name(origin).lower(), normalize_country_name(destination).lower())
+
+
+def _match_extra_cost_category(product_lower: str, tables: ReferenceTables) -> Optional[str]:
+    """제품명(소문자)에 매칭되는 부대비용 카테고리 (food, electronics, toys 등, 없으면 None)"""
+    # 행이 아닌 고유 카테고리만 순회
+    for category in tables.extra_costs_by_category:
+        if category in product_lower or category == 'general':
+            return category
+    return None
+
+
+def _optional_float(value: Optional[str]) -> Optional[float]:
+    """빈 문자열/None은 None, 그 외는 float"""
+    return float(value) if value else None
+
+
+def _read_csv_rows(path: Path, table_name: str) -> List[Dict[str, str]]:
+    """CSV 파일의 모든 행을 읽음 (실패 시 빈 리스트 + 경고)"""
+    if not path.exists():
+        return []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return list(csv.DictReader(f))
+    except Exception as e:
+        logger.warning(f"CSV 로드 실패 ({table_name}): {e}, 빈 테이블 사용")
+        return []
+
+
+def load_reference_tables(
+    freight_csv: Path,
+    duty_csv: Path,
+    extra_costs_csv: Path,
+    transactions_csv: Path,
+    product_pricing_csv: Path
+) -> ReferenceTables:
+    """
+    CSV 파일들을 읽어 ReferenceTables 인덱스를 생성
+
+    기존 선형 스캔과 동일한 의미를 유지합니다:
+    - 같은 키에 여러 행이 있으면 파일에서 먼저 나온 행이 우선
+    - 파싱할 수 없는 행은 건너뛰고 경고 로그만 남김
+
+    Returns:
+        새 ReferenceTables 인스턴스
+    """
+    tables = ReferenceTables()
+
+    # 운임: (origin, destination) → FreightRate
+    rows = _read_csv_rows(freight_csv, "freight_rates")
+    for row in rows:
+        try:
+            key = _lane_key(row.get('origin', ''), row.get('destination', ''))
+            if key in tables.freight_by_lane:
+                continue
+            tables.freight_by_lane[key] = FreightRate(
+                rate_per_kg=_optional_float(row.get('rate_per_kg')),
+                rate_per_cbm=_optional_float(row.get('rate_per_cbm')),
+                rate_per_container=_optional_float(row.get('rate_per_container')),
+                transit_days=int(row.get('transit_days', 25)),
+                mode=row.get('mode', 'Ocean'),
+                source="csv"
+            )
+        except (TypeError, ValueError) as e:
+            logger.warning(f"freight_rates 행 건너뜀: {e}")
+    tables.row_counts['freight_rates'] = len(rows)
+
+    # 관세: (origin, hs_code prefix) → duty + section 301
+    # 조회 시 hs_code[:6]의 prefix 비교를 하므로 1~6자리 prefix를 모두 키로 등록
+    rows = _read_csv_rows(duty_csv, "duty_rates")
+    for row in rows:
+        try:
+            origin = normalize_country_name(row.get('origin_country', '')).lower()
+            duty_rate = float(row.get('duty_rate_percent', 0)) / 100.0
+            section_301 = float(row.get('section_301_rate_percent', 0)) / 100.0 if row.get('section_301_rate_percent') else 0.0
+        except (TypeError, ValueError) as e:
+            logger.warning(f"duty_rates 행 건너뜀: {e}")
+            continue
+        hs_code = row.get('hs_code', '') or ''
+        for length in range(1, min(len(hs_code), _HS_PREFIX_LENGTH) + 1):
+            tables.duty_by_origin_hs.setdefault((origin, hs_code[:length]), duty_rate + section_301)
+    tables.row_counts['duty_rates'] = len(rows)
+
+    # 부대비용: category → ExtraCostsSummary (파일 순서 유지)
+    rows = _read_csv_rows(extra_costs_csv, "extra_costs")
+    for row in rows:
+        try:
+            category = row.get('category', '').lower()
+            if category in tables.extra_costs_by_category:
+                continue
+            tables.extra_costs_by_category[category] = ExtraCostsSummary(
+                terminal_handling=float(row.get('terminal_handling', 0) or 0),
+                customs_clearance=float(row.get('customs_clearance', 0) or 0),
+                inland_transport=float(row.get('inland_transport', 0) or 0),
+                inspection_qc=float(row.get('inspection_qc', 0) or 0),
+                certification=float(row.get('certification', 0) or 0),
+                source="csv"
+            )
+        except (TypeError, ValueError) as e:
+            logger.warning(f"extra_costs 행 건너뜀: {e}")
+    tables.row_counts['extra_costs'] = len(rows)
+
+    # 유사 거래: (origin, destination) 및 origin 단독 인덱스
+    rows = _read_csv_rows(transactions_csv, "reference_transactions")
+    for row in rows:
+        try:
+            csv_origin = normalize_country_name(row.get('origin', ''))
+            csv_destination = normalize_country_name(row.get('destination', ''))
+            transaction = ReferenceTransaction(
+                product_category=row.get('product_category', ''),
+                origin=csv_origin,  # 정규화된 이름 사용
+                destination=csv_destination,  # 정규화된 이름 사용
+                fob_price_per_unit=float(row.get('fob_price_per_unit', 0) or 0),
+                landed_cost_per_unit=float(row.get('landed_cost_per_unit', 0) or 0),
+                volume=int(row.get('volume', 0) or 0),
+                transaction_date=row.get('transaction_date', ''),
+                source="csv"
+            )
+        except (TypeError, ValueError) as e:
+            logger.warning(f"reference_transactions 행 건너뜀: {e}")
+            continue
+        lane = (csv_origin.lower(), csv_destination.lower())
+        tables.transactions_by_lane.setdefault(lane, []).append(transaction)
+        tables.transactions_by_origin.setdefault(lane[0], []).append(transaction)
+    tables.row_counts['reference_transactions'] = len(rows)
+
+    # 가격 힌트: (origin, destination) → 힌트 리스트 (카테고리 부분 일치는 조회 시)
+    rows = _read_csv_rows(product_pricing_csv, "product_pricing")
+    for row in rows:
+        try:
+            hint = ProductPricingHint(
+                product_category=row.get('product_category'),
+                origin_country=row.get('origin_country'),
+                destination_market=row.get('destination_market'),
+                typical_fob_low_usd=float(row.get('typical_fob_low_usd', 0)),
+                typical_fob_high_usd=float(row.get('typical_fob_high_usd', 0)),
+                typical_wholesale_price_low_usd=float(row.get('typical_wholesale_price_low_usd', 0)),
+                typical_wholesale_price_high_usd=float(row.get('typical_wholesale_price_high_usd', 0)),
+                typical_retail_price_low_usd=float(row.get('typical_retail_price_low_usd', 0)),
+                typical_retail_price_high_usd=float(row.get('typical_retail_price_high_usd', 0)),
+                vat_or_sales_tax_percent=float(row.get('vat_or_sales_tax_percent', 0)),
+                typical_moq_units=int(row.get('typical_moq_units', 0)),
+                packaging_type=row.get('packaging_type'),
+                margin_hint=row.get('margin_hint'),
+                source="csv"
+            )
+        except (TypeError, ValueError) as e:
+            logger.warning(f"product_pricing 행 건너뜀: {e}")
+            continue
+        lane = _lane_key(row.get('origin_country', ''), row.get('destination_market', ''))
+        tables.pricing_by_lane.setdefault(lane, []).append(hint)
+    tables.row_counts['product_pricing'] = len(rows)
+
+    logger.info(f"참조 테이블 로드 완료: {tables.row_counts}")
+    return tables
+
+
+def _build_bundle(
+    pricing_hint: Optional[ProductPricingHint],
+    freight_rate: FreightRate,
+    duty_rate: Optional[float],
+    duty_source: str,
+    extra_costs: ExtraCostsSummary,
+    transactions: List[ReferenceTransaction],
+    data_version: str
+) -> ReferenceDataBundle:
+    """조회 결과와 필드별 출처로 ReferenceDataBundle 생성"""
+    provenance = {
+        "product_pricing": pricing_hint.source if pricing_hint else "missing",
+        "freight": freight_rate.source,
+        "duty": duty_source,
+        "extra_costs": extra_costs.source,
+        "reference_transactions": transactions[0].source if transactions else "missing",
+    }
+    return ReferenceDataBundle(
+        pricing_hint=pricing_hint,
+        freight_rate=freight_rate,
+        duty_rate=duty_rate,
+        extra_costs=extra_costs,
+        reference_transactions=transactions,
+        provenance=provenance,
+        data_version=data_version
+    )
+
+
 class DataAccessLayer:
     """
     데이터 접근 레이어 - 추상 인터페이스
     
     현재 구현: CSV 기반 (나중에 Supabase로 쉽게 교체 가능)
+    
+    CSV 테이블은 첫 조회 시 한 번만 로드되어 ReferenceTables로 인덱싱되며,
+    이후 모든 조회는 행 수와 무관하게 O(1)입니다.
     """
     
     def __init__(self, data_dir: str = "data"):
@@ -215,6 +417,13 @@ class DataAccessLayer:
         
         # CSV 파일이 없으면 생성 (빈 파일)
         self._initialize_csv_files()
+        
+        # 인덱스 스냅샷 (첫 조회 시 로드, reload 시 통째로 교체)
+        self._tables: Optional[ReferenceTables] = None
+        self._fingerprints: Dict[str, Optional[FileFingerprint]] = {}
+        self._reload_lock = threading.Lock()
+        self._reload_listeners: List[Callable[[ReferenceTables], None]] = []
+        self._watcher: Optional["ReferenceDataWatcher"] = None
     
     def _initialize_csv_files(self):
         """CSV 파일 초기화 (없으면 빈 파일 생성)"""
@@ -250,56 +459,269 @@ class DataAccessLayer:
                     "packaging_type", "margin_hint", "last_updated"
                 ])
     
+    @property
+    def tables(self) -> ReferenceTables:
+        """
+        현재 인덱스 스냅샷 (없으면 로드)
+        
+        reload는 새 스냅샷을 완성한 뒤 참조만 교체하므로, 호출자가 한 번 얻은
+        스냅샷은 조회 도중 바뀌거나 반쯤 로드된 상태로 보이지 않습니다.
+        """
+        tables = self._tables
+        if tables is None:
+            with self._reload_lock:
+                if self._tables is None:
+                    self._fingerprints = self._current_fingerprints()
+                    self._tables = self._load_tables(self._fingerprints)
+                tables = self._tables
+        return tables
+    
+    @property
+    def data_version(self) -> str:
+        """현재 참조 데이터 버전 (CSV 내용 해시 기반)"""
+        return self.tables.version
+    
+    def _csv_paths(self) -> Dict[str, Path]:
+        """테이블 이름 → CSV 경로"""
+        return {
+            "freight_rates": self.freight_csv,
+            "duty_rates": self.duty_csv,
+            "extra_costs": self.extra_costs_csv,
+            "reference_transactions": self.transactions_csv,
+            "product_pricing": self.product_pricing_csv,
+        }
+    
+    def _current_fingerprints(
+        self,
+        base: Optional[Dict[str, Optional[FileFingerprint]]] = None
+    ) -> Dict[str, Optional[FileFingerprint]]:
+        """모든 CSV 파일의 현재 지문 (base 지문과 mtime/크기가 같으면 해시 재계산 생략)"""
+        if base is None:
+            base = self._fingerprints
+        return {
+            name: fingerprint_file(path, base.get(name))
+            for name, path in self._csv_paths().items()
+        }
+    
+    def _load_tables(self, fingerprints: Dict[str, Optional[FileFingerprint]]) -> ReferenceTables:
+        """CSV 파일에서 인덱스 생성"""
+        tables = load_reference_tables(
+            freight_csv=self.freight_csv,
+            duty_csv=self.duty_csv,
+            extra_costs_csv=self.extra_costs_csv,
+            transactions_csv=self.transactions_csv,
+            product_pricing_csv=self.product_pricing_csv
+        )
+        version_digest = hashlib.sha256()
+        for name in sorted(fingerprints):
+            fingerprint = fingerprints[name]
+            version_digest.update(f"{name}:{fingerprint.sha256 if fingerprint else '-'};".encode('utf-8'))
+        tables.version = version_digest.hexdigest()[:16]
+        return tables
+    
+    def reload(self, force: bool = False) -> bool:
+        """
+        CSV 파일이 바뀌었으면 인덱스를 다시 만들고 원자적으로 교체
+        
+        변경 감지는 mtime/크기로 먼저 거르고, 바뀐 파일만 내용 해시로 확인합니다
+        (touch만 된 파일은 다시 로드하지 않음). 로드 도중 파일이 또 바뀌면
+        이번 교체는 건너뛰고 다음 확인 때 다시 시도합니다.
+        
+        Args:
+            force: True면 변경 여부와 관계없이 다시 로드
+            
+        Returns:
+            새 스냅샷으로 교체했으면 True
+        """
+        with self._reload_lock:
+            previous_fingerprints = self._fingerprints
+            fingerprints = self._current_fingerprints()
+            
+            content_changed = _content_hashes(fingerprints) != _content_hashes(previous_fingerprints)
+            if self._tables is not None and not force and not content_changed:
+                self._fingerprints = fingerprints  # mtime만 바뀐 경우 지문만 갱신
+                return False
+            
+            new_tables = self._load_tables(fingerprints)
+            
+            if self._current_fingerprints(base=fingerprints) != fingerprints:
+                logger.info("참조 데이터가 로드 도중 변경됨, 다음 확인 때 다시 로드")
+                return False
+            
+            old_version = self._tables.version if self._tables else None
+            self._fingerprints = fingerprints
+            self._tables = new_tables
+            listeners = list(self._reload_listeners)
+        
+        logger.info(f"참조 데이터 다시 로드: {old_version} → {new_tables.version}")
+        for listener in listeners:
+            try:
+                listener(new_tables)
+            except Exception as e:
+                logger.warning(f"Reload listener 실패: {e}")
+        return True
+    
+    def add_reload_listener(self, listener: Callable[[ReferenceTables], None]) -> None:
+        """
+        참조 데이터 교체 시 호출될 콜백 등록 (결과 캐시 무효화 등)
+        
+        Args:
+            listener: 새 ReferenceTables를 인자로 받는 함수
+        """
+        self._reload_listeners.append(listener)
+    
+    def start_watcher(self, interval_seconds: float = 30.0) -> "ReferenceDataWatcher":
+        """
+        백그라운드 파일 감시 시작 (이미 실행 중이면 기존 watcher 반환)
+        
+        Args:
+            interval_seconds: 변경 확인 주기 (초)
+        """
+        if self._watcher is None or not self._watcher.is_alive():
+            self._watcher = ReferenceDataWatcher(self, interval_seconds=interval_seconds)
+            self._watcher.start()
+        return self._watcher
+    
+    def stop_watcher(self) -> None:
+        """백그라운드 파일 감시 중지"""
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+    
+    def resolve(self, spec: ShipmentSpec, transaction_limit: int = 5) -> ReferenceDataBundle:
+        """
+        분석에 필요한 참조 데이터를 한 번에 조회 (가격 힌트, 운임, 관세, 부대비용, 유사 거래)
+        
+        국가 정규화와 테이블 스냅샷 획득을 한 번만 수행하므로, 조회 도중 reload가
+        일어나도 다섯 결과는 같은 버전의 데이터에서 나옵니다.
+        
+        Args:
+            spec: ShipmentSpec 인스턴스
+            transaction_limit: 유사 거래 최대 개수
+            
+        Returns:
+            ReferenceDataBundle 인스턴스 (필드별 provenance 포함)
+        """
+        tables = self.tables
+        lane = _lane_key(spec.origin_country, spec.destination_country)
+        
+        pricing_hint = self._lookup_pricing_hint(spec, tables, lane)
+        freight_rate = self._lookup_freight_rate(spec, tables, lane)
+        duty_rate, duty_source = self._lookup_duty_rate(spec, tables, lane)
+        extra_costs = self._lookup_extra_costs(spec, tables)
+        transactions = self._lookup_reference_transactions(spec, tables, lane, transaction_limit)
+        
+        return _build_bundle(
+            pricing_hint, freight_rate, duty_rate, duty_source, extra_costs, transactions, tables.version
+        )
+    
+    def resolve_batch(self, specs: List[ShipmentSpec], transaction_limit: int = 5) -> List[ReferenceDataBundle]:
+        """
+        여러 스펙의 참조 데이터를 한 번에 조회 (run_analysis_batch용)
+        
+        필드마다 실제로 의존하는 키로만 조회를 재사용합니다: 운임/유사 거래는 레인,
+        관세는 (origin, 추정 HS 코드), 부대비용은 제품명이 매칭되는 부대비용 카테고리,
+        가격 힌트는 (레인, 카테고리). 제품명은 HS 코드/부대비용 카테고리로만 쓰이므로
+        제품명이 달라도 둘이 같으면 같은 묶음을 공유합니다.
+        같은 키를 가진 스펙의 결과는 같은 객체를 공유하므로 읽기 전용으로 사용해야 합니다.
+        
+        Args:
+            specs: ShipmentSpec 리스트
+            transaction_limit: 유사 거래 최대 개수
+            
+        Returns:
+            specs와 같은 순서의 ReferenceDataBundle 리스트
+        """
+        tables = self.tables
+        lanes: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        product_keys: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        pricing: Dict[Tuple, Optional[ProductPricingHint]] = {}
+        freight: Dict[Tuple, FreightRate] = {}
+        duty: Dict[Tuple, Tuple[Optional[float], str]] = {}
+        extra: Dict[Optional[str], ExtraCostsSummary] = {}
+        transactions: Dict[Tuple, List[ReferenceTransaction]] = {}
+        bundles: Dict[Tuple, ReferenceDataBundle] = {}
+        bundles_by_input: Dict[Tuple, ReferenceDataBundle] = {}
+        
+        results = []
+        for spec in specs:
+            input_key = (spec.origin_country, spec.destination_country, spec.product_name, spec.product_category)
+            bundle = bundles_by_input.get(input_key)
+            if bundle is not None:
+                results.append(bundle)
+                continue
+            
+            lane_input = (spec.origin_country, spec.destination_country)
+            lane = lanes.get(lane_input)
+            if lane is None:
+                lane = lanes[lane_input] = _lane_key(*lane_input)
+            
+            product_key = product_keys.get(spec.product_name)
+            if product_key is None:
+                product_key = product_keys[spec.product_name] = (
+                    self._estimate_hs_code(spec),
+                    _match_extra_cost_category(spec.product_name.lower(), tables)
+                )
+            hs_code, extra_category = product_key
+            
+            bundle_key = (lane, hs_code, extra_category, spec.product_category)
+            bundle = bundles.get(bundle_key)
+            if bundle is None:
+                pricing_key = (lane, spec.product_category)
+                if pricing_key not in pricing:
+                    pricing[pricing_key] = self._lookup_pricing_hint(spec, tables, lane)
+                if lane not in freight:
+                    freight[lane] = self._lookup_freight_rate(spec, tables, lane)
+                duty_key = (lane[0], hs_code)
+                if duty_key not in duty:
+                    duty[duty_key] = self._lookup_duty_rate(spec, tables, lane, hs_code)
+                if extra_category not in extra:
+                    extra[extra_category] = self._lookup_extra_costs(spec, tables)
+                if lane not in transactions:
+                    transactions[lane] = self._lookup_reference_transactions(spec, tables, lane, transaction_limit)
+                
+                duty_rate, duty_source = duty[duty_key]
+                bundle = bundles[bundle_key] = _build_bundle(
+                    pricing[pricing_key],
+                    freight[lane],
+                    duty_rate,
+                    duty_source,
+                    extra[extra_category],
+                    transactions[lane],
+                    tables.version
+                )
+            bundles_by_input[input_key] = bundle
+            results.append(bundle)
+        
+        return results
+    
     def get_product_pricing_hint(self, spec: ShipmentSpec) -> Optional[ProductPricingHint]:
         """
         상품 가격/마진/세금 힌트 조회
         """
-        if not self.product_pricing_csv.exists():
+        return self._lookup_pricing_hint(
+            spec, self.tables, _lane_key(spec.origin_country, spec.destination_country)
+        )
+    
+    def _lookup_pricing_hint(
+        self,
+        spec: ShipmentSpec,
+        tables: ReferenceTables,
+        lane: Tuple[str, str]
+    ) -> Optional[ProductPricingHint]:
+        if not spec.product_category:
             return None
-
-        normalized_origin = normalize_country_name(spec.origin_country)
-        normalized_destination = normalize_country_name(spec.destination_country)
         
-        try:
-            with open(self.product_pricing_csv, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    csv_origin = normalize_country_name(row.get('origin_country', ''))
-                    csv_destination = normalize_country_name(row.get('destination_market', ''))
-                    
-                    if (spec.product_category and spec.product_category in row.get('product_category', '') and
-                        csv_origin.lower() == normalized_origin.lower() and
-                        csv_destination.lower() == normalized_destination.lower()):
-                        
-                        return ProductPricingHint(
-                            product_category=row.get('product_category'),
-                            origin_country=row.get('origin_country'),
-                            destination_market=row.get('destination_market'),
-                            typical_fob_low_usd=float(row.get('typical_fob_low_usd', 0)),
-                            typical_fob_high_usd=float(row.get('typical_fob_high_usd', 0)),
-                            typical_wholesale_price_low_usd=float(row.get('typical_wholesale_price_low_usd', 0)),
-                            typical_wholesale_price_high_usd=float(row.get('typical_wholesale_price_high_usd', 0)),
-                            typical_retail_price_low_usd=float(row.get('typical_retail_price_low_usd', 0)),
-                            typical_retail_price_high_usd=float(row.get('typical_retail_price_high_usd', 0)),
-                            vat_or_sales_tax_percent=float(row.get('vat_or_sales_tax_percent', 0)),
-                            typical_moq_units=int(row.get('typical_moq_units', 0)),
-                            packaging_type=row.get('packaging_type'),
-                            margin_hint=row.get('margin_hint'),
-                            source="csv"
-                        )
-        except Exception as e:
-            logger.warning(f"CSV에서 가격 힌트 조회 실패: {e}")
-        
-        return None
+        hint = tables.find_pricing_hint(lane, spec.product_category)
+        return replace(hint) if hint else None
 
     def get_freight_rate(self, spec: ShipmentSpec) -> FreightRate:
         """
         운임 정보 조회 (Phase 5: 국가 이름 정규화 적용)
         
         매칭 전략:
-        1. 정규화된 origin + destination 정확 매칭 (우선)
-        2. 정규화된 origin만 매칭 (fallback)
-        3. 모두 실패 시 fallback 값 반환
+        1. 정규화된 origin + destination 정확 매칭 (인덱스 조회)
+        2. 실패 시 fallback 값 반환
         
         Args:
             spec: ShipmentSpec 인스턴스
@@ -308,39 +730,19 @@ class DataAccessLayer:
             FreightRate 인스턴스 (데이터 없으면 fallback 값)
         """
         # Phase 5: 국가 이름 정규화
-        normalized_origin = normalize_country_name(spec.origin_country)
-        normalized_destination = normalize_country_name(spec.destination_country)
-        
-        # CSV에서 조회 시도
-        if self.freight_csv.exists():
-            try:
-                with open(self.freight_csv, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        # CSV의 국가 이름도 정규화하여 비교
-                        csv_origin = normalize_country_name(row.get('origin', ''))
-                        csv_destination = normalize_country_name(row.get('destination', ''))
-                        
-                        # 정확 매칭: origin + destination
-                        if (csv_origin.lower() == normalized_origin.lower() and
-                            csv_destination.lower() == normalized_destination.lower()):
-                            
-                            rate_per_kg = float(row.get('rate_per_kg', 0)) if row.get('rate_per_kg') else None
-                            rate_per_cbm = float(row.get('rate_per_cbm', 0)) if row.get('rate_per_cbm') else None
-                            rate_per_container = float(row.get('rate_per_container', 0)) if row.get('rate_per_container') else None
-                            transit_days = int(row.get('transit_days', 25))
-                            mode = row.get('mode', 'Ocean')
-                            
-                            return FreightRate(
-                                rate_per_kg=rate_per_kg,
-                                rate_per_cbm=rate_per_cbm,
-                                rate_per_container=rate_per_container,
-                                transit_days=transit_days,
-                                mode=mode,
-                                source="csv"
-                            )
-            except Exception as e:
-                logger.warning(f"CSV에서 운임 조회 실패: {e}, fallback 사용")
+        return self._lookup_freight_rate(
+            spec, self.tables, _lane_key(spec.origin_country, spec.destination_country)
+        )
+    
+    def _lookup_freight_rate(
+        self,
+        spec: ShipmentSpec,
+        tables: ReferenceTables,
+        lane: Tuple[str, str]
+    ) -> FreightRate:
+        freight_rate = tables.freight_by_lane.get(lane)
+        if freight_rate is not None:
+            return replace(freight_rate)
         
         # Fallback: 하드코딩된 기본값
         logger.warning(
@@ -396,37 +798,35 @@ class DataAccessLayer:
         Returns:
             관세율 (0.0-1.0, 예: 0.10 = 10%) 또는 None
         """
+        rate, _ = self._lookup_duty_rate(
+            spec, self.tables, _lane_key(spec.origin_country, spec.destination_country), hs_code
+        )
+        return rate
+    
+    def _lookup_duty_rate(
+        self,
+        spec: ShipmentSpec,
+        tables: ReferenceTables,
+        lane: Tuple[str, str],
+        hs_code: Optional[str] = None
+    ) -> Tuple[Optional[float], str]:
+        """관세율 조회 (관세율, 출처) - 출처는 csv 또는 fallback"""
         # HS 코드가 없으면 추정 (간단한 휴리스틱)
         if not hs_code:
             hs_code = self._estimate_hs_code(spec)
         
-        # Phase 5: 국가 이름 정규화
-        normalized_origin = normalize_country_name(spec.origin_country)
-        
-        # CSV에서 조회 시도
-        if self.duty_csv.exists() and hs_code:
-            try:
-                with open(self.duty_csv, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        csv_origin = normalize_country_name(row.get('origin_country', ''))
-                        if (row.get('hs_code', '').startswith(hs_code[:6]) and
-                            csv_origin.lower() == normalized_origin.lower()):
-                            
-                            duty_rate = float(row.get('duty_rate_percent', 0)) / 100.0
-                            section_301 = float(row.get('section_301_rate_percent', 0)) / 100.0 if row.get('section_301_rate_percent') else 0.0
-                            
-                            total_rate = duty_rate + section_301
-                            return total_rate if total_rate > 0 else None
-            except Exception as e:
-                logger.warning(f"CSV에서 관세 조회 실패: {e}, fallback 사용")
+        # Phase 5: 국가 이름 정규화 (lane[0]은 정규화된 origin 소문자)
+        if hs_code:
+            total_rate = tables.duty_by_origin_hs.get((lane[0], hs_code[:_HS_PREFIX_LENGTH]))
+            if total_rate is not None:
+                return (total_rate if total_rate > 0 else None), "csv"
         
         # Fallback: 기존 duty_calculator.py의 기본값
         logger.warning(
             f"Data fallback used for duty_rate: No matching data found for "
             f"HS code {hs_code or '(estimated)'}, origin {spec.origin_country}"
         )
-        return self._get_fallback_duty_rate(spec, hs_code)
+        return self._get_fallback_duty_rate(spec, hs_code), "fallback"
     
     def _estimate_hs_code(self, spec: ShipmentSpec) -> Optional[str]:
         """HS 코드 추정 (간단한 휴리스틱)"""
@@ -466,27 +866,12 @@ class DataAccessLayer:
         Returns:
             ExtraCostsSummary 인스턴스
         """
-        # CSV에서 조회 시도
-        if self.extra_costs_csv.exists():
-            try:
-                with open(self.extra_costs_csv, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        category = row.get('category', '').lower()
-                        product_lower = spec.product_name.lower()
-                        
-                        # 카테고리 매칭 (food, electronics, toys 등)
-                        if category in product_lower or category == 'general':
-                            return ExtraCostsSummary(
-                                terminal_handling=float(row.get('terminal_handling', 0) or 0),
-                                customs_clearance=float(row.get('customs_clearance', 0) or 0),
-                                inland_transport=float(row.get('inland_transport', 0) or 0),
-                                inspection_qc=float(row.get('inspection_qc', 0) or 0),
-                                certification=float(row.get('certification', 0) or 0),
-                                source="csv"
-                            )
-            except Exception as e:
-                logger.warning(f"CSV에서 부대비용 조회 실패: {e}, fallback 사용")
+        return self._lookup_extra_costs(spec, self.tables)
+    
+    def _lookup_extra_costs(self, spec: ShipmentSpec, tables: ReferenceTables) -> ExtraCostsSummary:
+        category = _match_extra_cost_category(spec.product_name.lower(), tables)
+        if category is not None:
+            return replace(tables.extra_costs_by_category[category])
         
         # Fallback: 기본값
         logger.warning(
@@ -513,62 +898,25 @@ class DataAccessLayer:
         Returns:
             ReferenceTransaction 리스트
         """
-        transactions = []
+        return self._lookup_reference_transactions(
+            spec, self.tables, _lane_key(spec.origin_country, spec.destination_country), limit
+        )
+    
+    def _lookup_reference_transactions(
+        self,
+        spec: ShipmentSpec,
+        tables: ReferenceTables,
+        lane: Tuple[str, str],
+        limit: int
+    ) -> List[ReferenceTransaction]:
+        # 정확 매칭: origin + destination
+        matches = tables.transactions_by_lane.get(lane)
         
-        # CSV에서 조회 시도
-        if self.transactions_csv.exists():
-            try:
-                with open(self.transactions_csv, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    # Phase 5: 국가 이름 정규화
-                    normalized_origin = normalize_country_name(spec.origin_country)
-                    normalized_destination = normalize_country_name(spec.destination_country)
-                    
-                    for row in reader:
-                        # 유사도 매칭 (origin, destination, product category)
-                        csv_origin = normalize_country_name(row.get('origin', ''))
-                        csv_destination = normalize_country_name(row.get('destination', ''))
-                        
-                        # 정확 매칭: origin + destination
-                        if (csv_origin.lower() == normalized_origin.lower() and
-                            csv_destination.lower() == normalized_destination.lower()):
-                            
-                            transactions.append(ReferenceTransaction(
-                                product_category=row.get('product_category', ''),
-                                origin=csv_origin,  # 정규화된 이름 사용
-                                destination=csv_destination,  # 정규화된 이름 사용
-                                fob_price_per_unit=float(row.get('fob_price_per_unit', 0) or 0),
-                                landed_cost_per_unit=float(row.get('landed_cost_per_unit', 0) or 0),
-                                volume=int(row.get('volume', 0) or 0),
-                                transaction_date=row.get('transaction_date', ''),
-                                source="csv"
-                            ))
-                            
-                            if len(transactions) >= limit:
-                                break
-                    
-                    # Fallback: origin만 매칭 시도
-                    if len(transactions) == 0:
-                        f.seek(0)
-                        reader = csv.DictReader(f)
-                        for row in reader:
-                            csv_origin = normalize_country_name(row.get('origin', ''))
-                            if csv_origin.lower() == normalized_origin.lower():
-                                transactions.append(ReferenceTransaction(
-                                    product_category=row.get('product_category', ''),
-                                    origin=csv_origin,
-                                    destination=normalize_country_name(row.get('destination', '')),
-                                    fob_price_per_unit=float(row.get('fob_price_per_unit', 0) or 0),
-                                    landed_cost_per_unit=float(row.get('landed_cost_per_unit', 0) or 0),
-                                    volume=int(row.get('volume', 0) or 0),
-                                    transaction_date=row.get('transaction_date', ''),
-                                    source="csv"
-                                ))
-                                
-                                if len(transactions) >= limit:
-                                    break
-            except Exception as e:
-                logger.warning(f"CSV에서 거래 데이터 조회 실패: {e}, fallback 사용")
+        # Fallback: origin만 매칭 시도
+        if not matches:
+            matches = tables.transactions_by_origin.get(lane[0], [])
+        
+        transactions = [replace(transaction) for transaction in matches[:limit]]
         
         # Fallback: 빈 리스트 (데이터 없음)
         if not transactions:
@@ -580,6 +928,54 @@ class DataAccessLayer:
         return transactions
 
 
+class ReferenceDataWatcher:
+    """
+    참조 CSV 변경 감시 스레드
+    
+    주기적으로 DataAccessLayer.reload()를 호출합니다. 인덱스 재구성은 이 스레드에서
+    일어나므로 요청 경로(run_analysis)는 reload 비용을 부담하지 않습니다.
+    """
+    
+    def __init__(self, data_access: DataAccessLayer, interval_seconds: float = 30.0):
+        """
+        Args:
+            data_access: 감시할 DataAccessLayer
+            interval_seconds: 변경 확인 주기 (초)
+        """
+        self.data_access = data_access
+        self.interval_seconds = interval_seconds
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="reference-data-watcher",
+            daemon=True
+        )
+    
+    def start(self) -> None:
+        """감시 시작"""
+        self._thread.start()
+    
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """감시 중지 (현재 진행 중인 reload는 끝까지 수행)"""
+        self._stop_event.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+    
+    def is_alive(self) -> bool:
+        """스레드 실행 여부"""
+        return self._thread.is_alive()
+    
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval_seconds):
+            try:
+                self.data_access.reload()
+            except Exception as e:
+                logger.warning(f"참조 데이터 reload 실패: {e}, 기존 데이터 유지")
+
+
+# 참조 CSV 변경 확인 주기 기본값 (초, REFERENCE_DATA_RELOAD_SECONDS로 변경, 0이면 비활성화)
+DEFAULT_RELOAD_INTERVAL_SECONDS = 30.0
+
 # Singleton instance
 _data_access = None
 
@@ -604,6 +1000,14 @@ def get_data_access() -> DataAccessLayer:
         else:
             logger.info("Using CSV-based DataAccessLayer (SUPABASE_URL or SUPABASE_KEY not found)")
             _data_access = DataAccessLayer()
+        
+        # 참조 CSV hot-reload (Streamlit 재시작 없이 운임/관세 업데이트 반영)
+        try:
+            reload_interval = float(os.getenv("REFERENCE_DATA_RELOAD_SECONDS", DEFAULT_RELOAD_INTERVAL_SECONDS))
+        except ValueError:
+            reload_interval = DEFAULT_RELOAD_INTERVAL_SECONDS
+        if reload_interval > 0:
+            _data_access.start_watcher(interval_seconds=reload_interval)
     return _data_access
 
 
@@ -633,10 +1037,121 @@ def get_product_pricing_hint(spec: ShipmentSpec) -> Optional[ProductPricingHint]
     return get_data_access().get_product_pricing_hint(spec)
 
 
+def resolve_reference_data(spec: ShipmentSpec, transaction_limit: int = 5) -> ReferenceDataBundle:
+    """분석용 참조 데이터 일괄 조회"""
+    return get_data_access().resolve(spec, transaction_limit)
+
+
+def resolve_reference_data_batch(specs: List[ShipmentSpec], transaction_limit: int = 5) -> List[ReferenceDataBundle]:
+    """여러 스펙의 참조 데이터 일괄 조회"""
+    return get_data_access().resolve_batch(specs, transaction_limit)
+
+
 # ============================================================================
 # Phase 3: Supabase Data Access Layer Stub
 # ============================================================================
 
+# Supabase 쿼리 캐시 TTL 기본값 (초, SUPABASE_CACHE_TTL_SECONDS로 변경, 0이면 비활성화)
+DEFAULT_SUPABASE_CACHE_TTL_SECONDS = 300.0
+
+# Supabase 쿼리 캐시 최대 항목 수
+_SUPABASE_CACHE_MAX_ENTRIES = 4096
+
+# warm-preload 모드에서 통째로 메모리에 올리는 작은 테이블
+SUPABASE_PRELOAD_TABLES = ("freight_rates", "duty_rates", "extra_costs")
+
+# Supabase 동시 쿼리 스레드 수 (resolve()의 쿼리 4개 = 왕복 1회 수준)
+_SUPABASE_MAX_WORKERS = 4
+
+
+class SupabaseQueryCache:
+    """
+    Supabase 쿼리 결과 TTL read-through 캐시
+    
+    빈 결과도 캐시합니다 (negative caching). 데이터가 없는 레인은 TTL 동안 다시
+    네트워크를 타지 않고 바로 CSV fallback으로 넘어갑니다. 쿼리 예외는 캐시하지 않습니다.
+    """
+    
+    def __init__(
+        self,
+        ttl_seconds: float = DEFAULT_SUPABASE_CACHE_TTL_SECONDS,
+        max_entries: int = _SUPABASE_CACHE_MAX_ENTRIES,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            ttl_seconds: 캐시 유효 시간 (초, 0 이하면 캐시하지 않음)
+            max_entries: 최대 항목 수 (초과 시 가장 먼저 만료되는 항목부터 제거)
+            clock: 시간 함수 (테스트용)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: Dict[Tuple, Tuple[float, List[Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+    
+    def get_or_load(self, key: Tuple, loader: Callable[[], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        캐시된 행 반환, 없거나 만료되었으면 loader() 실행 후 저장
+        
+        Args:
+            key: (테이블, 조건...) 튜플
+            loader: 쿼리 실행 함수 (행 리스트 반환)
+            
+        Returns:
+            행 리스트 (빈 리스트 = 데이터 없음)
+        """
+        if self.ttl_seconds <= 0:
+            return loader()
+        
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                if not entry[1]:
+                    self.negative_hits += 1
+                return entry[1]
+            self.misses += 1
+        
+        rows = loader()
+        
+        with self._lock:
+            if len(self._entries) >= self.max_entries and key not in self._entries:
+                self._evict(now)
+            self._entries[key] = (now + self.ttl_seconds, rows)
+        return rows
+    
+    def _evict(self, now: float) -> None:
+        """만료 항목 제거, 그래도 가득 차 있으면 가장 먼저 만료되는 항목 제거 (lock 보유 상태에서 호출)"""
+        for key in [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
+        if len(self._entries) >= self.max_entries:
+            oldest = min(self._entries, key=lambda key: self._entries[key][0])
+            del self._entries[oldest]
+    
+    def clear(self) -> None:
+        """모든 항목 제거"""
+        with self._lock:
+            self._entries.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """캐시 통계"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total > 0 else 0.0,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
 class SupabaseDataAccessLayer(DataAccessLayer):
     """
     Supabase 기반 데이터 접근 레이어 (Phase 3: Stub 구현)
@@ -648,6 +1163,11 @@ class SupabaseDataAccessLayer(DataAccessLayer):
         1. 환경 변수 설정: SUPABASE_URL, SUPABASE_KEY
         2. get_data_access() 함수에서 이 클래스를 반환하도록 수정
         3. 각 get_*() 메서드의 TODO 부분을 실제 Supabase 쿼리로 채움
+    
+    성능:
+        - 쿼리 결과는 SupabaseQueryCache로 TTL 캐시 (빈 결과 포함)
+        - resolve()는 테이블별 쿼리를 스레드 풀에서 동시에 실행
+        - SUPABASE_PRELOAD=1이면 작은 테이블(SUPABASE_PRELOAD_TABLES)을 시작 시 통째로 로드
     """
     
     def __init__(self, data_dir: str = "data"):
@@ -677,6 +1197,135 @@ class SupabaseDataAccessLayer(DataAccessLayer):
                 logger.warning(f"Supabase client initialization failed: {e}, using CSV fallback")
         else:
             logger.info("Supabase credentials not found in environment variables, using CSV fallback")
+        
+        # 쿼리 결과 캐시
+        try:
+            cache_ttl = float(os.getenv("SUPABASE_CACHE_TTL_SECONDS", DEFAULT_SUPABASE_CACHE_TTL_SECONDS))
+        except ValueError:
+            cache_ttl = DEFAULT_SUPABASE_CACHE_TTL_SECONDS
+        self.query_cache = SupabaseQueryCache(ttl_seconds=cache_ttl)
+        
+        # warm-preload 테이블 (테이블 이름 → 전체 행)
+        self._preloaded_rows: Dict[str, List[Dict[str, Any]]] = {}
+        
+        # resolve()/preload()용 동시 쿼리 스레드 풀
+        self._resolve_executor = ThreadPoolExecutor(
+            max_workers=_SUPABASE_MAX_WORKERS,
+            thread_name_prefix="supabase-resolve"
+        )
+        
+        if self.supabase_client and os.getenv("SUPABASE_PRELOAD", "").lower() in ("1", "true", "yes"):
+            self.preload()
+    
+    def preload(self, tables: Tuple[str, ...] = SUPABASE_PRELOAD_TABLES) -> Dict[str, int]:
+        """
+        작은 테이블을 통째로 메모리에 로드 (warm-preload 모드)
+        
+        로드된 테이블은 이후 조회 시 네트워크 없이 메모리에서 필터링합니다.
+        실패한 테이블은 기존처럼 쿼리(+캐시)로 조회합니다.
+        
+        Args:
+            tables: 로드할 테이블 이름들
+            
+        Returns:
+            테이블별 로드된 행 수 (실패한 테이블 제외)
+        """
+        if not self.supabase_client:
+            return {}
+        
+        futures = {
+            table: self._resolve_executor.submit(
+                lambda name: self.supabase_client.table(name).select('*').execute().data or [],
+                table
+            )
+            for table in tables
+        }
+        loaded = {}
+        for table, future in futures.items():
+            try:
+                self._preloaded_rows[table] = list(future.result())
+                loaded[table] = len(self._preloaded_rows[table])
+            except Exception as e:
+                logger.warning(f"Supabase preload failed for {table}: {e}, using per-query lookups")
+        logger.info(f"Supabase preload 완료: {loaded}")
+        return loaded
+    
+    def _fetch_rows(
+        self,
+        table: str,
+        cache_key: Tuple,
+        query: Callable[[], Any],
+        row_filter: Callable[[Dict[str, Any]], bool]
+    ) -> List[Dict[str, Any]]:
+        """
+        Supabase 행 조회 (preload된 테이블은 메모리 필터링, 그 외는 캐시된 쿼리)
+        
+        Args:
+            table: 테이블 이름
+            cache_key: 쿼리 조건 (캐시 키)
+            query: 쿼리 빌더 (execute() 전까지 구성된 객체 반환)
+            row_filter: preload된 행에 적용할 쿼리와 같은 조건
+        """
+        preloaded = self._preloaded_rows.get(table)
+        if preloaded is not None:
+            return [row for row in preloaded if row_filter(row)]
+        return self.query_cache.get_or_load(
+            (table,) + cache_key,
+            lambda: query().execute().data or []
+        )
+    
+    def resolve(self, spec: ShipmentSpec, transaction_limit: int = 5) -> ReferenceDataBundle:
+        """
+        분석용 참조 데이터 일괄 조회 (Supabase 쿼리를 동시에 실행)
+        
+        운임/관세/부대비용/유사 거래 쿼리를 한 번의 동시 배치로 보내므로 지연 시간은
+        쿼리 4개의 합이 아니라 가장 느린 쿼리 하나 수준입니다. 각 쿼리는 기존과 같이
+        실패 시 CSV로 fallback합니다. 가격 힌트는 CSV에만 있습니다.
+        """
+        if not self.supabase_client:
+            return super().resolve(spec, transaction_limit)
+        
+        tables = self.tables
+        lane = _lane_key(spec.origin_country, spec.destination_country)
+        
+        freight_future = self._resolve_executor.submit(self.get_freight_rate, spec)
+        duty_future = self._resolve_executor.submit(self._lookup_duty_rate, spec, tables, lane)
+        extra_future = self._resolve_executor.submit(self.get_extra_costs, spec)
+        transactions_future = self._resolve_executor.submit(
+            self.get_reference_transactions, spec, transaction_limit
+        )
+        pricing_hint = self._lookup_pricing_hint(spec, tables, lane)
+        duty_rate, duty_source = duty_future.result()
+        
+        return _build_bundle(
+            pricing_hint,
+            freight_future.result(),
+            duty_rate,
+            duty_source,
+            extra_future.result(),
+            transactions_future.result(),
+            tables.version
+        )
+    
+    def resolve_batch(self, specs: List[ShipmentSpec], transaction_limit: int = 5) -> List[ReferenceDataBundle]:
+        """
+        여러 스펙의 참조 데이터를 한 번에 조회 (Supabase)
+        
+        (레인, 제품명, 카테고리)가 같은 스펙은 한 번만 resolve()하며, 레인 단위로 반복되는
+        쿼리는 쿼리 캐시에서 처리됩니다.
+        """
+        if not self.supabase_client:
+            return super().resolve_batch(specs, transaction_limit)
+        
+        bundles: Dict[Tuple, ReferenceDataBundle] = {}
+        results = []
+        for spec in specs:
+            key = (spec.origin_country, spec.destination_country, spec.product_name, spec.product_category)
+            bundle = bundles.get(key)
+            if bundle is None:
+                bundle = bundles[key] = self.resolve(spec, transaction_limit)
+            results.append(bundle)
+        return results
     
     def get_freight_rate(self, spec: ShipmentSpec) -> FreightRate:
         """
@@ -693,14 +1342,19 @@ class SupabaseDataAccessLayer(DataAccessLayer):
         # Step 1: Supabase에서 조회 시도
         if self.supabase_client:
             try:
-                result = self.supabase_client.table('freight_rates')\
-                    .select('*')\
-                    .eq('origin', normalized_origin)\
-                    .eq('destination', normalized_destination)\
-                    .execute()
+                rows = self._fetch_rows(
+                    'freight_rates',
+                    (normalized_origin, normalized_destination),
+                    lambda: self.supabase_client.table('freight_rates')
+                        .select('*')
+                        .eq('origin', normalized_origin)
+                        .eq('destination', normalized_destination),
+                    lambda row: row.get('origin') == normalized_origin
+                        and row.get('destination') == normalized_destination
+                )
                 
-                if result.data and len(result.data) > 0:
-                    row = result.data[0]
+                if rows:
+                    row = rows[0]
                     return FreightRate(
                         rate_per_kg=float(row.get('rate_per_kg')) if row.get('rate_per_kg') is not None else None,
                         rate_per_cbm=float(row.get('rate_per_cbm')) if row.get('rate_per_cbm') is not None else None,
@@ -715,7 +1369,13 @@ class SupabaseDataAccessLayer(DataAccessLayer):
         # Step 2: CSV fallback (부모 클래스 메서드 사용)
         return super().get_freight_rate(spec)
     
-    def get_duty_rate(self, spec: ShipmentSpec, hs_code: Optional[str] = None) -> Optional[float]:
+    def _lookup_duty_rate(
+        self,
+        spec: ShipmentSpec,
+        tables: ReferenceTables,
+        lane: Tuple[str, str],
+        hs_code: Optional[str] = None
+    ) -> Tuple[Optional[float], str]:
         """
         관세율 조회 (Supabase 우선, CSV fallback)
         
@@ -734,24 +1394,29 @@ class SupabaseDataAccessLayer(DataAccessLayer):
                 # Phase 5: 국가 이름 정규화
                 normalized_origin = normalize_country_name(spec.origin_country)
                 
-                result = self.supabase_client.table('duty_rates')\
-                    .select('*')\
-                    .like('hs_code', f"{hs_prefix}%")\
-                    .eq('origin_country', normalized_origin)\
-                    .limit(1)\
-                    .execute()
+                rows = self._fetch_rows(
+                    'duty_rates',
+                    (hs_prefix, normalized_origin),
+                    lambda: self.supabase_client.table('duty_rates')
+                        .select('*')
+                        .like('hs_code', f"{hs_prefix}%")
+                        .eq('origin_country', normalized_origin)
+                        .limit(1),
+                    lambda row: str(row.get('hs_code', '')).startswith(hs_prefix)
+                        and row.get('origin_country') == normalized_origin
+                )
                 
-                if result.data and len(result.data) > 0:
-                    row = result.data[0]
+                if rows:
+                    row = rows[0]
                     duty_rate = float(row.get('duty_rate_percent', 0)) / 100.0
                     section_301 = float(row.get('section_301_rate_percent', 0) or 0) / 100.0
                     total_rate = duty_rate + section_301
-                    return total_rate if total_rate > 0 else None
+                    return (total_rate if total_rate > 0 else None), "supabase"
             except Exception as e:
                 logger.warning(f"Supabase duty_rate query failed: {e}, falling back to CSV")
         
         # Step 2: CSV fallback
-        return super().get_duty_rate(spec, hs_code)
+        return super()._lookup_duty_rate(spec, tables, lane, hs_code)
     
     def get_extra_costs(self, spec: ShipmentSpec) -> ExtraCostsSummary:
         """
@@ -767,22 +1432,30 @@ class SupabaseDataAccessLayer(DataAccessLayer):
                 product_lower = spec.product_name.lower()
                 
                 # 먼저 제품 카테고리와 매칭되는 항목 찾기
-                result = self.supabase_client.table('extra_costs')\
-                    .select('*')\
-                    .ilike('category', f'%{product_lower}%')\
-                    .limit(1)\
-                    .execute()
+                rows = self._fetch_rows(
+                    'extra_costs',
+                    ('ilike', product_lower),
+                    lambda: self.supabase_client.table('extra_costs')
+                        .select('*')
+                        .ilike('category', f'%{product_lower}%')
+                        .limit(1),
+                    lambda row: product_lower in str(row.get('category', '')).lower()
+                )
                 
                 # 매칭 안 되면 "general" 카테고리 사용
-                if not result.data or len(result.data) == 0:
-                    result = self.supabase_client.table('extra_costs')\
-                        .select('*')\
-                        .eq('category', 'general')\
-                        .limit(1)\
-                        .execute()
+                if not rows:
+                    rows = self._fetch_rows(
+                        'extra_costs',
+                        ('eq', 'general'),
+                        lambda: self.supabase_client.table('extra_costs')
+                            .select('*')
+                            .eq('category', 'general')
+                            .limit(1),
+                        lambda row: row.get('category') == 'general'
+                    )
                 
-                if result.data and len(result.data) > 0:
-                    row = result.data[0]
+                if rows:
+                    row = rows[0]
                     return ExtraCostsSummary(
                         terminal_handling=float(row.get('terminal_handling', 0) or 0),
                         customs_clearance=float(row.get('customs_clearance', 0) or 0),
@@ -812,17 +1485,24 @@ class SupabaseDataAccessLayer(DataAccessLayer):
                 normalized_origin = normalize_country_name(spec.origin_country)
                 normalized_destination = normalize_country_name(spec.destination_country)
                 
-                result = self.supabase_client.table('reference_transactions')\
-                    .select('*')\
-                    .eq('origin', normalized_origin)\
-                    .eq('destination', normalized_destination)\
-                    .order('transaction_date', desc=True)\
-                    .limit(limit)\
-                    .execute()
+                rows = self._fetch_rows(
+                    'reference_transactions',
+                    (normalized_origin, normalized_destination, limit),
+                    lambda: self.supabase_client.table('reference_transactions')
+                        .select('*')
+                        .eq('origin', normalized_origin)
+                        .eq('destination', normalized_destination)
+                        .order('transaction_date', desc=True)
+                        .limit(limit),
+                    lambda row: row.get('origin') == normalized_origin
+                        and row.get('destination') == normalized_destination
+                )
                 
-                if result.data:
+                if rows:
+                    # preload된 행은 정렬되어 있지 않으므로 쿼리와 같은 순서로 맞춤 (안정 정렬)
+                    rows = sorted(rows, key=lambda row: str(row.get('transaction_date', '')), reverse=True)
                     transactions = []
-                    for row in result.data:
+                    for row in rows[:limit]:
                         transactions.append(ReferenceTransaction(
                             product_category=row.get('product_category', ''),
                             origin=row.get('origin', ''),
@@ -839,4 +1519,3 @@ class SupabaseDataAccessLayer(DataAccessLayer):
         
         # Step 2: CSV fallback
         return super().get_reference_transactions(spec, limit)
-
@@ -29,3 +29,12 @@ class RateLimitExceeded(NexSupplyError):
         super().__init__(message)
         self.retry_after = retry_after
 
+class CircuitOpenError(AIServiceError):
+    """Raised without calling the AI service while its circuit breaker is open"""
+    def __init__(self, retry_after: float, message: str = "AI service circuit breaker is open"):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class DeadlineExceeded(AIServiceError):
+    """Raised when an AI call cannot finish within its deadline"""
+    pass
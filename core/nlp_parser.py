@@ -7,22 +7,291 @@ NLP Parser Module - Phase 1: GIGO 문제 해결
 - 규칙 기반 파서로 LLM 결과 보정
 - 단가 검증 로직으로 비현실적인 값 방지
 - 유닛 타입 정규화로 혼동 방지
+- 규칙 기반 fast path: 필수 필드가 모호하지 않게 추출되면 Gemini 호출 생략
+- Gemini 장애 시 (circuit breaker open, deadline 초과 등) 규칙 기반 결과로 대체
 """
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+from dataclasses import dataclass, field
 import logging
+import os
+import re
+import threading
+import time
 from core.models import ShipmentSpec
 from core.errors import ParsingError, AIServiceError
 from src.ai_pipeline import parse_user_input as ai_parse_user_input
-from src.parser import normalize_input, parse_volume, parse_country, parse_channel, Channel
+from src.parser import normalize_input, parse_volume, parse_country, parse_channel, Channel, COUNTRY_MAP, CHANNEL_MAP
 
 logger = logging.getLogger(__name__)
 
+# fast path 최소 신뢰도 (NLP_FAST_PATH_MIN_CONFIDENCE로 변경, 1보다 크면 fast path 비활성화)
+DEFAULT_FAST_PATH_MIN_CONFIDENCE = 0.85
+
+# 필드별 신뢰도 (명시적 = 1.0)
+_IMPLIED_FIELD_CONFIDENCE = 0.9  # 기본값 가정 (목적지 미언급) 또는 약한 패턴
+_CONFLICTING_FIELD_CONFIDENCE = 0.5  # 여러 후보 중 하나를 고를 수 없음
+
+# 수량 뒤에 오는 단위 단어 (영어 + 한국어)
+_QUANTITY_UNIT_PATTERN = (
+    r'(?:units?|pcs|pieces?|ea|bags?|boxes?|cartons?|ctns?|packs?|bottles?|cans?|sets?|pairs?'
+    r'|개|봉지|박스|상자|병|캔|팩|세트|카톤|장|켤레)'
+)
+_NUMBER_PATTERN = r'(\d{1,3}(?:,\d{3})+|\d+)'
+
+# 제품명 앞에 붙는 동사/불용어 (제품명에서 제거)
+_LEADING_FILLER_WORDS = {
+    'i', 'we', 'want', 'wants', 'need', 'needs', 'to', 'import', 'buy', 'source', 'sell', 'order',
+    'ship', 'please', 'quote', 'for', 'a', 'an', 'the', 'about', 'analyze', 'check', 'my', 'our',
+}
+
+# 목적지 부정/변경 표현 (예: "미국 말고 한국에") - 규칙으로 의도를 확정할 수 없음
+_NEGATION_PATTERN = re.compile(r'말고|대신|instead of|\bnot\b|rather than', re.IGNORECASE)
+
+
+@dataclass
+class RuleBasedParse:
+    """
+    규칙 기반 파싱 결과 (Stage 1 파서 출력과 같은 형태 + 신뢰도)
+
+    confidence는 필수 필드(제품명, 수량, 목적지) 신뢰도의 곱입니다.
+    """
+    parsed: Dict[str, Any]
+    confidence: float
+    field_confidence: Dict[str, float]
+    reasons: List[str] = field(default_factory=list)  # 신뢰도가 낮은 이유
+
+
+class _ParsePathStats:
+    """파싱 경로 통계 (fast path / LLM)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.fast_path = 0
+            self.llm_path = 0
+            self.fast_path_seconds = 0.0
+            self.llm_path_seconds = 0.0
+
+    def record(self, fast: bool, seconds: float) -> None:
+        with self._lock:
+            if fast:
+                self.fast_path += 1
+                self.fast_path_seconds += seconds
+            else:
+                self.llm_path += 1
+                self.llm_path_seconds += seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.fast_path + self.llm_path
+            return {
+                "total": total,
+                "fast_path": self.fast_path,
+                "llm_path": self.llm_path,
+                "fast_path_rate": self.fast_path / total if total else 0.0,
+                "avg_fast_path_ms": self.fast_path_seconds / self.fast_path * 1000 if self.fast_path else 0.0,
+                "avg_llm_path_ms": self.llm_path_seconds / self.llm_path * 1000 if self.llm_path else 0.0,
+            }
+
+
+_parse_path_stats = _ParsePathStats()
+
+
+def get_parse_stats() -> Dict[str, Any]:
+    """
+    파싱 경로 통계 (fast path 비율, 경로별 평균 지연 시간)
+
+    Returns:
+        {"total", "fast_path", "llm_path", "fast_path_rate", "avg_fast_path_ms", "avg_llm_path_ms"}
+    """
+    return _parse_path_stats.snapshot()
+
+
+def reset_parse_stats() -> None:
+    """파싱 경로 통계 초기화"""
+    _parse_path_stats.reset()
+
+
+def _fast_path_min_confidence() -> float:
+    try:
+        return float(os.getenv("NLP_FAST_PATH_MIN_CONFIDENCE", DEFAULT_FAST_PATH_MIN_CONFIDENCE))
+    except ValueError:
+        return DEFAULT_FAST_PATH_MIN_CONFIDENCE
+
+
+def _explicit_quantity_spans(text_lower: str) -> List[Tuple[int, int]]:
+    """명시적 수량과 그 숫자의 시작 위치: [(위치, 수량)] (패키징 표현은 같은 길이의 공백으로 지움)"""
+    text_lower = re.sub(
+        _NUMBER_PATTERN + r'\s*' + _QUANTITY_UNIT_PATTERN + r'?\s*(?:per|/)\s*(?:carton|box|ctn|pallet|카톤|박스)',
+        lambda match: ' ' * len(match.group(0)), text_lower
+    )
+    spans = []
+    for match in re.finditer(_NUMBER_PATTERN + r'\s*' + _QUANTITY_UNIT_PATTERN, text_lower):
+        spans.append((match.start(1), int(match.group(1).replace(',', ''))))
+    for match in re.finditer(r'(\d+(?:\.\d+)?)\s*k\b', text_lower):
+        spans.append((match.start(1), int(float(match.group(1)) * 1000)))
+    for match in re.finditer(r'(\d+(?:\.\d+)?)\s*만', text_lower):
+        spans.append((match.start(1), int(float(match.group(1)) * 10000)))
+    return [(start, quantity) for start, quantity in spans if quantity > 0]
+
+
+def _explicit_quantities(text_lower: str) -> List[int]:
+    """단위 단어/k/만이 붙은 명시적 수량 (패키징 표현 "20 bags per carton" 제외)"""
+    return [quantity for _, quantity in _explicit_quantity_spans(text_lower)]
+
+
+def _is_location_or_channel_word(word: str) -> bool:
+    return word in COUNTRY_MAP or word in CHANNEL_MAP
+
+
+def _clean_product_phrase(phrase: str) -> Optional[str]:
+    """제품명 후보 정리 (불용어 제거, 국가/채널/가격 단어가 섞이면 None)"""
+    phrase = re.sub(r'[\s,:;\-–]+$', '', phrase.strip())
+    words = phrase.split()
+    while words and words[0].lower() in _LEADING_FILLER_WORDS:
+        words.pop(0)
+    if not words or len(words) > 6:
+        return None
+    if any(_is_location_or_channel_word(word.lower().strip('.,')) for word in words):
+        return None
+    name = " ".join(words)
+    if not re.search(r'[a-zA-Z가-힣]', name) or re.search(r'[$₩€¥£]|\d', name):
+        return None
+    return name
+
+
+def _rule_based_product(raw_text: str) -> Optional[tuple]:
+    """
+    제품명 추출: (제품명, 신뢰도) 또는 None
+
+    1. "5000 units of phone cases" (수량 + 단위 + of)
+    2. 첫 숫자 앞의 짧은 구 ("새우깡 5,000봉지", "phone case 10000 units") - 그 숫자가 유일한
+       명시적 수량일 때만. 제품명의 일부인 숫자("iPhone 15 cases", "USB 3.0 hubs")에서 잘린 구는
+       모호한 결과로 마지막에 반환
+    3. 단위 뒤의 구 ("5000 pcs phone cases from China") - 약한 패턴
+    """
+    of_match = re.search(
+        _NUMBER_PATTERN + r'\s*' + _QUANTITY_UNIT_PATTERN + r'\s+of\s+(.+?)(?=\s+(?:from|to|for|at|in|selling|retail|priced)\b|[,.]|$)',
+        raw_text, re.IGNORECASE
+    )
+    if of_match:
+        name = _clean_product_phrase(of_match.group(2))
+        if name:
+            return name, 1.0
+
+    stripped = raw_text.strip()
+    leading_name = None
+    leading = re.match(r'^([^\d$₩€¥£]+?)\s*[,:\-]?\s*\d', stripped)
+    if leading:
+        leading_name = _clean_product_phrase(leading.group(1))
+        spans = _explicit_quantity_spans(stripped.lower())
+        quantity_start = leading.end() - 1
+        if leading_name and len({quantity for _, quantity in spans}) == 1 and quantity_start in {
+            start for start, _ in spans
+        }:
+            return leading_name, 1.0
+
+    trailing = re.search(
+        _NUMBER_PATTERN + r'\s*' + _QUANTITY_UNIT_PATTERN + r'\s+(.+?)(?=\s+(?:from|to|for|at|in|selling|retail|priced)\b|[,.]|$)',
+        raw_text, re.IGNORECASE
+    )
+    if trailing:
+        name = _clean_product_phrase(trailing.group(2))
+        if name:
+            return name, _IMPLIED_FIELD_CONFIDENCE
+    if leading_name:
+        return leading_name, _CONFLICTING_FIELD_CONFIDENCE
+    return None
+
+
+def rule_based_parse(raw_text: str) -> RuleBasedParse:
+    """
+    규칙 기반 파싱 + 신뢰도 (Gemini 호출 없음, 마이크로초 단위)
+
+    Stage 1 LLM 출력 중 normalize_input이 덮어쓰지 않는 값은 제품명과 (숫자가 모호할 때의)
+    수량뿐이므로, 이 두 필드와 목적지가 모호하지 않게 추출되면 LLM 결과와 같은 스펙이 됩니다.
+
+    Args:
+        raw_text: 사용자 입력 텍스트
+
+    Returns:
+        RuleBasedParse 인스턴스
+    """
+    text_lower = raw_text.lower()
+    reasons = []
+
+    # 수량: 명시적 수량이 하나뿐이고 parse_volume과 일치해야 함
+    quantities = sorted(set(_explicit_quantities(text_lower)))
+    volume = quantities[0] if len(quantities) == 1 else None
+    if volume is not None and parse_volume(raw_text, volume) == volume:
+        volume_confidence = 1.0
+    elif len(quantities) > 1:
+        volume_confidence = 0.0
+        reasons.append(f"수량 후보가 여러 개: {quantities}")
+    else:
+        volume, volume_confidence = None, 0.0
+        reasons.append("명시적 수량 없음")
+
+    # 제품명
+    product = _rule_based_product(raw_text)
+    product_name, product_confidence = product if product else (None, 0.0)
+    if product is None:
+        reasons.append("제품명 추출 실패")
+
+    # 목적지: "to X" / "X에" 명시 > 국가 하나 > 미언급(기본 USA) > 부정 표현/여러 국가
+    market = parse_country(raw_text)
+    countries_found = {
+        country for keyword, country in COUNTRY_MAP.items()
+        if re.search(r'(?<![a-z])' + re.escape(keyword) + r'(?![a-z])', text_lower)
+    }
+    explicit_destination = re.search(
+        r'\bto\s+(?:the\s+)?([a-z][a-z ]*?)(?=\s*(?:,|\.|$|\s+(?:at|for|via|selling|retail)\b))|([가-힣]+)에\s',
+        text_lower + " "
+    )
+    if _NEGATION_PATTERN.search(raw_text):
+        destination_confidence = 0.0
+        reasons.append("목적지 부정/변경 표현")
+    elif explicit_destination and any(
+        keyword in (explicit_destination.group(1) or explicit_destination.group(2) or '') for keyword in COUNTRY_MAP
+    ):
+        destination_confidence = 1.0
+    elif len(countries_found) == 1 and not re.search(r'\bfrom\s+(?:the\s+)?' + re.escape(market.lower()), text_lower):
+        destination_confidence = 1.0
+    elif len(countries_found) <= 1:
+        destination_confidence = _IMPLIED_FIELD_CONFIDENCE  # 미언급 또는 출발지로만 언급 → 기본값 가정
+    else:
+        destination_confidence = _CONFLICTING_FIELD_CONFIDENCE
+        reasons.append(f"목적지 후보가 여러 개: {sorted(countries_found)}")
+
+    field_confidence = {
+        "product_category": product_confidence,
+        "detected_volume": volume_confidence,
+        "target_market": destination_confidence,
+    }
+    confidence = product_confidence * volume_confidence * destination_confidence
+
+    parsed = {
+        "product_category": product_name or "Unknown",
+        "detected_volume": volume or 1000,
+        "target_market": market,
+        "sales_channel": parse_channel(raw_text).value,
+        "special_requirements": [],
+    }
+    return RuleBasedParse(parsed=parsed, confidence=confidence, field_confidence=field_confidence, reasons=reasons)
+
 
 def extract_shipment_spec_from_text(raw_text: str) -> Dict[str, Any]:
     """
     자연어 텍스트에서 shipment 스펙을 추출 (Gemini + 규칙 기반 보정)
     
+    규칙 기반 파싱의 신뢰도가 NLP_FAST_PATH_MIN_CONFIDENCE 이상이면 Gemini를 호출하지 않습니다
+    (get_parse_stats로 fast path 비율 확인). Gemini 호출이 실패하면 (AIServiceError) 신뢰도와
+    관계없이 규칙 기반 결과를 사용하고 data_warnings에 기록합니다.
+    
     Args:
         raw_text: 사용자 입력 텍스트
         
@@ -35,9 +304,28 @@ def extract_shipment_spec_from_text(raw_text: str) -> Dict[str, Any]:
     if not raw_text or len(raw_text.strip()) < 10:
         raise ParsingError("입력 텍스트가 너무 짧습니다 (최소 10자 필요)")
     
+    ai_fallback_warning = None
     try:
-        # Step 1: Gemini로 파싱
-        llm_parsed = ai_parse_user_input(raw_text=raw_text, api_key=None)
+        # Step 1: 규칙 기반 fast path, 모호하면 Gemini로 파싱
+        started = time.perf_counter()
+        rule_parse = rule_based_parse(raw_text)
+        fast_path = rule_parse.confidence >= _fast_path_min_confidence()
+        if fast_path:
+            llm_parsed = rule_parse.parsed
+            logger.info(f"규칙 기반 fast path 사용 (신뢰도 {rule_parse.confidence:.2f}), Gemini 호출 생략")
+        else:
+            logger.debug(f"fast path 불가 (신뢰도 {rule_parse.confidence:.2f}): {rule_parse.reasons}")
+            try:
+                llm_parsed = ai_parse_user_input(raw_text=raw_text, api_key=None)
+            except AIServiceError as e:
+                # Gemini 장애: 결정적인 규칙 기반 결과로 계속 진행
+                logger.warning(f"AI 파싱 실패, 규칙 기반 결과 사용: {e}")
+                llm_parsed = rule_parse.parsed
+                ai_fallback_warning = (
+                    f"AI 파서를 사용할 수 없어 규칙 기반 파싱 결과를 사용했습니다 "
+                    f"(신뢰도 {rule_parse.confidence:.2f})"
+                )
+        _parse_path_stats.record(fast_path, time.perf_counter() - started)
         
         # Step 2: 규칙 기반 보정 (기존 parser.py 활용)
         normalized = normalize_input(raw_text, llm_parsed)
@@ -84,6 +372,8 @@ def extract_shipment_spec_from_text(raw_text: str) -> Dict[str, Any]:
                 )
                 spec_dict['fob_price_per_unit'] = None  # 무효한 값 제거
         
+        if ai_fallback_warning:
+            warnings.append(ai_fallback_warning)
         spec_dict['data_warnings'] = warnings
         
         return spec_dict
@@ -0,0 +1,309 @@
+"""
+Order Optimizer Module - 주문 수량 / 운송 모드 최적화
+LCL·FCL·항공 운임 구간(break point)을 조각별 선형 비용 곡선으로 미리 만들어 두고,
+수량 범위 전체에서 손익분기 수량과 권장 수량·운송 모드를 계산
+
+이 모듈은:
+- 운임 곡선: LogisticsCalculator 요율 (LCL CBM당 요율, 40ft FCL 컨테이너 요율, 항공 kg당 요율)
+- FCL은 컨테이너 용량(CBM·중량) 단위 계단 함수, LCL/항공은 선형
+- 곡선은 제품 단위 무게별로 캐시 (같은 제품은 다시 만들지 않음)
+- 최적 수량은 구간 끝점만 평가 (구간 안에서는 단위 운임이 수량에 따라 감소하므로)
+- MOQ는 product_pricing.csv의 typical_moq_units (가격 힌트)
+"""
+
+from typing import Dict, Any, Optional, List, Tuple
+from dataclasses import dataclass, field
+from functools import lru_cache
+import logging
+import math
+import numpy as np
+from core.models import ShipmentSpec
+from core.errors import CostingError
+from core.data_access import resolve_reference_data
+from core.analysis_engine import normalize_quantity, resolve_unit_prices, unit_weight
+from services.logistics_calculator import LogisticsCalculator, logistics_calculator
+
+logger = logging.getLogger(__name__)
+
+# 운송 모드 (곡선 순서 = 모드 코드)
+FREIGHT_MODES = ("lcl", "fcl", "air")
+
+# FCL 구간 수 상한 (넘으면 컨테이너 요율을 용량으로 나눈 선형 곡선으로 근사)
+_MAX_FCL_SEGMENTS = 100_000
+
+# 차트용 곡선 표본 수
+_CURVE_POINTS = 200
+
+
+@dataclass(frozen=True)
+class PiecewiseCostCurve:
+    """
+    조각별 선형 총운임 곡선
+
+    구간 n은 수량 (starts[n], starts[n+1]]을 담당하고, 비용 = fixed[n] + slope[n] × 수량입니다.
+    """
+    mode: str
+    starts: np.ndarray
+    fixed: np.ndarray
+    slope: np.ndarray
+
+    def segment_index(self, quantity: np.ndarray) -> np.ndarray:
+        """수량별 구간 인덱스"""
+        index = np.searchsorted(self.starts, quantity, side='left') - 1
+        return np.clip(index, 0, len(self.starts) - 1)
+
+    def cost(self, quantity: Any) -> np.ndarray:
+        """총운임 (USD)"""
+        quantity = np.asarray(quantity, dtype=np.float64)
+        index = self.segment_index(quantity)
+        return self.fixed[index] + self.slope[index] * quantity
+
+
+@dataclass
+class OrderPlan:
+    """주문 수량 / 운송 모드 최적화 결과 (수량은 정규화된 기본 단위)"""
+    recommended_quantity: int
+    recommended_mode: str
+    unit_landed_cost: float
+    net_margin_percent: float
+    moq: int
+    min_quantity: int
+    max_quantity: int
+    break_even_quantities: Dict[str, Optional[int]]  # "fcl_vs_lcl", "sea_vs_air"
+    current: Dict[str, Any]  # 현재 주문 수량의 모드/단가/마진
+    curve_quantity: np.ndarray = field(repr=False)
+    curve_unit_cost: Dict[str, np.ndarray] = field(repr=False)  # 모드별 단위 랜디드 코스트
+    curve_best_mode: np.ndarray = field(repr=False)  # FREIGHT_MODES 인덱스
+
+    def to_dict(self) -> Dict[str, Any]:
+        """UI/JSON용 딕셔너리 (곡선은 리스트로 변환)"""
+        return {
+            "recommended_quantity": self.recommended_quantity,
+            "recommended_mode": self.recommended_mode,
+            "unit_landed_cost": self.unit_landed_cost,
+            "net_margin_percent": self.net_margin_percent,
+            "moq": self.moq,
+            "min_quantity": self.min_quantity,
+            "max_quantity": self.max_quantity,
+            "break_even_quantities": dict(self.break_even_quantities),
+            "current": dict(self.current),
+            "curve": {
+                "quantity": self.curve_quantity.tolist(),
+                "unit_cost": {mode: values.tolist() for mode, values in self.curve_unit_cost.items()},
+                "best_mode": [FREIGHT_MODES[code] for code in self.curve_best_mode],
+            },
+        }
+
+
+@lru_cache(maxsize=256)
+def build_freight_cost_curves(
+    unit_weight_kg: float,
+    max_quantity: int,
+    use_spot_rate: bool = False,
+    include_air: bool = True
+) -> Tuple[PiecewiseCostCurve, ...]:
+    """
+    제품 단위 무게 기준 운송 모드별 총운임 곡선 (LCL, FCL, 항공 순서)
+
+    Args:
+        unit_weight_kg: 단위당 무게 (kg)
+        max_quantity: 곡선이 담당할 최대 수량
+        use_spot_rate: FCL spot 요율 사용 여부
+        include_air: 항공 곡선 포함 여부
+
+    Returns:
+        PiecewiseCostCurve 튜플 (FREIGHT_MODES 순서, include_air=False면 항공 제외)
+    """
+    if unit_weight_kg <= 0:
+        raise CostingError(f"Unit weight must be positive, got: {unit_weight_kg}")
+
+    unit_cbm = logistics_calculator.estimate_cbm(unit_weight_kg)
+    zero = np.zeros(1)
+
+    # LCL: CBM당 평균 요율 (calculate_sea_freight와 같은 평균값)
+    lcl_rate = sum(LogisticsCalculator.SEA_FREIGHT_RATES["lcl_per_cbm"]["standard_range"]) / 2
+    lcl = PiecewiseCostCurve("lcl", zero, zero, np.array([lcl_rate * unit_cbm]))
+
+    # FCL: 컨테이너 하나가 담는 수량마다 요율만큼 계단
+    fcl_rates = LogisticsCalculator.SEA_FREIGHT_RATES["40ft_fcl"]
+    container_rate = sum(fcl_rates["spot_range" if use_spot_rate else "standard_range"]) / 2
+    capacity = LogisticsCalculator.FCL_CAPACITY["40ft"]
+    units_per_container = min(capacity["cbm"] / unit_cbm, capacity["weight_kg"] / unit_weight_kg)
+    segments = math.ceil(max_quantity / units_per_container) if units_per_container > 0 else 0
+    if 0 < segments <= _MAX_FCL_SEGMENTS:
+        containers = np.arange(1, segments + 1, dtype=np.float64)
+        fcl = PiecewiseCostCurve(
+            "fcl",
+            (containers - 1) * units_per_container,
+            containers * container_rate,
+            np.zeros(segments)
+        )
+    else:
+        fcl = PiecewiseCostCurve("fcl", zero, zero, np.array([container_rate / units_per_container]))
+
+    curves = [lcl, fcl]
+    if include_air:
+        air_rate = logistics_calculator.calculate_air_freight(unit_weight_kg, "standard")["rate_per_kg"]
+        curves.append(PiecewiseCostCurve("air", zero, zero, np.array([air_rate * unit_weight_kg])))
+    return tuple(curves)
+
+
+def first_crossover(
+    cheaper: PiecewiseCostCurve,
+    reference: PiecewiseCostCurve,
+    min_quantity: int,
+    max_quantity: int
+) -> Optional[int]:
+    """
+    cheaper 곡선 비용이 reference 이하가 되는 가장 작은 정수 수량 (없으면 None)
+
+    두 곡선의 구간 경계를 합쳐 구간별 1차식을 풀기 때문에 수량 범위 크기와 무관하게 계산됩니다.
+    """
+    bounds = np.union1d(cheaper.starts, reference.starts)
+    bounds = bounds[bounds < max_quantity]
+    lower = np.maximum(np.floor(bounds) + 1, min_quantity)
+    upper = np.minimum(np.append(np.floor(bounds[1:]), max_quantity), max_quantity)
+    valid = lower <= upper
+    lower, upper = lower[valid], upper[valid]
+    if lower.size == 0:
+        return None
+
+    a = cheaper.segment_index(lower)
+    b = reference.segment_index(lower)
+    fixed_diff = cheaper.fixed[a] - reference.fixed[b]
+    slope_diff = cheaper.slope[a] - reference.slope[b]
+
+    # 구간 시작점에서 이미 싸거나, 기울기 차이가 음수면 구간 안에서 역전
+    candidate = np.where(
+        fixed_diff + slope_diff * lower <= 1e-9,
+        lower,
+        np.where(
+            slope_diff < 0,
+            np.ceil(-fixed_diff / np.where(slope_diff < 0, slope_diff, -1.0) - 1e-9),
+            np.inf
+        )
+    )
+    candidate = np.maximum(candidate, lower)
+    found = candidate <= upper
+    if not found.any():
+        return None
+    return int(candidate[found][0])
+
+
+def solve_order_plan(
+    spec: ShipmentSpec,
+    min_quantity: Optional[int] = None,
+    max_quantity: Optional[int] = None,
+    use_spot_rate: bool = False,
+    include_air: bool = True
+) -> OrderPlan:
+    """
+    수량 범위에서 단위 마진이 가장 높은 주문 수량과 운송 모드 찾기
+
+    제조 원가/소매가/관세율/부대비용은 run_analysis와 같은 규칙으로 한 번 결정하고,
+    운임만 LogisticsCalculator 요율 곡선으로 수량에 따라 바꿉니다. 마진이 같으면 더 작은
+    수량(재고 부담이 적은 쪽)을 권장합니다. spec은 수정하지 않습니다.
+
+    Args:
+        spec: 기준 ShipmentSpec
+        min_quantity: 최소 수량 (None이면 가격 힌트의 MOQ, 없으면 1)
+        max_quantity: 최대 수량 (None이면 max(최소 수량, 현재 수량) × 10)
+        use_spot_rate: FCL spot 요율 사용 여부
+        include_air: 항공 운송 포함 여부
+
+    Returns:
+        OrderPlan 인스턴스
+
+    Raises:
+        CostingError: 수량 범위가 잘못된 경우
+    """
+    working_spec = spec.model_copy(deep=True)  # resolve_unit_prices의 경고 추가가 원본에 닿지 않도록
+    current_quantity = normalize_quantity(working_spec)
+    reference_data = resolve_reference_data(working_spec, transaction_limit=5)
+    pricing_hint = reference_data.pricing_hint
+    retail_price, manufacturing_cost = resolve_unit_prices(working_spec, pricing_hint, current_quantity)
+
+    moq = int(pricing_hint.typical_moq_units) if pricing_hint and pricing_hint.typical_moq_units > 0 else 0
+    lower = int(min_quantity if min_quantity is not None else max(moq, 1))
+    upper = int(max_quantity if max_quantity is not None else max(lower, current_quantity) * 10)
+    if lower < 1 or upper < lower:
+        raise CostingError(f"Invalid quantity range: {lower} - {upper}")
+
+    unit_weight_kg = unit_weight(spec.product_name, spec.product_category)
+    curves = build_freight_cost_curves(unit_weight_kg, upper, use_spot_rate, include_air)
+    extra_costs = reference_data.extra_costs
+    misc_cost = extra_costs.terminal_handling + extra_costs.customs_clearance + extra_costs.inland_transport
+    duty_rate = reference_data.duty_rate
+
+    def unit_costs(quantity: np.ndarray) -> np.ndarray:
+        """모드별 단위 랜디드 코스트 (모드 × 수량)"""
+        shipping = np.stack([curve.cost(quantity) / quantity for curve in curves])
+        if duty_rate is not None:
+            duty = (manufacturing_cost + shipping) * duty_rate
+        else:
+            duty = np.full_like(shipping, manufacturing_cost * 0.038)
+        return manufacturing_cost + shipping + duty + misc_cost
+
+    def margin_percent(unit_cost: np.ndarray) -> np.ndarray:
+        return (retail_price - unit_cost) / retail_price * 100 if retail_price > 0 else np.zeros_like(unit_cost)
+
+    # 손익분기 수량
+    lcl_curve, fcl_curve = curves[0], curves[1]
+    break_even: Dict[str, Optional[int]] = {
+        "fcl_vs_lcl": first_crossover(fcl_curve, lcl_curve, lower, upper),
+        "sea_vs_air": None,
+    }
+    if include_air:
+        air_curve = curves[2]
+        sea_crossovers = [
+            q for q in (first_crossover(lcl_curve, air_curve, lower, upper),
+                        first_crossover(fcl_curve, air_curve, lower, upper))
+            if q is not None
+        ]
+        break_even["sea_vs_air"] = min(sea_crossovers) if sea_crossovers else None
+
+    # 후보 수량: 범위 양 끝 + 모든 구간 끝점 (구간 안에서는 단위 운임이 감소)
+    segment_ends: List[np.ndarray] = [np.floor(curve.starts[1:]) for curve in curves]
+    candidates = np.unique(np.concatenate(
+        [np.array([lower, upper], dtype=np.float64)] + segment_ends
+    ))
+    candidates = candidates[(candidates >= lower) & (candidates <= upper)]
+    candidate_costs = unit_costs(candidates).min(axis=0)
+    best = int(np.argmax(margin_percent(candidate_costs)))  # 동점이면 가장 작은 수량
+    recommended_quantity = int(candidates[best])
+    recommended_costs = unit_costs(np.array([recommended_quantity], dtype=np.float64))[:, 0]
+    recommended_mode = int(np.argmin(recommended_costs))
+
+    current_costs = unit_costs(np.array([current_quantity], dtype=np.float64))[:, 0]
+    current_mode = int(np.argmin(current_costs))
+
+    # 차트용 곡선
+    curve_quantity = np.unique(np.concatenate([
+        np.geomspace(lower, upper, _CURVE_POINTS).round(), [recommended_quantity]
+    ]))
+    curve_costs = unit_costs(curve_quantity)
+
+    logger.info(
+        f"주문 최적화 완료: {spec.product_name}, 권장 {recommended_quantity}개 "
+        f"({curves[recommended_mode].mode}), 범위 {lower}~{upper}"
+    )
+
+    return OrderPlan(
+        recommended_quantity=recommended_quantity,
+        recommended_mode=curves[recommended_mode].mode,
+        unit_landed_cost=float(recommended_costs[recommended_mode]),
+        net_margin_percent=float(margin_percent(recommended_costs[recommended_mode])),
+        moq=moq,
+        min_quantity=lower,
+        max_quantity=upper,
+        break_even_quantities=break_even,
+        current={
+            "quantity": current_quantity,
+            "mode": curves[current_mode].mode,
+            "unit_landed_cost": float(current_costs[current_mode]),
+            "net_margin_percent": float(margin_percent(current_costs[current_mode])),
+        },
+        curve_quantity=curve_quantity.astype(np.int64),
+        curve_unit_cost={curve.mode: curve_costs[index] for index, curve in enumerate(curves)},
+        curve_best_mode=curve_costs.argmin(axis=0)
+    )
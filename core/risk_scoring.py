@@ -9,8 +9,11 @@ ShipmentSpec과 비용 시나리오를 기반으로 리스크 점수 계산
 - 휴리스틱 기반 모델 (나중에 머신러닝으로 확장 가능)
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+from datetime import datetime
+from functools import lru_cache
 import logging
+import numpy as np
 from core.models import ShipmentSpec
 
 logger = logging.getLogger(__name__)
@@ -18,6 +21,18 @@ logger = logging.getLogger(__name__)
 
 from core.data_access import ProductPricingHint
 
+# 리드타임 리스크가 높아지는 피크 시즌 (Q4)
+PEAK_SEASON_MONTHS = (10, 11, 12)
+
+
+def is_peak_season() -> bool:
+    """
+    현재 월이 피크 시즌(Q4)인지
+    
+    리드타임 리스크가 이 값에 의존하므로 run_analysis 결과 캐시 키에도 포함됩니다.
+    """
+    return datetime.now().month in PEAK_SEASON_MONTHS
+
 
 def compute_risk_scores(
     spec: ShipmentSpec,
@@ -45,10 +60,79 @@ def compute_risk_scores(
     """
     # Sub-scores 계산
     price_risk = _compute_price_risk(spec, cost_scenarios, data_quality, pricing_hint)
-    lead_time_risk = _compute_lead_time_risk(spec, data_quality)
-    compliance_risk = _compute_compliance_risk(spec, data_quality)
-    reputation_risk = _compute_reputation_risk(spec, data_quality)
+    lead_time_risk, compliance_risk, reputation_risk = compute_context_risks(spec, data_quality)
+    
+    return combine_risk_scores(price_risk, lead_time_risk, compliance_risk, reputation_risk)
+
+
+def compute_context_risks(spec: ShipmentSpec, data_quality: Dict[str, Any]) -> Tuple[float, float, float]:
+    """
+    비용과 무관한 sub-score 계산 (lead_time_risk, compliance_risk, reputation_risk)
+    
+    경로/제품/수량/데이터 품질에만 의존하므로 run_analysis_batch에서는 같은 조건의
+    스펙끼리 결과를 재사용합니다.
+    """
+    return (
+        _compute_lead_time_risk(spec, data_quality),
+        _compute_compliance_risk(spec, data_quality),
+        _compute_reputation_risk(spec, data_quality)
+    )
+
+
+class ContextRiskCache:
+    """
+    compute_context_risks 결과 재사용 (run_analysis_batch용)
     
+    각 sub-score를 실제로 의존하는 입력만으로 캐시합니다. _compute_*_risk의 조건을
+    바꾸면 아래 키도 함께 바꿔야 합니다.
+    """
+    
+    def __init__(self):
+        self._lead_time: Dict[Tuple, float] = {}
+        self._compliance: Dict[Tuple, float] = {}
+        self._reputation: Dict[Tuple, float] = {}
+    
+    def get(self, spec: ShipmentSpec, data_quality: Dict[str, Any]) -> Tuple[float, float, float]:
+        """(lead_time_risk, compliance_risk, reputation_risk)"""
+        used_fallbacks = data_quality.get('used_fallbacks', [])
+        
+        lead_time_key = (spec.origin_country, spec.destination_country, spec.quantity < 500, 'freight' in used_fallbacks)
+        lead_time_risk = self._lead_time.get(lead_time_key)
+        if lead_time_risk is None:
+            lead_time_risk = self._lead_time[lead_time_key] = _compute_lead_time_risk(spec, data_quality)
+        
+        compliance_key = (
+            _compliance_keywords(spec.product_name),
+            spec.product_category,
+            spec.destination_country,
+            'duty' in used_fallbacks
+        )
+        compliance_risk = self._compliance.get(compliance_key)
+        if compliance_risk is None:
+            compliance_risk = self._compliance[compliance_key] = _compute_compliance_risk(spec, data_quality)
+        
+        reputation_key = (
+            spec.origin_country,
+            spec.destination_country,
+            data_quality.get('reference_transaction_count', 0),
+            spec.quantity < 500,
+            spec.quantity < 1000,
+            len(used_fallbacks) >= 3
+        )
+        reputation_risk = self._reputation.get(reputation_key)
+        if reputation_risk is None:
+            reputation_risk = self._reputation[reputation_key] = _compute_reputation_risk(spec, data_quality)
+        
+        return lead_time_risk, compliance_risk, reputation_risk
+
+
+def combine_risk_scores(
+    price_risk: float,
+    lead_time_risk: float,
+    compliance_risk: float,
+    reputation_risk: float
+) -> Dict[str, Any]:
+    """Sub-score들을 가중 평균해 최종 리스크 스코어 딕셔너리 생성"""
     # Overall risk score (가중 평균)
     overall_risk_score = (
         price_risk * 0.30 +
@@ -141,6 +225,64 @@ def _compute_price_risk(
     return min(100.0, risk_score)
 
 
+def compute_price_risk_batch(
+    base_cost: np.ndarray,
+    best_cost: np.ndarray,
+    worst_cost: np.ndarray,
+    freight_fallback: np.ndarray,
+    duty_fallback: np.ndarray,
+    fob_estimated: np.ndarray,
+    target_retail_price: np.ndarray,
+    fob_out_of_range: np.ndarray,
+    retail_out_of_range: np.ndarray
+) -> np.ndarray:
+    """
+    _compute_price_risk의 벡터화 버전 (run_analysis_batch용)
+    
+    같은 순서로 같은 연산을 하므로 결과는 스펙별 계산과 비트 단위로 동일합니다.
+    
+    Args:
+        base_cost, best_cost, worst_cost: 시나리오별 unit DDP
+        freight_fallback, duty_fallback: used_fallbacks에 freight/duty 포함 여부
+        fob_estimated: FOB 단가가 없거나 추정값인지 여부
+        target_retail_price: 목표 소매 가격 (없으면 0)
+        fob_out_of_range, retail_out_of_range: 가격 힌트 범위 밖 여부
+        
+    Returns:
+        price_risk 배열 (0-100)
+    """
+    risk_score = np.zeros(len(base_cost))
+    
+    # 1. 비용 시나리오 변동성
+    positive = base_cost > 0
+    volatility = np.divide(worst_cost - best_cost, base_cost, out=np.zeros(len(base_cost)), where=positive)
+    volatility_risk = np.where(
+        volatility > 0.20,
+        np.minimum(50, volatility * 100),
+        np.where(volatility > 0.10, volatility * 200, volatility * 100)
+    )
+    risk_score = np.where(positive, risk_score + volatility_risk, risk_score)
+    
+    # 2. 데이터 품질
+    risk_score = np.where(freight_fallback, risk_score + 15, risk_score)
+    risk_score = np.where(duty_fallback, risk_score + 15, risk_score)
+    
+    # 3. FOB 단가 불확실성
+    risk_score = np.where(fob_estimated, risk_score + 10, risk_score)
+    
+    # 4. 소매 가격 대비 랜디드 코스트 비율
+    has_ratio = (target_retail_price > 0) & positive
+    cost_ratio = np.divide(base_cost, target_retail_price, out=np.zeros(len(base_cost)), where=has_ratio)
+    risk_score = np.where(has_ratio & (cost_ratio > 0.8), risk_score + 20, risk_score)
+    risk_score = np.where(has_ratio & (cost_ratio <= 0.8) & (cost_ratio > 0.6), risk_score + 10, risk_score)
+    
+    # 5. 가격 힌트와 비교
+    risk_score = np.where(fob_out_of_range, risk_score + 15, risk_score)
+    risk_score = np.where(retail_out_of_range, risk_score + 15, risk_score)
+    
+    return np.minimum(100.0, risk_score)
+
+
 def _compute_lead_time_risk(
     spec: ShipmentSpec,
     data_quality: Dict[str, Any]
@@ -185,14 +327,30 @@ def _compute_lead_time_risk(
         risk_score += 5
     
     # 4. 피크 시즌 고려 (Q4)
-    from datetime import datetime
-    current_month = datetime.now().month
-    if current_month in [10, 11, 12]:
+    if is_peak_season():
         risk_score += 10  # 피크 시즌 리드타임 지연 가능성
     
     return min(100.0, risk_score)
 
 
+@lru_cache(maxsize=4096)
+def _compliance_keywords(product_name: str) -> Tuple[bool, bool, bool, bool, bool]:
+    """
+    제품명 키워드 검사 (spicy, food, toy, electronic, cosmetic) - 제품명별 메모이제이션
+    
+    _compute_compliance_risk가 제품명에서 보는 것은 이 값뿐이므로 ContextRiskCache도
+    제품명 대신 이 값으로 캐시합니다.
+    """
+    product_lower = product_name.lower()
+    return (
+        any(marker in product_lower for marker in ['불닭', '매운', 'spicy', 'hot chicken', 'buldak', 'fire noodle', 'hot', 'chili']),
+        any(kw in product_lower for kw in ['food', 'candy', 'snack', '식품', '과자']),
+        any(kw in product_lower for kw in ['toy', 'children', 'kid', '장난감', '어린이']),
+        any(kw in product_lower for kw in ['electronic', 'battery', '전자제품', '배터리']),
+        any(kw in product_lower for kw in ['cosmetic', 'beauty', '화장품']),
+    )
+
+
 def _compute_compliance_risk(
     spec: ShipmentSpec,
     data_quality: Dict[str, Any]
@@ -225,9 +383,7 @@ def _compute_compliance_risk(
         risk_score += 25.0
     
     # Phase 5: 매운맛 제품 감지 및 추가 리스크
-    product_lower = spec.product_name.lower()
-    spicy_markers = ['불닭', '매운', 'spicy', 'hot chicken', 'buldak', 'fire noodle', 'hot', 'chili']
-    is_spicy = any(marker in product_lower for marker in spicy_markers)
+    is_spicy, is_food_keyword, is_toy, is_electronic, is_cosmetic = _compliance_keywords(spec.product_name)
     
     if is_spicy:
         # 매운맛 제품은 FDA 규제 가능성 추가
@@ -240,14 +396,13 @@ def _compute_compliance_risk(
         risk_score += 5.0
     
     # 기존 키워드 검사 (카테고리 기반이 없을 때 fallback)
-    if not is_food_product:
-        if any(kw in product_lower for kw in ['food', 'candy', 'snack', '식품', '과자']):
-            risk_score += 30  # FDA 규제
-    if any(kw in product_lower for kw in ['toy', 'children', 'kid', '장난감', '어린이']):
+    if not is_food_product and is_food_keyword:
+        risk_score += 30  # FDA 규제
+    if is_toy:
         risk_score += 30  # CPSC 규제
-    if any(kw in product_lower for kw in ['electronic', 'battery', '전자제품', '배터리']):
+    if is_electronic:
         risk_score += 20  # FCC/UL 규제
-    if any(kw in product_lower for kw in ['cosmetic', 'beauty', '화장품']):
+    if is_cosmetic:
         risk_score += 20  # FDA MoCRA
     
     # 3. 목적지 국가별 규제 강도
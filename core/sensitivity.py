@@ -0,0 +1,273 @@
+"""
+Sensitivity Sweep Module - 수량 × 소매가 × FOB 그리드 분석
+"5천 개 대신 2만 개를 주문하면?", "$3.50에 팔면?" 같은 질문을 run_analysis 반복 없이 계산
+
+이 모듈은:
+- 참조 데이터는 한 번만 조회 (resolve_reference_data)
+- 그리드 전체의 단위 DDP/마진/판정을 NumPy 브로드캐스팅으로 한 번에 계산
+- 각 격자점의 값은 같은 입력으로 run_analysis를 실행한 결과와 같음
+- 결과는 배열 기반 SweepResult (utils.chart_helpers.create_sensitivity_heatmap으로 바로 시각화)
+"""
+
+from typing import Dict, Any, Optional, Sequence, Tuple
+from dataclasses import dataclass
+import logging
+import numpy as np
+from core.models import ShipmentSpec
+from core.business_rules import calculate_estimated_costs
+from core.errors import NexSupplyError
+from core.data_access import resolve_reference_data
+from services.analysis_service import calculate_final_costs_batch
+from services.verdict_calculator import calculate_verdict_scores, extract_risk_levels, VERDICT_LABELS
+from core.analysis_engine import build_data_quality, unit_weight
+
+logger = logging.getLogger(__name__)
+
+# 그리드 축 (배열 차원 순서)
+SWEEP_AXES = ("quantity", "retail_price", "fob")
+
+# SweepResult.grid에서 선택 가능한 지표
+SWEEP_METRICS = (
+    "unit_ddp", "net_profit_per_unit", "net_margin_percent", "total_profit", "verdict_score", "verdict"
+)
+
+# assess_risk_level 결과 (코드 = 인덱스)
+_RISK_LEVELS = ("Low", "Medium", "High")
+
+
+@dataclass
+class SweepResult:
+    """
+    sweep 결과 (지표 배열의 형태: 수량 × 소매가 × FOB)
+
+    fob 축의 0은 "FOB 미지정"으로, run_analysis와 같이 가격 힌트 중간값 또는 추정 원가를 사용합니다.
+    """
+    spec: ShipmentSpec
+    quantity: np.ndarray  # spec.unit_type 기준 주문 수량
+    retail_price: np.ndarray
+    fob: np.ndarray
+    unit_ddp: np.ndarray
+    net_profit_per_unit: np.ndarray
+    net_margin_percent: np.ndarray
+    total_profit: np.ndarray
+    verdict_score: np.ndarray
+    verdict: np.ndarray  # VERDICT_LABELS 인덱스 (0=STOP, 1=CAUTION, 2=GO)
+    data_quality: Dict[str, Any]
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return self.unit_ddp.shape
+
+    def axis(self, name: str) -> np.ndarray:
+        """축 값 배열"""
+        if name not in SWEEP_AXES:
+            raise ValueError(f"Unknown sweep axis: {name} (expected one of {SWEEP_AXES})")
+        return getattr(self, name)
+
+    def grid(
+        self,
+        metric: str = "net_margin_percent",
+        x: str = "quantity",
+        y: str = "retail_price",
+        fixed_index: int = 0
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        2차원 단면 (히트맵용)
+
+        Args:
+            metric: SWEEP_METRICS 중 하나
+            x: 가로 축 이름
+            y: 세로 축 이름
+            fixed_index: 나머지 축에서 고정할 인덱스
+
+        Returns:
+            (x 값, y 값, z[y, x] 배열)
+        """
+        if metric not in SWEEP_METRICS:
+            raise ValueError(f"Unknown sweep metric: {metric} (expected one of {SWEEP_METRICS})")
+        x_dim, y_dim = SWEEP_AXES.index(x), SWEEP_AXES.index(y)
+        if x_dim == y_dim:
+            raise ValueError("x and y must be different axes")
+        (fixed_dim,) = set(range(3)) - {x_dim, y_dim}
+
+        values = np.take(getattr(self, metric), fixed_index, axis=fixed_dim)
+        # 남은 두 차원은 원래 순서 유지 → z[y, x]가 되도록 필요하면 전치
+        remaining = [dim for dim in range(3) if dim != fixed_dim]
+        if remaining == [y_dim, x_dim]:
+            z = values
+        else:
+            z = values.T
+        return self.axis(x), self.axis(y), z
+
+    def verdict_labels(self) -> np.ndarray:
+        """판정 코드 → 라벨 ("STOP", "CAUTION", "GO") 배열"""
+        return np.array(VERDICT_LABELS)[self.verdict]
+
+
+def _axis_values(name: str, values: Optional[Sequence[float]], default: float, allow_zero: bool = False) -> np.ndarray:
+    """축 값 검증 (None이면 기본값 하나)"""
+    if values is None:
+        return np.array([default], dtype=np.float64)
+    array = np.asarray(values, dtype=np.float64).ravel()
+    if array.size == 0:
+        raise NexSupplyError(f"sweep {name} values must not be empty")
+    invalid = (array < 0) if allow_zero else (array <= 0)
+    if invalid.any() or not np.isfinite(array).all():
+        raise NexSupplyError(f"sweep {name} values must be positive: {values}")
+    return array
+
+
+def sweep(
+    spec: ShipmentSpec,
+    quantity: Optional[Sequence[float]] = None,
+    retail_price: Optional[Sequence[float]] = None,
+    fob: Optional[Sequence[float]] = None
+) -> SweepResult:
+    """
+    수량 × 소매가 × FOB 그리드 민감도 분석
+
+    각 격자점은 spec의 quantity/target_retail_price/fob_price_per_unit만 바꿔 run_analysis를
+    실행한 것과 같은 단위 DDP와 마진을 가집니다 (고정 배수 시나리오 기준). 판정은
+    calculate_verdict_score와 같은 가중치 점수입니다 (검증 오류 항목 제외).
+    spec은 수정하지 않습니다.
+
+    Args:
+        spec: 기준 ShipmentSpec
+        quantity: 주문 수량 목록 (spec.unit_type 기준 정수, None이면 spec.quantity)
+        retail_price: 소매 가격 목록 (None이면 run_analysis와 같은 규칙으로 결정한 소매가)
+        fob: FOB 단가 목록 (None이면 spec.fob_price_per_unit, 0은 미지정)
+
+    Returns:
+        SweepResult 인스턴스
+
+    Raises:
+        NexSupplyError: 축 값이 잘못되었거나 계산 실패 시
+    """
+    reference_data = resolve_reference_data(spec, transaction_limit=5)
+    pricing_hint = reference_data.pricing_hint
+
+    # 기본 소매가/FOB 중간값 (resolve_unit_prices와 같은 규칙)
+    if pricing_hint:
+        hint_retail = (pricing_hint.typical_retail_price_low_usd + pricing_hint.typical_retail_price_high_usd) / 2
+        hint_fob = (pricing_hint.typical_fob_low_usd + pricing_hint.typical_fob_high_usd) / 2
+    else:
+        hint_retail, hint_fob = 5.0, 0.0
+    default_retail = spec.target_retail_price or hint_retail
+
+    quantities = np.rint(_axis_values("quantity", quantity, spec.quantity)).astype(np.int64)
+    retail_prices = _axis_values("retail_price", retail_price, default_retail)
+    fob_prices = _axis_values("fob", fob, spec.fob_price_per_unit or 0.0, allow_zero=True)
+
+    try:
+        # 브로드캐스팅 형태: 수량 (Q,1,1), 소매가 (1,R,1), FOB (1,1,F)
+        q = quantities[:, None, None]
+        r = retail_prices[None, :, None]
+        f = fob_prices[None, None, :]
+        shape = (len(quantities), len(retail_prices), len(fob_prices))
+
+        # 수량 정규화 (normalize_quantity와 같은 규칙: 카톤 단위면 units_per_carton 곱)
+        units_per_carton = 1
+        if spec.packaging and 'units_per_carton' in spec.packaging and spec.unit_type in ['carton', 'box', 'ctn']:
+            units_per_carton = spec.packaging['units_per_carton']
+        normalized_quantity = q * units_per_carton
+
+        # 제조 원가 (resolve_unit_prices와 같은 우선순위)
+        manufacturing = np.where(f != 0, f, hint_fob if pricing_hint else 0.0)
+        valid_manufacturing = (manufacturing > 0) & (manufacturing < r)
+        manufacturing = np.broadcast_to(
+            np.where(valid_manufacturing | (pricing_hint is None), manufacturing, hint_fob),
+            shape
+        ).copy()
+        if pricing_hint is None:
+            needs_estimate = np.broadcast_to(~valid_manufacturing, shape)
+            estimated: Dict[Tuple[int, float], float] = {}
+            for qi, ri, fi in zip(*np.nonzero(needs_estimate), strict=True):
+                key = (int(quantities[qi]), float(retail_prices[ri]))
+                if key not in estimated:
+                    estimated[key] = calculate_estimated_costs(
+                        user_input=f"{spec.product_name} {key[0]} {spec.unit_type}",
+                        retail_price=key[1],
+                        volume=key[0] * units_per_carton
+                    ).get('manufacturing', 0)
+                manufacturing[qi, ri, fi] = estimated[key]
+
+        # 운임/관세/부대비용 (run_analysis와 같은 계산)
+        weight_kg = unit_weight(spec.product_name, spec.product_category) * normalized_quantity
+        freight_rate = reference_data.freight_rate
+        if freight_rate.rate_per_kg:
+            shipping = weight_kg * freight_rate.rate_per_kg
+        elif freight_rate.rate_per_cbm:
+            shipping = weight_kg / 200.0 * freight_rate.rate_per_cbm
+        else:
+            shipping = weight_kg * 5.0
+        if reference_data.duty_rate is not None:
+            duty = (manufacturing + shipping) * reference_data.duty_rate
+        else:
+            duty = manufacturing * 0.038
+        extra_costs = reference_data.extra_costs
+        misc = extra_costs.terminal_handling + extra_costs.customs_clearance + extra_costs.inland_transport
+
+        size = int(np.prod(shape))
+
+        def flat(values: Any) -> np.ndarray:
+            return np.broadcast_to(values, shape).reshape(size).astype(np.float64)
+
+        final = calculate_final_costs_batch(
+            flat(manufacturing), flat(shipping), flat(duty), flat(misc),
+            flat(normalized_quantity), flat(r)
+        )
+        if final["invalid"].any():
+            raise NexSupplyError("Failed to calculate costs: invalid cost breakdown or volume")
+        unit_ddp = final["unit_ddp"].reshape(shape)
+
+        # 수익성 (_assemble_result와 같은 규칙)
+        retail = np.broadcast_to(r, shape)
+        has_retail = retail > 0
+        net_profit = np.where(has_retail, retail - unit_ddp, 0.0)
+        net_margin = np.divide(net_profit, retail, out=np.zeros(shape), where=has_retail) * 100
+        total_profit = net_profit * normalized_quantity
+
+        # 리스크 레벨 (assess_risk_level과 같은 규칙: base_final 숫자 값 합계 기준)
+        unit_cost = (
+            final["unit_ddp"] + final["total_project_cost"] + final["manufacturing"] + final["shipping"]
+            + final["duty"] + final["misc"] + final["_normalized_from_total"]
+        )
+        risk_points = (
+            2 * (unit_cost > 100)
+            + (flat(normalized_quantity) < 500)
+            + (np.divide(final["duty"], unit_cost, out=np.zeros(size), where=unit_cost != 0) > 0.2)
+        )
+        risk_level = np.select([risk_points >= 3, risk_points >= 1], [2, 1], default=0).reshape(shape)
+
+        # 판정 (리스크 레벨별 가중치 점수)
+        verdict_score = np.zeros(shape, dtype=np.int64)
+        verdict = np.zeros(shape, dtype=np.int8)
+        for code, level in enumerate(_RISK_LEVELS):
+            mask = risk_level == code
+            if mask.any():
+                scores, verdicts = calculate_verdict_scores(
+                    net_margin[mask], *extract_risk_levels({"risk_analysis": {"level": level}})
+                )
+                verdict_score[mask] = scores
+                verdict[mask] = verdicts
+    except NexSupplyError:
+        raise
+    except Exception as e:
+        logger.error(f"sweep 실패: {e}", exc_info=True)
+        raise NexSupplyError(f"민감도 분석 실패: {str(e)}") from e
+
+    logger.info(f"민감도 분석 완료: {spec.product_name}, 그리드 {shape[0]}×{shape[1]}×{shape[2]}")
+
+    return SweepResult(
+        spec=spec,
+        quantity=quantities,
+        retail_price=retail_prices,
+        fob=fob_prices,
+        unit_ddp=unit_ddp,
+        net_profit_per_unit=net_profit,
+        net_margin_percent=net_margin,
+        total_profit=total_profit,
+        verdict_score=verdict_score,
+        verdict=verdict,
+        data_quality=build_data_quality(reference_data)
+    )
@@ -54,6 +54,38 @@ progress_bar = st.progress(0)
 status_text = st.empty()
 progress_hints = st.empty()
 
+
+def render_stage2_section(slot, name, value):
+    """Stage 2 섹션 하나를 도착하는 즉시 표시 (schema v1.2 원본 값)"""
+    try:
+        with slot.container():
+            if name == "cost_breakdown" and isinstance(value, dict):
+                currency = value.get("currency", "USD")
+                manufacturing = value.get("manufacturing", {})
+                logistics = value.get("logistics", {})
+                st.markdown("**💰 Landed cost per unit**")
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Total", f"{value.get('total_landed_cost', 0)} {currency}")
+                col2.metric("Manufacturing", manufacturing.get("base", 0) if isinstance(manufacturing, dict) else manufacturing)
+                col3.metric("Freight", logistics.get("freight", 0) if isinstance(logistics, dict) else 0)
+                col4.metric("Duty", logistics.get("duty", 0) if isinstance(logistics, dict) else 0)
+            elif name == "channel_strategy" and isinstance(value, dict):
+                st.markdown("**📦 Channel strategy**")
+                for channel, data in value.items():
+                    if isinstance(data, dict):
+                        st.markdown(f"- **{channel}**: margin {data.get('margin', 0)}% · {data.get('recommendation', '')}")
+            elif name == "risk_score" and isinstance(value, dict):
+                st.markdown("**⚠️ Risk**")
+                for category, data in value.items():
+                    if isinstance(data, dict):
+                        st.markdown(f"- **{category}**: {data.get('score', 0)}/100 · {data.get('reason', '')}")
+            elif name == "rfq_draft" and value:
+                with st.expander("📝 RFQ draft"):
+                    st.text(str(value))
+    except Exception as e:
+        import logging
+        logging.warning(f"Could not render section {name}: {e}")
+
 # Run analysis
 try:
     # Check if analysis is already running or done
@@ -112,63 +144,75 @@ try:
         # Step 4: AI Analysis (Phase 1: Use new analysis engine if available)
         update_status(STATUS_ANALYZING, 50, COLOR_CYAN, hint="Checking costs and duties")
         
-        # Phase 4: Use new analysis engine (parse_user_input + run_analysis)
-        result = None
-        try:
-            from core.nlp_parser import parse_user_input
-            from core.analysis_engine import run_analysis
-            from core.models import ShipmentSpec
+        # Every AI call of this request shares the ANALYSIS_SLA_SECONDS deadline
+        from utils.resilience import analysis_sla_seconds, deadline
+        with deadline(analysis_sla_seconds()):
+            # Phase 4: Use new analysis engine (parse_user_input + run_analysis)
+            result = None
+            try:
+                from core.nlp_parser import parse_user_input
+                from core.analysis_engine import run_analysis
+                from core.models import ShipmentSpec
             
-            # Step 3: Parse user input to ShipmentSpec
-            update_status(STATUS_PARSING, 40, COLOR_CYAN, hint="Extracting product details")
+                # Step 3: Parse user input to ShipmentSpec
+                update_status(STATUS_PARSING, 40, COLOR_CYAN, hint="Extracting product details")
             
-            # Check if we already have a parsed spec, otherwise parse now
-            shipment_spec_dict = st.session_state.get('shipment_spec')
-            if shipment_spec_dict and isinstance(shipment_spec_dict, dict):
-                try:
-                    shipment_spec = ShipmentSpec(**shipment_spec_dict)
-                except Exception:
-                    # If cached spec is invalid, re-parse
+                # Check if we already have a parsed spec, otherwise parse now
+                shipment_spec_dict = st.session_state.get('shipment_spec')
+                if shipment_spec_dict and isinstance(shipment_spec_dict, dict):
+                    try:
+                        shipment_spec = ShipmentSpec(**shipment_spec_dict)
+                    except Exception:
+                        # If cached spec is invalid, re-parse
+                        shipment_spec = parse_user_input(user_input, api_key=api_key)
+                        st.session_state['shipment_spec'] = shipment_spec.model_dump()
+                else:
+                    # Parse fresh
                     shipment_spec = parse_user_input(user_input, api_key=api_key)
                     st.session_state['shipment_spec'] = shipment_spec.model_dump()
-            else:
-                # Parse fresh
-                shipment_spec = parse_user_input(user_input, api_key=api_key)
-                st.session_state['shipment_spec'] = shipment_spec.model_dump()
             
-            # Step 4: Run analysis with new engine
-            update_status(STATUS_ANALYZING, 60, COLOR_CYAN, hint="Calculating costs and risks")
-            result = run_analysis(shipment_spec, api_key=api_key)
+                # Step 4: Run analysis with new engine
+                update_status(STATUS_ANALYZING, 60, COLOR_CYAN, hint="Calculating costs and risks")
+                result = run_analysis(shipment_spec, api_key=api_key)
             
-        except Exception as e:
-            import logging
-            logging.error(f"New analysis engine failed: {e}", exc_info=True)
-            # User-friendly error message (Customer Service feedback)
-            error_msg = str(e)
-            if "API" in error_msg or "key" in error_msg.lower():
-                user_friendly_msg = "⚠️ API connection issue. Please check your API key settings or try again later."
-            elif "parse" in error_msg.lower() or "input" in error_msg.lower():
-                user_friendly_msg = "⚠️ Could not understand your input. Please try rephrasing with more details (product name, quantity, origin, destination, price)."
-            elif "timeout" in error_msg.lower():
-                user_friendly_msg = "⏱️ The analysis is taking longer than expected. Please try again in a moment."
-            else:
-                user_friendly_msg = "⚠️ Something went wrong during analysis. Please try again or contact support if the issue persists."
+            except Exception as e:
+                import logging
+                logging.error(f"New analysis engine failed: {e}", exc_info=True)
+                # User-friendly error message (Customer Service feedback)
+                error_msg = str(e)
+                if "API" in error_msg or "key" in error_msg.lower():
+                    user_friendly_msg = "⚠️ API connection issue. Please check your API key settings or try again later."
+                elif "parse" in error_msg.lower() or "input" in error_msg.lower():
+                    user_friendly_msg = "⚠️ Could not understand your input. Please try rephrasing with more details (product name, quantity, origin, destination, price)."
+                elif "timeout" in error_msg.lower():
+                    user_friendly_msg = "⏱️ The analysis is taking longer than expected. Please try again in a moment."
+                else:
+                    user_friendly_msg = "⚠️ Something went wrong during analysis. Please try again or contact support if the issue persists."
             
-            # Fallback to legacy AI analysis if new engine fails
-            update_status(user_friendly_msg, 50, COLOR_CYAN)
-            try:
-                from src.ai import analyze_input
-        result = analyze_input(
-            text=user_input,
-            api_key=api_key,
-            use_pipeline=True
-        )
-            except Exception as fallback_error:
-                logging.error(f"Legacy analysis also failed: {fallback_error}")
-                # Show final user-friendly error
-                st.error(f"❌ **Analysis Failed**: {user_friendly_msg}")
-                st.info("💡 **Tips to fix this**:\n- Check your internet connection\n- Verify your input includes: product name, quantity, origin country, destination country, and target price\n- Try refreshing the page")
-                raise fallback_error
+                # Fallback to legacy AI analysis if new engine fails
+                update_status(user_friendly_msg, 50, COLOR_CYAN)
+                try:
+                    # 2-stage pipeline via the orchestrator (local work overlaps Stage 2):
+                    # render each Stage 2 section as soon as it streams in
+                    # (fallback=False: the deterministic engine has just failed above)
+                    from src.ai_pipeline import STAGE2_SECTIONS
+                    from services.pipeline_orchestrator import iter_pipeline_analysis
+                    section_slots = {name: st.empty() for name in STAGE2_SECTIONS}
+                    events = iter_pipeline_analysis(text=user_input, api_key=api_key, fallback=False)
+                    for completed, (event, value) in enumerate(events):
+                        if event == "result":
+                            result = value.result
+                        elif event == "parsed":
+                            update_status(STATUS_ANALYZING, 55, COLOR_CYAN, hint="Calculating costs and risks")
+                        else:
+                            render_stage2_section(section_slots[event], event, value)
+                            update_status(STATUS_ANALYZING, min(55 + completed * 6, 79), COLOR_CYAN, hint="Building your report")
+                except Exception as fallback_error:
+                    logging.error(f"Legacy analysis also failed: {fallback_error}")
+                    # Show final user-friendly error
+                    st.error(f"❌ **Analysis Failed**: {user_friendly_msg}")
+                    st.info("💡 **Tips to fix this**:\n- Check your internet connection\n- Verify your input includes: product name, quantity, origin country, destination country, and target price\n- Try refreshing the page")
+                    raise fallback_error
         
         elapsed_time = time.time() - start_time
         
@@ -264,11 +308,11 @@ except Exception as e:
     # Show error with retry option
     try:
         error_info = handle_error_with_retry_button(
-        error=e,
+            error=e,
             retry_callback=lambda: st.session_state.update({'analysis_status': None}),
             lang="ko"
-    )
-    
+        )
+        
         # Display error information
         st.error(f"**{error_info.get('title', '오류 발생')}**")
         st.warning(error_info.get('message', str(e)))
@@ -297,5 +341,5 @@ except Exception as e:
         st.info("💡 페이지를 새로고침하거나 잠시 후 다시 시도해주세요.")
         
         if st.button("← Analyze로 돌아가기"):
-        st.switch_page("pages/Analyze.py")
+            st.switch_page("pages/Analyze.py")
 
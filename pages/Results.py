@@ -468,7 +468,18 @@ else:
                 st.metric("Base Case", format_money(cost_scenarios.get('base'), currency), help="Most likely scenario based on current data")
             with scenario_cols[2]:
                 st.metric("Worst Case", format_money(cost_scenarios.get('worst'), currency), help="Pessimistic scenario with higher costs")
-        
+
+            # 시뮬레이션 모드: Best/Worst는 몬테카를로 P10/P90
+            cost_simulation = result.get("cost_simulation")
+            if cost_simulation:
+                st.caption(
+                    f"🎲 Monte Carlo ({cost_simulation.get('draws', 0):,} draws): "
+                    f"P10 {format_money(cost_simulation.get('p10'), currency)} · "
+                    f"P50 {format_money(cost_simulation.get('p50'), currency)} · "
+                    f"P90 {format_money(cost_simulation.get('p90'), currency)} · "
+                    f"Probability of negative margin {cost_simulation.get('prob_negative_margin', 0):.0%}"
+                )
+
         # DDP Cost Breakdown Table (Report Style)
         st.markdown("#### DDP Cost Breakdown (per unit)")
         st.caption("💡 **DDP (Delivered Duty Paid)**: Total cost per unit including all costs to your warehouse.")
@@ -525,6 +536,41 @@ else:
         profit_df = pd.DataFrame(profit_data)
         st.dataframe(profit_df, use_container_width=True, hide_index=True)
 
+        # What-if: 수량 × 소매가 민감도 (참조 데이터 한 번 조회, 그리드 한 번에 계산)
+        shipment_spec_data = result.get("shipment_spec")
+        if shipment_spec_data:
+            with st.expander("📈 What-if: Quantity × Retail Price", expanded=False):
+                try:
+                    import numpy as np
+                    from core.models import ShipmentSpec
+                    from core.sensitivity import sweep
+                    from utils.chart_helpers import create_sensitivity_heatmap
+
+                    what_if_spec = ShipmentSpec(**shipment_spec_data)
+                    base_retail = retail_price if retail_price and retail_price > 0 else 5.0
+                    metric = st.radio(
+                        "Metric",
+                        ["net_margin_percent", "unit_ddp", "total_profit", "verdict"],
+                        format_func=lambda m: {
+                            "net_margin_percent": "Margin %",
+                            "unit_ddp": "Unit DDP",
+                            "total_profit": "Total Profit",
+                            "verdict": "Verdict",
+                        }[m],
+                        horizontal=True,
+                        key="what_if_metric"
+                    )
+                    what_if = sweep(
+                        what_if_spec,
+                        quantity=np.unique(np.geomspace(
+                            max(1, what_if_spec.quantity // 5), what_if_spec.quantity * 5, 50
+                        ).round()),
+                        retail_price=np.linspace(base_retail * 0.5, base_retail * 1.5, 50)
+                    )
+                    st.plotly_chart(create_sensitivity_heatmap(what_if, metric=metric), use_container_width=True)
+                except Exception as e:
+                    st.caption(f"What-if analysis unavailable: {e}")
+
     with tab_risks:
         st.markdown("### ⚠️ Risk & Probability Analysis")
         
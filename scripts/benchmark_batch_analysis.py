@@ -0,0 +1,78 @@
+import random
+import sys
+import os
+import time
+import logging
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# run_analysis 반복 호출이 결과 캐시 적중 없이 매번 계산하도록 캐시 비활성화 (캐시 생성 전에 설정)
+os.environ["ANALYSIS_CACHE_MAX_ENTRIES"] = "0"
+
+from core.models import ShipmentSpec
+from core.analysis_engine import run_analysis, run_analysis_batch
+
+PRODUCTS = [
+    ("shrimp snack", "KR snack"),
+    ("spicy buldak ramen", "korean_ramen"),
+    ("choco pie", "korean_confectionery"),
+    ("toy car", None),
+    ("phone case", None),
+    ("cotton shirt", None),
+]
+LANES = [
+    ("China", "USA"),
+    ("South Korea", "United States"),
+    ("Vietnam", "USA"),
+    ("South Korea", "Germany"),
+    ("India", "Japan"),
+]
+
+
+def build_catalog(size, seed=7):
+    """벤치마크용 합성 카탈로그 (SKU마다 다른 제품명)"""
+    rng = random.Random(seed)
+    catalog = []
+    for index in range(size):
+        name, category = rng.choice(PRODUCTS)
+        origin, destination = rng.choice(LANES)
+        catalog.append(ShipmentSpec(
+            product_name=f"{name} #{index % 500}",
+            product_category=category,
+            quantity=rng.choice([300, 1200, 5000, 20000]),
+            unit_type="bag",
+            origin_country=origin,
+            destination_country=destination,
+            fob_price_per_unit=rng.choice([None, 0.4, 1.2]),
+            target_retail_price=rng.choice([None, 0.9, 2.5, 6.0]),
+        ))
+    return catalog
+
+
+def benchmark_batch_analysis(size=10000):
+    """
+    run_analysis 반복 호출과 run_analysis_batch의 처리량 비교
+    """
+    logging.disable(logging.WARNING)
+    catalog = build_catalog(size)
+    run_analysis(catalog[0].model_copy(deep=True))  # 참조 테이블 로드
+
+    specs = [spec.model_copy(deep=True) for spec in catalog]
+    start = time.perf_counter()
+    for spec in specs:
+        run_analysis(spec)
+    per_spec_seconds = time.perf_counter() - start
+
+    specs = [spec.model_copy(deep=True) for spec in catalog]
+    start = time.perf_counter()
+    run_analysis_batch(specs)
+    batch_seconds = time.perf_counter() - start
+
+    print(f"specs: {size}")
+    print(f"run_analysis loop:  {per_spec_seconds:.3f}s ({size / per_spec_seconds:,.0f} specs/s)")
+    print(f"run_analysis_batch: {batch_seconds:.3f}s ({size / batch_seconds:,.0f} specs/s)")
+    print(f"speedup: {per_spec_seconds / batch_seconds:.1f}x")
+
+
+if __name__ == '__main__':
+    benchmark_batch_analysis(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
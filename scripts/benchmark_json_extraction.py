@@ -0,0 +1,141 @@
+import json
+import random
+import re
+import sys
+import os
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.json_extract import extract_json, JSONObjectScanner
+
+ANALYSIS = {
+    "meta": {"schema_version": "v1.2", "model": "gemini-2.5-flash"},
+    "cost_breakdown": {
+        "manufacturing": {"low": 0.4, "base": 0.55, "high": 0.7},
+        "logistics": {"freight": 0.12, "duty": 0.05},
+        "total_landed_cost": 0.72,
+        "currency": "USD",
+    },
+    "channel_strategy": {"amazon_fba": {"margin": 31.5, "recommendation": "Go {if} MOQ <= 5000"}},
+    "risk_score": {"regulatory": {"score": 35, "reason": "FDA prior notice; labels with \"allergen\" info"}},
+}
+
+
+def legacy_extract_json(text):
+    """이전 src/ai_pipeline._extract_json_from_text (비교용, 전략 5개를 차례로 시도)"""
+    if not text:
+        return None
+    try:
+        return json.loads(text.strip())
+    except json.JSONDecodeError:
+        pass
+    if "```" in text:
+        json_start = text.find("```json")
+        if json_start != -1:
+            json_start += 7
+        else:
+            json_start = text.find("```")
+            if json_start != -1:
+                json_start += 3
+        if json_start != -1:
+            json_end = text.rfind("```")
+            if json_end > json_start:
+                try:
+                    return json.loads(text[json_start:json_end].strip())
+                except json.JSONDecodeError:
+                    pass
+    json_match = re.search(r'\{[\s\S]*\}', text)
+    if json_match:
+        try:
+            return json.loads(json_match.group())
+        except json.JSONDecodeError:
+            pass
+    try:
+        brace_count = 0
+        start_idx = text.find('{')
+        if start_idx != -1:
+            for i in range(start_idx, len(text)):
+                if text[i] == '{':
+                    brace_count += 1
+                elif text[i] == '}':
+                    brace_count -= 1
+                    if brace_count == 0:
+                        return json.loads(text[start_idx:i + 1])
+    except (json.JSONDecodeError, ValueError, IndexError):
+        pass
+    try:
+        fixed_text = re.sub(r',(\s*[}\]])', r'\1', text)
+        fixed_text = re.sub(r"'([^']*)':", r'"\1":', fixed_text)
+        fixed_text = re.sub(r":\s*'([^']*)'", r': "\1"', fixed_text)
+        return json.loads(fixed_text)
+    except (json.JSONDecodeError, ValueError):
+        pass
+    return None
+
+
+def noisy_output(size, seed, variant):
+    """
+    약 size 바이트의 잡음 섞인 LLM 출력 (설명문, 로그, 중괄호가 든 문장 + 끝부분의 JSON)
+
+    variant: "clean", "trailing_comma", "truncated" (스트리밍이 끊겨 JSON이 닫히지 않은 출력),
+             "unclosed" (닫히지 않은 중괄호만 있고 JSON이 없는 출력, 이전 추출기의 최악 경우)
+    """
+    if variant == "unclosed":
+        line = "Step {n: estimate freight for the next lane"
+        return "\n".join(line for _ in range(size // (len(line) + 1)))
+
+    rng = random.Random(seed)
+    lines = []
+    while sum(len(line) + 1 for line in lines) < size:
+        lines.append(rng.choice([
+            "Let me think about the landed cost step by step.",
+            "[debug] template {product} rendered for lane CN->US",
+            "Note: a carton holds 24 units; see {packaging} section.",
+            "The supplier's quote assumes FOB Ningbo (it's the usual port).",
+            "Checked duty tables: HTS 1905.90 at 0% under {MFN}.",
+            "Draft: {\"status\": \"pending\" (will finalize below)",
+        ]))
+    payload = json.dumps(ANALYSIS, indent=2)
+    if variant == "trailing_comma":
+        payload = payload.replace('"USD"\n', '"USD",\n')
+    elif variant == "truncated":
+        return "\n".join(lines) + "\n```json\n" + payload[:len(payload) // 2]
+    return "\n".join(lines) + "\n```json\n" + payload + "\n```\nLet me know if you need more detail."
+
+
+def _time(func, text, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(text)
+    return (time.perf_counter() - start) / repeat, result
+
+
+def _streamed(text, chunk_size=256):
+    scanner = JSONObjectScanner()
+    for index in range(0, len(text), chunk_size):
+        if scanner.feed(text[index:index + chunk_size]) is not None:
+            break
+    return scanner.result
+
+
+def benchmark_json_extraction(size=100_000, repeat=5):
+    """
+    100KB 잡음 출력에서 이전 5단계 추출기와 단일 패스 스캐너 비교
+    """
+    for variant in ("clean", "trailing_comma", "truncated", "unclosed"):
+        expected = None if variant in ("truncated", "unclosed") else ANALYSIS
+        text = noisy_output(size, seed=1, variant=variant)
+        legacy_seconds, legacy_result = _time(legacy_extract_json, text, repeat)
+        new_seconds, new_result = _time(extract_json, text, repeat)
+        stream_seconds, stream_result = _time(_streamed, text, repeat)
+
+        print(f"input: {len(text):,} bytes, {variant}")
+        print(f"  legacy extractor:  {legacy_seconds * 1000:8.2f} ms  correct={legacy_result == expected}")
+        print(f"  extract_json:      {new_seconds * 1000:8.2f} ms  correct={new_result == expected}")
+        print(f"  streamed (256 B):  {stream_seconds * 1000:8.2f} ms  correct={stream_result == expected}")
+        print(f"  speedup: {legacy_seconds / new_seconds:.1f}x")
+
+
+if __name__ == '__main__':
+    benchmark_json_extraction(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,71 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.ai_pipeline_async import AsyncGeminiPipeline, ConcurrencyBudget
+from src.stage1_batching import Stage1MicroBatcher
+
+INPUT_LINE = re.compile(r'^\[(\d+)\] (".*")$', re.MULTILINE)
+
+
+class LatencyModel:
+    """
+    호출당 고정 지연 + 출력 항목당 지연을 흉내 내는 가짜 Gemini 모델
+    (기본값은 실제 flash 호출 약 0.6초 + 항목당 0.05초를 1/20로 축소)
+    """
+
+    def __init__(self, overhead=0.03, per_item=0.0025):
+        self.overhead = overhead
+        self.per_item = per_item
+        self.calls = 0
+
+    async def generate_content_async(self, contents):
+        self.calls += 1
+        prompt = contents if isinstance(contents, str) else contents[0]
+        if "numbered user input" in prompt:
+            indexes = [int(index) for index, _ in INPUT_LINE.findall(prompt)]
+            await asyncio.sleep(self.overhead + self.per_item * len(indexes))
+            items = [{"index": index, "product_category": "snack", "detected_volume": 5000} for index in indexes]
+            return type("Response", (), {"text": json.dumps(items)})()
+        await asyncio.sleep(self.overhead + self.per_item)
+        return type("Response", (), {"text": '{"product_category": "snack", "detected_volume": 5000}'})()
+
+
+async def _parse_all(lines, micro_batch, concurrency):
+    model = LatencyModel()
+    pipeline = AsyncGeminiPipeline(
+        model_factory=lambda: model, budget=ConcurrencyBudget(concurrency), use_cache=False
+    )
+    batcher = Stage1MicroBatcher(pipeline, target_seconds=0.2) if micro_batch else None
+    start = time.perf_counter()
+    if batcher is not None:
+        await asyncio.gather(*(batcher.parse(line) for line in lines))
+    else:
+        await asyncio.gather(*(pipeline.parse_user_input(raw_text=line) for line in lines))
+    return time.perf_counter() - start, model.calls, batcher
+
+
+def benchmark_stage1_batching(size=10000, concurrency=16):
+    """
+    카탈로그 줄마다 Stage 1을 호출할 때와 마이크로 배치로 묶을 때의 호출 수/소요 시간 비교
+    """
+    logging.disable(logging.WARNING)
+    lines = [f"snack item #{index} {1000 + index % 50 * 100} bags to USA" for index in range(size)]
+
+    single_seconds, single_calls, _ = asyncio.run(_parse_all(lines, False, concurrency))
+    batch_seconds, batch_calls, batcher = asyncio.run(_parse_all(lines, True, concurrency))
+
+    print(f"lines: {size}, concurrency: {concurrency}")
+    print(f"per-item Stage 1: {single_calls} calls, {single_seconds:.2f}s")
+    print(f"micro-batched:    {batch_calls} calls, {batch_seconds:.2f}s (final batch size {batcher.batch_size})")
+    print(f"calls: {single_calls / batch_calls:.1f}x fewer, time: {single_seconds / batch_seconds:.1f}x faster")
+
+
+if __name__ == '__main__':
+    benchmark_stage1_batching(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
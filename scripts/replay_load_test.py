@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Replay Load Test - 기록된 입력을 오프라인 가짜 Gemini로 전체 파이프라인에 재생
+
+기록된 입력(requests.jsonl 같은 JSONL, scripts/run_baseline_analyses의 입력)을 목표 동시성으로
+analyze_input_pipeline 및 run_analysis에 흘려 보내고 처리량과 지연 시간 p50/p95/p99를 보고합니다.
+Gemini 호출은 utils.fake_gemini로 대체되므로 API 할당량을 쓰지 않습니다.
+
+사용법:
+    python scripts/replay_load_test.py
+    python scripts/replay_load_test.py --requests 2000 --concurrency 32 --time-scale 0.1
+    python scripts/replay_load_test.py --target pipeline --unique --error-rate 0.05 inputs.jsonl
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# 가짜 응답이 실제 응답 캐시 파일(SQLite)에 저장되지 않도록 메모리 캐시 사용 (캐시 생성 전에 설정)
+os.environ["RESPONSE_CACHE_BACKEND"] = "memory"
+
+from core.analysis_cache import get_analysis_cache
+from core.analysis_engine import run_analysis
+from core.nlp_parser import parse_user_input
+from scripts.run_baseline_analyses import BASELINE_INPUTS
+from src.ai_pipeline import (
+    STAGE1_CACHE_NAMESPACE, STAGE2_CACHE_NAMESPACE, analyze_input_pipeline, get_pipeline_metrics
+)
+from utils.cache import get_response_cache
+from utils.fake_gemini import LATENCY_DISTRIBUTIONS, FakeGeminiConfig, use_fake_gemini
+from utils.pipeline_metrics import percentiles, pipeline_metrics
+
+TARGETS = ("pipeline", "analysis")
+
+
+def load_inputs(paths):
+    """
+    재생할 입력 텍스트 목록
+
+    JSONL 줄은 "text" / "input" / "user_input" 필드, 없으면 "title" + "body"를 사용하고
+    그 외 파일은 한 줄이 입력 하나입니다. 경로가 없으면 기준 분석 입력 + requests.jsonl.
+    """
+    if not paths:
+        default = project_root / "requests.jsonl"
+        return list(BASELINE_INPUTS) + (load_inputs([default]) if default.exists() else [])
+
+    inputs = []
+    for path in paths:
+        for line in Path(path).read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if str(path).endswith(".jsonl"):
+                record = json.loads(line)
+                text = record.get("text") or record.get("input") or record.get("user_input")
+                if not text:
+                    text = "\n".join(str(record[key]) for key in ("title", "body") if record.get(key))
+                if text:
+                    inputs.append(text)
+            else:
+                inputs.append(line)
+    return inputs
+
+
+def _unique_suffix(index):
+    """요청마다 다른 꼬리표 (숫자는 수량으로 파싱될 수 있어 문자만 사용)"""
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord("a") + remainder) + letters
+    return f" (ref {letters})"
+
+
+def _run_one(target, text):
+    if target == "pipeline":
+        return analyze_input_pipeline(text=text)
+    return run_analysis(parse_user_input(text))
+
+
+def _reset_caches():
+    for namespace in (STAGE1_CACHE_NAMESPACE, STAGE2_CACHE_NAMESPACE):
+        get_response_cache(namespace).clear()
+    analysis_cache = get_analysis_cache()
+    if analysis_cache is not None:
+        analysis_cache.clear()
+    pipeline_metrics.reset()
+
+
+def replay(target, inputs, requests, concurrency, config, unique=False):
+    """
+    입력을 순환하며 requests개 요청을 concurrency개 스레드로 실행 (캐시는 시작 전에 비움)
+
+    같은 입력의 반복은 응답/분석 캐시에 적중합니다. unique=True이면 요청마다 꼬리표를 붙여
+    모든 요청이 캐시 없이 모델까지 갑니다.
+
+    Returns:
+        보고서 딕셔너리 (처리량, 지연 p50/p95/p99, 오류 유형별 개수, 가짜 모델 호출 통계,
+        pipeline 대상은 단계별 지연/캐시 수준)
+    """
+    _reset_caches()
+    jobs = [
+        inputs[index % len(inputs)] + (_unique_suffix(index) if unique else "")
+        for index in range(requests)
+    ]
+    latencies = []
+    errors = Counter()
+
+    def timed(text):
+        started = time.perf_counter()
+        try:
+            _run_one(target, text)
+            return time.perf_counter() - started, None
+        except Exception as e:
+            return time.perf_counter() - started, type(e).__name__
+
+    with use_fake_gemini(config) as model:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for seconds, error in pool.map(timed, jobs):
+                if error:
+                    errors[error] += 1
+                else:
+                    latencies.append(seconds)
+        elapsed = time.perf_counter() - started
+        model_stats = model.get_stats()
+
+    report = {
+        "target": target,
+        "requests": requests,
+        "concurrency": concurrency,
+        "seconds": elapsed,
+        "throughput_rps": requests / elapsed if elapsed > 0 else None,
+        "latency_seconds": percentiles(latencies),
+        "errors": dict(errors),
+        "model": model_stats,
+    }
+    if target == "pipeline":
+        stats = get_pipeline_metrics()
+        report["stages"] = {
+            name: {"seconds": stage["seconds"], "cache": stage["cache"], "retries": stage["retries"]}
+            for name, stage in stats["stages"].items()
+        }
+        report["cost_usd"] = stats["totals"]["cost_usd"]
+    return report
+
+
+def print_report(report):
+    latency = report["latency_seconds"]
+    print("-" * 80)
+    print(f"{report['target']}: {report['requests']} requests, concurrency {report['concurrency']}")
+    print(f"  throughput: {report['throughput_rps']:.1f} req/s ({report['seconds']:.2f}s)")
+    if latency["p50"] is not None:
+        print(f"  latency: p50 {latency['p50']:.3f}s  p95 {latency['p95']:.3f}s  p99 {latency['p99']:.3f}s")
+    print(f"  errors: {report['errors'] or 'none'}")
+    print(f"  model: {report['model']}")
+    for name, stage in report.get("stages", {}).items():
+        seconds = stage["seconds"]
+        print(
+            f"  {name:<17} p50 {seconds['p50']:.3f}s  p95 {seconds['p95']:.3f}s  p99 {seconds['p99']:.3f}s"
+            f"  cache {stage['cache']}  retries {stage['retries']}"
+        )
+
+
+def main():
+    """메인 함수: 인자 해석 후 대상별 재생"""
+    parser = argparse.ArgumentParser(description="Replay recorded inputs through the pipeline against a fake Gemini")
+    parser.add_argument("inputs", nargs="*", help="JSONL / text files of inputs (default: baseline inputs + requests.jsonl)")
+    parser.add_argument("--target", choices=TARGETS + ("all",), default="all")
+    parser.add_argument("--requests", type=int, default=200, help="requests per target (inputs are cycled)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--median-seconds", type=float, default=0.6)
+    parser.add_argument("--spread", type=float, default=0.4)
+    parser.add_argument("--seconds-per-output-token", type=float, default=0.004)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--time-scale", type=float, default=1.0, help="multiplies every fake latency")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--unique", action="store_true", help="make every request distinct (no cache hits)")
+    parser.add_argument("--json", help="also write the reports to this file")
+    args = parser.parse_args()
+
+    logging.disable(logging.ERROR)  # 주입된 오류는 보고서에 집계
+    inputs = load_inputs(args.inputs)
+    if not inputs:
+        parser.error("no inputs to replay")
+    config = FakeGeminiConfig(
+        latency=args.latency, median_seconds=args.median_seconds, spread=args.spread,
+        seconds_per_output_token=args.seconds_per_output_token, error_rate=args.error_rate,
+        malformed_rate=args.malformed_rate, time_scale=args.time_scale, seed=args.seed
+    )
+
+    print(f"inputs: {len(inputs)} recorded, fake Gemini: {config}")
+    reports = []
+    for target in (TARGETS if args.target == "all" else (args.target,)):
+        report = replay(target, inputs, args.requests, args.concurrency, config, unique=args.unique)
+        print_report(report)
+        reports.append(report)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(reports, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+if __name__ == '__main__':
+    main()
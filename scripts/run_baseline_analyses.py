@@ -7,27 +7,27 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from core.nlp_parser import parse_user_input
 from core.analysis_engine import run_analysis
 
+BASELINE_INPUTS = [
+    # Existing baselines
+    "새우깡 5,000봉지 미국에 4달러에 팔거야",
+    "초코파이 10,000박스 미국에 2달러씩 팔 거야",
+    "Korean cookies to Germany",
+    "신라면 20,000개 미국으로 수출",
+    "김치 1,000kg 유럽(독일)에 수출",
+
+    # New baselines for pricing calibration
+    "KR→US shrimp chips",
+    "KR→US ramen",
+    "KR→EU cookies"
+]
+
 def run_baseline_analyses():
     """
     Runs a series of baseline analyses and stores the results in a JSON file.
     """
-    baseline_inputs = [
-        # Existing baselines
-        "새우깡 5,000봉지 미국에 4달러에 팔거야",
-        "초코파이 10,000박스 미국에 2달러씩 팔 거야",
-        "Korean cookies to Germany",
-        "신라면 20,000개 미국으로 수출",
-        "김치 1,000kg 유럽(독일)에 수출",
-
-        # New baselines for pricing calibration
-        "KR→US shrimp chips",
-        "KR→US ramen",
-        "KR→EU cookies"
-    ]
-
     baseline_results = []
 
-    for user_input in baseline_inputs:
+    for user_input in BASELINE_INPUTS:
         try:
             parsed_input = parse_user_input(user_input)
             analysis_result = run_analysis(parsed_input)
@@ -4,7 +4,8 @@ Handles analysis requests with fallback logic for missing data.
 Phase 2: Includes FBA Calculator and Compliance Engine.
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+import numpy as np
 from core.models import CostBreakdown
 from core.costing import calculate_unit_cost, calculate_total_project_cost
 from core.errors import NexSupplyError
@@ -57,11 +58,74 @@ def get_default_lead_time(market: str, product_category: str = "general") -> Dic
         }
 
 
+def compliance_inputs(result: Dict[str, Any]) -> Optional[Tuple[str, str, str]]:
+    """
+    Arguments enrich_analysis_result passes to check_product_compliance.
+    
+    Returns:
+        (product_name, product_category, channel), or None when compliance is skipped
+    """
+    # Get product name from multiple possible locations
+    product_name = (
+        result.get('ai_context', {}).get('assumptions', {}).get('product_category', '') or
+        result.get('product_name', '') or
+        result.get('ai_context', {}).get('assumptions', {}).get('product_name', '') or
+        ''
+    )
+    product_category = result.get('ai_context', {}).get('assumptions', {}).get('product_category', '')
+    # Get channel from result, fallback to default
+    channel = (
+        result.get('ai_context', {}).get('assumptions', {}).get('channel', '') or
+        result.get('channel', '') or
+        'Amazon FBA'  # Default channel
+    )
+    
+    if product_name or product_category:
+        # Use raw user input if available for better keyword matching
+        search_text = f"{product_name} {product_category}".strip()
+        if search_text:
+            return (search_text, product_category, channel)
+    return None
+
+
+def risk_inputs(result: Dict[str, Any]) -> Optional[Tuple[str, str, str, str]]:
+    """
+    Arguments enrich_analysis_result passes to generate_all_risks.
+    
+    Returns:
+        (product_name, product_category, market, estimated_lead_time), or None when risks are skipped
+    """
+    product_name = (
+        result.get('ai_context', {}).get('assumptions', {}).get('product_category', '') or
+        result.get('product_name', '') or
+        ''
+    )
+    product_category = result.get('ai_context', {}).get('assumptions', {}).get('product_category', '')
+    market = result.get('ai_context', {}).get('assumptions', {}).get('market', 'USA')
+    lead_time = result.get('lead_time', {}).get('estimate', '')
+    
+    if product_name or product_category:
+        return (product_name or product_category, product_category, market, lead_time)
+    return None
+
+
+def _precomputed_value(precomputed: Optional[Dict[str, Any]], name: str, inputs: Any) -> Optional[Any]:
+    """Value computed ahead of time for name, if it was computed from the same inputs."""
+    if not precomputed or name not in precomputed:
+        return None
+    precomputed_inputs, value = precomputed[name]
+    if precomputed_inputs != inputs:
+        logger.info(f"Precomputed {name} used different inputs, recomputing")
+        return None
+    return value
+
+
 def enrich_analysis_result(
     result: Dict[str, Any],
     retail_price: Optional[float] = None,
     include_fba: bool = False,
-    volume: Optional[int] = None
+    volume: Optional[int] = None,
+    precomputed: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
     Enrich analysis result with fallback values and Phase 2 Pro Features.
@@ -71,6 +135,9 @@ def enrich_analysis_result(
         retail_price: Retail price per unit (for FBA calculation)
         include_fba: Whether to include FBA fee calculation
         volume: Order volume (for FBA calculation)
+        precomputed: Optional {"compliance": (inputs, value), "risk": (inputs, value)} computed
+            ahead of time (see services.pipeline_orchestrator). A value is used only if its
+            inputs equal compliance_inputs(result) / risk_inputs(result); otherwise it is recomputed.
         
     Returns:
         Enriched analysis result with fallback values and Pro Features
@@ -101,31 +168,17 @@ def enrich_analysis_result(
             }
     
     # Phase 2: Add Compliance Warnings
-    # Get product name from multiple possible locations
-    product_name = (
-        result.get('ai_context', {}).get('assumptions', {}).get('product_category', '') or
-        result.get('product_name', '') or
-        result.get('ai_context', {}).get('assumptions', {}).get('product_name', '') or
-        ''
-    )
-    product_category = result.get('ai_context', {}).get('assumptions', {}).get('product_category', '')
-    # Get channel from result, fallback to default
-    channel = (
-        result.get('ai_context', {}).get('assumptions', {}).get('channel', '') or
-        result.get('channel', '') or
-        'Amazon FBA'  # Default channel
-    )
-    
-    if product_name or product_category:
-        # Use raw user input if available for better keyword matching
-        search_text = f"{product_name} {product_category}".strip()
-        if search_text:
+    compliance_args = compliance_inputs(result)
+    if compliance_args:
+        compliance_warnings = _precomputed_value(precomputed, 'compliance', compliance_args)
+        if compliance_warnings is None:
+            search_text, product_category, channel = compliance_args
             compliance_warnings = check_product_compliance(
                 product_name=search_text,
                 product_category=product_category,
                 channel=channel
             )
-            result['compliance_warnings'] = compliance_warnings
+        result['compliance_warnings'] = compliance_warnings
     
     # Phase 2: Add FBA Fees if requested
     if include_fba and retail_price and retail_price > 0 and volume:
@@ -218,26 +271,23 @@ def enrich_analysis_result(
     result['risk_analysis'] = risk_analysis
     
     # Phase 3: Add Real-World Risk Engine warnings
-    product_name = (
-        result.get('ai_context', {}).get('assumptions', {}).get('product_category', '') or
-        result.get('product_name', '') or
-        ''
-    )
-    product_category = result.get('ai_context', {}).get('assumptions', {}).get('product_category', '')
-    market = result.get('ai_context', {}).get('assumptions', {}).get('market', 'USA')
-    lead_time = result.get('lead_time', {}).get('estimate', '')
-    
-    if product_name or product_category:
-        try:
-            risk_warnings = generate_all_risks(
-                product_name=product_name or product_category,
-                product_category=product_category,
-                market=market,
-                estimated_lead_time=lead_time
-            )
+    risk_args = risk_inputs(result)
+    if risk_args:
+        risk_warnings = _precomputed_value(precomputed, 'risk', risk_args)
+        if risk_warnings is not None:
             result['risk_warnings'] = risk_warnings
-        except Exception as e:
-            logger.warning(f"Risk engine failed: {e}")
+        else:
+            product_name, product_category, market, lead_time = risk_args
+            try:
+                risk_warnings = generate_all_risks(
+                    product_name=product_name,
+                    product_category=product_category,
+                    market=market,
+                    estimated_lead_time=lead_time
+                )
+                result['risk_warnings'] = risk_warnings
+            except Exception as e:
+                logger.warning(f"Risk engine failed: {e}")
     
     # Phase 3: Validation and Verdict Calculation
     validation_result = None
@@ -363,3 +413,65 @@ def calculate_final_costs(
     except Exception as e:
         raise NexSupplyError(f"Failed to calculate costs: {str(e)}") from e
 
+
+
+def calculate_final_costs_batch(
+    manufacturing: np.ndarray,
+    shipping: np.ndarray,
+    duty: np.ndarray,
+    misc: np.ndarray,
+    volume: np.ndarray,
+    retail_price: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    calculate_final_costs의 벡터화 버전 (run_analysis_batch용)
+    
+    TOTAL/PER-UNIT 판별 휴리스틱과 단가 계산 순서가 calculate_final_costs와 같아서
+    행별 결과가 스펙별 계산과 동일합니다.
+    
+    Args:
+        manufacturing, shipping, duty, misc: 비용 배열
+        volume: 주문 수량 배열
+        retail_price: 소매 가격 배열 (0이면 검증 생략)
+        
+    Returns:
+        unit_ddp, total_project_cost, manufacturing, shipping, duty, misc,
+        _normalized_from_total, invalid 배열 딕셔너리
+        (invalid: 음수 비용 또는 0 이하 수량인 행 - calculate_final_costs가 실패하는 행이며
+        값은 의미 없음)
+    """
+    positive_volume = volume > 0
+    total_cost_sum = manufacturing + shipping + duty + misc
+    
+    # CRITICAL FIX: Detect if costs are TOTAL or PER-UNIT (calculate_final_costs와 동일)
+    looks_total = (manufacturing > 500) | ((retail_price != 0) & (manufacturing > retail_price * 10))
+    estimated_per_unit = np.divide(
+        total_cost_sum, volume, out=np.full(len(volume), np.inf), where=positive_volume
+    )
+    looks_total |= (total_cost_sum > 1000) & (volume > 100) & (estimated_per_unit < 100)
+    is_total_cost = positive_volume & looks_total
+    
+    divisor = np.where(is_total_cost, volume, 1)
+    manufacturing_unit = np.where(is_total_cost, manufacturing / divisor, manufacturing)
+    shipping_unit = np.where(is_total_cost, shipping / divisor, shipping)
+    duty_unit = np.where(is_total_cost, duty / divisor, duty)
+    misc_unit = np.where(is_total_cost, misc / divisor, misc)
+    
+    invalid = (
+        (manufacturing_unit < 0) | (shipping_unit < 0) | (duty_unit < 0) | (misc_unit < 0) |
+        ~positive_volume
+    )
+    
+    # CostBreakdown.unit_ddp와 같은 순서로 합산
+    unit_ddp = manufacturing_unit + shipping_unit + duty_unit + misc_unit
+    
+    return {
+        'unit_ddp': unit_ddp,
+        'total_project_cost': unit_ddp * volume,
+        'manufacturing': manufacturing_unit,
+        'shipping': shipping_unit,
+        'duty': duty_unit,
+        'misc': misc_unit,
+        '_normalized_from_total': is_total_cost,
+        'invalid': invalid
+    }
@@ -0,0 +1,348 @@
+"""
+Pipeline Orchestrator - Overlaps local work with the Stage 2 LLM call
+Runs Stage 1 -> Stage 2 -> enrich_analysis_result -> reference data lookup.
+
+Only the two Gemini calls wait on the network. Everything after them that depends
+only on the Stage 1 parse (reference data resolution, risk engine, compliance rules)
+is started on a thread pool as soon as Stage 1 returns and joined after Stage 2:
+
+    Stage 1 ──> Stage 2 (network) ──────────────> join ──> enrich
+            └─> DAL resolve / risks / compliance ─┘
+
+The speculative results are only used if the final result asks for the same inputs
+(see enrich_analysis_result's precomputed argument); otherwise they are recomputed,
+so the output is always the same as the sequential flow (overlap=False).
+
+Each request runs under the ANALYSIS_SLA_SECONDS deadline. If Gemini is unavailable
+(open circuit breaker, deadline, exhausted retries) the request is answered by the
+deterministic run_analysis path instead.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from core.analysis_engine import run_analysis
+from core.data_access import ReferenceDataBundle, normalize_country_name, resolve_reference_data
+from core.errors import AIServiceError
+from core.models import ShipmentSpec
+from core.nlp_parser import _extract_origin_country, _extract_unit_type, parse_user_input as parse_shipment_spec
+from services.analysis_service import compliance_inputs, enrich_analysis_result, risk_inputs
+from services.compliance import check_product_compliance
+from services.risk_engine import generate_all_risks
+from src.ai_pipeline import _convert_to_legacy_format, analyze_input_pipeline, iter_pipeline_events
+from utils.resilience import analysis_sla_seconds, deadline
+
+logger = logging.getLogger(__name__)
+
+# Threads for speculative local work (override with PIPELINE_LOCAL_WORKERS)
+DEFAULT_PIPELINE_LOCAL_WORKERS = 8
+
+_local_executor: Optional[ThreadPoolExecutor] = None
+_local_executor_lock = threading.Lock()
+
+
+def _get_local_executor() -> ThreadPoolExecutor:
+    global _local_executor
+    if _local_executor is None:
+        with _local_executor_lock:
+            if _local_executor is None:
+                try:
+                    workers = int(os.getenv("PIPELINE_LOCAL_WORKERS", DEFAULT_PIPELINE_LOCAL_WORKERS))
+                except ValueError:
+                    logger.warning("Invalid PIPELINE_LOCAL_WORKERS, using default")
+                    workers = DEFAULT_PIPELINE_LOCAL_WORKERS
+                _local_executor = ThreadPoolExecutor(
+                    max_workers=max(1, workers), thread_name_prefix="pipeline-local"
+                )
+    return _local_executor
+
+
+@dataclass
+class PipelineAnalysis:
+    """
+    Result of run_pipeline_analysis.
+
+    timings (seconds): "total"; "local_work" (summed duration of the local tasks);
+    "join_wait" (time spent waiting for them after Stage 2, 0 when fully hidden).
+
+    fallback_reason is set when Gemini was unavailable; result is then the
+    run_analysis output for the rule-based ShipmentSpec.
+    """
+    result: Dict[str, Any]
+    shipment_spec: Optional[ShipmentSpec] = None
+    reference_data: Optional[ReferenceDataBundle] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    fallback_reason: Optional[str] = None
+
+
+def _stage1_product_name(parsed_data: Dict[str, Any]) -> str:
+    product = str(parsed_data.get('product_category') or '').strip()
+    return '' if product.lower() == 'unknown' else product
+
+
+def _apply_stage1_identity(result: Dict[str, Any], parsed_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Carry the Stage 1 product name into the result (the legacy format drops it)."""
+    product_name = _stage1_product_name(parsed_data)
+    if product_name:
+        result.setdefault('product_name', product_name)
+    return result
+
+
+def shipment_spec_from_parsed(parsed_data: Dict[str, Any], raw_text: Optional[str] = None) -> Optional[ShipmentSpec]:
+    """
+    ShipmentSpec for reference data lookups from a Stage 1 parse.
+
+    Returns:
+        ShipmentSpec, or None if the parse has no product or an invalid quantity
+    """
+    product_name = _stage1_product_name(parsed_data)
+    if not product_name:
+        return None
+    text = raw_text or product_name
+    try:
+        return ShipmentSpec(
+            product_name=product_name,
+            quantity=int(parsed_data.get('detected_volume') or 1000),
+            unit_type=_extract_unit_type(text, parsed_data),
+            origin_country=_extract_origin_country(text, parsed_data),
+            destination_country=normalize_country_name(parsed_data.get('target_market') or 'USA'),
+            channel=parsed_data.get('sales_channel') or None
+        )
+    except Exception as e:
+        logger.warning(f"Could not build ShipmentSpec from Stage 1 parse: {e}")
+        return None
+
+
+def _resolve(spec: Optional[ShipmentSpec]) -> Optional[ReferenceDataBundle]:
+    if spec is None:
+        return None
+    try:
+        return resolve_reference_data(spec, transaction_limit=5)
+    except Exception as e:
+        logger.warning(f"Reference data lookup failed: {e}")
+        return None
+
+
+def _compliance(args: tuple) -> Dict[str, Any]:
+    search_text, product_category, channel = args
+    return check_product_compliance(product_name=search_text, product_category=product_category, channel=channel)
+
+
+def _risks(args: tuple) -> Dict[str, Any]:
+    product_name, product_category, market, lead_time = args
+    return generate_all_risks(
+        product_name=product_name, product_category=product_category, market=market, estimated_lead_time=lead_time
+    )
+
+
+class _LocalWork:
+    """Local tasks started from a Stage 1 parse, running while Stage 2 is in flight."""
+
+    def __init__(self, parsed_data: Dict[str, Any], raw_text: Optional[str]):
+        # Same inputs enrich_analysis_result will derive: the legacy format depends only on parsed_data
+        provisional = _apply_stage1_identity(_convert_to_legacy_format({}, parsed_data), parsed_data)
+        self.spec = shipment_spec_from_parsed(parsed_data, raw_text)
+        self.compliance_args = compliance_inputs(provisional)
+        self.risk_args = risk_inputs(provisional)
+        self.seconds = 0.0
+        self._seconds_lock = threading.Lock()
+
+        executor = _get_local_executor()
+        self.reference_future = executor.submit(self._timed, _resolve, self.spec)
+        self.compliance_future = (
+            executor.submit(self._timed, _compliance, self.compliance_args) if self.compliance_args else None
+        )
+        self.risk_future = executor.submit(self._timed, _risks, self.risk_args) if self.risk_args else None
+
+    def _timed(self, func: Callable[[Any], Any], arg: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return func(arg)
+        finally:
+            with self._seconds_lock:
+                self.seconds += time.perf_counter() - start
+
+    @staticmethod
+    def _value(future: Optional[Future], name: str) -> Optional[Any]:
+        if future is None:
+            return None
+        try:
+            return future.result()
+        except Exception as e:
+            # enrich_analysis_result recomputes (and reports) it
+            logger.warning(f"Speculative {name} failed: {e}")
+            return None
+
+    def join(self) -> Dict[str, Any]:
+        """Wait for all tasks; returns enrich_analysis_result's precomputed argument plus the bundle."""
+        precomputed: Dict[str, Any] = {}
+        compliance = self._value(self.compliance_future, "compliance")
+        if compliance is not None:
+            precomputed['compliance'] = (self.compliance_args, compliance)
+        risks = self._value(self.risk_future, "risk analysis")
+        if risks is not None:
+            precomputed['risk'] = (self.risk_args, risks)
+        return {
+            'precomputed': precomputed,
+            'reference_data': self._value(self.reference_future, "reference data lookup"),
+        }
+
+    def cancel(self) -> None:
+        for future in (self.reference_future, self.compliance_future, self.risk_future):
+            if future is not None:
+                future.cancel()
+
+
+def run_pipeline_analysis(
+    text: Optional[str] = None,
+    image_data: Optional[bytes] = None,
+    image_data_list: Optional[list] = None,
+    api_key: Optional[str] = None,
+    reference_data: Optional[Dict[str, Any]] = None,
+    retail_price: Optional[float] = None,
+    include_fba: bool = False,
+    volume: Optional[int] = None,
+    overlap: bool = True,
+    fallback: bool = True,
+    on_parsed: Optional[Callable[[Dict[str, Any]], None]] = None,
+    on_section: Optional[Callable[[str, Any], None]] = None
+) -> PipelineAnalysis:
+    """
+    2-stage AI analysis, enrichment and reference data lookup for one input.
+
+    Args:
+        text, image_data, image_data_list, api_key, reference_data: As analyze_input_pipeline
+        retail_price, include_fba, volume: As enrich_analysis_result
+        overlap: Run local work concurrently with Stage 2 (False runs it after Stage 2, same result)
+        fallback: Answer with run_analysis when Gemini fails (text input only)
+        on_parsed, on_section: As analyze_input_pipeline (Stage 2 sections are streamed when
+            on_section is given; for drawing from the caller's thread see iter_pipeline_analysis)
+
+    Returns:
+        PipelineAnalysis
+
+    Raises:
+        AIServiceError: If Gemini fails and fallback is off or impossible (image-only input)
+        ParsingError, ValueError: As analyze_input_pipeline
+    """
+    start = time.perf_counter()
+    with deadline(analysis_sla_seconds()):
+        try:
+            return _run_pipeline_analysis(
+                start, text, image_data, image_data_list, api_key, reference_data,
+                retail_price, include_fba, volume, overlap, on_parsed, on_section
+            )
+        except AIServiceError as e:
+            if not fallback or not text:
+                raise
+            logger.warning(f"Gemini unavailable, using deterministic analysis: {e}")
+            return _deterministic_analysis(start, text, str(e))
+
+
+def iter_pipeline_analysis(
+    text: Optional[str] = None,
+    image_data: Optional[bytes] = None,
+    image_data_list: Optional[list] = None,
+    api_key: Optional[str] = None,
+    **kwargs: Any
+) -> Iterator[Tuple[str, Any]]:
+    """
+    run_pipeline_analysis on a worker thread, with its progress yielded on the caller's thread.
+
+    Yields the events of src.ai_pipeline.iter_analysis_sections, ending with
+    ("result", PipelineAnalysis). Keyword arguments are passed to run_pipeline_analysis;
+    the request deadline is the caller's.
+    """
+    return iter_pipeline_events(
+        lambda on_parsed, on_section: run_pipeline_analysis(
+            text=text,
+            image_data=image_data,
+            image_data_list=image_data_list,
+            api_key=api_key,
+            on_parsed=on_parsed,
+            on_section=on_section,
+            **kwargs
+        )
+    )
+
+
+def _deterministic_analysis(start: float, text: str, reason: str) -> PipelineAnalysis:
+    """run_analysis on the rule-based ShipmentSpec (nlp_parser skips Gemini once it fails fast)."""
+    spec = parse_shipment_spec(text)
+    return PipelineAnalysis(
+        result=run_analysis(spec),
+        shipment_spec=spec,
+        timings={'total': time.perf_counter() - start, 'local_work': 0.0, 'join_wait': 0.0},
+        fallback_reason=reason
+    )
+
+
+def _run_pipeline_analysis(
+    start: float,
+    text: Optional[str],
+    image_data: Optional[bytes],
+    image_data_list: Optional[list],
+    api_key: Optional[str],
+    reference_data: Optional[Dict[str, Any]],
+    retail_price: Optional[float],
+    include_fba: bool,
+    volume: Optional[int],
+    overlap: bool,
+    on_parsed: Optional[Callable[[Dict[str, Any]], None]],
+    on_section: Optional[Callable[[str, Any], None]]
+) -> PipelineAnalysis:
+    stage1: Dict[str, Any] = {}
+
+    def start_local_work(parsed_data: Dict[str, Any]) -> None:
+        stage1['parsed_data'] = parsed_data
+        if overlap:
+            stage1['work'] = _LocalWork(parsed_data, text)
+        if on_parsed is not None:
+            on_parsed(parsed_data)
+
+    try:
+        result = analyze_input_pipeline(
+            text=text,
+            image_data=image_data,
+            image_data_list=image_data_list,
+            api_key=api_key,
+            reference_data=reference_data,
+            on_parsed=start_local_work,
+            on_section=on_section
+        )
+    except Exception:
+        if 'work' in stage1:
+            stage1['work'].cancel()
+        raise
+
+    parsed_data = stage1['parsed_data']
+    work = stage1.get('work') or _LocalWork(parsed_data, text)
+
+    join_start = time.perf_counter()
+    joined = work.join()
+    join_wait = time.perf_counter() - join_start
+
+    result = _apply_stage1_identity(result, parsed_data)
+    result = enrich_analysis_result(
+        result,
+        retail_price=retail_price,
+        include_fba=include_fba,
+        volume=volume,
+        precomputed=joined['precomputed']
+    )
+
+    return PipelineAnalysis(
+        result=result,
+        shipment_spec=work.spec,
+        reference_data=joined['reference_data'],
+        timings={
+            'total': time.perf_counter() - start,
+            'local_work': work.seconds,
+            'join_wait': join_wait,
+        }
+    )
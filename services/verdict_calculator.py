@@ -4,6 +4,31 @@ Phase 3: Replaces simple logic with weighted scoring for trust and transparency.
 """
 
 from typing import Dict, Any, Optional, Tuple, Literal, List
+import numpy as np
+
+# Verdict thresholds (score >= GO → GO, score >= CAUTION → CAUTION, else STOP)
+VERDICT_GO_THRESHOLD = 80
+VERDICT_CAUTION_THRESHOLD = 50
+
+# Verdict codes for vectorized scoring (index = code)
+VERDICT_STOP, VERDICT_CAUTION, VERDICT_GO = 0, 1, 2
+VERDICT_LABELS = ("STOP", "CAUTION", "GO")
+
+
+def _risk_points(risk_level: Optional[str]) -> int:
+    """Score contribution of one risk level (Lower risk = Higher score)"""
+    if not risk_level:
+        return 0
+    risk_lower = risk_level.lower()
+    if risk_lower == "low":
+        return 20
+    elif risk_lower in ["medium", "caution"]:
+        return 10
+    elif risk_lower in ["high", "danger"]:
+        return -10
+    elif risk_lower == "critical":
+        return -50
+    return 0
 
 
 def calculate_verdict_score(
@@ -62,39 +87,10 @@ def calculate_verdict_score(
         reasons.append("CRITICAL: Negative Margin")
     
     # Risk scoring (Lower risk = Higher score)
-    if regulatory_risk:
-        risk_lower = regulatory_risk.lower()
-        if risk_lower == "low":
-            score += 20
-        elif risk_lower in ["medium", "caution"]:
-            score += 10
-        elif risk_lower in ["high", "danger"]:
-            score -= 10
-        elif risk_lower == "critical":
-            score -= 50
-            reasons.append("CRITICAL: Regulatory Risk")
-    
-    if logistics_risk:
-        risk_lower = logistics_risk.lower()
-        if risk_lower == "low":
-            score += 20
-        elif risk_lower in ["medium", "caution"]:
-            score += 10
-        elif risk_lower in ["high", "danger"]:
-            score -= 10
-        elif risk_lower == "critical":
-            score -= 50
-    
-    if supplier_risk:
-        risk_lower = supplier_risk.lower()
-        if risk_lower == "low":
-            score += 20
-        elif risk_lower in ["medium", "caution"]:
-            score += 10
-        elif risk_lower in ["high", "danger"]:
-            score -= 10
-        elif risk_lower == "critical":
-            score -= 50
+    for risk_level in (regulatory_risk, logistics_risk, supplier_risk):
+        score += _risk_points(risk_level)
+    if regulatory_risk and regulatory_risk.lower() == "critical":
+        reasons.append("CRITICAL: Regulatory Risk")
     
     # Critical errors (auto-fail)
     if critical_errors:
@@ -104,11 +100,11 @@ def calculate_verdict_score(
                 reasons.append(error)
     
     # Determine verdict
-    if score >= 80:
+    if score >= VERDICT_GO_THRESHOLD:
         verdict_text = "GO (Recommended)"
         verdict_color = "#10b981"  # Green
         verdict_icon = "✅"
-    elif score >= 50:
+    elif score >= VERDICT_CAUTION_THRESHOLD:
         verdict_text = "CAUTION (Check Risks)"
         verdict_color = "#f59e0b"  # Yellow
         verdict_icon = "🟡"
@@ -125,7 +121,7 @@ def calculate_verdict_score(
         verdict_reason = f"Score: {score}"
     
     # Add specific reasons for STOP
-    if score < 50:
+    if score < VERDICT_CAUTION_THRESHOLD:
         if negative_margin:
             verdict_reason = "STOP: Negative Margin - Business not viable"
         elif critical_errors:
@@ -161,6 +157,42 @@ def calculate_verdict_from_analysis(
             negative_margin = True
     
     # Extract risk levels
+    regulatory_risk, logistics_risk, supplier_risk = extract_risk_levels(result)
+    
+    # Get critical errors from validation
+    critical_errors = []
+    if validation_result:
+        critical_errors.extend(validation_result.errors)
+    
+    # Calculate score
+    score, verdict_text, verdict_color, verdict_reason = calculate_verdict_score(
+        margin_percent=margin_percent,
+        regulatory_risk=regulatory_risk,
+        logistics_risk=logistics_risk,
+        supplier_risk=supplier_risk,
+        negative_margin=negative_margin,
+        critical_errors=critical_errors if critical_errors else None
+    )
+    
+    return {
+        'score': score,
+        'verdict': verdict_text,
+        'color': verdict_color,
+        'reason': verdict_reason,
+        'margin_percent': margin_percent,
+        'regulatory_risk': regulatory_risk,
+        'logistics_risk': logistics_risk,
+        'supplier_risk': supplier_risk
+    }
+
+
+def extract_risk_levels(result: Dict[str, Any]) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """
+    Extract (regulatory, logistics, supplier) risk levels from an analysis result.
+    
+    Uses risk_assessment traffic lights when present, otherwise maps the
+    overall risk_analysis level to all three categories.
+    """
     risk_assessment = result.get('risk_assessment', {})
     traffic_lights = risk_assessment.get('traffic_lights', [])
     
@@ -189,29 +221,40 @@ def calculate_verdict_from_analysis(
         else:
             regulatory_risk = logistics_risk = supplier_risk = 'low'
     
-    # Get critical errors from validation
-    critical_errors = []
-    if validation_result:
-        critical_errors.extend(validation_result.errors)
+    return regulatory_risk, logistics_risk, supplier_risk
+
+
+def calculate_verdict_scores(
+    margin_percent: np.ndarray,
+    regulatory_risk: Optional[str] = None,
+    logistics_risk: Optional[str] = None,
+    supplier_risk: Optional[str] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized calculate_verdict_score for a grid of margins (sensitivity sweeps).
     
-    # Calculate score
-    score, verdict_text, verdict_color, verdict_reason = calculate_verdict_score(
-        margin_percent=margin_percent,
-        regulatory_risk=regulatory_risk,
-        logistics_risk=logistics_risk,
-        supplier_risk=supplier_risk,
-        negative_margin=negative_margin,
-        critical_errors=critical_errors if critical_errors else None
-    )
+    Applies the same margin and risk points; validation errors are not part of
+    the grid and are ignored.
     
-    return {
-        'score': score,
-        'verdict': verdict_text,
-        'color': verdict_color,
-        'reason': verdict_reason,
-        'margin_percent': margin_percent,
-        'regulatory_risk': regulatory_risk,
-        'logistics_risk': logistics_risk,
-        'supplier_risk': supplier_risk
-    }
-
+    Args:
+        margin_percent: Array of net profit margin percentages
+        regulatory_risk: Regulatory risk level
+        logistics_risk: Logistics risk level
+        supplier_risk: Supplier risk level
+        
+    Returns:
+        Tuple of (score array, verdict code array - see VERDICT_LABELS)
+    """
+    margin_points = np.select(
+        [margin_percent >= 20, margin_percent >= 10, margin_percent >= 0],
+        [30, 20, 10],
+        default=-100  # -50 for negative margin, -50 more for the CRITICAL flag
+    )
+    risk_points = sum(_risk_points(level) for level in (regulatory_risk, logistics_risk, supplier_risk))
+    scores = margin_points + risk_points
+    verdicts = np.select(
+        [scores >= VERDICT_GO_THRESHOLD, scores >= VERDICT_CAUTION_THRESHOLD],
+        [VERDICT_GO, VERDICT_CAUTION],
+        default=VERDICT_STOP
+    ).astype(np.int8)
+    return scores, verdicts
@@ -5,10 +5,12 @@ Uses Google Gemini 2.5 Flash to analyze user input and generate sourcing reports
 
 import google.generativeai as genai
 from typing import Optional, Dict, Any
-import json
 import os
 from dotenv import load_dotenv
+from core.errors import AIServiceError
 from utils.error_handler import retry_on_failure
+from utils.json_extract import extract_json
+from utils.image_processing import prepare_images
 
 load_dotenv()
 
@@ -106,7 +108,7 @@ def configure_client(api_key: Optional[str] = None) -> None:
             raise ValueError("GEMINI_API_KEY not found. Please provide API key via environment variable or parameter.")
 
 
-@retry_on_failure(max_retries=2, delay=1.0, backoff=2.0, exceptions=(Exception,))
+@retry_on_failure(max_retries=2, delay=1.0, backoff=2.0, exceptions=(AIServiceError,))
 def analyze_input(
     text: Optional[str] = None,
     image_data: Optional[bytes] = None,
@@ -152,61 +154,20 @@ def analyze_input(
     full_prompt = f"{SYSTEM_PROMPT}\n\nUser input:\n{user_input_text}"
     content_parts.append(full_prompt)
     
-    # Add images if provided (support multiple images)
-    import PIL.Image
-    import io
-    
-    # Handle multiple images (new feature)
-    if image_data_list:
-        for img_bytes in image_data_list:
-            try:
-                image = PIL.Image.open(io.BytesIO(img_bytes))
-                content_parts.append(image)
-            except Exception as e:
-                # Skip invalid images
-                continue
-    # Handle single image (backward compatibility)
-    elif image_data:
-        try:
-            image = PIL.Image.open(io.BytesIO(image_data))
-            content_parts.append(image)
-        except Exception as e:
-            pass
+    # Add images if provided (support multiple images): downscaled, re-encoded and
+    # de-duplicated in parallel; invalid images are skipped
+    images = image_data_list if image_data_list else ([image_data] if image_data else [])
+    content_parts.extend(image.to_part() for image in prepare_images(images))
     
     if not content_parts:
         raise ValueError("Either text or image must be provided")
     
-    # Generate response
-    if len(content_parts) == 1:
-        response = model.generate_content(content_parts[0])
-    else:
-        response = model.generate_content(content_parts)
+    # Generate response (shared circuit breaker / deadline; failures raise AIServiceError)
+    from src.ai_pipeline import _generate_text
+    response_text = _generate_text(model, content_parts[0] if len(content_parts) == 1 else content_parts)
     
-    # Extract JSON from response
-    response_text = response.text.strip()
-    
-    # Try to extract JSON if wrapped in markdown code blocks
-    if "```" in response_text:
-        json_start = response_text.find("```json") + 7
-        if json_start < 7:
-            json_start = response_text.find("```") + 3
-        json_end = response_text.rfind("```")
-        response_text = response_text[json_start:json_end].strip()
-    
-    # Parse JSON
-    try:
-        result = json.loads(response_text)
-        return result
-    except json.JSONDecodeError as e:
-        # If JSON parsing fails, try to extract JSON object
-        import re
-        json_match = re.search(r'\{[\s\S]*\}', response_text)
-        if json_match:
-            try:
-                result = json.loads(json_match.group())
-                return result
-            except json.JSONDecodeError:
-                pass
-        
-        raise ValueError(f"Failed to parse JSON from AI response: {e}\nResponse text: {response_text}")
-
+    # Extract JSON from response (code fences, surrounding prose, trailing commas)
+    result = extract_json(response_text)
+    if result is None:
+        raise ValueError(f"Failed to parse JSON from AI response\nResponse text: {response_text}")
+    return result
@@ -5,14 +5,27 @@ Enhanced with robust error handling and response parsing.
 """
 
 import google.generativeai as genai
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Callable, Iterator, Tuple, Union
+import contextvars
+import hashlib
 import json
 import os
-import re
 import logging
+import queue
+import threading
+import time
 from dotenv import load_dotenv
 from core.errors import AIServiceError, ParsingError
 from utils.error_handler import retry_on_failure
+from utils.resilience import get_gemini_caller
+from utils.json_extract import JSONObjectScanner, extract_json
+from utils.image_processing import prepare_images
+from utils.cache import get_response_cache, normalize_text_key, single_flight
+from utils.pipeline_metrics import (
+    PipelineTrace, pipeline_metrics, record_cache_level, record_model_attempt, record_model_usage,
+    record_prompt_savings
+)
+from src.prompt_builder import PROMPT_FORMAT_VERSION, build_stage2_prompt, stage2_token_budget
 
 load_dotenv()
 
@@ -62,6 +75,152 @@ Return ONLY JSON (schema v1.2):
 Focus on calculation, not definitions. User language."""
 
 
+# Stage 2 top-level sections reported to on_section while the response streams in
+STAGE2_SECTIONS = ("cost_breakdown", "channel_strategy", "risk_score", "rfq_draft")
+
+# Response cache levels: Stage 1 keyed on raw input, Stage 2 keyed on canonical parsed_data
+STAGE1_CACHE_NAMESPACE = "stage1"
+STAGE2_CACHE_NAMESPACE = "stage2"
+
+
+def _canonical_json(value: Any) -> str:
+    """Sorted, compact JSON (stable across dict ordering)."""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _prompt_version(prompt: str) -> str:
+    """Short hash of a prompt template (prompt changes invalidate cached responses)."""
+    return hashlib.blake2b(prompt.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def reference_data_version(reference_data: Optional[Dict[str, Any]]) -> str:
+    """Content version of Stage 2 reference data ("default" when none is given)."""
+    if not reference_data:
+        return "default"
+    return hashlib.blake2b(_canonical_json(reference_data).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def canonicalize_parsed_data(parsed_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Canonical form of Stage 1 output for the Stage 2 cache key.
+    
+    Differently worded inputs that parse to the same category/volume/market/channel
+    map to the same dict: strings are case-folded and whitespace-collapsed, the volume
+    is an int and special requirements are a sorted, de-duplicated list.
+    """
+    def canonical(value: Any) -> Any:
+        if isinstance(value, str):
+            return normalize_text_key(value)
+        if isinstance(value, dict):
+            return {str(key): canonical(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [canonical(item) for item in value]
+        return value
+    
+    result = canonical(parsed_data if isinstance(parsed_data, dict) else {})
+    volume = result.get('detected_volume')
+    if isinstance(volume, (int, float, str)):
+        try:
+            result['detected_volume'] = int(float(volume))
+        except ValueError:
+            pass
+    requirements = result.get('special_requirements')
+    if isinstance(requirements, list):
+        unique = {_canonical_json(item): item for item in requirements if item}
+        result['special_requirements'] = [unique[key] for key in sorted(unique)]
+    return result
+
+
+def _stage1_cache_text(text: Optional[str]) -> str:
+    """Stage 1 cache key text: parser prompt version + raw text (images are keyed separately)."""
+    return f"{_prompt_version(STAGE1_PARSER_PROMPT)}\x00{text or ''}"
+
+
+def _is_cacheable_analysis(analysis: Any) -> bool:
+    """Stage 2 output worth caching (not the fallback structure returned when JSON extraction failed)."""
+    return isinstance(analysis, dict) and '_parsing_error' not in analysis
+
+
+def _stage2_cache_text(parsed_data: Dict[str, Any], reference_data: Optional[Dict[str, Any]]) -> str:
+    """Stage 2 cache key text: canonical parsed_data + reference data version + prompt version / format / budget."""
+    return _canonical_json({
+        "parsed_data": canonicalize_parsed_data(parsed_data),
+        "reference_version": reference_data_version(reference_data),
+        "prompt": _prompt_version(STAGE2_ANALYST_PROMPT),
+        "prompt_format": PROMPT_FORMAT_VERSION,
+        "token_budget": stage2_token_budget(),
+    })
+
+
+def _cached_single_flight(
+    namespace: str,
+    text: str,
+    image_data: Any,
+    compute: Callable[[], Any],
+    cacheable: Callable[[Any], bool]
+) -> Any:
+    """
+    Cached call coalesced per key across concurrent callers.
+    
+    The flight leader checks the cache and, on a miss, computes and stores the result
+    if cacheable(result). Checking inside the flight means a caller arriving just after
+    a flight finished reads the stored result instead of recomputing. Failures reach
+    every waiter and leave the cache untouched. The cache level that answered is
+    recorded on the active pipeline trace.
+    """
+    cache = get_response_cache(namespace)
+    led = []
+    
+    def call() -> Any:
+        led.append(True)
+        cached = cache.get(text=text, image_data=image_data)
+        if cached is not None:
+            logger.info(f"Response cache hit ({namespace})")
+            record_cache_level("hit")
+            return cached
+        record_cache_level("miss")
+        value = compute()
+        if cacheable(value):
+            cache.set(text=text, image_data=image_data, response=value)
+        return value
+    
+    value = single_flight.do(cache.key_for(text, image_data), call)
+    if not led:
+        record_cache_level("coalesced")
+    return value
+
+
+def get_pipeline_cache_stats() -> Dict[str, Any]:
+    """
+    Cache statistics for both pipeline levels.
+    
+    Returns:
+        {"stage1": ..., "stage2": ..., "stage2_calls_avoided": int, "stage2_avoided_rate": float,
+         "single_flight": ...}
+        stage2_calls_avoided counts Stage 2 cache hits (each one is an analyst call not made);
+        single_flight counts calls coalesced onto an identical in-flight call.
+    """
+    stage1 = get_response_cache(STAGE1_CACHE_NAMESPACE).get_stats()
+    stage2 = get_response_cache(STAGE2_CACHE_NAMESPACE).get_stats()
+    stage2_lookups = stage2.get("hits", 0) + stage2.get("misses", 0)
+    return {
+        "stage1": stage1,
+        "stage2": stage2,
+        "stage2_calls_avoided": stage2.get("hits", 0),
+        "stage2_avoided_rate": stage2.get("hits", 0) / stage2_lookups if stage2_lookups else 0.0,
+        "single_flight": single_flight.get_stats(),
+    }
+
+
+def get_pipeline_metrics() -> Dict[str, Any]:
+    """
+    Aggregated per-request accounting (see utils.pipeline_metrics.PipelineMetrics.get_stats):
+    tokens, cost, retries and cache levels per stage, with p50 / p95 / p99 latencies.
+    Failed requests are included and counted by error type.
+    """
+    return pipeline_metrics.get_stats()
+
+
 def configure_client(api_key: Optional[str] = None) -> None:
     """Configure the Gemini API client with API key."""
     if api_key:
@@ -74,89 +233,234 @@ def configure_client(api_key: Optional[str] = None) -> None:
             raise ValueError("GEMINI_API_KEY not found. Provide via environment variable or parameter.")
 
 
-def _extract_json_from_text(text: str) -> Optional[Dict[str, Any]]:
+def _stage1_images(image_data: Union[bytes, List[bytes], None]) -> List[bytes]:
+    """Uploaded image bytes as a list (single image or image_data_list)."""
+    if isinstance(image_data, (list, tuple)):
+        return [data for data in image_data if data]
+    return [image_data] if image_data else []
+
+
+def _build_stage1_contents(raw_text: Optional[str], image_data: Union[bytes, List[bytes], None]) -> List[Any]:
     """
-    Robust JSON extraction from text with multiple fallback methods.
+    Build Stage 1 request contents: prompt + every image as inline data.
     
-    Args:
-        text: Text that may contain JSON
-        
-    Returns:
-        Parsed JSON dict or None if extraction fails
+    Images are downscaled, re-encoded and de-duplicated in parallel
+    (utils.image_processing.prepare_images); undecodable images are skipped.
     """
-    if not text:
-        return None
+    content_parts = []
+    user_input = raw_text if raw_text else "이미지를 분석해주세요."
+    prompt = f"{STAGE1_PARSER_PROMPT}\n\nUser input:\n{user_input}"
+    content_parts.append(prompt)
+    
+    images = _stage1_images(image_data)
+    if images:
+        prepared = prepare_images(images)
+        content_parts.extend(image.to_part() for image in prepared)
+        logger.info(
+            f"Stage 1 images: {len(prepared)} of {len(images)} sent, "
+            f"{sum(len(data) for data in images)} -> {sum(len(image.data) for image in prepared)} bytes"
+        )
+    
+    return content_parts
+
+
+def _parse_stage1_response(response_text: str, raw_text: Optional[str]) -> Dict[str, Any]:
+    """Turn Stage 1 response text into parsed_data (JSON extraction, defaults, rule-based override)."""
+    # Parse JSON with robust extraction
+    parsed = extract_json(response_text)
+    
+    # Fallback to empty dict if all parsing methods fail
+    if parsed is None:
+        logger.warning(f"Failed to parse JSON from response. Response preview: {response_text[:200]}")
+        parsed = {}
     
-    # Method 1: Direct JSON parse
+    return _normalize_stage1(parsed, raw_text)
+
+
+def _normalize_stage1(parsed: Dict[str, Any], raw_text: Optional[str]) -> Dict[str, Any]:
+    """Stage 1 defaults and rule-based override for one extracted JSON object."""
+    # Apply defaults
+    parsed.setdefault('detected_volume', 1000)
+    parsed.setdefault('target_market', 'USA')
+    parsed.setdefault('sales_channel', 'Amazon FBA')
+    parsed.setdefault('special_requirements', [])
+    parsed.setdefault('product_category', 'Unknown')
+    
+    # Validate parsed data
+    if not isinstance(parsed, dict):
+        logger.error(f"Parsed data is not a dict: {type(parsed)}")
+        parsed = {}
+    
+    # CRITICAL: Override LLM parsing with Python rule-based parser
     try:
-        return json.loads(text.strip())
-    except json.JSONDecodeError:
-        pass
-    
-    # Method 2: Extract from markdown code blocks
-    if "```" in text:
-        # Try ```json first
-        json_start = text.find("```json")
-        if json_start != -1:
-            json_start += 7
-        else:
-            # Try ``` without language
-            json_start = text.find("```")
-            if json_start != -1:
-                json_start += 3
-        
-        if json_start != -1:
-            json_end = text.rfind("```")
-            if json_end > json_start:
-                json_text = text[json_start:json_end].strip()
-                try:
-                    return json.loads(json_text)
-                except json.JSONDecodeError:
-                    pass
-    
-    # Method 3: Extract JSON object with regex (greedy)
-    json_match = re.search(r'\{[\s\S]*\}', text)
-    if json_match:
-        try:
-            return json.loads(json_match.group())
-        except json.JSONDecodeError:
-            pass
+        from src.parser import normalize_input
+        if raw_text:
+            parsed = normalize_input(raw_text, parsed)
+    except ImportError:
+        logger.debug("Parser module not available, using LLM results as-is")
+    except Exception as e:
+        logger.warning(f"Parser normalization failed: {e}")
+    
+    return parsed
+
+
+def _build_stage2_prompt(parsed_data: Dict[str, Any], reference_data: Optional[Dict[str, Any]]) -> str:
+    """
+    Build the Stage 2 analyst prompt (compact, within STAGE2_PROMPT_TOKEN_BUDGET).
     
-    # Method 4: Find balanced braces (most robust for nested JSON)
+    The estimated tokens saved against the indented-JSON prompt are recorded on the
+    active pipeline trace.
+    """
+    prompt = build_stage2_prompt(STAGE2_ANALYST_PROMPT, parsed_data, reference_data, stage2_token_budget())
+    if prompt.rows_dropped:
+        logger.info(f"Stage 2 prompt: dropped {prompt.rows_dropped} reference rows to fit the token budget")
+    record_prompt_savings(prompt.tokens_saved)
+    return prompt.text
+
+
+def _parse_stage2_response(response_text: str) -> Dict[str, Any]:
+    """Turn Stage 2 response text into the analysis dict (default structure if JSON extraction fails)."""
+    # Parse JSON with robust extraction
+    analysis = extract_json(response_text)
+    json_errors = []
+    
+    # If all parsing methods failed, return default structure
+    if analysis is None:
+        logger.warning(f"Failed to parse JSON from analysis response. Response preview: {response_text[:500]}")
+        json_errors.append("All JSON extraction methods failed")
+        
+        # Return a default structure to prevent complete failure
+        analysis = {
+            "meta": {"schema_version": "v1.2", "model": "gemini-2.5-flash", "parsing_failed": True},
+            "cost_breakdown": {
+                "manufacturing": {"low": 0, "base": 0, "high": 0},
+                "logistics": {"freight": 0, "duty": 0},
+                "total_landed_cost": 0,
+                "currency": "USD"
+            },
+            "channel_strategy": {
+                "amazon_fba": {"margin": 0, "recommendation": "Unable to analyze - parsing error"},
+                "wholesale": {"margin": 0, "recommendation": "Unable to analyze - parsing error"}
+            },
+            "risk_score": {
+                "regulatory": {"score": 50, "reason": "Unable to analyze - parsing error"},
+                "supply_chain": {"score": 50, "reason": "Unable to analyze - parsing error"}
+            },
+            "rfq_draft": "Unable to generate RFQ due to parsing error",
+            "_parsing_error": {
+                "message": "Failed to parse JSON from Gemini response",
+                "errors": json_errors,
+                "response_preview": response_text[:500] if response_text else "No response text"
+            }
+        }
+    else:
+        # Validate analysis structure
+        if not isinstance(analysis, dict):
+            logger.error(f"Analysis is not a dict: {type(analysis)}")
+            analysis = {}
+    
+    return analysis
+
+
+def _generate_text(model: Any, contents: Any) -> str:
+    """
+    One Gemini call through the shared circuit breaker / hedging / deadline policy.
+    
+    Raises:
+        AIServiceError: On failure (CircuitOpenError / DeadlineExceeded keep their type)
+    """
+    record_model_attempt()
+    started = time.perf_counter()
     try:
-        brace_count = 0
-        start_idx = text.find('{')
-        if start_idx != -1:
-            for i in range(start_idx, len(text)):
-                if text[i] == '{':
-                    brace_count += 1
-                elif text[i] == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        json_str = text[start_idx:i+1]
-                        return json.loads(json_str)
-    except (json.JSONDecodeError, ValueError, IndexError):
-        pass
-    
-    # Method 5: Try to fix common JSON issues
-    # Remove trailing commas, fix single quotes, etc.
+        response = get_gemini_caller().call(lambda: model.generate_content(contents))
+    except AIServiceError:
+        raise
+    except Exception as e:
+        logger.error(f"Gemini API call failed: {e}")
+        raise AIServiceError(f"Failed to call Gemini API: {str(e)}") from e
+    
+    if not response or not response.text:
+        raise AIServiceError("Empty response from Gemini API")
+    record_model_usage(
+        contents, response.text, getattr(response, 'usage_metadata', None), time.perf_counter() - started
+    )
+    return response.text.strip()
+
+
+def _generate_text_stream(model: Any, contents: Any, on_text: Callable[[str], Any]) -> str:
+    """
+    Streaming variant of _generate_text: on_text receives each chunk as it arrives.
+    
+    Not hedged (a second attempt would replay chunks into on_text).
+    
+    Raises:
+        AIServiceError: On failure (CircuitOpenError / DeadlineExceeded keep their type)
+    """
+    def consume() -> Tuple[str, Any]:
+        parts = []
+        usage = None
+        for chunk in model.generate_content(contents, stream=True):
+            usage = getattr(chunk, 'usage_metadata', None) or usage  # complete on the last chunk
+            try:
+                text = chunk.text
+            except ValueError:
+                continue  # chunk without text parts (e.g. finish reason only)
+            if text:
+                parts.append(text)
+                on_text(text)
+        return ''.join(parts), usage
+    
+    record_model_attempt()
+    started = time.perf_counter()
     try:
-        # Remove trailing commas before closing braces/brackets
-        fixed_text = re.sub(r',(\s*[}\]])', r'\1', text)
-        # Replace single quotes with double quotes (simple cases)
-        fixed_text = re.sub(r"'([^']*)':", r'"\1":', fixed_text)
-        fixed_text = re.sub(r":\s*'([^']*)'", r': "\1"', fixed_text)
-        return json.loads(fixed_text)
-    except (json.JSONDecodeError, ValueError):
-        pass
+        response_text, usage = get_gemini_caller().call(consume, hedge=False)
+    except AIServiceError:
+        raise
+    except Exception as e:
+        logger.error(f"Gemini API call failed: {e}")
+        raise AIServiceError(f"Failed to call Gemini API: {str(e)}") from e
     
-    return None
+    if not response_text.strip():
+        raise AIServiceError("Empty response from Gemini API")
+    record_model_usage(contents, response_text, usage, time.perf_counter() - started)
+    return response_text.strip()
 
 
-@retry_on_failure(max_retries=2, delay=1.0, backoff=2.0, exceptions=(AIServiceError, Exception))
+class _SectionEmitter:
+    """
+    Forwards each Stage 2 section to on_section (streamed, or from the final analysis).
+    
+    A section is reported again only with a different value: a streamed attempt that
+    fails and is retried may have shown sections the successful attempt replaces (or,
+    reported as None, drops).
+    """
+    
+    def __init__(self, on_section: Callable[[str, Any], None]):
+        self._on_section = on_section
+        self._emitted: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+    
+    def __call__(self, name: str, value: Any) -> None:
+        with self._lock:
+            if name not in STAGE2_SECTIONS or (name in self._emitted and self._emitted[name] == value):
+                return
+            self._emitted[name] = value
+        self._on_section(name, value)
+    
+    def flush(self, analysis: Any) -> None:
+        """Sections not streamed (cache hit, coalesced call, parsing fallback) or streamed by a failed attempt."""
+        if isinstance(analysis, dict):
+            for name in STAGE2_SECTIONS:
+                if name in analysis:
+                    self(name, analysis[name])
+                elif name in self._emitted:
+                    self(name, None)
+
+
+@retry_on_failure(max_retries=2, delay=1.0, backoff=2.0, exceptions=(AIServiceError,))
 def parse_user_input(
     raw_text: Optional[str] = None,
-    image_data: Optional[bytes] = None,
+    image_data: Union[bytes, List[bytes], None] = None,
     api_key: Optional[str] = None
 ) -> Dict[str, Any]:
     """
@@ -165,7 +469,7 @@ def parse_user_input(
     
     Args:
         raw_text: User input text
-        image_data: Optional image bytes
+        image_data: Optional image bytes, or a list of images (all sent in one request)
         api_key: Optional API key override
     
     Returns:
@@ -179,67 +483,10 @@ def parse_user_input(
         configure_client(api_key)
         model = genai.GenerativeModel('gemini-2.5-flash')
         
-        content_parts = []
-        user_input = raw_text if raw_text else "이미지를 분석해주세요."
-        prompt = f"{STAGE1_PARSER_PROMPT}\n\nUser input:\n{user_input}"
-        content_parts.append(prompt)
-        
-        if image_data:
-            try:
-                import PIL.Image
-                import io
-                image = PIL.Image.open(io.BytesIO(image_data))
-                content_parts.append(image)
-            except Exception as e:
-                logger.warning(f"Failed to process image: {e}")
-                # Continue without image
-        
-        # Generate response with error handling
-        try:
-            if len(content_parts) == 1:
-                response = model.generate_content(content_parts[0])
-            else:
-                response = model.generate_content(content_parts)
-            
-            if not response or not response.text:
-                raise AIServiceError("Empty response from Gemini API")
-            
-            response_text = response.text.strip()
-        except Exception as e:
-            logger.error(f"Gemini API call failed: {e}")
-            raise AIServiceError(f"Failed to call Gemini API: {str(e)}") from e
-        
-        # Parse JSON with robust extraction
-        parsed = _extract_json_from_text(response_text)
-        
-        # Fallback to empty dict if all parsing methods fail
-        if parsed is None:
-            logger.warning(f"Failed to parse JSON from response. Response preview: {response_text[:200]}")
-            parsed = {}
-        
-        # Apply defaults
-        parsed.setdefault('detected_volume', 1000)
-        parsed.setdefault('target_market', 'USA')
-        parsed.setdefault('sales_channel', 'Amazon FBA')
-        parsed.setdefault('special_requirements', [])
-        parsed.setdefault('product_category', 'Unknown')
-        
-        # Validate parsed data
-        if not isinstance(parsed, dict):
-            logger.error(f"Parsed data is not a dict: {type(parsed)}")
-            parsed = {}
-        
-        # CRITICAL: Override LLM parsing with Python rule-based parser
-        try:
-            from src.parser import normalize_input
-            if raw_text:
-                parsed = normalize_input(raw_text, parsed)
-        except ImportError:
-            logger.debug("Parser module not available, using LLM results as-is")
-        except Exception as e:
-            logger.warning(f"Parser normalization failed: {e}")
+        content_parts = _build_stage1_contents(raw_text, image_data)
+        response_text = _generate_text(model, content_parts[0] if len(content_parts) == 1 else content_parts)
         
-        return parsed
+        return _parse_stage1_response(response_text, raw_text)
         
     except AIServiceError:
         raise
@@ -248,11 +495,12 @@ def parse_user_input(
         raise ParsingError(f"Failed to parse user input: {str(e)}") from e
 
 
-@retry_on_failure(max_retries=2, delay=1.0, backoff=2.0, exceptions=(AIServiceError, Exception))
+@retry_on_failure(max_retries=2, delay=1.0, backoff=2.0, exceptions=(AIServiceError,))
 def generate_analysis_report(
     parsed_data: Dict[str, Any],
     reference_data: Optional[Dict[str, Any]] = None,
-    api_key: Optional[str] = None
+    api_key: Optional[str] = None,
+    on_section: Optional[Callable[[str, Any], None]] = None
 ) -> Dict[str, Any]:
     """
     Stage 2: Deep & Logical Analyst
@@ -262,6 +510,9 @@ def generate_analysis_report(
         parsed_data: Output from Stage 1 Parser
         reference_data: Optional reference data (cost ranges, etc.)
         api_key: Optional API key override
+        on_section: Optional callback; streams the response and is called with each
+            top-level section (name, value) as soon as it is complete. A retried call
+            reports its sections again.
     
     Returns:
         Dictionary with comprehensive analysis
@@ -273,79 +524,14 @@ def generate_analysis_report(
         configure_client(api_key)
         model = genai.GenerativeModel('gemini-2.5-flash')
         
-        # Prepare reference data
-        if reference_data is None:
-            reference_data = {
-                "typical_mfg_range": "0.5-5.0 USD per unit",
-                "typical_freight": "500-2000 USD per container",
-                "typical_duty_rate": "0-25% based on HS code"
-            }
-        
-        # Build prompt with parsed data and reference
-        try:
-            prompt = STAGE2_ANALYST_PROMPT.format(
-                parsed_data=json.dumps(parsed_data, indent=2, ensure_ascii=False),
-                reference_data=json.dumps(reference_data, indent=2, ensure_ascii=False)
-            )
-        except Exception as e:
-            logger.warning(f"Failed to format prompt: {e}, using fallback")
-            prompt = STAGE2_ANALYST_PROMPT.format(
-                parsed_data=str(parsed_data),
-                reference_data=str(reference_data)
-            )
-        
-        # Generate response with error handling
-        try:
-            response = model.generate_content(prompt)
-            
-            if not response or not response.text:
-                raise AIServiceError("Empty response from Gemini API")
-            
-            response_text = response.text.strip()
-        except Exception as e:
-            logger.error(f"Gemini API call failed in generate_analysis_report: {e}")
-            raise AIServiceError(f"Failed to call Gemini API: {str(e)}") from e
-        
-        # Parse JSON with robust extraction
-        analysis = _extract_json_from_text(response_text)
-        json_errors = []
-        
-        # If all parsing methods failed, return default structure
-        if analysis is None:
-            logger.warning(f"Failed to parse JSON from analysis response. Response preview: {response_text[:500]}")
-            json_errors.append("All JSON extraction methods failed")
-            
-            # Return a default structure to prevent complete failure
-            analysis = {
-                "meta": {"schema_version": "v1.2", "model": "gemini-2.5-flash", "parsing_failed": True},
-                "cost_breakdown": {
-                    "manufacturing": {"low": 0, "base": 0, "high": 0},
-                    "logistics": {"freight": 0, "duty": 0},
-                    "total_landed_cost": 0,
-                    "currency": "USD"
-                },
-                "channel_strategy": {
-                    "amazon_fba": {"margin": 0, "recommendation": "Unable to analyze - parsing error"},
-                    "wholesale": {"margin": 0, "recommendation": "Unable to analyze - parsing error"}
-                },
-                "risk_score": {
-                    "regulatory": {"score": 50, "reason": "Unable to analyze - parsing error"},
-                    "supply_chain": {"score": 50, "reason": "Unable to analyze - parsing error"}
-                },
-                "rfq_draft": "Unable to generate RFQ due to parsing error",
-                "_parsing_error": {
-                    "message": "Failed to parse JSON from Gemini response",
-                    "errors": json_errors,
-                    "response_preview": response_text[:500] if response_text else "No response text"
-                }
-            }
+        prompt = _build_stage2_prompt(parsed_data, reference_data)
+        if on_section is None:
+            response_text = _generate_text(model, prompt)
         else:
-            # Validate analysis structure
-            if not isinstance(analysis, dict):
-                logger.error(f"Analysis is not a dict: {type(analysis)}")
-                analysis = {}
+            scanner = JSONObjectScanner(on_member=on_section)
+            response_text = _generate_text_stream(model, prompt, scanner.feed)
         
-        return analysis
+        return _parse_stage2_response(response_text)
         
     except AIServiceError:
         raise
@@ -433,26 +619,105 @@ def validate_response(json_data: Dict[str, Any]) -> Dict[str, Any]:
     return validation_result
 
 
+def _assemble_pipeline_result(
+    parsed_data: Dict[str, Any],
+    analysis: Any,
+    trace: Optional[PipelineTrace] = None
+) -> Dict[str, Any]:
+    """
+    Layer 3 validation + legacy format conversion of Stage 1/2 outputs.
+    
+    The legacy result carries result['_pipeline'] (parsed_data, validation, and the
+    request's trace as 'metrics'). Recording the trace in get_pipeline_metrics() is the
+    caller's job (pipeline_metrics.track), so failed requests are counted as well.
+    """
+    trace = trace or PipelineTrace()
+    
+    # Validate analysis
+    if not isinstance(analysis, dict):
+        logger.warning(f"Analysis is not a dict, using empty dict: {type(analysis)}")
+        analysis = {}
+    
+    # Layer 3: Validate
+    with trace.stage("validation"):
+        try:
+            validation = validate_response(analysis)
+        except Exception as e:
+            logger.warning(f"Validation failed: {e}, continuing without validation")
+            validation = {
+                'is_valid': True,
+                'warnings': [f"Validation error: {str(e)}"],
+                'errors': []
+            }
+    
+    # Merge parsed data into result for backward compatibility
+    validation_data = validation.get('data', {})
+    if not isinstance(validation_data, dict):
+        validation_data = analysis  # Fallback to analysis if validation_data is invalid
+    
+    result = validation_data.copy()
+    pipeline_info = {
+        'parsed_data': parsed_data if isinstance(parsed_data, dict) else {},
+        'validation': {
+            'is_valid': validation.get('is_valid', False),
+            'warnings': validation.get('warnings', []),
+            'errors': validation.get('errors', [])
+        }
+    }
+    result['_pipeline'] = pipeline_info
+    
+    # Convert to backward-compatible format
+    with trace.stage("legacy_conversion"):
+        try:
+            result = _convert_to_legacy_format(result, parsed_data)
+        except Exception as e:
+            logger.warning(f"Legacy format conversion failed: {e}, using result as-is")
+    
+    pipeline_info['metrics'] = trace.finish().to_dict()
+    result['_pipeline'] = pipeline_info
+    return result
+
+
 def analyze_input_pipeline(
     text: Optional[str] = None,
     image_data: Optional[bytes] = None,
     image_data_list: Optional[list] = None,
     api_key: Optional[str] = None,
-    reference_data: Optional[Dict[str, Any]] = None
+    reference_data: Optional[Dict[str, Any]] = None,
+    on_parsed: Optional[Callable[[Dict[str, Any]], None]] = None,
+    on_section: Optional[Callable[[str, Any], None]] = None
 ) -> Dict[str, Any]:
     """
     Main Pipeline Function - Orchestrates 2-Stage Pipeline + Validation
     
     Flow:
-    1. Stage 1: Parse user input (fast, cheap)
+    1. Stage 1: Parse user input (fast, cheap); all images are prepared in parallel
+       (downscaled, re-encoded, de-duplicated) and sent in one request
     2. Stage 2: Generate analysis report (deep, logical)
     3. Layer 3: Validate response (sanity checks)
     
+    Both Gemini calls are cached (see get_pipeline_cache_stats):
+    - Stage 1 by normalized text + image content
+    - Stage 2 by canonical parsed_data + reference data version, so differently
+      worded inputs that parse the same way skip the analyst call
+    Concurrent identical requests share one in-flight call per stage (utils.cache.single_flight).
+    Tokens, wall time, retries and cache level per stage are returned in
+    result['_pipeline']['metrics'] and aggregated in get_pipeline_metrics().
+    
     Args:
         text: User input text
         image_data: Optional image bytes
         api_key: Optional API key override
         reference_data: Optional reference data for Stage 2
+        on_parsed: Optional callback with the Stage 1 result, called before Stage 2 starts
+            (used to start local work that overlaps the Stage 2 call; must not block)
+        on_section: Optional callback with each Stage 2 section (STAGE2_SECTIONS, raw
+            schema v1.2 values) as soon as it is available; Stage 2 is then streamed.
+            Every section present in the analysis is reported, also on cache hits and
+            coalesced calls; a section is reported again only if a retried Stage 2 call
+            replaces what a failed streamed attempt reported (None if the analysis has no
+            such section), so the last value reported is the analysis' value. May be
+            called from a worker thread.
     
     Returns:
         Dictionary with analysis result and validation info
@@ -467,75 +732,58 @@ def analyze_input_pipeline(
         if not text and not image_data and not (image_data_list and len(image_data_list) > 0):
             raise ValueError("Either text or image_data must be provided")
         
-        # Stage 1: Parse input
-        # Use image_data_list if available, otherwise fallback to image_data
-        image_to_use = image_data_list[0] if image_data_list and len(image_data_list) > 0 else image_data
-        try:
-            parsed_data = parse_user_input(raw_text=text, image_data=image_to_use, api_key=api_key)
-        except (AIServiceError, ParsingError) as e:
-            logger.error(f"Stage 1 (parsing) failed: {e}")
-            raise
-        except Exception as e:
-            logger.error(f"Unexpected error in Stage 1: {e}", exc_info=True)
-            raise ParsingError(f"Failed to parse user input: {str(e)}") from e
+        with pipeline_metrics.track() as trace:
+            # Stage 1: Parse input
+            # Every image of image_data_list (otherwise image_data) goes into one Stage 1 request
+            image_to_use = _stage1_images(image_data_list) or _stage1_images(image_data) or None
+            try:
+                with trace.stage("stage1"):
+                    parsed_data = _cached_single_flight(
+                        STAGE1_CACHE_NAMESPACE, _stage1_cache_text(text), image_to_use,
+                        lambda: parse_user_input(raw_text=text, image_data=image_to_use, api_key=api_key),
+                        lambda value: isinstance(value, dict)
+                    )
+            except (AIServiceError, ParsingError) as e:
+                logger.error(f"Stage 1 (parsing) failed: {e}")
+                raise
+            except Exception as e:
+                logger.error(f"Unexpected error in Stage 1: {e}", exc_info=True)
+                raise ParsingError(f"Failed to parse user input: {str(e)}") from e
         
-        # Validate parsed_data
-        if not isinstance(parsed_data, dict):
-            logger.warning(f"Parsed data is not a dict, converting: {type(parsed_data)}")
-            parsed_data = {}
+            # Validate parsed_data
+            if not isinstance(parsed_data, dict):
+                logger.warning(f"Parsed data is not a dict, converting: {type(parsed_data)}")
+                parsed_data = {}
         
-        # Stage 2: Generate analysis
-        try:
-            analysis = generate_analysis_report(
-                parsed_data=parsed_data,
-                reference_data=reference_data,
-                api_key=api_key
-            )
-        except AIServiceError as e:
-            logger.error(f"Stage 2 (analysis) failed: {e}")
-            raise
-        except Exception as e:
-            logger.error(f"Unexpected error in Stage 2: {e}", exc_info=True)
-            raise AIServiceError(f"Failed to generate analysis: {str(e)}") from e
+            if on_parsed is not None:
+                on_parsed(parsed_data)
         
-        # Validate analysis
-        if not isinstance(analysis, dict):
-            logger.warning(f"Analysis is not a dict, using empty dict: {type(analysis)}")
-            analysis = {}
-        
-        # Layer 3: Validate
-        try:
-            validation = validate_response(analysis)
-        except Exception as e:
-            logger.warning(f"Validation failed: {e}, continuing without validation")
-            validation = {
-                'is_valid': True,
-                'warnings': [f"Validation error: {str(e)}"],
-                'errors': []
-            }
-        
-        # Merge parsed data into result for backward compatibility
-        validation_data = validation.get('data', {})
-        if not isinstance(validation_data, dict):
-            validation_data = analysis  # Fallback to analysis if validation_data is invalid
-        
-        result = validation_data.copy()
-        result['_pipeline'] = {
-            'parsed_data': parsed_data if isinstance(parsed_data, dict) else {},
-            'validation': {
-                'is_valid': validation.get('is_valid', False),
-                'warnings': validation.get('warnings', []),
-                'errors': validation.get('errors', [])
-            }
-        }
+            # Stage 2: Generate analysis
+            emit = _SectionEmitter(on_section) if on_section is not None else None
+            stream_kwargs = {'on_section': emit} if emit is not None else {}
+            try:
+                with trace.stage("stage2"):
+                    analysis = _cached_single_flight(
+                        STAGE2_CACHE_NAMESPACE, _stage2_cache_text(parsed_data, reference_data), None,
+                        lambda: generate_analysis_report(
+                            parsed_data=parsed_data,
+                            reference_data=reference_data,
+                            api_key=api_key,
+                            **stream_kwargs
+                        ),
+                        _is_cacheable_analysis
+                    )
+            except AIServiceError as e:
+                logger.error(f"Stage 2 (analysis) failed: {e}")
+                raise
+            except Exception as e:
+                logger.error(f"Unexpected error in Stage 2: {e}", exc_info=True)
+                raise AIServiceError(f"Failed to generate analysis: {str(e)}") from e
         
-        # Convert to backward-compatible format
-        try:
-            result = _convert_to_legacy_format(result, parsed_data)
-        except Exception as e:
-            logger.warning(f"Legacy format conversion failed: {e}, using result as-is")
+            if emit is not None:
+                emit.flush(analysis)
         
-        return result
+            return _assemble_pipeline_result(parsed_data, analysis, trace)
         
     except (AIServiceError, ParsingError, ValueError):
         raise
@@ -544,6 +792,73 @@ def analyze_input_pipeline(
         raise ValueError(f"Pipeline error: {str(e)}") from e
 
 
+def iter_analysis_sections(
+    text: Optional[str] = None,
+    image_data: Optional[bytes] = None,
+    image_data_list: Optional[list] = None,
+    api_key: Optional[str] = None,
+    reference_data: Optional[Dict[str, Any]] = None
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Run analyze_input_pipeline on a worker thread and yield its progress on the caller's thread.
+    
+    For UIs that can only draw from their own thread (Streamlit): yields ("parsed", parsed_data)
+    after Stage 1, (section, value) for each Stage 2 section as it streams in, and finally
+    ("result", result) with the analyze_input_pipeline result. Pipeline errors are re-raised
+    from the iterator.
+    
+    The pipeline runs under the caller's deadline (utils.resilience.deadline). Stopping early
+    does not cancel the in-flight Gemini call; it finishes in the background and its result
+    still lands in the response cache.
+    """
+    return iter_pipeline_events(
+        lambda on_parsed, on_section: analyze_input_pipeline(
+            text=text,
+            image_data=image_data,
+            image_data_list=image_data_list,
+            api_key=api_key,
+            reference_data=reference_data,
+            on_parsed=on_parsed,
+            on_section=on_section
+        )
+    )
+
+
+def iter_pipeline_events(
+    run: Callable[[Callable[[Dict[str, Any]], None], Callable[[str, Any], None]], Any]
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Event iterator of iter_analysis_sections for any pipeline entry point.
+    
+    Args:
+        run: Called on the worker thread with (on_parsed, on_section) callbacks to pass to
+            analyze_input_pipeline; its return value is yielded as ("result", value)
+    """
+    events: "queue.Queue[Tuple[str, Any]]" = queue.Queue()
+    
+    def worker() -> None:
+        try:
+            result = run(
+                lambda parsed_data: events.put(("parsed", parsed_data)),
+                lambda name, value: events.put((name, value))
+            )
+        except BaseException as e:
+            events.put(("error", e))
+        else:
+            events.put(("result", result))
+    
+    # The worker runs in a copy of the caller's context, so the request deadline applies to it
+    context = contextvars.copy_context()
+    threading.Thread(target=context.run, args=(worker,), name="pipeline-stream", daemon=True).start()
+    while True:
+        event = events.get()
+        if event[0] == "error":
+            raise event[1]
+        yield event
+        if event[0] == "result":
+            return
+
+
 def _convert_to_legacy_format(pipeline_result: Dict[str, Any], parsed_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Convert new pipeline format to legacy format for backward compatibility.
@@ -0,0 +1,427 @@
+"""
+Async AI Pipeline - asyncio-native 2-Stage Pipeline
+Same Stage 1 -> Stage 2 -> validation flow as src.ai_pipeline, without holding threads.
+
+- Gemini calls go through generate_content_async under a global concurrency budget
+  (GEMINI_MAX_CONCURRENCY), shared by every pipeline, thread and event loop in the process
+- Retries back off with asyncio.sleep (other requests keep running)
+- Calls share the sync pipeline's Gemini circuit breaker and honour per-call timeouts / deadlines
+- analyze_batch drives hundreds of inputs concurrently; with micro_batch=True short text
+  inputs share Stage 1 calls (src.stage1_batching)
+- Identical in-flight calls are coalesced (utils.cache.single_flight, shared with the sync pipeline)
+- Per-stage tokens / latency / cache levels are traced like the sync pipeline (utils.pipeline_metrics)
+- The model is injected through a factory, so the pipeline runs offline against a fake model
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Optional, Dict, Any, Deque, List, Callable, Sequence, Tuple, Union
+import google.generativeai as genai
+from core.errors import AIServiceError, ParsingError, DeadlineExceeded
+from utils.cache import get_response_cache, single_flight
+from utils.error_handler import async_retry_on_failure
+from utils.pipeline_metrics import pipeline_metrics, record_cache_level, record_model_attempt, record_model_usage
+from utils.resilience import get_gemini_caller, remaining_time
+from src.ai_pipeline import (
+    configure_client,
+    _build_stage1_contents,
+    _stage1_images,
+    _parse_stage1_response,
+    _build_stage2_prompt,
+    _parse_stage2_response,
+    _assemble_pipeline_result,
+    _stage1_cache_text,
+    _stage2_cache_text,
+    _is_cacheable_analysis,
+    STAGE1_CACHE_NAMESPACE,
+    STAGE2_CACHE_NAMESPACE,
+)
+from src.stage1_batching import Stage1MicroBatcher
+
+logger = logging.getLogger(__name__)
+
+# Default number of Gemini calls in flight in the process (override with GEMINI_MAX_CONCURRENCY)
+DEFAULT_GEMINI_MAX_CONCURRENCY = 16
+
+DEFAULT_MODEL_NAME = 'gemini-2.5-flash'
+
+# Returns an object with `async generate_content_async(contents)` (google.generativeai.GenerativeModel or a fake)
+ModelFactory = Callable[[], Any]
+
+
+class ConcurrencyBudget:
+    """
+    Process-wide limit on concurrent model calls.
+
+    One lock-guarded counter is shared by every thread and event loop (Streamlit reruns and
+    asyncio.run calls each get a fresh loop), so the limit holds for the whole process.
+    Waiters queue in arrival order, each with a future on its own loop; a released slot is
+    handed straight to the next waiter. Tracks in-flight and peak calls for monitoring.
+    """
+
+    def __init__(self, limit: int):
+        if limit < 1:
+            raise ValueError(f"Concurrency limit must be at least 1, got: {limit}")
+        self.limit = limit
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+
+    async def __aenter__(self) -> "ConcurrencyBudget":
+        with self._lock:
+            if self.active < self.limit and not self._waiters:
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+                return self
+            loop = asyncio.get_running_loop()
+            waiter = loop.create_future()
+            self._waiters.append((loop, waiter))
+        try:
+            await waiter  # the releasing call hands its slot over (active stays counted)
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove((loop, waiter))
+                    handed_over = False
+                except ValueError:
+                    handed_over = True
+            if handed_over:
+                self._release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self._release()
+
+    def _release(self) -> None:
+        with self._lock:
+            while self._waiters:
+                loop, waiter = self._waiters.popleft()
+                try:
+                    loop.call_soon_threadsafe(_hand_over_slot, waiter)
+                except RuntimeError:  # its loop was closed, nobody is waiting there any more
+                    continue
+                return
+            self.active -= 1
+
+
+def _hand_over_slot(waiter: asyncio.Future) -> None:
+    if not waiter.done():  # a cancelled waiter gives the slot back itself
+        waiter.set_result(None)
+
+
+_global_budget: Optional[ConcurrencyBudget] = None
+_global_budget_lock = threading.Lock()
+
+
+def get_concurrency_budget() -> ConcurrencyBudget:
+    """Global Gemini concurrency budget (created on first use from GEMINI_MAX_CONCURRENCY)."""
+    global _global_budget
+    if _global_budget is None:
+        with _global_budget_lock:
+            if _global_budget is None:
+                try:
+                    limit = int(os.getenv("GEMINI_MAX_CONCURRENCY", DEFAULT_GEMINI_MAX_CONCURRENCY))
+                except ValueError:
+                    logger.warning("Invalid GEMINI_MAX_CONCURRENCY, using default")
+                    limit = DEFAULT_GEMINI_MAX_CONCURRENCY
+                _global_budget = ConcurrencyBudget(max(1, limit))
+    return _global_budget
+
+
+class AsyncGeminiPipeline:
+    """
+    asyncio 2-stage pipeline (Stage 1 parser, Stage 2 analyst, Layer 3 validation).
+
+    Results match src.ai_pipeline.analyze_input_pipeline for the same model responses,
+    including the Stage 1 / Stage 2 response caches.
+    """
+
+    def __init__(
+        self,
+        model_factory: Optional[ModelFactory] = None,
+        api_key: Optional[str] = None,
+        budget: Optional[ConcurrencyBudget] = None,
+        max_retries: int = 2,
+        retry_delay: float = 1.0,
+        retry_backoff: float = 2.0,
+        use_cache: bool = True
+    ):
+        """
+        Args:
+            model_factory: Creates the model (default: configured Gemini GenerativeModel)
+            api_key: Optional API key override (default model only)
+            budget: Concurrency budget (default: global budget)
+            max_retries: Retries per model call on AIServiceError
+            retry_delay: Initial backoff delay (seconds)
+            retry_backoff: Backoff multiplier
+            use_cache: Use the Stage 1 / Stage 2 response caches
+        """
+        self._model_factory = model_factory
+        self.api_key = api_key
+        self.budget = budget or get_concurrency_budget()
+        self.use_cache = use_cache
+        self._model: Any = None
+        self._call_model = async_retry_on_failure(
+            max_retries=max_retries, delay=retry_delay, backoff=retry_backoff, exceptions=(AIServiceError,)
+        )(self._call_model_once)
+
+    def _get_model(self) -> Any:
+        if self._model is None:
+            if self._model_factory is not None:
+                self._model = self._model_factory()
+            else:
+                configure_client(self.api_key)
+                self._model = genai.GenerativeModel(DEFAULT_MODEL_NAME)
+        return self._model
+
+    async def _call_model_once(self, contents: Any) -> str:
+        """One model call inside the concurrency budget (released before any backoff wait)."""
+        caller = get_gemini_caller()
+        record_model_attempt()
+        timeout = min(
+            (t for t in (caller.call_timeout, remaining_time()) if t is not None), default=None
+        )
+        if timeout is not None and timeout <= 0:
+            raise DeadlineExceeded("No time left before the request deadline")
+        caller.breaker.before_call()
+        try:
+            async with self.budget:
+                started = time.perf_counter()
+                try:
+                    response = await asyncio.wait_for(self._get_model().generate_content_async(contents), timeout)
+                except asyncio.TimeoutError as e:
+                    caller.breaker.record_failure()
+                    raise DeadlineExceeded(f"Gemini call did not finish within {timeout:.1f}s") from e
+                except Exception as e:
+                    caller.breaker.record_failure()
+                    logger.error(f"Gemini API call failed: {e}")
+                    raise AIServiceError(f"Failed to call Gemini API: {str(e)}") from e
+                seconds = time.perf_counter() - started
+        except asyncio.CancelledError:
+            # Cancelled while waiting for a slot or for the model: no outcome, but free the half-open probe
+            caller.breaker.release_probe()
+            raise
+        caller.breaker.record_success()
+        if not response or not getattr(response, 'text', None):
+            raise AIServiceError("Empty response from Gemini API")
+        record_model_usage(contents, response.text, getattr(response, 'usage_metadata', None), seconds)
+        return response.text.strip()
+
+    async def _cached_single_flight(
+        self,
+        namespace: str,
+        text: str,
+        image_data: Any,
+        compute: Callable[[], Any],
+        cacheable: Callable[[Any], bool]
+    ) -> Any:
+        """
+        Async counterpart of src.ai_pipeline._cached_single_flight (no caching or
+        coalescing when use_cache is False). SQLite access and image hashing run off
+        the event loop.
+        """
+        if not self.use_cache:
+            record_cache_level("miss")
+            return await compute()
+
+        cache = get_response_cache(namespace)
+        led = []
+
+        async def call() -> Any:
+            led.append(True)
+            cached = await asyncio.to_thread(cache.get, text, image_data)
+            if cached is not None:
+                logger.info(f"Response cache hit ({namespace})")
+                record_cache_level("hit")
+                return cached
+            record_cache_level("miss")
+            value = await compute()
+            if cacheable(value):
+                await asyncio.to_thread(cache.set, text, image_data, value)
+            return value
+
+        key = await asyncio.to_thread(cache.key_for, text, image_data)
+        value = await single_flight.do_async(key, call)
+        if not led:
+            record_cache_level("coalesced")
+        return value
+
+    async def parse_user_input(
+        self,
+        raw_text: Optional[str] = None,
+        image_data: Union[bytes, List[bytes], None] = None
+    ) -> Dict[str, Any]:
+        """
+        Stage 1: Fast & Cheap Parser (async).
+
+        Raises:
+            AIServiceError: If API call fails after retries
+            ParsingError: If parsing fails completely
+        """
+        try:
+            if image_data:
+                contents = await asyncio.to_thread(_build_stage1_contents, raw_text, image_data)
+            else:
+                contents = _build_stage1_contents(raw_text, image_data)
+            response_text = await self._call_model(contents[0] if len(contents) == 1 else contents)
+            return _parse_stage1_response(response_text, raw_text)
+        except AIServiceError:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in parse_user_input: {e}", exc_info=True)
+            raise ParsingError(f"Failed to parse user input: {str(e)}") from e
+
+    async def generate_analysis_report(
+        self,
+        parsed_data: Dict[str, Any],
+        reference_data: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Stage 2: Deep & Logical Analyst (async).
+
+        Raises:
+            AIServiceError: If API call fails after retries
+        """
+        try:
+            response_text = await self._call_model(_build_stage2_prompt(parsed_data, reference_data))
+            return _parse_stage2_response(response_text)
+        except AIServiceError:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in generate_analysis_report: {e}", exc_info=True)
+            raise AIServiceError(f"Failed to generate analysis report: {str(e)}") from e
+
+    async def analyze(
+        self,
+        text: Optional[str] = None,
+        image_data: Optional[bytes] = None,
+        image_data_list: Optional[list] = None,
+        reference_data: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run the 2-stage pipeline for one input (async analyze_input_pipeline).
+
+        Raises:
+            AIServiceError: If AI service fails
+            ParsingError: If input parsing fails
+            ValueError: If no input is given or the pipeline fails completely
+        """
+        return await self._analyze(text, image_data, image_data_list, reference_data)
+
+    async def _analyze(
+        self,
+        text: Optional[str] = None,
+        image_data: Optional[bytes] = None,
+        image_data_list: Optional[list] = None,
+        reference_data: Optional[Dict[str, Any]] = None,
+        batcher: Optional[Stage1MicroBatcher] = None
+    ) -> Dict[str, Any]:
+        """analyze(); text-only Stage 1 goes through batcher when given."""
+        if not text and not image_data and not image_data_list:
+            raise ValueError("Either text or image_data must be provided")
+
+        try:
+            image_to_use = _stage1_images(image_data_list) or _stage1_images(image_data) or None
+            with pipeline_metrics.track() as trace:
+                # Stage 1
+                with trace.stage("stage1"):
+                    parsed_data = await self._cached_single_flight(
+                        STAGE1_CACHE_NAMESPACE, _stage1_cache_text(text), image_to_use,
+                        lambda: (
+                            batcher.parse(text) if batcher is not None and image_to_use is None
+                            else self.parse_user_input(raw_text=text, image_data=image_to_use)
+                        ),
+                        lambda value: isinstance(value, dict)
+                    )
+                if not isinstance(parsed_data, dict):
+                    logger.warning(f"Parsed data is not a dict, converting: {type(parsed_data)}")
+                    parsed_data = {}
+
+                # Stage 2
+                with trace.stage("stage2"):
+                    analysis = await self._cached_single_flight(
+                        STAGE2_CACHE_NAMESPACE, _stage2_cache_text(parsed_data, reference_data), None,
+                        lambda: self.generate_analysis_report(parsed_data, reference_data),
+                        _is_cacheable_analysis
+                    )
+
+                return _assemble_pipeline_result(parsed_data, analysis, trace)
+
+        except (AIServiceError, ParsingError, ValueError):
+            raise
+        except Exception as e:
+            logger.error(f"Pipeline error: {e}", exc_info=True)
+            raise ValueError(f"Pipeline error: {str(e)}") from e
+
+    async def analyze_batch(
+        self,
+        inputs: Sequence[Union[str, Dict[str, Any]]],
+        reference_data: Optional[Dict[str, Any]] = None,
+        return_exceptions: bool = True,
+        micro_batch: bool = False
+    ) -> List[Any]:
+        """
+        Run the pipeline for many inputs concurrently (bounded by the concurrency budget).
+
+        Args:
+            inputs: Text strings or dicts of analyze() keyword arguments
+            reference_data: Default reference data for inputs that do not set their own
+            return_exceptions: Put exceptions in the result list instead of raising the first one
+            micro_batch: Parse short text inputs several per Stage 1 call (catalog imports)
+
+        Returns:
+            Results in input order (dicts, or exceptions when return_exceptions is True)
+        """
+        batcher = Stage1MicroBatcher(self) if micro_batch else None
+        tasks = []
+        for item in inputs:
+            kwargs = {"text": item} if isinstance(item, str) else dict(item)
+            kwargs.setdefault("reference_data", reference_data)
+            tasks.append(self._analyze(batcher=batcher, **kwargs))
+        results = await asyncio.gather(*tasks, return_exceptions=return_exceptions)
+        if batcher is not None and batcher.batches:
+            logger.info(
+                f"Stage 1 micro-batching: {batcher.batched_items} inputs in {batcher.batches} calls, "
+                f"{batcher.fallbacks} parsed individually"
+            )
+        return results
+
+
+async def analyze_input_pipeline_async(
+    text: Optional[str] = None,
+    image_data: Optional[bytes] = None,
+    image_data_list: Optional[list] = None,
+    api_key: Optional[str] = None,
+    reference_data: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Async counterpart of src.ai_pipeline.analyze_input_pipeline (same arguments and result)."""
+    pipeline = AsyncGeminiPipeline(api_key=api_key)
+    return await pipeline.analyze(
+        text=text, image_data=image_data, image_data_list=image_data_list, reference_data=reference_data
+    )
+
+
+def analyze_inputs_batch(
+    inputs: Sequence[Union[str, Dict[str, Any]]],
+    api_key: Optional[str] = None,
+    reference_data: Optional[Dict[str, Any]] = None,
+    model_factory: Optional[ModelFactory] = None,
+    micro_batch: bool = False
+) -> List[Any]:
+    """
+    Synchronous entry point for batch analysis (catalog uploads, scripts).
+
+    Runs its own event loop; call AsyncGeminiPipeline.analyze_batch directly from async code.
+    Pass micro_batch=True for catalog line items (see AsyncGeminiPipeline.analyze_batch).
+
+    Returns:
+        Results in input order (dicts or exceptions)
+    """
+    pipeline = AsyncGeminiPipeline(model_factory=model_factory, api_key=api_key)
+    return asyncio.run(pipeline.analyze_batch(inputs, reference_data=reference_data, micro_batch=micro_batch))
@@ -0,0 +1,246 @@
+"""
+Stage 2 Prompt Builder - Compact serialization with a token budget
+Keeps the analyst prompt size bounded as reference data grows.
+
+- parsed_data: compact JSON without empty fields
+- reference_data: scalar hints as `key: value` lines, nested dicts flattened to dotted
+  keys, lists of records as a `|`-separated table whose constant columns are hoisted
+  into one `common:` line instead of being repeated on every row
+- Token budget (STAGE2_PROMPT_TOKEN_BUDGET): table rows are ranked by relevance to the
+  parsed input and the lowest-ranked rows are dropped until the prompt fits
+- Stage2Prompt reports the tokens saved against the previous indented-JSON prompt
+"""
+
+import json
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.pipeline_metrics import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Prompt token budget per Stage 2 call (override with STAGE2_PROMPT_TOKEN_BUDGET; 0 = unlimited)
+DEFAULT_STAGE2_PROMPT_TOKEN_BUDGET = 2000
+
+# Bump when the serialization changes (part of the Stage 2 cache key)
+PROMPT_FORMAT_VERSION = "compact-v1"
+
+# Default reference hints when the caller passes none
+DEFAULT_REFERENCE_DATA = {
+    "typical_mfg_range": "0.5-5.0 USD per unit",
+    "typical_freight": "500-2000 USD per container",
+    "typical_duty_rate": "0-25% based on HS code"
+}
+
+_CELL_SEPARATOR = "|"
+
+
+@dataclass
+class Stage2Prompt:
+    """
+    A built Stage 2 prompt.
+
+    tokens / baseline_tokens are estimates (utils.pipeline_metrics.estimate_tokens) of this
+    prompt and of the indented-JSON prompt it replaces; rows_dropped counts reference
+    table rows cut to fit the budget.
+    """
+    text: str
+    tokens: int
+    baseline_tokens: int
+    rows_kept: int = 0
+    rows_dropped: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.baseline_tokens - self.tokens)
+
+
+def stage2_token_budget() -> Optional[int]:
+    """Configured prompt token budget (None: unlimited)."""
+    try:
+        budget = int(os.getenv("STAGE2_PROMPT_TOKEN_BUDGET", DEFAULT_STAGE2_PROMPT_TOKEN_BUDGET))
+    except ValueError:
+        logger.warning("Invalid STAGE2_PROMPT_TOKEN_BUDGET, using default")
+        budget = DEFAULT_STAGE2_PROMPT_TOKEN_BUDGET
+    return budget if budget > 0 else None
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def _compact_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _cell(value: Any) -> str:
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = value if isinstance(value, str) else _compact_json(value)
+    return text.replace(_CELL_SEPARATOR, "/").replace("\n", " ")
+
+
+def _flatten(value: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """Nested dicts to dotted keys (lists stay values)."""
+    flat: Dict[str, Any] = {}
+    for key, item in value.items():
+        name = f"{prefix}{key}"
+        if isinstance(item, dict):
+            flat.update(_flatten(item, f"{name}."))
+        elif not _is_empty(item):
+            flat[name] = item
+    return flat
+
+
+def _is_table(value: Any) -> bool:
+    return isinstance(value, list) and len(value) > 0 and all(isinstance(row, dict) for row in value)
+
+
+def _search_terms(parsed_data: Dict[str, Any]) -> List[str]:
+    terms = []
+    for key in ("product_category", "target_market", "sales_channel"):
+        value = parsed_data.get(key)
+        if isinstance(value, str) and value.strip():
+            terms.extend(word for word in value.lower().split() if len(word) > 2)
+    return terms
+
+
+def _detected_volume(parsed_data: Dict[str, Any]) -> Optional[float]:
+    try:
+        volume = float(parsed_data.get("detected_volume"))
+    except (TypeError, ValueError):
+        return None
+    return volume if volume > 0 else None
+
+
+def _row_rank(row: Dict[str, Any], terms: List[str], volume: Optional[float]) -> Tuple[int, float, str]:
+    """
+    Sort key, most relevant first: more parsed-input words found in the row's text,
+    then closer volume, then the most recent date.
+    """
+    text = " ".join(str(item).lower() for item in row.values() if isinstance(item, str))
+    matches = sum(1 for term in terms if term in text)
+    closeness = 0.0
+    row_volume = row.get("volume")
+    if volume and isinstance(row_volume, (int, float)) and row_volume > 0:
+        closeness = -abs(row_volume - volume) / volume
+    date = max((str(item) for key, item in row.items() if "date" in key and item), default="")
+    return (matches, closeness, date)
+
+
+class _Table:
+    """A list of records rendered with constant columns hoisted out."""
+
+    def __init__(self, name: str, rows: List[Dict[str, Any]], terms: List[str], volume: Optional[float]):
+        self.name = name
+        flat_rows = [_flatten(row) for row in rows]
+        columns: List[str] = []
+        for row in flat_rows:
+            columns.extend(key for key in row if key not in columns)
+        self.common = {}
+        if len(flat_rows) > 1:
+            for column in columns:
+                values = {_cell(row.get(column, "")) for row in flat_rows}
+                if len(values) == 1:
+                    self.common[column] = flat_rows[0].get(column, "")
+        self.columns = [column for column in columns if column not in self.common]
+        self.rows = sorted(flat_rows, key=lambda row: _row_rank(row, terms, volume), reverse=True)
+        self.lines = [_CELL_SEPARATOR.join(_cell(row.get(column, "")) for column in self.columns) for row in self.rows]
+
+    def render(self, kept: int) -> str:
+        title = f"{self.name} ({kept} of {len(self.rows)} rows, most relevant first)"
+        parts = [f"{title}:"]
+        if self.common:
+            parts.append("common: " + ", ".join(f"{key}={_cell(value)}" for key, value in self.common.items()))
+        if kept and self.columns:
+            parts.append(_CELL_SEPARATOR.join(self.columns))
+            parts.extend(self.lines[:kept])
+        return "\n".join(parts)
+
+
+def _baseline_prompt(template: str, parsed_data: Dict[str, Any], reference_data: Dict[str, Any]) -> str:
+    """The indented-JSON prompt used before the compact builder (for tokens_saved)."""
+    return template.format(
+        parsed_data=json.dumps(parsed_data, indent=2, ensure_ascii=False, default=str),
+        reference_data=json.dumps(reference_data, indent=2, ensure_ascii=False, default=str)
+    )
+
+
+def build_stage2_prompt(
+    template: str,
+    parsed_data: Dict[str, Any],
+    reference_data: Optional[Dict[str, Any]] = None,
+    token_budget: Optional[int] = None
+) -> Stage2Prompt:
+    """
+    Fill the Stage 2 template ({parsed_data}, {reference_data}) compactly within a token budget.
+
+    Args:
+        template: Prompt template (STAGE2_ANALYST_PROMPT)
+        parsed_data: Stage 1 output
+        reference_data: Reference hints / records (DEFAULT_REFERENCE_DATA when None)
+        token_budget: Prompt token budget (None: unlimited). Only table rows are dropped,
+            so a prompt whose fixed part exceeds the budget is returned without rows.
+
+    Returns:
+        Stage2Prompt
+    """
+    if reference_data is None:
+        reference_data = DEFAULT_REFERENCE_DATA
+    parsed_data = parsed_data if isinstance(parsed_data, dict) else {}
+    terms = _search_terms(parsed_data)
+    volume = _detected_volume(parsed_data)
+
+    compact_parsed = _compact_json({key: value for key, value in parsed_data.items() if not _is_empty(value)})
+    scalar_lines: List[str] = []
+    tables: List[_Table] = []
+    for key, value in reference_data.items():
+        if _is_table(value):
+            tables.append(_Table(str(key), value, terms, volume))
+        elif isinstance(value, dict):
+            scalar_lines.extend(f"{name}: {_cell(item)}" for name, item in _flatten(value, f"{key}.").items())
+        elif not _is_empty(value):
+            scalar_lines.append(f"{key}: {_cell(value)}")
+
+    def render(kept: List[int]) -> str:
+        blocks = ["\n".join(scalar_lines)] if scalar_lines else []
+        blocks.extend(table.render(count) for table, count in zip(tables, kept, strict=True))
+        return template.format(parsed_data=compact_parsed, reference_data="\n".join(blocks))
+
+    kept = [len(table.rows) for table in tables]
+    if token_budget is not None:
+        # Add rows round-robin by rank while the character estimate fits, then trim
+        # against the exact rendering (row counts in the titles add a few characters)
+        kept = [0] * len(tables)
+        budget_chars = token_budget * 4
+        chars = len(render(kept))
+        open_tables = set(range(len(tables)))
+        while open_tables:
+            for index in sorted(open_tables):
+                table = tables[index]
+                if kept[index] >= len(table.rows):
+                    open_tables.discard(index)
+                    continue
+                extra = len(table.lines[kept[index]]) + 1
+                if kept[index] == 0:
+                    extra += len(_CELL_SEPARATOR.join(table.columns)) + 1
+                if chars + extra > budget_chars:
+                    open_tables.discard(index)
+                    continue
+                chars += extra
+                kept[index] += 1
+        while sum(kept) and estimate_tokens(render(kept)) > token_budget:
+            index = max(range(len(kept)), key=lambda position: kept[position])
+            kept[index] -= 1
+    text = render(kept)
+
+    total_rows = sum(len(table.rows) for table in tables)
+    return Stage2Prompt(
+        text=text,
+        tokens=estimate_tokens(text),
+        baseline_tokens=estimate_tokens(_baseline_prompt(template, parsed_data, reference_data)),
+        rows_kept=sum(kept),
+        rows_dropped=total_rows - sum(kept)
+    )
@@ -0,0 +1,219 @@
+"""
+Stage 1 Micro-Batching - Many short text inputs parsed in one Gemini call
+For catalog-scale uploads, where one Stage 1 call per line item is mostly per-call overhead.
+
+- Stage1MicroBatcher collects the text inputs that AsyncGeminiPipeline.analyze_batch parses
+  concurrently and packs up to batch_size of them into one numbered prompt returning a JSON array
+- Results are split back per item by "index"; items missing from the array or malformed
+  (truncated output, wrong type) fall back to a regular per-item Stage 1 call, as does a
+  batch whose call fails
+- The batch size adapts to model latency: it moves toward the size a call would need to
+  take STAGE1_BATCH_TARGET_SECONDS, and halves when a batch comes back incomplete
+- Every item is normalized like a single Stage 1 response (defaults, rule-based parser),
+  and gets its share of the batch call's tokens on its pipeline trace
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.ai_pipeline import _normalize_stage1
+from utils.json_extract import extract_json_array
+from utils.pipeline_metrics import PipelineTrace, StageMetrics, record_batched_call
+
+logger = logging.getLogger(__name__)
+
+# Inputs per batch call at start (override with STAGE1_BATCH_SIZE)
+DEFAULT_STAGE1_BATCH_SIZE = 16
+# Upper bound for the adaptive batch size (override with STAGE1_MAX_BATCH_SIZE)
+DEFAULT_STAGE1_MAX_BATCH_SIZE = 64
+# Model time per batch call the batch size is tuned toward (override with STAGE1_BATCH_TARGET_SECONDS)
+DEFAULT_STAGE1_BATCH_TARGET_SECONDS = 8.0
+# How long a partial batch waits for more inputs (override with STAGE1_BATCH_LINGER_SECONDS)
+DEFAULT_STAGE1_BATCH_LINGER_SECONDS = 0.02
+# Longer inputs are not "short line items" and are parsed on their own (override with STAGE1_BATCH_MAX_CHARS)
+DEFAULT_STAGE1_BATCH_MAX_CHARS = 500
+
+STAGE1_BATCH_PARSER_PROMPT = """Extract structured data from each numbered user input. Return ONLY a JSON array with one object per input:
+
+[
+  {"index": int, "product_category": "string", "detected_volume": int, "target_market": "string", "sales_channel": "string", "special_requirements": ["string"]}
+]
+
+"index" is the input's number. Defaults: volume=1000, market="USA", channel="Amazon FBA" if missing.
+User language: Keep strings in user's language."""
+
+
+def _env_number(name: str, default: Any) -> Any:
+    try:
+        return type(default)(os.getenv(name, default))
+    except ValueError:
+        logger.warning(f"Invalid {name}, using default")
+        return default
+
+
+def build_stage1_batch_prompt(texts: Sequence[str]) -> str:
+    """Batch prompt with the inputs numbered from 0 (each as a JSON string)."""
+    lines = [f"[{index}] {json.dumps(text, ensure_ascii=False)}" for index, text in enumerate(texts)]
+    return f"{STAGE1_BATCH_PARSER_PROMPT}\n\nUser inputs:\n" + "\n".join(lines)
+
+
+def split_stage1_batch_response(response_text: str, texts: Sequence[str]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Per-item parsed_data from a batch response, in input order.
+
+    Returns:
+        One entry per input: normalized parsed_data, or None where the response has no
+        valid object for it (missing, duplicated or malformed index, wrong type)
+    """
+    items = extract_json_array(response_text) or []
+    by_index: Dict[int, Optional[Dict[str, Any]]] = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        index = item.pop("index", None)
+        if isinstance(index, bool) or not isinstance(index, int) or not 0 <= index < len(texts):
+            continue
+        by_index[index] = None if index in by_index else item  # duplicates are ambiguous
+    return [
+        _normalize_stage1(by_index[index], text) if by_index.get(index) is not None else None
+        for index, text in enumerate(texts)
+    ]
+
+
+class Stage1MicroBatcher:
+    """
+    Packs concurrent Stage 1 text parses of one pipeline into batch calls.
+
+    parse() is a drop-in for AsyncGeminiPipeline.parse_user_input(raw_text=...) for text
+    inputs; a batch is sent when batch_size inputs are waiting or linger_seconds after the
+    first one arrived. At most the pipeline's concurrency limit of batches is in flight, so
+    a large upload is cut into batches as calls finish, at the size adapted so far. Batch
+    calls go through the pipeline's model call (retries, concurrency budget, circuit breaker).
+    """
+
+    def __init__(
+        self,
+        pipeline: Any,
+        batch_size: Optional[int] = None,
+        max_batch_size: Optional[int] = None,
+        target_seconds: Optional[float] = None,
+        linger_seconds: Optional[float] = None,
+        max_chars: Optional[int] = None
+    ):
+        """
+        Args:
+            pipeline: AsyncGeminiPipeline (its _call_model and parse_user_input are used)
+            batch_size: Initial inputs per call (default STAGE1_BATCH_SIZE)
+            max_batch_size: Adaptive upper bound (default STAGE1_MAX_BATCH_SIZE)
+            target_seconds: Model time per call to tune toward (default STAGE1_BATCH_TARGET_SECONDS)
+            linger_seconds: Wait for a partial batch (default STAGE1_BATCH_LINGER_SECONDS)
+            max_chars: Longer inputs are parsed individually (default STAGE1_BATCH_MAX_CHARS)
+        """
+        self._pipeline = pipeline
+        self.max_batch_size = max(1, max_batch_size or _env_number("STAGE1_MAX_BATCH_SIZE", DEFAULT_STAGE1_MAX_BATCH_SIZE))
+        self.batch_size = min(
+            self.max_batch_size, max(1, batch_size or _env_number("STAGE1_BATCH_SIZE", DEFAULT_STAGE1_BATCH_SIZE))
+        )
+        self.target_seconds = target_seconds or _env_number(
+            "STAGE1_BATCH_TARGET_SECONDS", DEFAULT_STAGE1_BATCH_TARGET_SECONDS
+        )
+        self.linger_seconds = (
+            linger_seconds if linger_seconds is not None
+            else _env_number("STAGE1_BATCH_LINGER_SECONDS", DEFAULT_STAGE1_BATCH_LINGER_SECONDS)
+        )
+        self.max_chars = max_chars or _env_number("STAGE1_BATCH_MAX_CHARS", DEFAULT_STAGE1_BATCH_MAX_CHARS)
+        self.batches = 0
+        self.batched_items = 0
+        self.fallbacks = 0
+        self._max_in_flight = pipeline.budget.limit
+        self._in_flight = 0
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+    async def parse(self, raw_text: Optional[str]) -> Dict[str, Any]:
+        """
+        Stage 1 parsed_data for one text input (batched when short).
+
+        Raises:
+            AIServiceError / ParsingError: From the per-item fallback call
+        """
+        if not raw_text or len(raw_text) > self.max_chars:
+            return await self._pipeline.parse_user_input(raw_text=raw_text)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((raw_text, future))
+        if len(self._pending) >= self.batch_size:
+            self._flush(partial=False)
+        elif self._timer is None:
+            self._timer = loop.call_later(self.linger_seconds, self._flush, True)
+
+        parsed, batch, items, position = await future
+        record_batched_call(batch, items, position)
+        if parsed is None:
+            self.fallbacks += 1
+            return await self._pipeline.parse_user_input(raw_text=raw_text)
+        return parsed
+
+    def _flush(self, partial: bool) -> None:
+        """Start batch calls for the full batches waiting (and the remainder if partial) while slots are free."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while (
+            self._pending and self._in_flight < self._max_in_flight
+            and (partial or len(self._pending) >= self.batch_size)
+        ):
+            items, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+            self._in_flight += 1
+            # Fresh context: the batch call must not report to the trace of whichever input triggered it
+            task = asyncio.get_running_loop().create_task(self._run_batch(items), context=contextvars.Context())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        if self._pending and self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.linger_seconds, self._flush, True)
+
+    async def _run_batch(self, items: List[Tuple[str, asyncio.Future]]) -> None:
+        texts = [text for text, _ in items]
+        trace = PipelineTrace()
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        failed = False
+        try:
+            with trace.stage("stage1") as batch:
+                response_text = await self._pipeline._call_model(build_stage1_batch_prompt(texts))
+            results = split_stage1_batch_response(response_text, texts)
+        except Exception as e:
+            failed = True
+            logger.warning(f"Stage 1 batch of {len(texts)} failed, parsing its items one by one: {e}")
+        finally:
+            # Also on cancellation: resolve the waiting items, free the slot and start the next batch
+            batch = trace.stages.get("stage1") or StageMetrics()
+            for position, ((_, future), parsed) in enumerate(zip(items, results, strict=True)):
+                if not future.done():
+                    future.set_result((parsed, batch, len(items), position))
+            self.batches += 1
+            self.batched_items += len(texts)
+            self._adapt(len(texts), batch.model_seconds, complete=not failed and None not in results)
+            self._in_flight -= 1
+            self._flush(partial=False)
+
+    def _adapt(self, items: int, model_seconds: float, complete: bool) -> None:
+        """
+        Tune batch_size from the last batch: halve it after an incomplete batch (usually
+        truncated output), otherwise move halfway toward target_seconds / seconds-per-item.
+        """
+        if not complete:
+            size = items // 2
+        elif model_seconds > 0:
+            size = round((self.batch_size + self.target_seconds * items / model_seconds) / 2)
+        else:
+            size = self.batch_size * 2
+        size = min(self.max_batch_size, max(1, size))
+        if size != self.batch_size:
+            logger.debug(f"Stage 1 batch size {self.batch_size} -> {size}")
+            self.batch_size = size
@@ -78,3 +78,35 @@ def mock_gemini_api_key(monkeypatch):
     monkeypatch.setenv("GEMINI_MODEL", "gemini-2.5-flash")
     return dummy_key
 
+
+
+@pytest.fixture(autouse=True)
+def reset_gemini_circuit():
+    """테스트 간 Gemini circuit breaker 상태가 공유되지 않도록 매 테스트마다 초기화"""
+    from utils.resilience import reset_gemini_caller
+    reset_gemini_caller()
+    yield
+    reset_gemini_caller()
+
+
+@pytest.fixture
+def memory_response_cache(monkeypatch):
+    """
+    sync/async 파이프라인의 응답 캐시를 테스트 전용 메모리 캐시로 대체 (namespace별 하나)
+    Gemini 클라이언트 설정도 건너뜁니다. 반환된 딕셔너리를 비우면 다음 호출부터 빈 캐시를 사용합니다.
+    """
+    import src.ai_pipeline as ai_pipeline
+    import src.ai_pipeline_async as ai_pipeline_async
+    from utils.cache import ResponseCache
+
+    caches = {}
+
+    def get_response_cache(namespace="default"):
+        if namespace not in caches:
+            caches[namespace] = ResponseCache(namespace=namespace)
+        return caches[namespace]
+
+    for module in (ai_pipeline, ai_pipeline_async):
+        monkeypatch.setattr(module, "get_response_cache", get_response_cache)
+        monkeypatch.setattr(module, "configure_client", lambda api_key=None: None)
+    return caches
@@ -0,0 +1,167 @@
+"""
+Async AI Pipeline Tests
+가짜 모델로 asyncio 파이프라인의 동시성 한도, 비차단 재시도, 배치 처리를 오프라인 검증합니다.
+"""
+
+import asyncio
+import json
+import threading
+import time
+import pytest
+import src.ai_pipeline as ai_pipeline
+from core.errors import AIServiceError
+from src.ai_pipeline_async import AsyncGeminiPipeline, ConcurrencyBudget, analyze_inputs_batch
+from utils.fake_gemini import FakeGeminiConfig, FakeGenerativeModel
+from utils.pipeline_metrics import PipelineMetrics, without_metrics
+from utils.resilience import CircuitBreaker, get_gemini_caller
+
+
+class FakeModel(FakeGenerativeModel):
+    """Stage 1 / Stage 2 프롬프트에 고정 JSON으로 응답하는 가짜 Gemini 모델"""
+
+    def __init__(self, latency=0.01, failures=0):
+        # 처음 failures번 호출은 실패
+        super().__init__(config=FakeGeminiConfig(
+            latency="fixed", median_seconds=latency, seconds_per_output_token=0.0, fail_first=failures
+        ))
+
+    def respond(self, contents):
+        prompt = contents if isinstance(contents, str) else contents[0]
+        if "Senior Sourcing Analyst" in prompt:
+            return json.dumps({
+                "cost_breakdown": {
+                    "manufacturing": {"low": 1.0, "base": 1.2, "high": 1.5},
+                    "logistics": {"freight": 0.3, "duty": 0.1},
+                    "total_landed_cost": 1.6,
+                    "currency": "USD",
+                },
+                "channel_strategy": {"amazon_fba": {"margin": 35, "recommendation": "go"}},
+                "risk_score": {"regulatory": {"score": 20, "reason": "low"}},
+            })
+        return '```json\n{"product_category": "shrimp chips", "detected_volume": 5000}\n```'
+
+
+class TestAsyncPipeline:
+    """asyncio 파이프라인"""
+
+    def test_matches_sync_pipeline(self, monkeypatch, memory_response_cache):
+        model = FakeModel(latency=0)
+        monkeypatch.setattr(ai_pipeline.genai, "GenerativeModel", lambda name: model)
+        expected = ai_pipeline.analyze_input_pipeline(text="shrimp chips 5000 bags to USA")
+
+        pipeline = AsyncGeminiPipeline(model_factory=lambda: model, use_cache=False)
+        assert without_metrics(asyncio.run(pipeline.analyze(text="shrimp chips 5000 bags to USA"))) == without_metrics(expected)
+
+    def test_batch_respects_concurrency_budget(self):
+        model = FakeModel(latency=0.02)
+        budget = ConcurrencyBudget(limit=8)
+        pipeline = AsyncGeminiPipeline(model_factory=lambda: model, budget=budget, use_cache=False)
+        inputs = [f"product {index} 5000 units to USA" for index in range(200)]
+
+        started = time.perf_counter()
+        results = asyncio.run(pipeline.analyze_batch(inputs))
+        elapsed = time.perf_counter() - started
+
+        assert len(results) == 200 and all(isinstance(result, dict) for result in results)
+        assert model.calls == 400
+        assert budget.peak == 8 and budget.active == 0
+        assert elapsed < 400 * 0.02 / 2  # 순차 실행(8초)보다 훨씬 빠름
+
+    def test_budget_is_shared_across_event_loops(self):
+        budget = ConcurrencyBudget(limit=4)
+        lock = threading.Lock()
+        running = []
+
+        async def call():
+            async with budget:
+                with lock:
+                    running.append(budget.active)
+                await asyncio.sleep(0.01)
+
+        async def many():
+            await asyncio.gather(*(call() for _ in range(20)))
+
+        threads = [threading.Thread(target=asyncio.run, args=(many(),)) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # 스레드마다 별도 이벤트 루프여도 프로세스 전체에서 4개 한도
+        assert len(running) == 60 and max(running) == 4
+        assert budget.peak == 4 and budget.active == 0
+
+    def test_cancelled_waiter_frees_its_slot(self):
+        budget = ConcurrencyBudget(limit=1)
+
+        async def run():
+            async with budget:
+                waiter = asyncio.ensure_future(budget.__aenter__())
+                await asyncio.sleep(0)
+                waiter.cancel()
+            async with budget:  # 취소된 대기자가 슬롯을 잡고 있지 않음
+                return budget.active
+
+        assert asyncio.run(run()) == 1 and budget.active == 0
+
+    def test_backoff_does_not_block_event_loop(self):
+        model = FakeModel(latency=0, failures=2)
+        pipeline = AsyncGeminiPipeline(model_factory=lambda: model, retry_delay=0.05, use_cache=False)
+        ticks = []
+
+        async def ticker():
+            for _ in range(10):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        async def run():
+            return await asyncio.gather(pipeline.parse_user_input(raw_text="shrimp chips 5000 bags"), ticker())
+
+        parsed, _ = asyncio.run(run())
+        assert parsed["detected_volume"] == 5000
+        assert model.calls == 3
+        assert len(ticks) == 10 and max(b - a for a, b in zip(ticks, ticks[1:], strict=False)) < 0.04
+
+    def test_batch_isolates_failures(self):
+        model = FakeModel(latency=0, failures=100)
+        pipeline = AsyncGeminiPipeline(model_factory=lambda: model, max_retries=0, use_cache=False)
+        results = asyncio.run(pipeline.analyze_batch(["shrimp chips 5000 bags", {"text": ""}]))
+        assert isinstance(results[0], AIServiceError)
+        assert isinstance(results[1], ValueError)
+
+    def test_cancelled_probe_releases_breaker(self, monkeypatch):
+        monkeypatch.setenv("GEMINI_CIRCUIT_FAILURE_THRESHOLD", "1")
+        monkeypatch.setenv("GEMINI_CIRCUIT_RECOVERY_SECONDS", "0")
+        breaker = get_gemini_caller().breaker
+        breaker.record_failure()  # open → 다음 호출이 half-open probe
+        model = FakeModel(latency=1.0)
+        pipeline = AsyncGeminiPipeline(model_factory=lambda: model, max_retries=0, use_cache=False)
+
+        async def cancel_probe():
+            task = asyncio.ensure_future(pipeline.parse_user_input(raw_text="shrimp chips 5000 bags"))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancel_probe())
+        assert breaker.get_stats()["consecutive_failures"] == 1  # 취소는 실패로 세지 않음
+        model.latency = 0
+        parsed = asyncio.run(pipeline.parse_user_input(raw_text="shrimp chips 5000 bags"))
+        assert parsed["detected_volume"] == 5000
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_failed_request_is_recorded(self, monkeypatch):
+        import src.ai_pipeline_async as ai_pipeline_async
+        metrics = PipelineMetrics()
+        monkeypatch.setattr(ai_pipeline_async, "pipeline_metrics", metrics)
+        pipeline = AsyncGeminiPipeline(model_factory=lambda: FakeModel(latency=0, failures=100), max_retries=0, use_cache=False)
+        with pytest.raises(AIServiceError):
+            asyncio.run(pipeline.analyze(text="shrimp chips 5000 bags"))
+        stats = metrics.get_stats()
+        assert (stats["requests"], stats["totals"]["failed_requests"], stats["errors"]) == (1, 1, {"AIServiceError": 1})
+
+    def test_sync_batch_entry_point(self, memory_response_cache):
+        model = FakeModel(latency=0)
+        results = analyze_inputs_batch(["shrimp chips 5000 bags"] * 3, model_factory=lambda: model)
+        assert len(results) == 3 and without_metrics(results[0]) == without_metrics(results[2])
+        assert model.calls == 2  # identical inputs share one Stage 1 and one Stage 2 call
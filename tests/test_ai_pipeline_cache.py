@@ -0,0 +1,75 @@
+"""
+AI Pipeline Cache Tests
+Stage 1 / Stage 2 캐시 분리: 다르게 표현된 입력이 같은 parsed_data로 파싱되면 Stage 2 호출을 건너뜁니다.
+"""
+
+import pytest
+import src.ai_pipeline as ai_pipeline
+
+
+@pytest.fixture
+def pipeline(monkeypatch, memory_response_cache):
+    """Gemini 호출 대신 호출 횟수를 기록하는 가짜 Stage 1/2 + 테스트 전용 메모리 캐시"""
+    calls = {"stage1": 0, "stage2": 0}
+
+    def fake_parse(raw_text=None, image_data=None, api_key=None):
+        calls["stage1"] += 1
+        volume = 5000 if "5000" in (raw_text or "") else 1000
+        return {
+            "product_category": "Shrimp Chips" if calls["stage1"] % 2 else "shrimp  chips",
+            "detected_volume": volume,
+            "target_market": "USA",
+            "sales_channel": "Amazon FBA",
+            "special_requirements": ["FDA", "Labeling"] if calls["stage1"] % 2 else ["labeling", "FDA"],
+        }
+
+    def fake_report(parsed_data, reference_data=None, api_key=None):
+        calls["stage2"] += 1
+        return {"cost_breakdown": {"total_landed_cost": 1.0}, "risk_score": {}}
+
+    monkeypatch.setattr(ai_pipeline, "parse_user_input", fake_parse)
+    monkeypatch.setattr(ai_pipeline, "generate_analysis_report", fake_report)
+    return calls
+
+
+class TestTwoLevelCache:
+    """2단계 캐시"""
+
+    def test_stage1_miss_hits_stage2(self, pipeline):
+        first = ai_pipeline.analyze_input_pipeline(text="shrimp chips 5000 bags to USA")
+        second = ai_pipeline.analyze_input_pipeline(text="I need 5000 bags of shrimp chips for the US")
+        assert pipeline == {"stage1": 2, "stage2": 1}
+        assert first["cost_breakdown"] == second["cost_breakdown"]
+
+        stats = ai_pipeline.get_pipeline_cache_stats()
+        assert (stats["stage1"]["hits"], stats["stage1"]["misses"]) == (0, 2)
+        assert (stats["stage2"]["hits"], stats["stage2"]["misses"]) == (1, 1)
+        assert stats["stage2_calls_avoided"] == 1
+
+    def test_repeat_request_hits_both_levels(self, pipeline):
+        for _ in range(3):
+            ai_pipeline.analyze_input_pipeline(text="Shrimp chips  5000 bags")
+        assert pipeline == {"stage1": 1, "stage2": 1}
+        assert ai_pipeline.get_pipeline_cache_stats()["stage1"]["hits"] == 2
+
+    def test_reference_data_version_and_volume_in_key(self, pipeline):
+        ai_pipeline.analyze_input_pipeline(text="shrimp chips 5000 bags")
+        ai_pipeline.analyze_input_pipeline(text="shrimp chips 5000 bags", reference_data={"duty": "6.5%"})
+        ai_pipeline.analyze_input_pipeline(text="shrimp chips 1000 bags", reference_data={"duty": "6.5%"})
+        assert pipeline["stage2"] == 3
+
+    def test_parsing_failure_not_cached(self, pipeline, monkeypatch):
+        def failed_report(parsed_data, reference_data=None, api_key=None):
+            pipeline["stage2"] += 1
+            return {"_parsing_error": {"message": "bad json"}}
+
+        monkeypatch.setattr(ai_pipeline, "generate_analysis_report", failed_report)
+        ai_pipeline.analyze_input_pipeline(text="shrimp chips 5000 bags")
+        ai_pipeline.analyze_input_pipeline(text="shrimp chips 5000 bags")
+        assert pipeline["stage2"] == 2
+
+    def test_canonicalize_parsed_data(self):
+        a = ai_pipeline.canonicalize_parsed_data(
+            {"product_category": " Shrimp\nChips", "detected_volume": "5000", "special_requirements": ["B", "a", "b"]}
+        )
+        assert a == {"product_category": "shrimp chips", "detected_volume": 5000, "special_requirements": ["a", "b"]}
@@ -0,0 +1,311 @@
+"""
+Analysis Engine Tests
+run_analysis_batch가 스펙별 run_analysis와 같은 결과를 내는지 검증합니다.
+"""
+
+import itertools
+import json
+import shutil
+from datetime import datetime
+from pathlib import Path
+import pytest
+from core import analysis_engine, risk_scoring
+from core.analysis_cache import AnalysisResultCache, analysis_cache_key
+from core.analysis_engine import run_analysis, run_analysis_batch
+from core.cost_simulation import FALLBACK_DUTY_FACTOR_RANGE, build_cost_distribution
+from core.data_access import DataAccessLayer, ReferenceDataBundle
+from core.errors import NexSupplyError
+from core.models import ShipmentSpec
+
+
+def _catalog():
+    """레인/제품/가격 조합이 섞인 작은 카탈로그"""
+    products = [
+        ("shrimp snack", "KR snack"),
+        ("spicy buldak ramen", "korean_ramen"),
+        ("toy car", None),
+        ("phone case", None),
+        ("choco pie", "korean_confectionery"),
+    ]
+    lanes = [("China", "USA"), ("South Korea", "United States"), ("Korea", "Germany"), ("Vietnam", "Japan")]
+    prices = [(None, None), (0.4, 2.5), (1.2, 0.9), (None, 6.0)]
+    specs = []
+    for (name, category), (origin, destination), (fob, retail), quantity in itertools.product(
+        products, lanes, prices, [300, 5000, 20000]
+    ):
+        specs.append(ShipmentSpec(
+            product_name=name,
+            product_category=category,
+            quantity=quantity,
+            unit_type="bag",
+            origin_country=origin,
+            destination_country=destination,
+            fob_price_per_unit=fob,
+            target_retail_price=retail,
+        ))
+    specs.append(ShipmentSpec(
+        product_name="shrimp snack",
+        quantity=100,
+        unit_type="carton",
+        packaging={"units_per_carton": 20},
+        origin_country="South Korea",
+        destination_country="USA",
+    ))
+    return specs
+
+
+def _canonical(result):
+    return json.dumps(result, sort_keys=True, default=str)
+
+
+class TestRunAnalysisBatch:
+    """배치 분석과 스펙별 분석의 동등성"""
+
+    def test_matches_per_spec_results(self):
+        catalog = _catalog()
+        per_spec_inputs = [spec.model_copy(deep=True) for spec in catalog]
+        batch_inputs = [spec.model_copy(deep=True) for spec in catalog]
+
+        expected = [run_analysis(spec) for spec in per_spec_inputs]
+        batch = run_analysis_batch(batch_inputs)
+
+        assert len(batch) == len(catalog)
+        for index, result in enumerate(expected):
+            assert _canonical(batch.to_dict(index)) == _canonical(result)
+            # 가격 힌트 범위 경고도 스펙에 똑같이 추가됨
+            assert batch_inputs[index].data_warnings == per_spec_inputs[index].data_warnings
+
+    def test_arrays_match_result_dicts(self):
+        batch = run_analysis_batch([spec.model_copy(deep=True) for spec in _catalog()])
+        for index, result in enumerate(batch.to_dicts()):
+            assert batch.unit_ddp_base[index] == result["cost_scenarios"]["base"]
+            assert batch.unit_ddp_worst[index] == result["cost_scenarios"]["worst"]
+            assert batch.net_margin_percent[index] == pytest.approx(result["profitability"]["net_profit_percent"])
+            assert round(float(batch.overall_risk_score[index]), 1) == result["risk_scores"]["overall_risk_score"]
+
+    def test_result_dicts_are_independent(self):
+        batch = run_analysis_batch([spec.model_copy(deep=True) for spec in _catalog()[:3]])
+        first = batch.to_dict(0)
+        first["data_quality"]["used_fallbacks"].append("mutated")
+        assert "mutated" not in batch.to_dict(0)["data_quality"]["used_fallbacks"]
+
+    def test_mixed_products_in_one_lane(self):
+        # 같은 레인의 제품끼리 참조 데이터 묶음을 공유해도 compliance 리스크는 제품별
+        products = [
+            ("spicy buldak ramen", "korean_ramen"),
+            ("toy car", None),
+            ("kids toy robot", None),
+            ("beauty cosmetic cream", None),
+            ("choco pie", "korean_confectionery"),
+            ("plain box", None),
+        ]
+        catalog = [
+            ShipmentSpec(
+                product_name=name,
+                product_category=category,
+                quantity=quantity,
+                unit_type="bag",
+                origin_country="China",
+                destination_country="USA",
+                target_retail_price=5.0,
+            )
+            for (name, category), quantity in itertools.product(products, [300, 5000])
+        ]
+        expected = [run_analysis(spec.model_copy(deep=True)) for spec in catalog]
+        batch = run_analysis_batch([spec.model_copy(deep=True) for spec in catalog])
+        assert len({result["risk_scores"]["compliance_risk"] for result in expected}) > 1
+        for index, result in enumerate(expected):
+            assert _canonical(batch.to_dict(index)) == _canonical(result)
+
+    def test_bad_rows_fail_alone(self):
+        catalog = _catalog()[:4]
+        bad = [
+            catalog[0].model_copy(update={"unit_type": "carton", "packaging": {"units_per_carton": 0}}),
+            catalog[0].model_copy(update={"unit_type": "carton", "packaging": {"units_per_carton": None}}),
+        ]
+        specs = [catalog[0], bad[0], catalog[1], bad[1], catalog[2], catalog[3]]
+        for spec in bad:
+            with pytest.raises(NexSupplyError):
+                run_analysis(spec.model_copy(deep=True))
+
+        for draws in (0, 2_000):
+            batch = run_analysis_batch([spec.model_copy(deep=True) for spec in specs], simulation_draws=draws)
+            assert sorted(batch.errors) == [1, 3]
+            assert batch.ok.tolist() == [True, False, True, False, True, True]
+            for index in (1, 3):
+                with pytest.raises(NexSupplyError):
+                    batch.to_dict(index)
+                assert batch.to_dicts()[index] is batch.errors[index]
+            # 나머지 행은 스펙별 분석과 같음
+            for index in (0, 2, 4, 5):
+                expected = run_analysis(specs[index].model_copy(deep=True), simulation_draws=draws)
+                assert _canonical(batch.to_dict(index)) == _canonical(expected)
+
+    def test_empty_batch(self):
+        batch = run_analysis_batch([])
+        assert len(batch) == 0
+        assert batch.to_dicts() == []
+
+
+class TestCostSimulation:
+    """몬테카를로 랜디드 코스트 시뮬레이션"""
+
+    def _spec(self, **overrides):
+        values = dict(
+            product_name="shrimp snack",
+            product_category="KR snack",
+            quantity=5000,
+            unit_type="bag",
+            origin_country="South Korea",
+            destination_country="USA",
+            target_retail_price=2.0,
+        )
+        values.update(overrides)
+        return ShipmentSpec(**values)
+
+    def test_default_mode_keeps_fixed_scenarios(self):
+        result = run_analysis(self._spec(), simulation_draws=0)
+        assert "cost_simulation" not in result
+        assert result["cost_scenarios"]["best"] == pytest.approx(result["cost_scenarios"]["base"] * 0.9)
+
+    def test_percentiles_replace_best_and_worst(self):
+        result = run_analysis(self._spec(), simulation_draws=20_000)
+        simulation = result["cost_simulation"]
+        assert simulation["p10"] < simulation["p50"] < simulation["p90"]
+        assert result["cost_scenarios"]["best"] == simulation["p10"]
+        assert result["cost_scenarios"]["worst"] == simulation["p90"]
+        assert 0.0 <= simulation["prob_negative_margin"] <= 1.0
+        # 고정 시드: 같은 입력은 같은 결과
+        assert run_analysis(self._spec(), simulation_draws=20_000)["cost_simulation"] == simulation
+
+    def test_prob_negative_margin_follows_retail_price(self):
+        base = run_analysis(self._spec(), simulation_draws=0)["cost_scenarios"]["base"]
+        cheap = run_analysis(self._spec(target_retail_price=base * 0.5), simulation_draws=20_000)
+        rich = run_analysis(self._spec(target_retail_price=base * 5), simulation_draws=20_000)
+        assert cheap["cost_simulation"]["prob_negative_margin"] == 1.0
+        assert rich["cost_simulation"]["prob_negative_margin"] == 0.0
+
+    def test_duty_spread_follows_duty_provenance(self):
+        base_final = {"manufacturing": 1.0, "shipping": 0.2, "duty": 0.1, "misc": 0.05}
+
+        def distribution(provenance):
+            bundle = ReferenceDataBundle(duty_rate=0.08, provenance=provenance)
+            return build_cost_distribution(self._spec(), base_final, 2.0, 1.0, bundle, weight_kg=500)
+
+        csv = distribution({"duty": "csv"})
+        assert (csv.duty_low, csv.duty_high) == (1.0, 1.0)  # CSV 관세율은 추가 불확실성 없음
+        fallback = distribution({"duty": "fallback"})
+        assert (fallback.duty_low, fallback.duty_high) == FALLBACK_DUTY_FACTOR_RANGE
+
+    def test_batch_matches_per_spec_results(self):
+        catalog = _catalog()[::7]
+        expected = [run_analysis(spec.model_copy(deep=True), simulation_draws=5_000) for spec in catalog]
+        batch = run_analysis_batch([spec.model_copy(deep=True) for spec in catalog], simulation_draws=5_000)
+        for index, result in enumerate(expected):
+            assert _canonical(batch.to_dict(index)) == _canonical(result)
+
+
+class TestAnalysisResultCache:
+    """run_analysis 결과 캐시"""
+
+    @pytest.fixture
+    def cache(self, monkeypatch):
+        cache = AnalysisResultCache(max_entries=16)
+        monkeypatch.setattr(analysis_engine, "get_analysis_cache", lambda: cache)
+        return cache
+
+    def _spec(self, **overrides):
+        values = dict(
+            product_name="shrimp chips",
+            product_category="KR snack - shrimp chips",
+            quantity=5000,
+            unit_type="bag",
+            origin_country="South Korea",
+            destination_country="USA",
+            target_retail_price=4.0,
+        )
+        values.update(overrides)
+        return ShipmentSpec(**values)
+
+    def test_repeated_spec_hits_cache(self, cache):
+        first = run_analysis(self._spec(), simulation_draws=0)
+        second = run_analysis(self._spec(), simulation_draws=0)
+        assert _canonical(first) == _canonical(second)
+        stats = cache.get_stats()
+        assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+        # 옵션이 다르면 다른 항목
+        run_analysis(self._spec(), simulation_draws=1000)
+        assert cache.get_stats()["misses"] == 2
+
+    def test_hits_return_isolated_copies(self, cache):
+        first = run_analysis(self._spec(), simulation_draws=0)
+        first["cost_breakdown"]["manufacturing"] = -1
+        first["data_warnings"].append("mutated")
+        second = run_analysis(self._spec(), simulation_draws=0)
+        second["data_quality"]["used_fallbacks"].append("mutated")
+        third = run_analysis(self._spec(), simulation_draws=0)
+        assert third["cost_breakdown"]["manufacturing"] != -1
+        assert "mutated" not in third["data_warnings"]
+        assert "mutated" not in third["data_quality"]["used_fallbacks"]
+
+    def test_hit_replays_spec_warnings(self, cache):
+        uncached_spec = self._spec(target_retail_price=40.0)
+        run_analysis(uncached_spec, simulation_draws=0)
+        cached_spec = self._spec(target_retail_price=40.0)
+        run_analysis(cached_spec, simulation_draws=0)
+        assert cache.get_stats()["hits"] == 1
+        assert cached_spec.data_warnings == uncached_spec.data_warnings != []
+
+    def test_peak_season_change_misses_cache(self, cache, monkeypatch):
+        def set_month(month):
+            class FakeDatetime:
+                @staticmethod
+                def now():
+                    return datetime(2026, month, 15)
+            monkeypatch.setattr(risk_scoring, "datetime", FakeDatetime)
+
+        set_month(9)
+        off_peak = run_analysis(self._spec(), simulation_draws=0)
+        set_month(11)
+        peak = run_analysis(self._spec(), simulation_draws=0)
+        assert cache.get_stats()["misses"] == 2
+        # Q4 피크 시즌에는 리드타임 리스크 +10
+        assert peak["risk_scores"]["lead_time_risk"] == off_peak["risk_scores"]["lead_time_risk"] + 10
+        set_month(12)
+        run_analysis(self._spec(), simulation_draws=0)
+        assert cache.get_stats()["hits"] == 1
+
+    def test_lru_bounded_by_entries_and_bytes(self):
+        cache = AnalysisResultCache(max_entries=2)
+        cache.put("a", {"value": 1}, [])
+        cache.put("b", {"value": 2}, [])
+        assert cache.get("a") is not None  # a가 최근 사용
+        cache.put("c", {"value": 3}, [])
+        assert cache.get("b") is None
+        assert cache.get_stats()["evictions"] == 1
+
+        small = AnalysisResultCache(max_entries=100, max_bytes=300)
+        for index in range(10):
+            small.put(str(index), {"payload": "x" * 50}, [])
+        stats = small.get_stats()
+        assert 0 < stats["bytes"] <= 300
+        assert small.get("9") is not None and small.get("0") is None
+        assert not small.put("huge", {"payload": "x" * 1000}, [])
+
+    def test_reload_invalidates(self, tmp_path):
+        data_dir = tmp_path / "data"
+        source = Path(__file__).resolve().parent.parent / "data"
+        shutil.copytree(source, data_dir, ignore=shutil.ignore_patterns("raw", "processed"))
+        dal = DataAccessLayer(str(data_dir))
+        cache = AnalysisResultCache()
+        dal.add_reload_listener(cache.invalidate)
+
+        spec = self._spec()
+        old_key = analysis_cache_key(spec, dal.data_version)
+        cache.put(old_key, {"value": 1}, [])
+
+        with open(data_dir / "freight_rates.csv", "a", encoding="utf-8") as f:
+            f.write("Mars,Venus,Ocean,1.0,1.0,,99\n")
+        assert dal.reload()
+        assert cache.get_stats()["size"] == 0
+        assert analysis_cache_key(spec, dal.data_version) != old_key
@@ -0,0 +1,532 @@
+"""
+Data Access Layer Tests
+CSV 참조 테이블 인덱스 조회가 기존 선형 스캔과 동일하게 동작하는지 검증합니다.
+"""
+
+import csv
+import pytest
+from core import data_access
+from core.data_access import DataAccessLayer
+from core.models import ShipmentSpec
+
+
+def _write_csv(path, header, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """작은 참조 테이블 세트"""
+    _write_csv(
+        tmp_path / "freight_rates.csv",
+        ['origin', 'destination', 'mode', 'rate_per_kg', 'rate_per_cbm', 'rate_per_container', 'transit_days'],
+        [
+            ['Korea', 'USA', 'Ocean', '5.0', '120.0', '', '25'],
+            ['South Korea', 'United States', 'Air', '9.0', '', '', '5'],
+            ['China', 'United States', 'Ocean', '4.5', '110.0', '2000', '30'],
+        ]
+    )
+    _write_csv(
+        tmp_path / "duty_rates.csv",
+        ['hs_code', 'origin_country', 'duty_rate_percent', 'section_301_rate_percent'],
+        [
+            ['1704.90', 'China', '5.6', '25.0'],
+            ['1704.90', 'South Korea', '0.0', ''],
+            ['9503.00', 'China', '0.0', ''],
+        ]
+    )
+    _write_csv(
+        tmp_path / "extra_costs.csv",
+        ['category', 'terminal_handling', 'customs_clearance', 'inland_transport', 'inspection_qc', 'certification'],
+        [
+            ['food', '0.12', '0.06', '0.18', '0.25', '0.40'],
+            ['general', '0.10', '0.05', '0.15', '0.20', '0.30'],
+            ['toy', '0.50', '0.50', '0.50', '0.50', '0.50'],
+        ]
+    )
+    _write_csv(
+        tmp_path / "reference_transactions.csv",
+        ['product_category', 'origin', 'destination', 'fob_price_per_unit', 'landed_cost_per_unit', 'volume', 'transaction_date'],
+        [
+            ['snack', 'South Korea', 'United States', '0.35', '0.55', '10000', '2025-10-15'],
+            ['ramen', 'Korea', 'USA', '0.55', '0.80', '20000', '2025-10-20'],
+            ['cookie', 'South Korea', 'Germany', '1.10', '2.50', '5000', '2025-10-25'],
+        ]
+    )
+    _write_csv(
+        tmp_path / "product_pricing.csv",
+        [
+            "product_category", "origin_country", "destination_market",
+            "typical_fob_low_usd", "typical_fob_high_usd",
+            "typical_wholesale_price_low_usd", "typical_wholesale_price_high_usd",
+            "typical_retail_price_low_usd", "typical_retail_price_high_usd",
+            "vat_or_sales_tax_percent", "typical_moq_units",
+            "packaging_type", "margin_hint", "last_updated"
+        ],
+        [
+            ['KR snack - shrimp chips', 'South Korea', 'United States', '0.25', '0.45', '0.8', '1.2', '1.5', '2.5', '8.5', '5000', 'bags', 'high', '2025-11-30'],
+            ['KR ramen', 'South Korea', 'United States', '0.4', '0.7', '1.0', '1.5', '1.8', '2.8', '6.0', '10000', 'cups', 'medium', '2025-11-30'],
+        ]
+    )
+    return tmp_path
+
+
+def _spec(**overrides) -> ShipmentSpec:
+    values = {
+        'product_name': 'shrimp snack',
+        'quantity': 5000,
+        'unit_type': 'bag',
+        'origin_country': 'South Korea',
+        'destination_country': 'United States',
+    }
+    values.update(overrides)
+    return ShipmentSpec(**values)
+
+
+class TestIndexedLookups:
+    """인덱스 기반 조회 결과 검증"""
+
+    def test_freight_first_matching_row_wins(self, data_dir):
+        dal = DataAccessLayer(str(data_dir))
+        rate = dal.get_freight_rate(_spec(origin_country='ROK', destination_country='America'))
+        assert rate.source == "csv"
+        assert rate.mode == "Ocean"
+        assert rate.rate_per_kg == 5.0
+        assert rate.rate_per_container is None
+
+    def test_freight_fallback_for_unknown_lane(self, data_dir):
+        dal = DataAccessLayer(str(data_dir))
+        rate = dal.get_freight_rate(_spec(destination_country='Japan'))
+        assert rate.source == "fallback"
+
+    def test_duty_includes_section_301(self, data_dir):
+        dal = DataAccessLayer(str(data_dir))
+        rate = dal.get_duty_rate(_spec(origin_country='China'))
+        assert rate == pytest.approx(0.306)
+
+    def test_zero_duty_match_returns_none_without_fallback(self, data_dir):
+        dal = DataAccessLayer(str(data_dir))
+        assert dal.get_duty_rate(_spec()) is None
+
+    def test_duty_short_hs_code_prefix(self, data_dir):
+        dal = DataAccessLayer(str(data_dir))
+        assert dal.get_duty_rate(_spec(origin_country='China'), hs_code="1704") == pytest.approx(0.306)
+
+    def test_extra_costs_respects_file_order(self, data_dir):
+        dal = DataAccessLayer(str(data_dir))
+        # "general" 행이 "toy"보다 앞에 있으므로 general이 선택됨 (기존 동작)
+        costs = dal.get_extra_costs(_spec(product_name='toy car'))
+        assert costs.terminal_handling == 0.10
+        assert dal.get_extra_costs(_spec(product_name='food box')).terminal_handling == 0.12
+
+    def test_reference_transactions_lane_then_origin(self, data_dir):
+        dal = DataAccessLayer(str(data_dir))
+        lane_matches = dal.get_reference_transactions(_spec(), limit=5)
+        assert [t.product_category for t in lane_matches] == ['snack', 'ramen']
+        assert lane_matches[1].origin == 'South Korea'
+
+        origin_matches = dal.get_reference_transactions(_spec(destination_country='France'), limit=2)
+        assert [t.product_category for t in origin_matches] == ['snack', 'ramen']
+
+    def test_pricing_hint_partial_category(self, data_dir):
+        dal = DataAccessLayer(str(data_dir))
+        hint = dal.get_product_pricing_hint(_spec(product_category='KR ramen'))
+        assert hint is not None
+        assert hint.typical_moq_units == 10000
+        assert dal.get_product_pricing_hint(_spec(product_category=None)) is None
+        assert dal.get_product_pricing_hint(_spec(product_category='KR cookies')) is None
+
+    def test_results_are_isolated_copies(self, data_dir):
+        dal = DataAccessLayer(str(data_dir))
+        rate = dal.get_freight_rate(_spec())
+        rate.rate_per_kg = 999.0
+        assert dal.get_freight_rate(_spec()).rate_per_kg == 5.0
+
+
+class TestLoadOnce:
+    """CSV 파일은 한 번만 읽혀야 함"""
+
+    def test_tables_loaded_once(self, data_dir, monkeypatch):
+        calls = []
+        original = data_access._read_csv_rows
+
+        def counting_read(path, table_name):
+            calls.append(table_name)
+            return original(path, table_name)
+
+        monkeypatch.setattr(data_access, "_read_csv_rows", counting_read)
+        dal = DataAccessLayer(str(data_dir))
+        for _ in range(3):
+            dal.get_freight_rate(_spec())
+            dal.get_duty_rate(_spec())
+            dal.get_extra_costs(_spec())
+            dal.get_reference_transactions(_spec())
+            dal.get_product_pricing_hint(_spec(product_category='KR snack'))
+
+        assert len(calls) == 5
+        assert dal.tables.row_counts['freight_rates'] == 3
+
+
+class TestHotReload:
+    """CSV 변경 감지 및 원자적 스냅샷 교체"""
+
+    def _set_korea_us_rate(self, data_dir, rate_per_kg):
+        _write_csv(
+            data_dir / "freight_rates.csv",
+            ['origin', 'destination', 'mode', 'rate_per_kg', 'rate_per_cbm', 'rate_per_container', 'transit_days'],
+            [['South Korea', 'United States', 'Ocean', rate_per_kg, '120.0', '', '25']]
+        )
+
+    def test_reload_picks_up_content_change(self, data_dir):
+        dal = DataAccessLayer(str(data_dir))
+        old_tables = dal.tables
+        old_version = dal.data_version
+
+        self._set_korea_us_rate(data_dir, '7.5')
+        assert dal.reload() is True
+
+        assert dal.get_freight_rate(_spec()).rate_per_kg == 7.5
+        assert dal.data_version != old_version
+        # 이전 스냅샷은 그대로 유지됨 (진행 중인 조회에 영향 없음)
+        assert old_tables.freight_by_lane[('south korea', 'united states')].rate_per_kg == 5.0
+
+    def test_touch_without_content_change_does_not_reload(self, data_dir):
+        import os
+        dal = DataAccessLayer(str(data_dir))
+        tables = dal.tables
+
+        stat = os.stat(data_dir / "freight_rates.csv")
+        os.utime(data_dir / "freight_rates.csv", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000))
+
+        assert dal.reload() is False
+        assert dal.tables is tables
+
+    def test_reload_listener_called(self, data_dir):
+        dal = DataAccessLayer(str(data_dir))
+        _ = dal.tables  # force initial load
+        versions = []
+        dal.add_reload_listener(lambda tables: versions.append(tables.version))
+
+        self._set_korea_us_rate(data_dir, '6.0')
+        dal.reload()
+
+        assert versions == [dal.data_version]
+
+    def test_watcher_reloads_in_background(self, data_dir):
+        import time
+        dal = DataAccessLayer(str(data_dir))
+        _ = dal.tables  # force initial load
+        dal.start_watcher(interval_seconds=0.02)
+        try:
+            self._set_korea_us_rate(data_dir, '8.25')
+            deadline = time.time() + 5
+            while time.time() < deadline and dal.get_freight_rate(_spec()).rate_per_kg != 8.25:
+                time.sleep(0.02)
+            assert dal.get_freight_rate(_spec()).rate_per_kg == 8.25
+        finally:
+            dal.stop_watcher()
+
+
+class TestCountryNormalizer:
+    """국가 이름 정규화 (사전 컴파일된 별칭 테이블)"""
+
+    def test_exact_aliases(self):
+        from core.country_normalizer import normalize_country_name
+        assert normalize_country_name("Korea") == "South Korea"
+        assert normalize_country_name("USA") == "United States"
+        assert normalize_country_name("Deutschland") == "Germany"
+        assert normalize_country_name("People's Republic of China") == "China"
+        assert normalize_country_name("Mars") == "Mars"
+
+    def test_short_alias_does_not_match_inside_words(self):
+        from core.country_normalizer import normalize_country_name
+        assert normalize_country_name("Argentina") == "Argentina"
+        assert normalize_country_name("made in china") == "China"
+        assert normalize_country_name("Made in KR") == "South Korea"
+
+    def test_token_and_cjk_partial_match(self):
+        from core.country_normalizer import normalize_country_name
+        assert normalize_country_name("South Korea trading co.") == "South Korea"
+        assert normalize_country_name("미국에") == "United States"
+        assert normalize_country_name("인도네시아") == "Indonesia"
+
+    def test_repeated_lookups_are_memoized(self):
+        from core.country_normalizer import normalize_country_name, normalize_cache_info
+        normalize_country_name("Republic of Korea")
+        hits = normalize_cache_info().hits
+        normalize_country_name("Republic of Korea")
+        assert normalize_cache_info().hits == hits + 1
+
+    def test_aliases_loaded_from_data_file(self, tmp_path):
+        from core import country_normalizer
+        path = tmp_path / "aliases.csv"
+        _write_csv(path, ['alias', 'canonical'], [['Nippon', 'Japan']])
+        try:
+            country_normalizer.load_country_aliases(path)
+            assert country_normalizer.normalize_country_name("nippon") == "Japan"
+            assert country_normalizer.normalize_country_name("USA") == "United States"
+        finally:
+            country_normalizer.load_country_aliases()
+        assert country_normalizer.normalize_country_name("nippon") == "Nippon"
+
+
+class TestResolveBundle:
+    """resolve(): 참조 데이터 일괄 조회"""
+
+    def test_bundle_matches_individual_lookups(self, data_dir):
+        dal = DataAccessLayer(str(data_dir))
+        spec = _spec(origin_country='China', product_category='KR ramen')
+        bundle = dal.resolve(spec)
+
+        assert bundle.freight_rate == dal.get_freight_rate(spec)
+        assert bundle.duty_rate == dal.get_duty_rate(spec)
+        assert bundle.extra_costs == dal.get_extra_costs(spec)
+        assert bundle.reference_transactions == dal.get_reference_transactions(spec)
+        assert bundle.pricing_hint == dal.get_product_pricing_hint(spec)
+        assert bundle.data_version == dal.data_version
+
+    def test_provenance_and_used_fallbacks(self, data_dir):
+        dal = DataAccessLayer(str(data_dir))
+        bundle = dal.resolve(_spec(destination_country='Japan', product_category='KR ramen'))
+
+        assert bundle.provenance == {
+            "product_pricing": "missing",
+            "freight": "fallback",
+            "duty": "csv",
+            "extra_costs": "csv",
+            "reference_transactions": "csv",
+        }
+        # 관세 0% 매칭은 기존 규칙대로 duty fallback으로 집계됨
+        assert bundle.used_fallbacks == ["product_pricing", "freight", "duty"]
+
+    def test_resolve_batch_matches_resolve(self, data_dir):
+        dal = DataAccessLayer(str(data_dir))
+        specs = [
+            _spec(),
+            _spec(origin_country='Korea', destination_country='USA'),
+            _spec(origin_country='China', product_name='toy car'),
+            _spec(product_category='KR ramen'),
+            _spec(),
+        ]
+        bundles = dal.resolve_batch(specs)
+        assert [bundle.provenance for bundle in bundles] == [dal.resolve(spec).provenance for spec in specs]
+        assert [bundle.duty_rate for bundle in bundles] == [dal.resolve(spec).duty_rate for spec in specs]
+        assert [bundle.extra_costs for bundle in bundles] == [dal.resolve(spec).extra_costs for spec in specs]
+        # 같은 입력은 같은 묶음을 공유
+        assert bundles[0] is bundles[4]
+
+    def test_resolve_batch_shares_bundles_across_product_names(self, data_dir):
+        dal = DataAccessLayer(str(data_dir))
+        specs = [_spec(product_name=f'toy car #{index}') for index in range(3)] + [_spec(product_name='phone case')]
+        bundles = dal.resolve_batch(specs)
+        # HS 코드와 부대비용 카테고리가 같으면 제품명이 달라도 같은 묶음
+        assert bundles[0] is bundles[1] is bundles[2]
+        assert bundles[3] is not bundles[0]
+        assert [bundle.extra_costs for bundle in bundles] == [dal.resolve(spec).extra_costs for spec in specs]
+
+    def test_single_snapshot_and_normalization(self, data_dir, monkeypatch):
+        dal = DataAccessLayer(str(data_dir))
+        _ = dal.tables  # force initial load
+        calls = []
+        original = data_access._lane_key
+
+        def counting_lane_key(origin, destination):
+            calls.append((origin, destination))
+            return original(origin, destination)
+
+        monkeypatch.setattr(data_access, "_lane_key", counting_lane_key)
+        dal.resolve(_spec())
+        assert len(calls) == 1
+
+    def test_supabase_queries_run_concurrently(self, data_dir):
+        import threading
+
+        barrier = threading.Barrier(4, timeout=5)
+        waited = set()
+
+        def wait_for_other_queries(table):
+            if table not in waited:
+                waited.add(table)
+                barrier.wait()  # 테이블별 첫 쿼리 4개가 동시에 진행 중이어야 통과
+
+        dal = _supabase_dal(data_dir, on_execute=wait_for_other_queries)
+        bundle = dal.resolve(_spec())
+
+        assert bundle.freight_rate.rate_per_kg == 3.0
+        assert bundle.duty_rate == pytest.approx(0.04)
+        assert bundle.provenance["freight"] == "supabase"
+        assert bundle.provenance["duty"] == "supabase"
+        assert bundle.provenance["extra_costs"] == "csv"
+        assert bundle.provenance["reference_transactions"] == "csv"
+
+
+SUPABASE_ROWS = {
+    'freight_rates': [
+        {'origin': 'South Korea', 'destination': 'United States', 'rate_per_kg': 3.0, 'transit_days': 20, 'mode': 'Ocean'},
+    ],
+    'duty_rates': [
+        {'hs_code': '1704.90', 'origin_country': 'South Korea', 'duty_rate_percent': 4.0, 'section_301_rate_percent': None},
+    ],
+    'extra_costs': [],
+    'reference_transactions': [],
+}
+
+
+class _FakeSupabaseQuery:
+    """supabase-py 쿼리 빌더 대역 (필터는 무시하고 테이블 행을 그대로 반환)"""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        self.client.executed.append(self.table)
+        if self.client.on_execute:
+            self.client.on_execute(self.table)
+        return type("Result", (), {"data": list(self.client.rows.get(self.table, []))})()
+
+
+class _FakeSupabaseClient:
+    def __init__(self, rows, on_execute=None):
+        self.rows = rows
+        self.on_execute = on_execute
+        self.executed = []
+
+    def table(self, name):
+        return _FakeSupabaseQuery(self, name)
+
+
+def _supabase_dal(data_dir, rows=None, on_execute=None):
+    from core.data_access import SupabaseDataAccessLayer
+    dal = SupabaseDataAccessLayer(str(data_dir))
+    dal.supabase_client = _FakeSupabaseClient(SUPABASE_ROWS if rows is None else rows, on_execute)
+    return dal
+
+
+class TestSupabaseCache:
+    """Supabase 쿼리 TTL 캐시 / negative caching / warm-preload"""
+
+    def test_repeated_lookup_hits_cache(self, data_dir):
+        dal = _supabase_dal(data_dir)
+        for _ in range(3):
+            assert dal.get_freight_rate(_spec()).source == "supabase"
+        assert dal.supabase_client.executed == ['freight_rates']
+        assert dal.query_cache.get_stats()["hits"] == 2
+
+    def test_missing_lane_is_negatively_cached(self, data_dir):
+        dal = _supabase_dal(data_dir, rows={'freight_rates': []})
+        for _ in range(3):
+            assert dal.get_freight_rate(_spec(destination_country='Germany')).source == "fallback"
+        assert dal.supabase_client.executed == ['freight_rates']
+        assert dal.query_cache.get_stats()["negative_hits"] == 2
+
+    def test_entries_expire_after_ttl(self, data_dir):
+        from core.data_access import SupabaseQueryCache
+        now = [0.0]
+        dal = _supabase_dal(data_dir)
+        dal.query_cache = SupabaseQueryCache(ttl_seconds=10, clock=lambda: now[0])
+
+        dal.get_freight_rate(_spec())
+        now[0] = 9.0
+        dal.get_freight_rate(_spec())
+        now[0] = 11.0
+        dal.get_freight_rate(_spec())
+        assert dal.supabase_client.executed == ['freight_rates', 'freight_rates']
+
+    def test_query_errors_are_not_cached(self, data_dir):
+        failures = [RuntimeError("connection reset")]
+
+        def fail_once(table):
+            if failures:
+                raise failures.pop()
+
+        dal = _supabase_dal(data_dir, on_execute=fail_once)
+        assert dal.get_freight_rate(_spec()).source == "csv"
+        assert dal.get_freight_rate(_spec()).source == "supabase"
+
+    def test_preload_serves_small_tables_from_memory(self, data_dir):
+        dal = _supabase_dal(data_dir)
+        assert dal.preload() == {'freight_rates': 1, 'duty_rates': 1, 'extra_costs': 0}
+        dal.supabase_client.executed.clear()
+
+        bundle = dal.resolve(_spec())
+        assert bundle.freight_rate.rate_per_kg == 3.0
+        assert bundle.duty_rate == pytest.approx(0.04)
+        assert bundle.extra_costs.source == "csv"
+        assert dal.get_freight_rate(_spec(destination_country='Germany')).source == "fallback"
+        assert dal.supabase_client.executed == ['reference_transactions']
+
+
+@pytest.fixture
+def supabase_stand_in(monkeypatch):
+    """SUPABASE_ROWS를 PostgREST 형식으로 제공하는 로컬 HTTP 서버"""
+    import json
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import urlparse, parse_qsl
+
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            table = url.path.rsplit('/', 1)[-1]
+            requests.append(table)
+            rows = list(SUPABASE_ROWS.get(table, []))
+            limit = None
+            for column, condition in parse_qsl(url.query):
+                if column == 'limit':
+                    limit = int(condition)
+                    continue
+                if column in ('select', 'order'):
+                    continue
+                op, _, value = condition.partition('.')
+                if op == 'eq':
+                    rows = [row for row in rows if str(row.get(column)) == value]
+                elif op in ('like', 'ilike'):
+                    needle = value.strip('*%')
+                    rows = [row for row in rows if needle.lower() in str(row.get(column, '')).lower()]
+            body = json.dumps(rows[:limit] if limit else rows).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("SUPABASE_URL", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setenv("SUPABASE_KEY", "stand-in.anon.key")
+    try:
+        yield requests
+    finally:
+        server.shutdown()
+
+
+class TestSupabaseHttpStandIn:
+    """실제 supabase-py 클라이언트로 로컬 HTTP 대역 서버 조회"""
+
+    def test_resolve_against_stand_in(self, data_dir, supabase_stand_in):
+        pytest.importorskip("supabase")
+        from core.data_access import SupabaseDataAccessLayer
+
+        dal = SupabaseDataAccessLayer(str(data_dir))
+        assert dal.supabase_client is not None
+
+        bundle = dal.resolve(_spec())
+        assert bundle.freight_rate.rate_per_kg == 3.0
+        assert bundle.provenance["duty"] == "supabase"
+
+        request_count = len(supabase_stand_in)
+        dal.resolve(_spec())
+        assert len(supabase_stand_in) == request_count
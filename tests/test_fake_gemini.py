@@ -0,0 +1,123 @@
+"""
+Fake Gemini Tests
+오프라인 가짜 Gemini 모델의 스키마 응답, 지연/오류 주입, 파이프라인 연결을 검증합니다.
+"""
+
+import asyncio
+import json
+import os
+import time
+
+import google.generativeai as genai
+import pytest
+
+import src.ai_pipeline as ai_pipeline
+import src.ai_pipeline_async as ai_pipeline_async
+from src.stage1_batching import build_stage1_batch_prompt
+from utils.fake_gemini import FakeGeminiConfig, FakeGeminiError, FakeGenerativeModel, use_fake_gemini
+
+FAST = FakeGeminiConfig(latency="fixed", median_seconds=0.0, seconds_per_output_token=0.0, seed=1)
+
+
+class TestCannedResponses:
+    """스키마에 맞는 고정 응답"""
+
+    def test_stage2_passes_validation(self):
+        model = FakeGenerativeModel(config=FAST)
+        prompt = ai_pipeline._build_stage2_prompt({"product_category": "ramen", "detected_volume": 20000}, None)
+        analysis = json.loads(model.generate_content(prompt).text)
+        validation = ai_pipeline.validate_response(analysis)
+        assert validation["is_valid"] and validation["warnings"] == []
+        assert set(ai_pipeline.STAGE2_SECTIONS) <= set(analysis)
+        # 같은 프롬프트는 같은 응답
+        assert model.generate_content(prompt).text == json.dumps(analysis, ensure_ascii=False)
+
+    def test_stage1_single_and_batched(self):
+        model = FakeGenerativeModel(config=FAST)
+        single = json.loads(model.generate_content(ai_pipeline._build_stage1_contents("choco pie 10,000 boxes", None)).text)
+        assert (single["product_category"], single["detected_volume"]) == ("choco pie boxes", 10000)
+        batch = json.loads(model.generate_content(build_stage1_batch_prompt(["a 5", "b 7"])).text)
+        assert [(item["index"], item["detected_volume"]) for item in batch] == [(0, 5), (1, 7)]
+
+    def test_usage_metadata_and_streaming(self):
+        model = FakeGenerativeModel(config=FAST)
+        chunks = list(model.generate_content("Senior Sourcing Analyst " * 20, stream=True))
+        assert len(chunks) > 1 and all(chunk.usage_metadata is None for chunk in chunks[:-1])
+        usage = chunks[-1].usage_metadata
+        assert usage.prompt_token_count > 0 and usage.candidates_token_count > 0
+        json.loads("".join(chunk.text for chunk in chunks))
+
+
+class TestInjection:
+    """지연 분포와 오류/손상 응답 주입"""
+
+    def test_latency_scales(self):
+        config = FakeGeminiConfig(latency="fixed", median_seconds=2.0, seconds_per_output_token=0.0, time_scale=0.02)
+        started = time.perf_counter()
+        FakeGenerativeModel(config=config).generate_content("hello")
+        assert 0.035 <= time.perf_counter() - started < 0.5
+
+    def test_lognormal_spread(self):
+        model = FakeGenerativeModel(config=FakeGeminiConfig(median_seconds=1.0, spread=0.5, time_scale=0.0, seed=3))
+        draws = sorted(model._plan("x")["base_seconds"] for _ in range(200))
+        assert draws == [0.0] * 200  # time_scale 0: 지연 없음
+        model.config.time_scale = 1.0
+        draws = sorted(model._plan("x")["base_seconds"] for _ in range(500))
+        assert 0.8 < draws[250] < 1.25 and draws[-1] > 2 * draws[0]
+
+    def test_errors_and_malformed(self):
+        failing = FakeGenerativeModel(config=FakeGeminiConfig(error_rate=1.0, time_scale=0.0))
+        with pytest.raises(FakeGeminiError):
+            failing.generate_content("hello")
+        with pytest.raises(FakeGeminiError):
+            asyncio.run(failing.generate_content_async("hello"))
+        broken = FakeGenerativeModel(config=FakeGeminiConfig(malformed_rate=1.0, time_scale=0.0))
+        with pytest.raises(ValueError):
+            json.loads(broken.generate_content("Senior Sourcing Analyst").text)
+        assert failing.get_stats() == {"calls": 2, "errors": 2, "malformed": 0}
+        assert broken.get_stats()["malformed"] == 1
+
+    def test_fail_first_and_scripted_responses(self):
+        class Scripted(FakeGenerativeModel):
+            def respond(self, contents):
+                return "x" * 20
+
+        config = FakeGeminiConfig(
+            latency="fixed", median_seconds=0.0, fail_first=1, stream_chunk_chars=7, report_usage=False
+        )
+        model = Scripted(config=config)
+        with pytest.raises(FakeGeminiError):
+            model.generate_content("hello")
+        chunks = list(model.generate_content("hello", stream=True))
+        assert [len(chunk.text) for chunk in chunks] == [7, 7, 6] and model.streamed_chunks == 3
+        assert all(chunk.usage_metadata is None for chunk in chunks)
+        assert model.get_stats() == {"calls": 2, "errors": 1, "malformed": 0}
+
+    def test_invalid_config(self):
+        with pytest.raises(ValueError):
+            FakeGeminiConfig(latency="pareto")
+        with pytest.raises(ValueError):
+            FakeGeminiConfig(error_rate=1.5)
+        with pytest.raises(ValueError):
+            FakeGeminiConfig(stream_chunk_chars=0)
+
+
+class TestUseFakeGemini:
+    """파이프라인에 가짜 모델 연결"""
+
+    def test_sync_async_and_streaming_pipelines(self, memory_response_cache, monkeypatch):
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        original = genai.GenerativeModel
+        with use_fake_gemini(FAST) as model:
+            result = ai_pipeline.analyze_input_pipeline(text="shrimp chips 5000 bags")
+            assert result["_pipeline"]["validation"]["is_valid"]
+            assert result["_pipeline"]["metrics"]["stages"]["stage2"]["tokens_estimated"] is False
+
+            async_result = asyncio.run(ai_pipeline_async.analyze_input_pipeline_async(text="ramen 300 boxes"))
+            assert async_result["_pipeline"]["parsed_data"]["detected_volume"] == 300
+
+            events = [name for name, _ in ai_pipeline.iter_analysis_sections("cookies 800 tins", None, None, None, None)]
+            assert events[0] == "parsed" and events[-1] == "result"
+            assert model.get_stats()["calls"] == 6
+        assert genai.GenerativeModel is original
+        assert "GEMINI_API_KEY" not in os.environ
@@ -0,0 +1,114 @@
+"""
+Image Processing Tests
+다중 이미지 병렬 준비(축소/재인코딩), 중복 제거, Stage 1 단일 요청 전송을 검증합니다.
+"""
+
+import io
+import json
+import numpy as np
+import pytest
+from PIL import Image
+
+import src.ai_pipeline as ai_pipeline
+from utils.fake_gemini import FakeGeminiConfig, FakeGenerativeModel
+from utils.image_processing import prepare_image, prepare_images
+
+
+def _photo(width: int, height: int, fmt: str = "JPEG", seed: int = 0, mode: str = "RGB", **options) -> bytes:
+    x, y = np.meshgrid(np.linspace(0, 1, 400), np.linspace(0, 1, 300))
+    pixels = np.stack([
+        (np.sin((6 + seed) * x) + np.cos(4 * y)) * 60 + 128, x * y * 255, np.sin(30 * x * y) * 80 + 120
+    ], axis=-1).clip(0, 255).astype(np.uint8)
+    image = Image.fromarray(pixels).resize((width, height))
+    if mode == "RGBA":
+        image.putalpha(128)
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+def _size(data: bytes):
+    with Image.open(io.BytesIO(data)) as image:
+        return image.size
+
+
+class TestPrepareImage:
+    """단일 이미지 준비"""
+
+    def test_large_photo_is_downscaled(self):
+        original = _photo(4000, 3000, quality=95)
+        prepared = prepare_image(original)
+        assert prepared.mime_type == "image/jpeg"
+        assert (prepared.width, prepared.height) == _size(prepared.data) == (1536, 1152)
+        assert len(prepared.data) < len(original) and prepared.original_bytes == len(original)
+
+    def test_small_compact_image_is_sent_as_is(self):
+        original = _photo(800, 600, quality=80)
+        prepared = prepare_image(original)
+        assert prepared.data == original
+        assert prepared.to_part() == {"mime_type": "image/jpeg", "data": original}
+
+    def test_transparent_png_becomes_jpeg(self):
+        prepared = prepare_image(_photo(2000, 1500, fmt="PNG", mode="RGBA"), max_side=500)
+        assert prepared.mime_type == "image/jpeg"
+        assert _size(prepared.data) == (500, 375)
+
+    def test_undecodable_bytes(self):
+        assert prepare_image(b"not an image") is None
+
+
+class TestPrepareImages:
+    """여러 이미지 병렬 준비"""
+
+    def test_order_kept_duplicates_and_junk_dropped(self):
+        first, second = _photo(3000, 2000, seed=0), _photo(3000, 2000, seed=3)
+        prepared = prepare_images([first, b"junk", None, second, first])
+        assert [image.original_bytes for image in prepared] == [len(first), len(second)]
+        assert all(max(image.width, image.height) <= 1536 for image in prepared)
+
+    def test_empty(self):
+        assert prepare_images([]) == [] and prepare_images([None, b""]) == []
+
+
+class RecordingModel(FakeGenerativeModel):
+    """Stage 1 요청 contents를 기록하는 가짜 모델"""
+
+    def __init__(self):
+        super().__init__(config=FakeGeminiConfig(latency="fixed", median_seconds=0.0, seconds_per_output_token=0.0))
+        self.stage1_contents = []
+
+    def respond(self, contents):
+        if isinstance(contents, str) and "Senior Sourcing Analyst" in contents:
+            return json.dumps({"cost_breakdown": {}, "risk_score": {}})
+        self.stage1_contents.append(contents)
+        return '{"product_category": "shrimp chips"}'
+
+
+@pytest.fixture
+def recording_model(monkeypatch, memory_response_cache):
+    model = RecordingModel()
+    monkeypatch.setattr(ai_pipeline.genai, "GenerativeModel", lambda name: model)
+    return model
+
+
+class TestPipelineImages:
+    """파이프라인 Stage 1 이미지 전송"""
+
+    def test_all_images_in_one_stage1_request(self, recording_model):
+        first, second = _photo(3000, 2000, seed=0), _photo(3000, 2000, seed=3)
+        ai_pipeline.analyze_input_pipeline(text="shrimp chips", image_data_list=[first, second, first])
+
+        assert len(recording_model.stage1_contents) == 1
+        parts = recording_model.stage1_contents[0][1:]
+        assert [part["mime_type"] for part in parts] == ["image/jpeg", "image/jpeg"]
+        assert all(max(_size(part["data"])) <= 1536 for part in parts)
+        assert sum(len(part["data"]) for part in parts) < len(first) + len(second)
+
+        # 같은 이미지 묶음은 Stage 1 캐시 적중
+        ai_pipeline.analyze_input_pipeline(text="shrimp chips", image_data_list=[first, second, first])
+        assert len(recording_model.stage1_contents) == 1
+
+    def test_single_image_fallback(self, recording_model):
+        image = _photo(800, 600, quality=80)
+        ai_pipeline.analyze_input_pipeline(image_data=image)
+        assert recording_model.stage1_contents[0][1:] == [{"mime_type": "image/jpeg", "data": image}]
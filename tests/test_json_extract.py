@@ -0,0 +1,110 @@
+"""
+JSON Extraction Tests
+LLM 출력에서 JSON을 찾는 단일 패스 스캐너를 검증합니다.
+"""
+
+import json
+import random
+import time
+from utils.json_extract import JSONObjectScanner, extract_json, extract_json_array
+
+
+SAMPLE = {"product": "Cookies {mini}", "price": 1.5, "tags": ["a", "b"], "note": "say \"hi\""}
+
+
+class TestExtractJson:
+    """extract_json 동작"""
+
+    def test_plain_and_fenced(self):
+        text = json.dumps(SAMPLE)
+        assert extract_json(text) == SAMPLE
+        assert extract_json(f"Here you go:\n```json\n{text}\n```\nDone.") == SAMPLE
+        assert extract_json(f"```\n{text}\n```") == SAMPLE
+
+    def test_object_in_prose_with_braces_in_strings(self):
+        text = "Template {product} is ignored. Result: " + json.dumps(SAMPLE) + " {trailing}"
+        assert extract_json(text) == SAMPLE
+
+    def test_repairs_trailing_commas_and_single_quotes(self):
+        text = "Answer: {'name': 'O\\'Brien', 'items': [1, 2, 3,], 'q': 'a \"b\"',}"
+        assert extract_json(text) == {"name": "O'Brien", "items": [1, 2, 3], "q": 'a "b"'}
+
+    def test_apostrophes_in_values_are_kept(self):
+        assert extract_json('x {"note": "it\'s fine", "n": 1,} y') == {"note": "it's fine", "n": 1}
+
+    def test_skips_invalid_candidate(self):
+        text = 'Draft {"a": oops} final {"a": 1}'
+        assert extract_json(text) == {"a": 1}
+
+    def test_unclosed_candidate_before_fence(self):
+        text = 'Draft: {"status": "pending"\n```json\n{"a": 1,}\n```'
+        assert extract_json(text) == {"a": 1}
+
+    def test_top_level_array_is_kept(self):
+        assert extract_json('[{"a": 1}, {"a": 2}]') == [{"a": 1}, {"a": 2}]
+        assert extract_json('```json\n[1, 2]\n```') == [1, 2]
+
+    def test_no_json(self):
+        assert extract_json("") is None
+        assert extract_json(None) is None
+        assert extract_json("no json {here") is None
+
+    def test_linear_time_on_unclosed_braces(self):
+        text = "Step {n: estimate freight\n" * 4000
+        start = time.perf_counter()
+        assert extract_json(text) is None
+        assert time.perf_counter() - start < 1.0
+
+
+class TestExtractJsonArray:
+    """배치 응답(객체 배열) 추출"""
+
+    def test_whole_and_fenced_array(self):
+        assert extract_json_array('```json\n[{"index": 0}, {"index": 1}]\n```') == [{"index": 0}, {"index": 1}]
+
+    def test_truncated_array_keeps_complete_elements(self):
+        text = 'Here: [\n {"index": 0, "tags": ["a"]},\n {"index": 1},\n {"index": 2, "na'
+        assert extract_json_array(text) == [{"index": 0, "tags": ["a"]}, {"index": 1}]
+
+    def test_no_array(self):
+        assert extract_json_array('items [0] and [1] only') is None
+        assert extract_json_array(None) is None
+
+
+class TestJSONObjectScanner:
+    """스트리밍(청크 단위) 입력"""
+
+    def test_chunked_feed_matches_one_shot(self):
+        text = (
+            "Thinking {x} about it's cost...\n```json\n"
+            + json.dumps(SAMPLE, indent=2).replace('"b"\n', '"b",\n')
+            + "\n```"
+        )
+        expected = JSONObjectScanner().feed(text)
+        assert expected == SAMPLE
+        rng = random.Random(7)
+        for _ in range(50):
+            scanner = JSONObjectScanner()
+            pos = 0
+            while pos < len(text):
+                size = rng.randint(1, 12)
+                scanner.feed(text[pos:pos + size])
+                pos += size
+            assert scanner.result == expected
+
+    def test_returns_as_soon_as_object_closes(self):
+        scanner = JSONObjectScanner()
+        assert scanner.feed('prefix {"a": ') is None
+        assert scanner.feed('1}') == {"a": 1}
+        assert scanner.feed(' {"b": 2}') == {"a": 1}
+
+    def test_on_member_reports_top_level_members(self):
+        members = []
+        scanner = JSONObjectScanner(on_member=lambda key, value: members.append((key, value)))
+        text = "note {x}\n{'a': {'b': [1, 2,]}, \"c\": \"d,}\", \"e\": 3,} tail"
+        for char in text:
+            scanner.feed(char)
+            if char == '3':
+                assert [key for key, _ in members] == ["a", "c"]
+        assert members == [("a", {"b": [1, 2]}), ("c", "d,}"), ("e", 3)]
+        assert scanner.result == dict(members)
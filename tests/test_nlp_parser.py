@@ -0,0 +1,80 @@
+"""
+NLP Parser Fast Path Tests
+규칙 기반 파싱이 확실하면 Gemini를 호출하지 않고, 모호하면 Gemini로 넘기는지 검증합니다.
+"""
+
+import pytest
+import core.nlp_parser as nlp_parser
+from core.nlp_parser import rule_based_parse, parse_user_input, get_parse_stats, reset_parse_stats
+
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    """Gemini Stage 1 대신 호출 기록 (제품명은 입력 첫 단어)"""
+    calls = []
+
+    def fake_ai_parse(raw_text=None, api_key=None):
+        calls.append(raw_text)
+        return {"product_category": raw_text.split()[0], "detected_volume": 1000, "target_market": "USA"}
+
+    monkeypatch.setattr(nlp_parser, "ai_parse_user_input", fake_ai_parse)
+    reset_parse_stats()
+    return calls
+
+
+CONFIDENT_INPUTS = [
+    ("새우깡 5,000봉지 미국에 4달러에 팔거야", "새우깡", 5000),
+    ("phone case 10000 units from China to USA, retail price $15", "phone case", 10000),
+    ("I want to import 5000 units of bluetooth speakers from China to USA", "bluetooth speakers", 5000),
+    ("shrimp chips 5000 bags, 20 bags per carton, to Japan at $3", "shrimp chips", 5000),
+    ("불닭볶음면 3만개 일본에 팔고 싶어", "불닭볶음면", 30000),
+]
+
+AMBIGUOUS_INPUTS = [
+    "미국 말고 한국에 라면 1000개 보내고 싶어",
+    "need some snacks for my store please",
+    "Import 2000 units of yoga mats and 500 units of straps",
+    "5000 pcs phone cases from China",
+    # 제품명 안의 숫자 (수량이 아님)
+    "iPhone 15 cases 3000 units to USA",
+    "Galaxy S24 cases 2000 units to USA",
+    "USB 3.0 hubs 500 pcs to USA",
+    "MP3 players 1000 units to Japan",
+    "Size 10 running shoes 2000 pairs to USA",
+]
+
+
+class TestRuleBasedFastPath:
+    """규칙 기반 fast path"""
+
+    @pytest.mark.parametrize("text,product,quantity", CONFIDENT_INPUTS)
+    def test_confident_inputs_skip_llm(self, llm_calls, text, product, quantity):
+        spec = parse_user_input(text)
+        assert llm_calls == []
+        assert spec.product_name == product
+        assert spec.quantity == quantity
+
+    @pytest.mark.parametrize("text", AMBIGUOUS_INPUTS)
+    def test_ambiguous_inputs_use_llm(self, llm_calls, text):
+        assert rule_based_parse(text).confidence < nlp_parser.DEFAULT_FAST_PATH_MIN_CONFIDENCE
+        parse_user_input(text)
+        assert llm_calls == [text]
+
+    def test_fast_path_matches_llm_path(self, llm_calls, monkeypatch):
+        text = "phone case 10000 units from China to USA, retail price $15"
+        fast = parse_user_input(text)
+        monkeypatch.setenv("NLP_FAST_PATH_MIN_CONFIDENCE", "2")  # fast path 비활성화
+        monkeypatch.setattr(
+            nlp_parser, "ai_parse_user_input",
+            lambda raw_text=None, api_key=None: {"product_category": "phone case", "detected_volume": 1000}
+        )
+        assert parse_user_input(text) == fast
+
+    def test_fast_path_rate_metric(self, llm_calls):
+        for text, _, _ in CONFIDENT_INPUTS[:3]:
+            parse_user_input(text)
+        parse_user_input(AMBIGUOUS_INPUTS[1])
+        stats = get_parse_stats()
+        assert (stats["fast_path"], stats["llm_path"], stats["total"]) == (3, 1, 4)
+        assert stats["fast_path_rate"] == 0.75
+        assert 0 < stats["avg_fast_path_ms"] < 50
@@ -0,0 +1,112 @@
+"""
+Order Optimizer Tests
+조각별 운임 곡선의 손익분기 수량과 권장 수량이 수량별 직접 계산 결과와 같은지 검증합니다.
+"""
+
+import time
+import numpy as np
+import pytest
+from core.analysis_engine import normalize_quantity, resolve_unit_prices, unit_weight
+from core.data_access import resolve_reference_data
+from core.errors import CostingError
+from core.models import ShipmentSpec
+from core.order_optimizer import build_freight_cost_curves, first_crossover, solve_order_plan, FREIGHT_MODES
+from services.logistics_calculator import LogisticsCalculator
+
+
+def _spec(**overrides):
+    values = dict(
+        product_name="shrimp chips",
+        product_category="KR snack - shrimp chips",
+        quantity=5000,
+        unit_type="bag",
+        origin_country="South Korea",
+        destination_country="USA",
+        target_retail_price=4.0,
+    )
+    values.update(overrides)
+    return ShipmentSpec(**values)
+
+
+class TestFreightCostCurves:
+    """운임 곡선"""
+
+    def test_fcl_steps_per_container(self):
+        lcl, fcl, air = build_freight_cost_curves(2.0, 20000)
+        container_rate = sum(LogisticsCalculator.SEA_FREIGHT_RATES["40ft_fcl"]["standard_range"]) / 2
+        units_per_container = min(67 / 0.01, 26500 / 2.0)  # CBM 기준 6700개
+        assert fcl.cost(units_per_container) == pytest.approx(container_rate)
+        assert fcl.cost(units_per_container + 1) == pytest.approx(2 * container_rate)
+        assert lcl.cost(1000) == pytest.approx(1000 * 0.01 * 102.5)
+        assert air.cost(10) > lcl.cost(10)
+
+    def test_first_crossover_matches_dense_scan(self):
+        lcl, fcl, air = build_freight_cost_curves(2.0, 20000)
+        quantity = np.arange(1, 20001, dtype=np.float64)
+        expected = int(quantity[np.argmax(fcl.cost(quantity) <= lcl.cost(quantity))])
+        assert first_crossover(fcl, lcl, 1, 20000) == expected
+        assert expected == int(np.ceil(1612 / (102.5 * 0.01)))
+        assert first_crossover(air, lcl, 1, 20000) is None
+
+    def test_invalid_weight(self):
+        with pytest.raises(CostingError):
+            build_freight_cost_curves(0.0, 100)
+
+
+class TestSolveOrderPlan:
+    """주문 수량 / 운송 모드 최적화"""
+
+    @pytest.mark.parametrize("spec", [
+        _spec(),
+        _spec(product_name="toy car", product_category=None, origin_country="China", target_retail_price=12.0),
+        _spec(unit_type="carton", packaging={"units_per_carton": 20}, fob_price_per_unit=0.8),
+    ])
+    def test_recommendation_matches_dense_evaluation(self, spec):
+        plan = solve_order_plan(spec, min_quantity=1, max_quantity=30000)
+        quantity = np.arange(1, 30001, dtype=np.float64)
+        curves = build_freight_cost_curves(unit_weight(spec.product_name, spec.product_category), 30000)
+        # 권장 수량의 마진이 범위 전체의 최대값 (직접 계산 기준)
+        margins = _dense_margins(spec, curves, quantity)
+        assert plan.net_margin_percent == pytest.approx(margins.max())
+        assert plan.recommended_quantity == int(quantity[np.argmax(margins >= margins.max() - 1e-9)])
+        assert plan.recommended_mode in FREIGHT_MODES
+        assert spec.data_warnings == []
+
+    def test_moq_lower_bound(self):
+        plan = solve_order_plan(_spec())
+        assert plan.moq > 0
+        assert plan.min_quantity == plan.moq
+        assert plan.curve_quantity.min() >= plan.moq
+        assert plan.recommended_quantity >= plan.moq
+        assert plan.to_dict()["curve"]["best_mode"]
+
+    def test_invalid_range(self):
+        with pytest.raises(CostingError):
+            solve_order_plan(_spec(), min_quantity=500, max_quantity=100)
+
+    def test_answers_in_milliseconds(self):
+        spec = _spec()
+        solve_order_plan(spec, min_quantity=1, max_quantity=1_000_000)
+        start = time.perf_counter()
+        solve_order_plan(spec, min_quantity=1, max_quantity=1_000_000)
+        assert time.perf_counter() - start < 0.05
+
+
+def _dense_margins(spec, curves, quantity):
+    """run_analysis와 같은 원가 규칙으로 모든 수량의 최고 마진 계산 (수량별 직접 평가)"""
+    working = spec.model_copy(deep=True)
+    reference_data = resolve_reference_data(working, transaction_limit=5)
+    retail, manufacturing = resolve_unit_prices(working, reference_data.pricing_hint, normalize_quantity(working))
+    extra = reference_data.extra_costs
+    misc = extra.terminal_handling + extra.customs_clearance + extra.inland_transport
+
+    best = None
+    for curve in curves:
+        shipping = np.array([float(curve.cost(q)) / q for q in quantity])
+        if reference_data.duty_rate is not None:
+            duty = (manufacturing + shipping) * reference_data.duty_rate
+        else:
+            duty = manufacturing * 0.038
+        unit = manufacturing + shipping + duty + misc
+        best = unit if best is None else np.minimum(best, unit)
+    return (retail - best) / retail * 100
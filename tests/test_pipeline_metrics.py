@@ -0,0 +1,117 @@
+"""
+Pipeline Metrics Tests
+요청별 단계 토큰/지연/비용/재시도/캐시 수준 기록과 p50/p95/p99 집계를 검증합니다.
+"""
+
+import json
+import pytest
+import src.ai_pipeline as ai_pipeline
+import utils.error_handler as error_handler
+from core.errors import AIServiceError
+from utils.fake_gemini import FakeGeminiConfig, FakeGenerativeModel, FakeUsageMetadata
+from utils.pipeline_metrics import PipelineMetrics, PipelineTrace, token_cost_usd, percentile, percentiles
+
+
+def _is_stage2(contents):
+    return isinstance(contents, str) and "Senior Sourcing Analyst" in contents
+
+
+class FakeModel(FakeGenerativeModel):
+    """Stage 1 / Stage 2에 정해진 usage_metadata를 돌려주는 가짜 모델 (첫 호출 실패 주입 가능)"""
+
+    def __init__(self, fail_first=False, usage=True):
+        super().__init__(config=FakeGeminiConfig(
+            latency="fixed", median_seconds=0.0, seconds_per_output_token=0.0,
+            fail_first=1 if fail_first else 0, report_usage=usage
+        ))
+
+    def respond(self, contents):
+        if _is_stage2(contents):
+            return json.dumps({"cost_breakdown": {"total_landed_cost": 1.0}, "risk_score": {}})
+        return '{"product_category": "shrimp chips", "detected_volume": 5000}'
+
+    def usage(self, contents, text):
+        return FakeUsageMetadata(800, 300) if _is_stage2(contents) else FakeUsageMetadata(120, 40)
+
+
+@pytest.fixture
+def fake_gemini(monkeypatch, memory_response_cache):
+    monkeypatch.setattr(ai_pipeline, "pipeline_metrics", PipelineMetrics(window=100))
+    monkeypatch.setattr(error_handler.time, "sleep", lambda seconds: None)
+
+    def install(model):
+        monkeypatch.setattr(ai_pipeline.genai, "GenerativeModel", lambda name: model)
+        return model
+
+    return install
+
+
+class TestRequestMetrics:
+    """요청별 기록"""
+
+    def test_tokens_cost_and_cache_levels(self, fake_gemini):
+        fake_gemini(FakeModel())
+        first = ai_pipeline.analyze_input_pipeline(text="shrimp chips 5000 bags")["_pipeline"]["metrics"]
+        stages = first["stages"]
+        assert list(stages) == ["stage1", "stage2", "validation", "legacy_conversion"]
+        assert (stages["stage1"]["input_tokens"], stages["stage1"]["output_tokens"]) == (120, 40)
+        assert (stages["stage2"]["input_tokens"], stages["stage2"]["output_tokens"]) == (800, 300)
+        assert stages["stage1"]["cache"] == stages["stage2"]["cache"] == "miss"
+        assert (first["input_tokens"], first["output_tokens"], first["retries"]) == (920, 340, 0)
+        assert first["cost_usd"] == pytest.approx(token_cost_usd(920, 340))
+        assert first["total_seconds"] >= sum(stage["seconds"] for stage in stages.values())
+
+        second = ai_pipeline.analyze_input_pipeline(text="shrimp chips 5000 bags")["_pipeline"]["metrics"]
+        assert second["stages"]["stage1"]["cache"] == second["stages"]["stage2"]["cache"] == "hit"
+        assert (second["input_tokens"], second["output_tokens"], second["cost_usd"]) == (0, 0, 0)
+
+    def test_retries_and_estimated_tokens(self, fake_gemini):
+        model = fake_gemini(FakeModel(fail_first=True, usage=False))
+        result = ai_pipeline.analyze_input_pipeline(text="shrimp chips 5000 bags")
+        stage1 = result["_pipeline"]["metrics"]["stages"]["stage1"]
+        assert model.calls == 3
+        assert (stage1["calls"], stage1["retries"]) == (2, 1)
+        assert stage1["tokens_estimated"] and stage1["input_tokens"] > 0
+        assert result["_pipeline"]["parsed_data"]["detected_volume"] == 5000
+
+    def test_failed_requests_are_recorded(self, fake_gemini):
+        model = fake_gemini(FakeModel())
+        ai_pipeline.analyze_input_pipeline(text="shrimp chips 5000 bags")
+        model.generate_content = lambda contents: (_ for _ in ()).throw(ConnectionError("Gemini 503"))
+        with pytest.raises(AIServiceError):
+            ai_pipeline.analyze_input_pipeline(text="dried mango 300 boxes")
+        stats = ai_pipeline.get_pipeline_metrics()
+        assert (stats["requests"], stats["totals"]["failed_requests"]) == (2, 1)
+        assert stats["errors"] == {"AIServiceError": 1}
+        assert stats["stages"]["stage1"]["retries"] == 2  # 실패한 요청의 재시도도 집계
+
+    def test_aggregated_percentiles(self, fake_gemini):
+        fake_gemini(FakeModel())
+        for volume in range(10):
+            ai_pipeline.analyze_input_pipeline(text=f"shrimp chips {volume}")
+        stats = ai_pipeline.get_pipeline_metrics()
+        assert stats["requests"] == 10
+        assert stats["totals"]["input_tokens"] == 10 * 120 + 800  # Stage 2는 같은 parsed_data로 캐시 적중
+        assert stats["stages"]["stage2"]["cache"] == {"hit": 9, "coalesced": 0, "miss": 1}
+        assert stats["stages"]["stage1"]["input_tokens"] == {"p50": 120, "p95": 120, "p99": 120}
+        latency = stats["total_seconds"]
+        assert latency["p50"] <= latency["p95"] <= latency["p99"]
+
+
+def test_window_keeps_totals():
+    metrics = PipelineMetrics(window=2)
+    for _ in range(3):
+        trace = PipelineTrace()
+        with trace.stage("stage1") as stage:
+            stage.input_tokens = 10
+        metrics.record(trace.finish())
+    stats = metrics.get_stats()
+    assert (stats["requests"], stats["window"], stats["totals"]["input_tokens"]) == (3, 2, 30)
+
+
+def test_nearest_rank_percentiles():
+    # ceil(p/100 * n)번째 값: 반올림(banker's rounding)이면 p50이 2, p25가 2가 됨
+    assert percentiles([5, 1, 4, 2, 3]) == {"p50": 3, "p95": 5, "p99": 5}
+    samples = sorted(range(1, 11))
+    assert [percentile(samples, p) for p in (25, 50, 70, 71, 100)] == [3, 5, 7, 8, 10]
+    assert percentiles([]) == {"p50": None, "p95": None, "p99": None}
@@ -0,0 +1,116 @@
+"""
+Pipeline Orchestrator Tests
+Stage 2 호출과 겹쳐 실행한 로컬 작업(참조 데이터, 리스크, 컴플라이언스) 결과가 순차 실행과 같은지 검증합니다.
+"""
+
+import time
+import pytest
+import src.ai_pipeline as ai_pipeline
+import services.pipeline_orchestrator as orchestrator
+from core.errors import AIServiceError
+from services.analysis_service import enrich_analysis_result, risk_inputs
+from utils.pipeline_metrics import without_metrics
+
+STAGE2_LATENCY = 0.2
+LOOKUP_LATENCY = 0.15
+
+
+@pytest.fixture
+def pipeline(monkeypatch, memory_response_cache):
+    """느린 가짜 Stage 2 + 느린 참조 데이터 조회 + 테스트 전용 메모리 캐시"""
+    calls = {"stage2": 0, "resolve": 0}
+
+    def fake_parse(raw_text=None, image_data=None, api_key=None):
+        return {
+            "product_category": "shrimp chips",
+            "detected_volume": 5000,
+            "target_market": "USA",
+            "sales_channel": "Amazon FBA",
+            "special_requirements": [],
+        }
+
+    def fake_report(parsed_data, reference_data=None, api_key=None, on_section=None):
+        calls["stage2"] += 1
+        time.sleep(STAGE2_LATENCY)
+        return {"cost_breakdown": {"total_landed_cost": 1.0}, "risk_score": {}}
+
+    real_resolve = orchestrator.resolve_reference_data
+
+    def slow_resolve(spec, transaction_limit=5):
+        calls["resolve"] += 1
+        time.sleep(LOOKUP_LATENCY)
+        return real_resolve(spec, transaction_limit=transaction_limit)
+
+    monkeypatch.setattr(ai_pipeline, "parse_user_input", fake_parse)
+    monkeypatch.setattr(ai_pipeline, "generate_analysis_report", fake_report)
+    monkeypatch.setattr(orchestrator, "resolve_reference_data", slow_resolve)
+    return calls
+
+
+class TestPipelineOrchestrator:
+    """Stage 2와 로컬 작업 겹치기"""
+
+    def test_overlap_matches_sequential(self, pipeline, memory_response_cache):
+        kwargs = dict(text="shrimp chips 5000 bags to USA", retail_price=4.0, volume=5000)
+        overlapped = orchestrator.run_pipeline_analysis(**kwargs)
+        memory_response_cache.clear()  # 두 실행 모두 Stage 2 호출
+        sequential = orchestrator.run_pipeline_analysis(overlap=False, **kwargs)
+
+        assert without_metrics(overlapped.result) == without_metrics(sequential.result)
+        assert overlapped.reference_data == sequential.reference_data
+        assert overlapped.shipment_spec == sequential.shipment_spec
+        assert overlapped.shipment_spec.product_name == "shrimp chips"
+        assert overlapped.reference_data is not None
+        assert "risk_warnings" in overlapped.result and "compliance_warnings" in overlapped.result
+
+    def test_local_work_hidden_behind_stage2(self, pipeline, memory_response_cache):
+        overlapped = orchestrator.run_pipeline_analysis(text="shrimp chips 5000 bags")
+        memory_response_cache.clear()  # 두 실행 모두 Stage 2 호출
+        sequential = orchestrator.run_pipeline_analysis(text="shrimp chips 5000 bags", overlap=False)
+
+        assert pipeline == {"stage2": 2, "resolve": 2}
+        assert overlapped.timings["local_work"] >= LOOKUP_LATENCY
+        assert overlapped.timings["join_wait"] < LOOKUP_LATENCY / 2
+        assert sequential.timings["join_wait"] >= LOOKUP_LATENCY
+        assert overlapped.timings["total"] < sequential.timings["total"] - LOOKUP_LATENCY / 2
+
+    def test_iter_pipeline_analysis_streams_sections(self, pipeline):
+        events = list(orchestrator.iter_pipeline_analysis(text="shrimp chips 5000 bags to USA", retail_price=4.0))
+
+        assert [name for name, _ in events] == ["parsed", "cost_breakdown", "risk_score", "result"]
+        assert events[0][1]["product_category"] == "shrimp chips"
+        analysis = events[-1][1]
+        assert isinstance(analysis, orchestrator.PipelineAnalysis)
+        assert analysis.shipment_spec.product_name == "shrimp chips"
+        assert "risk_warnings" in analysis.result
+
+    def test_iter_pipeline_analysis_reraises(self, pipeline, monkeypatch):
+        def failing_report(parsed_data, reference_data=None, api_key=None, on_section=None):
+            raise AIServiceError("Gemini unavailable")
+
+        monkeypatch.setattr(ai_pipeline, "generate_analysis_report", failing_report)
+        with pytest.raises(AIServiceError):
+            list(orchestrator.iter_pipeline_analysis(text="shrimp chips 5000 bags", fallback=False))
+
+    def test_stage2_failure_propagates(self, pipeline, monkeypatch):
+        def failing_report(parsed_data, reference_data=None, api_key=None):
+            raise AIServiceError("Gemini unavailable")
+
+        monkeypatch.setattr(ai_pipeline, "generate_analysis_report", failing_report)
+        with pytest.raises(AIServiceError):
+            orchestrator.run_pipeline_analysis(text="shrimp chips 5000 bags", fallback=False)
+
+        fallback = orchestrator.run_pipeline_analysis(text="shrimp chips 5000 bags to USA")
+        assert fallback.fallback_reason == "Gemini unavailable"
+        assert fallback.shipment_spec.product_name == "shrimp chips"
+        assert fallback.result == orchestrator.run_analysis(fallback.shipment_spec)
+
+
+def test_precomputed_with_different_inputs_is_recomputed():
+    result = {"product_name": "toy car", "ai_context": {"assumptions": {"market": "USA"}}}
+    stale = {"risk": (("shrimp chips", "", "USA", ""), {"warnings": ["stale"]})}
+    enriched = enrich_analysis_result(dict(result), precomputed=stale)
+    assert enriched["risk_warnings"]["warnings"] != ["stale"]
+
+    fresh = {"risk": (risk_inputs(enrich_analysis_result(dict(result))), {"warnings": ["precomputed"]})}
+    assert enrich_analysis_result(dict(result), precomputed=fresh)["risk_warnings"] == {"warnings": ["precomputed"]}
@@ -0,0 +1,137 @@
+"""
+Pipeline Streaming Tests
+Stage 2 응답을 스트리밍으로 받으면서 섹션이 완성되는 즉시 전달되는지 검증합니다.
+"""
+
+import json
+import pytest
+import src.ai_pipeline as ai_pipeline
+import utils.error_handler as error_handler
+from core.errors import AIServiceError
+from utils.fake_gemini import FakeGeminiConfig, FakeGenerativeModel, FakeResponse
+from utils.pipeline_metrics import without_metrics
+from utils.resilience import deadline, remaining_time
+
+
+ANALYSIS = {
+    "meta": {"schema_version": "v1.2", "model": "gemini-2.5-flash"},
+    "cost_breakdown": {
+        "manufacturing": {"low": 0.4, "base": 0.5, "high": 0.6},
+        "logistics": {"freight": 0.1, "duty": 0.05},
+        "total_landed_cost": 0.65,
+        "currency": "USD",
+    },
+    "channel_strategy": {"amazon_fba": {"margin": 30.0, "recommendation": "Go, {if} MOQ fits"}},
+    "risk_score": {"regulatory": {"score": 40, "reason": "FDA \"prior notice\""}},
+    "rfq_draft": "Dear supplier, ...",
+}
+
+
+class FakeStreamingModel(FakeGenerativeModel):
+    """stream=True이면 응답을 작은 청크로 나눠 돌려주는 가짜 Gemini 모델"""
+
+    def __init__(self, text, chunk_size=7):
+        super().__init__(config=FakeGeminiConfig(
+            latency="fixed", median_seconds=0.0, seconds_per_output_token=0.0, stream_chunk_chars=chunk_size
+        ))
+        self.text = text
+
+    def respond(self, contents):
+        return self.text
+
+
+@pytest.fixture
+def streaming_model(monkeypatch, memory_response_cache):
+    model = FakeStreamingModel("```json\n" + json.dumps(ANALYSIS, indent=2) + "\n```")
+    monkeypatch.setattr(ai_pipeline.genai, "GenerativeModel", lambda name: model)
+    monkeypatch.setattr(
+        ai_pipeline, "parse_user_input",
+        lambda raw_text=None, image_data=None, api_key=None: {"product_category": "cookies", "detected_volume": 1000}
+    )
+    return model
+
+
+class TestStreamingStage2:
+    """Stage 2 스트리밍"""
+
+    def test_sections_arrive_before_stream_ends(self, streaming_model):
+        seen = []
+        report = ai_pipeline.generate_analysis_report(
+            {"product_category": "cookies"},
+            on_section=lambda name, value: seen.append((name, value, streaming_model.streamed_chunks))
+        )
+        total_chunks = streaming_model.streamed_chunks
+        assert [name for name, _, _ in seen] == ["meta", *ai_pipeline.STAGE2_SECTIONS]
+        assert all(value == ANALYSIS[name] for name, value, _ in seen)
+        # 각 섹션은 응답이 끝나기 전, 완성되는 순서대로 도착
+        arrivals = [chunk for _, _, chunk in seen[1:]]
+        assert arrivals == sorted(arrivals) and arrivals[0] < arrivals[-1] < total_chunks
+        assert report == ai_pipeline.generate_analysis_report({"product_category": "cookies"}) == ANALYSIS
+
+    def test_pipeline_reports_each_section_once_on_cache_hit(self, streaming_model):
+        streamed, cached = [], []
+        first = ai_pipeline.analyze_input_pipeline(
+            text="cookies", on_section=lambda name, value: streamed.append(name)
+        )
+        second = ai_pipeline.analyze_input_pipeline(
+            text="cookies", on_section=lambda name, value: cached.append(name)
+        )
+        assert streaming_model.calls == 1
+        assert streamed == cached == list(ai_pipeline.STAGE2_SECTIONS)
+        third = ai_pipeline.analyze_input_pipeline(text="cookies")
+        assert without_metrics(first) == without_metrics(second) == without_metrics(third)
+
+    def test_retry_replaces_sections_of_failed_attempt(self, streaming_model, monkeypatch):
+        monkeypatch.setattr(error_handler.time, "sleep", lambda seconds: None)
+        failed = dict(ANALYSIS, cost_breakdown={"total_landed_cost": 99.0}, channel_strategy={})
+        failed_text = "```json\n" + json.dumps(failed, indent=2) + "\n```"
+        attempts = []
+        stream_response = streaming_model.generate_content
+
+        def generate_content(contents, stream=False):
+            attempts.append(1)
+            if len(attempts) == 1:
+                return self._fail_after(failed_text[:failed_text.index('"rfq_draft"')])
+            return stream_response(contents, stream=stream)
+
+        monkeypatch.setattr(streaming_model, "generate_content", generate_content)
+        seen = []
+        result = ai_pipeline.analyze_input_pipeline(text="cookies", on_section=lambda name, value: seen.append((name, value)))
+        assert len(attempts) == 2
+        # 실패한 시도의 섹션은 성공한 시도의 값으로 다시 전달되고, 같은 값은 반복하지 않음
+        last = dict(seen)
+        assert all(last[name] == ANALYSIS[name] for name in ai_pipeline.STAGE2_SECTIONS)
+        assert [name for name, _ in seen].count("risk_score") == 1
+        assert [name for name, _ in seen].count("cost_breakdown") == 2
+        assert result["_pipeline"]["metrics"]["stages"]["stage2"]["calls"] == 2
+
+    @staticmethod
+    def _fail_after(text):
+        yield FakeResponse(text)
+        raise ConnectionError("stream dropped")
+
+    def test_iter_analysis_sections(self, streaming_model):
+        events = list(ai_pipeline.iter_analysis_sections(text="cookies"))
+        names = [name for name, _ in events]
+        assert names == ["parsed", *ai_pipeline.STAGE2_SECTIONS, "result"]
+        assert events[-1][1]["cost_breakdown"]["total_ddp"] == 0.65
+
+    def test_iter_analysis_sections_reraises(self, streaming_model, monkeypatch):
+        def failed_parse(raw_text=None, image_data=None, api_key=None):
+            raise AIServiceError("Gemini 503")
+
+        monkeypatch.setattr(ai_pipeline, "parse_user_input", failed_parse)
+        with pytest.raises(AIServiceError):
+            list(ai_pipeline.iter_analysis_sections(text="cookies"))
+
+    def test_iter_analysis_sections_keeps_caller_deadline(self, streaming_model, monkeypatch):
+        seen = []
+
+        def parse(raw_text=None, image_data=None, api_key=None):
+            seen.append(remaining_time())
+            return {"product_category": "cookies", "detected_volume": 1000}
+
+        monkeypatch.setattr(ai_pipeline, "parse_user_input", parse)
+        with deadline(30):
+            list(ai_pipeline.iter_analysis_sections(text="cookies"))
+        assert seen and seen[0] is not None and 0 < seen[0] <= 30  # 작업 스레드에도 같은 deadline
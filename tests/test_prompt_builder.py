@@ -0,0 +1,82 @@
+"""
+Stage 2 Prompt Builder Tests
+참조 데이터의 표 형식 직렬화, 반복 필드 제거, 토큰 예산에 따른 행 선택을 검증합니다.
+"""
+
+import src.ai_pipeline as ai_pipeline
+from src.prompt_builder import build_stage2_prompt
+from utils.pipeline_metrics import PipelineTrace, estimate_tokens
+
+TEMPLATE = ai_pipeline.STAGE2_ANALYST_PROMPT
+PARSED = {"product_category": "Shrimp chips", "detected_volume": 5000, "target_market": "USA", "special_requirements": []}
+
+
+def transactions(count):
+    return [
+        {
+            "product_category": "Shrimp chips" if index % 3 == 0 else "Rice cracker",
+            "origin": "China",
+            "destination": "USA",
+            "fob_price_per_unit": 0.4 + index / 1000,
+            "volume": 5000 if index % 2 == 0 else 40000,
+            "transaction_date": f"2024-{index % 12 + 1:02d}-01",
+            "source": "csv",
+        }
+        for index in range(count)
+    ]
+
+
+class TestCompactSerialization:
+    """표 형식 직렬화"""
+
+    def test_table_hoists_constant_columns(self):
+        prompt = build_stage2_prompt(TEMPLATE, PARSED, {"duty_rate": 0.065, "reference_transactions": transactions(4)})
+        assert "common: origin=China, destination=USA, source=csv" in prompt.text
+        assert "product_category|fob_price_per_unit|volume|transaction_date" in prompt.text
+        assert prompt.text.count("China") == 1
+        assert "duty_rate: 0.065" in prompt.text
+        assert '"special_requirements"' not in prompt.text  # 빈 필드 제거
+        assert prompt.rows_kept == 4 and prompt.rows_dropped == 0
+
+    def test_nested_hints_are_flattened(self):
+        prompt = build_stage2_prompt(TEMPLATE, PARSED, {"pricing_hint": {"typical_fob_low_usd": 0.3, "margin_hint": ""}})
+        assert "pricing_hint.typical_fob_low_usd: 0.3" in prompt.text
+        assert "margin_hint" not in prompt.text
+
+    def test_default_reference_data(self):
+        prompt = build_stage2_prompt(TEMPLATE, PARSED, None)
+        assert "typical_duty_rate: 0-25% based on HS code" in prompt.text
+        assert prompt.tokens <= prompt.baseline_tokens
+
+
+class TestTokenBudget:
+    """토큰 예산"""
+
+    def test_budget_keeps_most_relevant_rows(self):
+        rows = transactions(600)
+        prompt = build_stage2_prompt(TEMPLATE, PARSED, {"reference_transactions": rows}, token_budget=1000)
+        assert prompt.tokens == estimate_tokens(prompt.text) <= 1000
+        assert 0 < prompt.rows_kept < 600 and prompt.rows_kept + prompt.rows_dropped == 600
+        assert f"({prompt.rows_kept} of 600 rows" in prompt.text
+        table = prompt.text.split("product_category|fob_price_per_unit|volume|transaction_date\n")[1]
+        first_rows = table.splitlines()[:prompt.rows_kept]
+        # 상품명이 일치하고 물량이 가까운 행이 먼저 선택됨
+        assert all(row.startswith("Shrimp chips|") and "|5000|" in row for row in first_rows)
+        assert prompt.tokens_saved > 10 * prompt.tokens
+
+    def test_unlimited_budget_keeps_all_rows(self):
+        prompt = build_stage2_prompt(TEMPLATE, PARSED, {"reference_transactions": transactions(50)}, token_budget=None)
+        assert prompt.rows_kept == 50
+
+    def test_pipeline_records_tokens_saved(self, monkeypatch):
+        monkeypatch.setenv("STAGE2_PROMPT_TOKEN_BUDGET", "800")
+        trace = PipelineTrace()
+        with trace.stage("stage2"):
+            text = ai_pipeline._build_stage2_prompt(PARSED, {"reference_transactions": transactions(300)})
+        assert estimate_tokens(text) <= 800
+        assert trace.to_dict()["prompt_tokens_saved"] > 0
+
+    def test_budget_is_part_of_stage2_cache_key(self, monkeypatch):
+        before = ai_pipeline._stage2_cache_text(PARSED, None)
+        monkeypatch.setenv("STAGE2_PROMPT_TOKEN_BUDGET", "500")
+        assert ai_pipeline._stage2_cache_text(PARSED, None) != before
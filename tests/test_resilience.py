@@ -0,0 +1,203 @@
+"""
+Resilience Tests
+가짜 모델(지연/실패 주입)로 circuit breaker, hedged request, deadline, 재시도 정책과
+결정적 run_analysis fallback을 검증합니다.
+"""
+
+import threading
+import time
+import pytest
+import src.ai_pipeline as ai_pipeline
+import services.pipeline_orchestrator as orchestrator
+from core.errors import AIServiceError, CircuitOpenError, DeadlineExceeded, ParsingError
+from utils.error_handler import retry_on_failure
+from utils.fake_gemini import FakeGeminiConfig, FakeGenerativeModel, FakeResponse
+from utils.resilience import (
+    CircuitBreaker, ResilientCaller, LatencyTracker, call_with_hedging, deadline, get_gemini_caller
+)
+from concurrent.futures import ThreadPoolExecutor
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeModel:
+    """
+    호출 순서별 지연과 실패를 주입하는 가짜 Gemini 모델 (sync)
+    응답에 몇 번째 호출인지 담아 hedged request 중 어느 쪽이 이겼는지 확인합니다.
+    """
+
+    def __init__(self, latencies=(0.0,), fail=False):
+        self.latencies = list(latencies)
+        self.fail = fail
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, contents):
+        with self._lock:
+            index = self.calls
+            self.calls += 1
+        time.sleep(self.latencies[min(index, len(self.latencies) - 1)])
+        if self.fail:
+            raise ConnectionError("Gemini 503")
+        return FakeResponse(f'{{"product_category": "shrimp chips", "detected_volume": 5000, "attempt": {index}}}')
+
+
+class TestCircuitBreaker:
+    """circuit breaker 상태 전이"""
+
+    def test_open_half_open_close(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker("test", failure_threshold=3, recovery_timeout=10, clock=clock)
+        for _ in range(3):
+            breaker.before_call()
+            breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpenError) as excinfo:
+            breaker.before_call()
+        assert excinfo.value.retry_after == 10
+
+        clock.now = 10
+        breaker.before_call()  # probe
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()  # probe 진행 중에는 거부
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+
+        clock.now = 20
+        breaker.before_call()
+        breaker.record_success()
+        assert breaker.get_stats() == {"state": "closed", "consecutive_failures": 0, "opened": 2, "rejected": 2}
+
+    def test_success_resets_consecutive_failures(self):
+        breaker = CircuitBreaker("test", failure_threshold=2)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+class TestHedgingAndDeadlines:
+    """hedged request와 deadline"""
+
+    def test_hedge_wins_over_slow_primary(self):
+        model = FakeModel(latencies=[1.0, 0.01])
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            started = time.perf_counter()
+            response = call_with_hedging(lambda: model.generate_content("x"), executor, hedge_delay=0.05, timeout=2)
+            elapsed = time.perf_counter() - started
+        assert '"attempt": 1' in response.text
+        assert elapsed < 0.5 and model.calls == 2
+
+    def test_fast_primary_is_not_hedged(self):
+        model = FakeModel(latencies=[0.01])
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            call_with_hedging(lambda: model.generate_content("x"), executor, hedge_delay=0.2, timeout=2)
+        assert model.calls == 1
+
+    def test_timeout_raises_deadline_exceeded(self):
+        caller = ResilientCaller(CircuitBreaker("test"), call_timeout=0.05)
+        model = FakeModel(latencies=[0.5])
+        started = time.perf_counter()
+        with pytest.raises(DeadlineExceeded):
+            caller.call(lambda: model.generate_content("x"))
+        assert time.perf_counter() - started < 0.3
+        assert caller.breaker.get_stats()["consecutive_failures"] == 1
+
+    def test_expired_deadline_leaves_breaker_untouched(self):
+        clock = FakeClock()
+        caller = ResilientCaller(CircuitBreaker("test", failure_threshold=1, recovery_timeout=10, clock=clock))
+        caller.breaker.record_failure()
+        clock.now = 10  # half-open: 다음 호출이 probe
+        model = FakeModel()
+        with deadline(-1), pytest.raises(DeadlineExceeded):
+            caller.call(lambda: model.generate_content("x"))
+        assert model.calls == 0
+        assert caller.breaker.get_stats()["consecutive_failures"] == 1
+        caller.call(lambda: model.generate_content("x"))  # probe가 남아 있어 호출 가능
+        assert caller.breaker.state == CircuitBreaker.CLOSED
+
+    def test_hedge_delay_from_latency_percentile(self):
+        caller = ResilientCaller(CircuitBreaker("test"), hedge=True, min_hedge_delay=0.01, latency=LatencyTracker())
+        assert caller.hedge_delay() is None  # 샘플 부족
+        for index in range(100):
+            caller.latency.record(index / 100)
+        assert caller.hedge_delay() == pytest.approx(0.94)
+
+
+class TestRetryPolicy:
+    """재시도 정책"""
+
+    def test_parse_errors_are_not_retried(self):
+        calls = []
+
+        @retry_on_failure(max_retries=2, delay=0.01, exceptions=(AIServiceError, ParsingError))
+        def parse():
+            calls.append(1)
+            raise ParsingError("bad JSON")
+
+        with pytest.raises(ParsingError):
+            parse()
+        assert len(calls) == 1
+
+    def test_transient_errors_are_retried(self):
+        calls = []
+
+        @retry_on_failure(max_retries=2, delay=0.01)
+        def call():
+            calls.append(1)
+            if len(calls) < 3:
+                raise AIServiceError("503")
+            return "ok"
+
+        assert call() == "ok" and len(calls) == 3
+
+    def test_retry_never_sleeps_past_deadline(self):
+        calls = []
+
+        @retry_on_failure(max_retries=2, delay=1.0)
+        def call():
+            calls.append(1)
+            raise AIServiceError("503")
+
+        started = time.perf_counter()
+        with deadline(0.5), pytest.raises(AIServiceError):
+            call()
+        assert len(calls) == 1 and time.perf_counter() - started < 0.1
+
+
+class TestGeminiOutage:
+    """Gemini 장애 시 fail fast + 결정적 fallback"""
+
+    @pytest.fixture
+    def failing_model(self, monkeypatch, memory_response_cache):
+        model = FakeGenerativeModel(config=FakeGeminiConfig(error_rate=1.0, time_scale=0.0))
+        monkeypatch.setattr(ai_pipeline.genai, "GenerativeModel", lambda name: model)
+        monkeypatch.setenv("ANALYSIS_SLA_SECONDS", "0.5")
+        monkeypatch.setenv("GEMINI_CIRCUIT_FAILURE_THRESHOLD", "2")
+        return model
+
+    def test_breaker_fails_fast_and_falls_back(self, failing_model):
+        text = "need some snacks for my store please, 3000 units"
+        first = orchestrator.run_pipeline_analysis(text=text)
+        calls_after_first = failing_model.calls
+        assert first.fallback_reason and first.shipment_spec is not None
+        assert first.result == orchestrator.run_analysis(first.shipment_spec)
+        assert any("규칙 기반" in warning for warning in first.shipment_spec.data_warnings)
+
+        # 연속 실패로 breaker open → Gemini를 호출하지 않고 바로 fallback
+        assert get_gemini_caller().breaker.state == CircuitBreaker.OPEN
+        started = time.perf_counter()
+        second = orchestrator.run_pipeline_analysis(text=text)
+        assert failing_model.calls == calls_after_first
+        assert "circuit breaker is open" in second.fallback_reason
+        assert time.perf_counter() - started < 0.5
+
+    def test_no_fallback_raises(self, failing_model):
+        with pytest.raises(AIServiceError):
+            orchestrator.run_pipeline_analysis(text="shrimp chips 5000 bags", fallback=False)
@@ -0,0 +1,192 @@
+"""
+Response Cache Tests
+Persistent SQLite backend: persistence, TTL/LRU eviction, counters and multi-process access.
+"""
+
+import io
+import multiprocessing
+import os
+import sqlite3
+import numpy as np
+from PIL import Image
+from utils import cache as cache_module
+from utils.cache import ResponseCache, SQLiteResponseCache, content_digest, normalize_text_key
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _write_entries(path: str, worker: int, count: int) -> None:
+    cache = SQLiteResponseCache(path=path)
+    for index in range(count):
+        cache.set(text=f"worker-{worker}-{index}", response={"worker": worker, "index": index})
+        assert cache.get(text=f"worker-{worker}-{index}") == {"worker": worker, "index": index}
+
+
+def _photo(width: int, height: int, fmt: str = "JPEG", **options) -> bytes:
+    x, y = np.meshgrid(np.linspace(0, 1, 1200), np.linspace(0, 1, 900))
+    pixels = np.stack([
+        (np.sin(6 * x) + np.cos(4 * y)) * 60 + 128, x * y * 255, np.sin(30 * x * y) * 80 + 120
+    ], axis=-1).clip(0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).resize((width, height)).save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+class TestCacheKeys:
+    """이미지/텍스트 캐시 키"""
+
+    def test_images_with_same_header_do_not_collide(self):
+        cache = ResponseCache()
+        header = b"\xff\xd8\xff\xe0" + b"\x00" * 2000
+        first, second = header + b"photo-one", header + b"photo-two"
+        cache.set(text="analyze", image_data=first, response={"owner": "first"})
+        assert cache.get(text="analyze", image_data=second) is None
+        assert cache.get(text="analyze", image_data=[first]) == {"owner": "first"}
+        assert cache._generate_key(image_data=[first, second]) != cache._generate_key(image_data=[first])
+
+    def test_text_normalization(self):
+        cache = ResponseCache()
+        cache.set(text="Shrimp  Chips\n5000 bags ", response={"v": 1})
+        assert cache.get(text="shrimp chips 5000 BAGS") == {"v": 1}
+        assert normalize_text_key("  Ａ  b ") == "ａ b"
+        assert cache.get(text="shrimp chips 500 bags") is None
+
+    def test_tree_digest_independent_of_workers(self, monkeypatch):
+        data = os.urandom(5 * 1024 * 1024 + 17)
+        digest = content_digest(data)
+        monkeypatch.setattr(cache_module.os, "cpu_count", lambda: 1)
+        assert content_digest(bytearray(data)) == digest
+        assert content_digest(data[:-1] + b"\x00") != digest
+
+    def test_perceptual_keys_match_reencoded_photo(self):
+        original = _photo(1200, 900, quality=95)
+        reencoded = _photo(600, 450, quality=70)
+        assert ResponseCache()._generate_key(image_data=original) != ResponseCache()._generate_key(image_data=reencoded)
+
+        cache = ResponseCache(perceptual_image_keys=True)
+        cache.set(text="t", image_data=original, response={"v": 1})
+        assert cache.get(text="t", image_data=reencoded) == {"v": 1}
+        assert cache.get(text="t", image_data=_photo(800, 600, "PNG")) == {"v": 1}
+        # 디코딩할 수 없는 바이트는 전체 내용 해시로 대체
+        assert cache.get(text="t", image_data=b"not an image") is None
+
+
+class TestSQLiteResponseCache:
+    """SQLite(WAL) 응답 캐시"""
+
+    def test_same_api_and_persistence(self, tmp_path):
+        path = str(tmp_path / "responses.sqlite3")
+        cache = SQLiteResponseCache(path=path)
+        assert isinstance(cache, ResponseCache)
+        assert cache.get(text="hello") is None
+
+        cache.set(text="hello", image_data=b"\x89PNG", response={"answer": "안녕", "value": 1.5})
+        cache.close()
+
+        reopened = SQLiteResponseCache(path=path)
+        assert reopened.get(text="hello", image_data=b"\x89PNG") == {"answer": "안녕", "value": 1.5}
+        assert reopened.get(text="hello") is None
+        stats = reopened.get_stats()
+        assert (stats["hits"], stats["misses"], stats["total_entries"]) == (1, 2, 1)
+
+    def test_ttl_expiry(self, tmp_path):
+        clock = FakeClock()
+        cache = SQLiteResponseCache(path=str(tmp_path / "c.sqlite3"), ttl_seconds=60, clock=clock)
+        cache.set(text="a", response={"v": 1})
+        cache.set(text="b", response={"v": 2})
+        clock.now += 30
+        assert cache.get(text="a") == {"v": 1}
+        clock.now += 31
+        assert cache.get_stats()["expired_entries"] == 2
+        assert cache.get(text="a") is None
+        assert cache.clear_expired() == 1
+        assert cache.get_stats()["expirations"] == 2
+
+    def test_lru_eviction_by_bytes_and_entries(self, tmp_path):
+        clock = FakeClock()
+        payload = {"blob": "x" * 100}
+        cache = SQLiteResponseCache(path=str(tmp_path / "c.sqlite3"), max_bytes=350, clock=clock)
+        for key in ("a", "b", "c"):
+            clock.now += 1
+            cache.set(text=key, response=payload)
+        clock.now += 1
+        assert cache.get(text="a") == payload  # a가 최근 사용
+        clock.now += 1
+        cache.set(text="d", response=payload)
+
+        assert cache.get(text="b") is None
+        assert cache.get(text="a") == payload
+        stats = cache.get_stats()
+        assert stats["evictions"] == 1 and stats["bytes"] <= 350
+
+        small = SQLiteResponseCache(path=str(tmp_path / "s.sqlite3"), max_entries=2, clock=clock)
+        for key in ("a", "b", "c"):
+            clock.now += 1
+            small.set(text=key, response={"k": key})
+        assert small.get_stats()["total_entries"] == 2
+        assert small.get(text="a") is None
+
+    def test_lookup_is_a_plain_read(self, tmp_path):
+        path = str(tmp_path / "c.sqlite3")
+        cache = SQLiteResponseCache(path=path, busy_timeout_seconds=0.05)
+        cache.set(text="a", response={"v": 1})
+        writer = sqlite3.connect(path, isolation_level=None)
+        writer.execute("BEGIN IMMEDIATE")  # 다른 프로세스가 쓰기 잠금을 잡고 있어도 조회는 성공
+        try:
+            assert cache.get(text="a") == {"v": 1}
+            assert cache.get(text="b") is None
+        finally:
+            writer.execute("ROLLBACK")
+            writer.close()
+        stats = cache.get_stats()  # 모아 둔 hit/miss는 다음 쓰기에 기록
+        assert (stats["hits"], stats["misses"]) == (1, 1)
+
+    def test_running_totals_follow_entries(self, tmp_path):
+        clock = FakeClock()
+        path = str(tmp_path / "c.sqlite3")
+        first = SQLiteResponseCache(path=path, ttl_seconds=60, max_entries=3, clock=clock, namespace="one")
+        second = SQLiteResponseCache(path=path, ttl_seconds=60, max_entries=3, clock=clock, namespace="two")
+        for index in range(5):
+            clock.now += 1
+            first.set(text=f"k{index}", response={"v": index})
+        first.set(text="k4", response={"v": "replaced"})
+        second.set(text="k0", response={"v": 0})
+        clock.now += 61
+        first.get(text="k4")  # 만료된 항목은 다음 쓰기에서 삭제
+        second.clear()
+        first.flush_access()
+
+        conn = sqlite3.connect(path)
+        totals = dict(conn.execute("SELECT name, value FROM counters WHERE name IN ('entries', 'bytes')"))
+        assert (totals["entries"], totals["bytes"]) == conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        conn.close()
+        stats = first.get_stats()
+        assert stats["evictions"] == 3 and stats["expirations"] == 1
+
+    def test_oversized_response_not_stored(self, tmp_path):
+        cache = SQLiteResponseCache(path=str(tmp_path / "c.sqlite3"), max_bytes=10)
+        cache.set(text="big", response={"blob": "x" * 100})
+        assert cache.get_stats()["total_entries"] == 0
+
+    def test_concurrent_processes(self, tmp_path):
+        path = str(tmp_path / "shared.sqlite3")
+        SQLiteResponseCache(path=path)
+        context = multiprocessing.get_context("spawn")
+        workers = [context.Process(target=_write_entries, args=(path, worker, 25)) for worker in range(4)]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join(timeout=60)
+            assert process.exitcode == 0
+
+        stats = SQLiteResponseCache(path=path).get_stats()
+        assert stats["total_entries"] == 100
+        assert stats["hits"] == 100
@@ -0,0 +1,106 @@
+"""
+Sensitivity Sweep Tests
+sweep 그리드의 각 점이 같은 입력의 run_analysis 결과와 같은지 검증합니다.
+"""
+
+import itertools
+import numpy as np
+import pytest
+from core.analysis_engine import run_analysis
+from core.errors import NexSupplyError
+from core.models import ShipmentSpec
+from core.sensitivity import sweep
+from services.verdict_calculator import (
+    calculate_verdict_score, calculate_verdict_scores, extract_risk_levels, VERDICT_LABELS
+)
+
+
+def _spec(**overrides):
+    values = dict(
+        product_name="shrimp chips",
+        product_category="KR snack - shrimp chips",
+        quantity=5000,
+        unit_type="bag",
+        origin_country="South Korea",
+        destination_country="USA",
+        target_retail_price=4.0,
+    )
+    values.update(overrides)
+    return ShipmentSpec(**values)
+
+
+QUANTITIES = [50, 499, 5000, 20000]
+RETAIL_PRICES = [0.5, 3.5, 9.0]
+FOB_PRICES = [0, 0.3, 1.5]
+
+
+class TestSweep:
+    """민감도 그리드"""
+
+    @pytest.mark.parametrize("spec", [
+        _spec(),
+        _spec(product_name="toy car", product_category=None, origin_country="China", target_retail_price=None),
+        _spec(unit_type="carton", packaging={"units_per_carton": 20}, origin_country="Vietnam"),
+    ])
+    def test_grid_matches_run_analysis(self, spec):
+        result = sweep(spec, quantity=QUANTITIES, retail_price=RETAIL_PRICES, fob=FOB_PRICES)
+        assert result.shape == (len(QUANTITIES), len(RETAIL_PRICES), len(FOB_PRICES))
+
+        for (i, quantity), (j, retail), (k, fob) in itertools.product(
+            enumerate(QUANTITIES), enumerate(RETAIL_PRICES), enumerate(FOB_PRICES)
+        ):
+            point = spec.model_copy(
+                update={"quantity": quantity, "target_retail_price": retail, "fob_price_per_unit": fob or None},
+                deep=True
+            )
+            expected = run_analysis(point, simulation_draws=0)
+            profitability = expected["profitability"]
+            regulatory, logistics, supplier = extract_risk_levels(expected)
+            score = calculate_verdict_score(
+                margin_percent=profitability["net_profit_percent"],
+                regulatory_risk=regulatory,
+                logistics_risk=logistics,
+                supplier_risk=supplier,
+                negative_margin=profitability["net_profit_percent"] < 0
+            )[0]
+
+            assert result.unit_ddp[i, j, k] == expected["cost_scenarios"]["base"]
+            assert result.net_margin_percent[i, j, k] == profitability["net_profit_percent"]
+            assert result.total_profit[i, j, k] == pytest.approx(profitability["total_profit"])
+            assert result.verdict_score[i, j, k] == score
+
+    def test_defaults_and_spec_untouched(self):
+        spec = _spec(target_retail_price=40.0)
+        result = sweep(spec)
+        assert result.shape == (1, 1, 1)
+        assert result.retail_price[0] == 40.0
+        assert spec.data_warnings == []
+
+    def test_grid_orientation(self):
+        result = sweep(_spec(), quantity=QUANTITIES, retail_price=RETAIL_PRICES, fob=FOB_PRICES)
+        x, y, z = result.grid("unit_ddp", x="quantity", y="fob", fixed_index=1)
+        assert list(x) == QUANTITIES and list(y) == FOB_PRICES
+        assert z.shape == (len(FOB_PRICES), len(QUANTITIES))
+        assert z[2, 3] == result.unit_ddp[3, 1, 2]
+
+    def test_invalid_axis_values(self):
+        with pytest.raises(NexSupplyError):
+            sweep(_spec(), quantity=[0, 100])
+        with pytest.raises(NexSupplyError):
+            sweep(_spec(), retail_price=[])
+
+
+class TestVerdictScores:
+    """벡터화 판정 점수"""
+
+    def test_matches_scalar_score(self):
+        margins = np.array([-5.0, 0.0, 9.9, 10.0, 19.9, 20.0, 55.0])
+        for levels in [("low", "low", "low"), ("medium", "high", None), ("critical", "low", "low")]:
+            scores, verdicts = calculate_verdict_scores(margins, *levels)
+            for margin, score, verdict in zip(margins, scores, verdicts, strict=True):
+                expected_score, expected_text, _, _ = calculate_verdict_score(
+                    margin_percent=float(margin), regulatory_risk=levels[0], logistics_risk=levels[1],
+                    supplier_risk=levels[2], negative_margin=margin < 0
+                )
+                assert score == expected_score
+                assert VERDICT_LABELS[verdict] in expected_text
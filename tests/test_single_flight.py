@@ -0,0 +1,157 @@
+"""
+Single-Flight Tests
+같은 키로 동시에 들어온 호출이 한 번의 실행을 공유하는지 검증합니다.
+"""
+
+import asyncio
+import threading
+import time
+import pytest
+from core.errors import AIServiceError
+from utils.cache import SingleFlight
+from utils.pipeline_metrics import without_metrics
+import src.ai_pipeline as ai_pipeline
+
+
+class TestSingleFlight:
+    """동시 호출 병합"""
+
+    def test_threads_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.05)
+            return {"value": 1}
+
+        barrier = threading.Barrier(8)
+        results = []
+
+        def worker():
+            barrier.wait()
+            results.append(flight.do("key", slow))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == [{"value": 1}] * 8
+        # 대기자는 복사본을 받음
+        assert len({id(result) for result in results}) == 8
+        assert flight.get_stats() == {"leaders": 1, "coalesced": 7, "coalesced_rate": 7 / 8, "in_flight": 0}
+
+    def test_async_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return [1, 2]
+
+        async def main():
+            return await asyncio.gather(*[flight.do_async("key", slow) for _ in range(20)])
+
+        assert asyncio.run(main()) == [[1, 2]] * 20
+        assert len(calls) == 1
+
+    def test_failure_reaches_all_waiters_and_is_not_remembered(self):
+        flight = SingleFlight()
+        attempts = []
+
+        async def failing():
+            attempts.append(1)
+            await asyncio.sleep(0.01)
+            raise AIServiceError("boom")
+
+        async def main():
+            return await asyncio.gather(*[flight.do_async("key", failing) for _ in range(5)], return_exceptions=True)
+
+        results = asyncio.run(main())
+        assert len(attempts) == 1
+        assert all(isinstance(result, AIServiceError) for result in results)
+
+        # 다음 호출은 새로 실행
+        assert flight.do("key", lambda: "ok") == "ok"
+        assert flight.get_stats()["in_flight"] == 0
+
+    def test_cancelled_waiter_does_not_cancel_flight(self):
+        flight = SingleFlight()
+
+        async def slow():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        async def main():
+            leader = asyncio.ensure_future(flight.do_async("key", slow))
+            await asyncio.sleep(0)
+            waiter = asyncio.ensure_future(flight.do_async("key", slow))
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+            return await leader
+
+        assert asyncio.run(main()) == "done"
+
+    def test_thread_waits_on_async_leader(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            started.set()
+            await asyncio.sleep(0.05)
+            return "shared"
+
+        thread_result = []
+
+        def thread_worker():
+            started.wait()
+            thread_result.append(flight.do("key", lambda: calls.append(1) or "own"))
+
+        thread = threading.Thread(target=thread_worker)
+        thread.start()
+        assert asyncio.run(flight.do_async("key", slow)) == "shared"
+        thread.join()
+        assert thread_result == ["shared"] and len(calls) == 1
+
+
+def test_pipeline_coalesces_concurrent_identical_requests(monkeypatch, memory_response_cache):
+    monkeypatch.setattr(ai_pipeline, "single_flight", SingleFlight())
+    calls = {"parse": 0, "analysis": 0}
+
+    def fake_parse(raw_text=None, image_data=None, api_key=None):
+        calls["parse"] += 1
+        time.sleep(0.05)
+        return {"product_name": "shrimp chips", "volume": 5000, "destination": "USA"}
+
+    def fake_analysis(parsed_data, reference_data=None, api_key=None):
+        calls["analysis"] += 1
+        time.sleep(0.05)
+        return {"product_name": "shrimp chips", "risk_level": "low", "estimated_duty_rate": "5%"}
+
+    monkeypatch.setattr(ai_pipeline, "parse_user_input", fake_parse)
+    monkeypatch.setattr(ai_pipeline, "generate_analysis_report", fake_analysis)
+
+    results = []
+    barrier = threading.Barrier(6)
+
+    def worker():
+        barrier.wait()
+        results.append(ai_pipeline.analyze_input_pipeline(text="shrimp chips 5000 bags to USA"))
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 6 and all(without_metrics(result) == without_metrics(results[0]) for result in results)
+    assert calls == {"parse": 1, "analysis": 1}
+    assert ai_pipeline.get_pipeline_cache_stats()["single_flight"]["coalesced"] >= 5
@@ -0,0 +1,169 @@
+"""
+Stage 1 Micro-Batching Tests
+여러 짧은 입력을 한 번의 Stage 1 호출로 묶고, 항목별로 분리/대체 호출/배치 크기 조정을 검증합니다.
+"""
+
+import asyncio
+import json
+import re
+
+from src.ai_pipeline_async import AsyncGeminiPipeline
+from src.stage1_batching import Stage1MicroBatcher, build_stage1_batch_prompt, split_stage1_batch_response
+from utils.fake_gemini import FakeGeminiConfig, FakeGeminiError, FakeGenerativeModel
+from utils.pipeline_metrics import without_metrics
+
+INPUT_LINE = re.compile(r'^\[(\d+)\] (".*")$', re.MULTILINE)
+
+
+class BatchFakeModel(FakeGenerativeModel):
+    """
+    배치 프롬프트에는 JSON 배열, 단일 Stage 1 / Stage 2 프롬프트에는 객체로 응답하는 가짜 모델
+    지연은 호출당 overhead + 입력당 per_item
+    """
+
+    def __init__(self, overhead=0.0, per_item=0.0, drop=(), fail_batches=False):
+        super().__init__(config=FakeGeminiConfig(latency="fixed", median_seconds=0.0, seconds_per_output_token=0.0))
+        self.overhead = overhead
+        self.per_item = per_item
+        self.drop = set(drop)  # 배치 응답에서 빠뜨릴 입력 텍스트
+        self.fail_batches = fail_batches
+        self.batch_sizes = []
+        self.single_calls = 0
+
+    @staticmethod
+    def _parsed(text):
+        return {"product_category": text.split()[0], "detected_volume": 5000}
+
+    def respond(self, contents):
+        prompt = contents if isinstance(contents, str) else contents[0]
+        if "Senior Sourcing Analyst" in prompt:
+            return json.dumps({"cost_breakdown": {"total_landed_cost": 1.0}, "risk_score": {}})
+        if "numbered user input" in prompt:
+            texts = [(int(index), json.loads(text)) for index, text in INPUT_LINE.findall(prompt)]
+            items = [{"index": index, **self._parsed(text)} for index, text in texts if text not in self.drop]
+            return "```json\n" + json.dumps(items) + "\n```"
+        self.single_calls += 1
+        text = prompt.split("User input:\n", 1)[1]
+        return json.dumps(self._parsed(text))
+
+    async def generate_content_async(self, contents, **kwargs):
+        prompt = contents if isinstance(contents, str) else contents[0]
+        if "numbered user input" in prompt:
+            size = len(INPUT_LINE.findall(prompt))
+            self.batch_sizes.append(size)
+            await asyncio.sleep(self.overhead + self.per_item * size)
+            if self.fail_batches:
+                raise FakeGeminiError("batch rejected")
+        elif "Senior Sourcing Analyst" not in prompt:
+            await asyncio.sleep(self.overhead + self.per_item)
+        return await super().generate_content_async(contents, **kwargs)
+
+
+def run_batch(model, inputs, micro_batch=True):
+    pipeline = AsyncGeminiPipeline(model_factory=lambda: model, use_cache=False, max_retries=0)
+    return asyncio.run(pipeline.analyze_batch(inputs, micro_batch=micro_batch))
+
+
+CATALOG = [f"item{index} snack {index} bags" for index in range(100)]
+
+
+class TestBatchPrompt:
+    """배치 프롬프트 구성과 응답 분리"""
+
+    def test_split_by_index(self):
+        texts = ["a 1", 'b "quoted"\nline', "c 3"]
+        prompt = build_stage1_batch_prompt(texts)
+        assert '[1] "b \\"quoted\\"\\nline"' in prompt
+        response = json.dumps([
+            {"index": 2, "product_category": "c"}, {"index": 0, "product_category": "a"},
+            {"index": 7, "product_category": "x"}, "junk",
+        ])
+        first, second, third = split_stage1_batch_response(response, texts)
+        assert (first["product_category"], third["product_category"]) == ("a", "c")
+        assert second is None
+        assert first["target_market"] == "USA"  # 단일 응답과 같은 기본값 적용
+
+    def test_duplicate_index_is_ambiguous(self):
+        response = json.dumps([{"index": 0, "product_category": "a"}, {"index": 0, "product_category": "b"}])
+        assert split_stage1_batch_response(response, ["a"]) == [None]
+
+
+class TestMicroBatching:
+    """analyze_batch(micro_batch=True)"""
+
+    def test_matches_per_item_results_with_far_fewer_calls(self):
+        batched_model, single_model = BatchFakeModel(), BatchFakeModel()
+        batched = run_batch(batched_model, CATALOG)
+        single = run_batch(single_model, CATALOG, micro_batch=False)
+
+        assert [without_metrics(result) for result in batched] == [without_metrics(result) for result in single]
+        assert sum(batched_model.batch_sizes) == 100 and batched_model.single_calls == 0
+        assert len(batched_model.batch_sizes) <= 100 / 8
+        assert single_model.single_calls == 100
+
+    def test_missing_items_fall_back_to_single_calls(self):
+        model = BatchFakeModel(drop={CATALOG[3], CATALOG[40]})
+        results = run_batch(model, CATALOG)
+        assert model.single_calls == 2
+        assert results[3]["_pipeline"]["parsed_data"]["product_category"] == "item3"
+        assert all(isinstance(result, dict) for result in results)
+
+    def test_failed_batch_falls_back(self):
+        model = BatchFakeModel(fail_batches=True)
+        results = run_batch(model, CATALOG[:10])
+        assert model.single_calls == 10 and all(isinstance(result, dict) for result in results)
+
+    def test_usage_is_shared_among_items(self, memory_response_cache):
+        model = BatchFakeModel()
+        pipeline = AsyncGeminiPipeline(model_factory=lambda: model)
+        results = asyncio.run(pipeline.analyze_batch(CATALOG[:8], micro_batch=True))
+        stage1 = [result["_pipeline"]["metrics"]["stages"]["stage1"] for result in results]
+        assert len(model.batch_sizes) == 1
+        assert sum(metrics["calls"] for metrics in stage1) == 1
+        assert all(metrics["input_tokens"] > 0 and metrics["cache"] == "miss" for metrics in stage1)
+
+    def test_cancelled_batch_frees_its_slot(self):
+        model = BatchFakeModel(overhead=10.0)
+        pipeline = AsyncGeminiPipeline(model_factory=lambda: model, use_cache=False, max_retries=0)
+        batcher = Stage1MicroBatcher(pipeline, batch_size=2, linger_seconds=0.001)
+        batcher._max_in_flight = 1
+
+        async def scenario():
+            parses = [asyncio.ensure_future(batcher.parse(text)) for text in CATALOG[:4]]
+            await asyncio.sleep(0.05)
+            assert batcher._in_flight == 1 and len(batcher._pending) == 2
+            model.overhead = 0.0
+            for task in list(batcher._tasks):
+                task.cancel()
+            # 취소된 배치의 항목은 단일 호출로, 대기 중이던 배치는 풀린 슬롯으로 진행
+            return await asyncio.wait_for(asyncio.gather(*parses), timeout=2)
+
+        parsed = asyncio.run(scenario())
+        assert [item["product_category"] for item in parsed] == ["item0", "item1", "item2", "item3"]
+        assert model.single_calls == 2 and batcher._in_flight == 0
+
+
+class TestAdaptiveBatchSize:
+    """지연 시간 기반 배치 크기 조정"""
+
+    def test_grows_when_fast_and_shrinks_when_slow(self):
+        pipeline = AsyncGeminiPipeline(model_factory=BatchFakeModel)
+        batcher = Stage1MicroBatcher(pipeline, batch_size=16, max_batch_size=64, target_seconds=8.0)
+        batcher._adapt(16, model_seconds=2.0, complete=True)  # 항목당 0.125초 -> 목표 64개
+        assert batcher.batch_size == 40
+        batcher._adapt(40, model_seconds=40.0, complete=True)  # 항목당 1초 -> 목표 8개
+        assert batcher.batch_size == 24
+        batcher._adapt(24, model_seconds=1.0, complete=False)  # 잘린 응답
+        assert batcher.batch_size == 12
+
+    def test_latency_drives_batch_size_in_pipeline(self):
+        model = BatchFakeModel(overhead=0.01, per_item=0.004)
+        pipeline = AsyncGeminiPipeline(model_factory=lambda: model, use_cache=False)
+        batcher = Stage1MicroBatcher(pipeline, batch_size=40, target_seconds=0.05, linger_seconds=0.005)
+
+        async def parse_all():
+            return await asyncio.gather(*(batcher.parse(text) for text in CATALOG))
+
+        parsed = asyncio.run(parse_all())
+        assert [item["product_category"] for item in parsed] == [f"item{index}" for index in range(100)]
+        assert 2 <= batcher.batch_size <= 16  # 0.05초 안에 끝나는 크기 (약 10개) 쪽으로 줄어듦
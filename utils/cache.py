@@ -1,14 +1,142 @@
 """
-Response Cache - Simple in-memory cache for AI responses
+Response Cache - Cache for AI responses
 Reduces API calls by caching identical requests
+
+Two backends share the same get/set API:
+- ResponseCache: process-local dict with TTL
+- SQLiteResponseCache: persistent SQLite (WAL) file shared by all workers on the host,
+  with byte-size limits, LRU/TTL eviction and hit/miss/eviction counters
+
+Use get_response_cache() to get the configured backend.
 """
 
+import asyncio
+import atexit
+import concurrent.futures
+import copy
 import hashlib
+import io
 import json
+import logging
+import os
+import sqlite3
+import threading
 import time
-from typing import Optional, Dict, Any, Tuple
+import unicodedata
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple, Callable, Awaitable
 from datetime import datetime, timedelta
 
+logger = logging.getLogger(__name__)
+
+# Defaults (override with RESPONSE_CACHE_* environment variables)
+DEFAULT_RESPONSE_CACHE_BACKEND = "sqlite"
+DEFAULT_RESPONSE_CACHE_PATH = ".cache/response_cache.sqlite3"
+DEFAULT_RESPONSE_CACHE_TTL_SECONDS = 24 * 3600
+DEFAULT_RESPONSE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_RESPONSE_CACHE_MAX_ENTRIES = 100_000
+# SQLite lookups buffer LRU touches and hit/miss counts; they are written in one transaction
+# after this many lookups, after this many seconds, or with the next write
+DEFAULT_RESPONSE_CACHE_ACCESS_FLUSH_BATCH = 64
+DEFAULT_RESPONSE_CACHE_ACCESS_FLUSH_SECONDS = 1.0
+
+# Cache key format version (bump when the key derivation changes)
+CACHE_KEY_VERSION = "v2"
+
+# Images at least this large are hashed as a BLAKE2b tree (leaves hashed in parallel)
+_TREE_HASH_LEAF_BYTES = 1024 * 1024
+_TREE_HASH_MIN_BYTES = 4 * _TREE_HASH_LEAF_BYTES
+_hash_executor: Optional[ThreadPoolExecutor] = None
+_hash_executor_lock = threading.Lock()
+
+
+def normalize_text_key(text: Optional[str]) -> str:
+    """
+    Normalize text for cache keys: Unicode NFC, case-folded, whitespace collapsed.
+
+    "Shrimp  Chips\n5000 bags" and "shrimp chips 5000 bags" map to the same key.
+    """
+    if not text:
+        return ""
+    return " ".join(unicodedata.normalize("NFC", text).casefold().split())
+
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        with _hash_executor_lock:
+            if _hash_executor is None:
+                _hash_executor = ThreadPoolExecutor(
+                    max_workers=min(8, os.cpu_count() or 1), thread_name_prefix="cache-hash"
+                )
+    return _hash_executor
+
+
+def content_digest(data: bytes) -> str:
+    """
+    Full-content BLAKE2b digest of image bytes (hashed through a memoryview, no copies).
+
+    Large inputs use BLAKE2b tree mode with 1 MB leaves: leaves are hashed on a thread pool
+    (hashlib releases the GIL), so the cost scales down with available cores. The digest
+    depends only on the content, never on the number of workers.
+
+    Returns:
+        32-character hex digest
+    """
+    view = memoryview(data).cast("B")
+    size = view.nbytes
+    if size < _TREE_HASH_MIN_BYTES:
+        return hashlib.blake2b(view, digest_size=16).hexdigest()
+
+    leaf_count = (size + _TREE_HASH_LEAF_BYTES - 1) // _TREE_HASH_LEAF_BYTES
+    tree = dict(fanout=0, depth=2, leaf_size=_TREE_HASH_LEAF_BYTES, inner_size=32)
+
+    def leaf(index: int) -> bytes:
+        start = index * _TREE_HASH_LEAF_BYTES
+        return hashlib.blake2b(
+            view[start:start + _TREE_HASH_LEAF_BYTES], digest_size=32, node_offset=index,
+            node_depth=0, last_node=index == leaf_count - 1, **tree
+        ).digest()
+
+    if (os.cpu_count() or 1) > 1:
+        leaves = list(_get_hash_executor().map(leaf, range(leaf_count)))
+    else:
+        leaves = [leaf(index) for index in range(leaf_count)]
+
+    root = hashlib.blake2b(digest_size=16, node_offset=0, node_depth=1, last_node=True, **tree)
+    for digest in leaves:
+        root.update(digest)
+    return root.hexdigest()
+
+
+def perceptual_hash(data: bytes, hash_size: int = 8) -> Optional[str]:
+    """
+    Difference hash (dHash) of an image: stable across resizing and re-compression.
+
+    JPEGs are decoded at reduced scale (draft mode), so this stays cheap for large photos.
+
+    Returns:
+        Hex string, or None if the bytes cannot be decoded as an image
+    """
+    try:
+        from PIL import Image
+        with Image.open(io.BytesIO(data)) as image:
+            image.draft("L", (hash_size * 8, hash_size * 8))
+            pixels = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS)
+            values = pixels.tobytes()
+    except Exception as e:
+        logger.debug(f"Perceptual hash unavailable: {e}")
+        return None
+
+    bits = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for column in range(hash_size):
+            bits = (bits << 1) | (values[offset + column] > values[offset + column + 1])
+    return f"{bits:0{hash_size * hash_size // 4}x}"
+
 
 class ResponseCache:
     """
@@ -16,40 +144,62 @@ class ResponseCache:
     Uses hash of input text/image to identify identical requests.
     """
     
-    def __init__(self, ttl_seconds: int = 3600):
+    def __init__(self, ttl_seconds: int = 3600, perceptual_image_keys: bool = False, namespace: str = "default"):
         """
         Args:
             ttl_seconds: Time-to-live for cache entries in seconds (default: 1 hour)
+            perceptual_image_keys: Key images by perceptual hash instead of exact content,
+                so re-uploads at a different size or compression also hit
+            namespace: Cache level name (part of every key; stats are per namespace)
         """
         self.cache: Dict[str, Tuple[Dict[str, Any], float]] = {}
         self.ttl = ttl_seconds
+        self.perceptual_image_keys = perceptual_image_keys
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+    
+    def key_for(self, text: Optional[str] = None, image_data: Optional[bytes] = None) -> str:
+        """Cache key for an input (namespaced, e.g. for SingleFlight coalescing)."""
+        return f"{self.namespace}:{self._generate_key(text, image_data)}"
+    
+    def _image_fingerprint(self, image_bytes: bytes) -> str:
+        """Fingerprint of one image (perceptual if enabled and decodable, else full content)."""
+        if self.perceptual_image_keys:
+            phash = perceptual_hash(image_bytes)
+            if phash is not None:
+                return f"p:{phash}"
+        return f"b:{content_digest(image_bytes)}"
     
     def _generate_key(self, text: Optional[str] = None, image_data: Optional[bytes] = None) -> str:
         """
         Generate a cache key from input text and/or image data.
         
+        Text is normalized (normalize_text_key) and every image contributes a hash of
+        its full content, so distinct images never share a key.
+        
         Args:
             text: Input text
             image_data: Image data bytes (or list of image bytes)
             
         Returns:
-            Cache key string (SHA256 hash)
-        """
-        # Handle list of images
-        if isinstance(image_data, list):
-            # Hash all images together
-            combined = (text or "").encode('utf-8')
-            for img_bytes in image_data:
-                combined += img_bytes[:1000]  # Use first 1KB as fingerprint
-            key_input = combined
+            Cache key string (BLAKE2b hash)
+        """
+        if isinstance(image_data, (list, tuple)):
+            images = [img_bytes for img_bytes in image_data if img_bytes]
         elif image_data:
-            # Single image
-            key_input = ((text or "") + image_data[:1000].hex()).encode('utf-8')
+            images = [image_data]
         else:
-            # Text only
-            key_input = (text or "").encode('utf-8')
+            images = []
         
-        return hashlib.sha256(key_input).hexdigest()
+        key_input = hashlib.blake2b(digest_size=32)
+        parts = [CACHE_KEY_VERSION, self.namespace, normalize_text_key(text)]
+        for part in parts + [self._image_fingerprint(img) for img in images]:
+            encoded = part.encode('utf-8')
+            key_input.update(len(encoded).to_bytes(8, "big"))  # length prefix: no ambiguity between parts
+            key_input.update(encoded)
+        
+        return key_input.hexdigest()
     
     def get(self, text: Optional[str] = None, image_data: Optional[bytes] = None) -> Optional[Dict[str, Any]]:
         """
@@ -69,11 +219,13 @@ class ResponseCache:
             
             # Check if expired
             if time.time() - timestamp < self.ttl:
+                self.hits += 1
                 return cached_data
             else:
                 # Remove expired entry
                 del self.cache[key]
         
+        self.misses += 1
         return None
     
     def set(self, text: Optional[str] = None, image_data: Optional[bytes] = None, response: Dict[str, Any] = None) -> None:
@@ -126,14 +278,597 @@ class ResponseCache:
             if current_time - timestamp < self.ttl
         )
         
+        total = self.hits + self.misses
         return {
+            "backend": "memory",
+            "namespace": self.namespace,
             "total_entries": len(self.cache),
             "valid_entries": valid_entries,
             "expired_entries": len(self.cache) - valid_entries,
-            "ttl_seconds": self.ttl
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total > 0 else 0.0
         }
 
 
-# Global cache instance (1 hour TTL)
+# Open SQLite caches, so their buffered lookups are written at interpreter exit
+_open_sqlite_caches: "weakref.WeakSet[SQLiteResponseCache]" = weakref.WeakSet()
+
+
+def _flush_sqlite_caches() -> None:
+    for cache in list(_open_sqlite_caches):
+        cache.flush_access()
+
+
+atexit.register(_flush_sqlite_caches)
+
+
+class SQLiteResponseCache(ResponseCache):
+    """
+    Persistent response cache backed by a SQLite database in WAL mode.
+
+    Entries survive restarts and are shared between processes using the same file.
+    Lookups are plain reads and run concurrently; writes are serialized by SQLite's write
+    lock (BEGIN IMMEDIATE with a busy timeout). A lookup's LRU touch and hit/miss count are
+    buffered per instance and written in batches (see flush_access), so the LRU order and
+    counters seen by other processes lag by up to one batch. Counters live in the database
+    so get_stats() reports totals across all workers; running entry/byte totals kept next
+    to them let set() check the limits without scanning the table. Cache errors are logged
+    and treated as misses - a broken cache never fails an analysis.
+
+    Several namespaces (cache levels) can share one file: they share the byte/entry limits
+    and the LRU order, but entries and counters are reported per namespace.
+    """
+
+    _SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS entries (
+            key TEXT PRIMARY KEY,
+            namespace TEXT NOT NULL DEFAULT 'default',
+            value BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            expires_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        )
+        """,
+        "DROP INDEX IF EXISTS entries_last_access",
+        "CREATE INDEX IF NOT EXISTS entries_lru ON entries(last_access, key)",
+        "CREATE INDEX IF NOT EXISTS entries_expires_at ON entries(expires_at)",
+        "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+    )
+    # Counter rows with the running totals of the whole file (no "namespace:" prefix)
+    _TOTAL_ENTRIES = "entries"
+    _TOTAL_BYTES = "bytes"
+
+    def __init__(
+        self,
+        path: str = DEFAULT_RESPONSE_CACHE_PATH,
+        ttl_seconds: int = DEFAULT_RESPONSE_CACHE_TTL_SECONDS,
+        max_bytes: int = DEFAULT_RESPONSE_CACHE_MAX_BYTES,
+        max_entries: int = DEFAULT_RESPONSE_CACHE_MAX_ENTRIES,
+        busy_timeout_seconds: float = 5.0,
+        clock: Callable[[], float] = time.time,
+        perceptual_image_keys: bool = False,
+        namespace: str = "default",
+        access_flush_batch: int = DEFAULT_RESPONSE_CACHE_ACCESS_FLUSH_BATCH,
+        access_flush_seconds: float = DEFAULT_RESPONSE_CACHE_ACCESS_FLUSH_SECONDS
+    ):
+        """
+        Args:
+            path: SQLite database file (parent directory is created)
+            ttl_seconds: Time-to-live for cache entries in seconds
+            max_bytes: Maximum total size of stored responses
+            max_entries: Maximum number of entries
+            busy_timeout_seconds: How long a writer waits for another process's lock
+            clock: Wall-clock time function (entries are compared across processes)
+            perceptual_image_keys: Key images by perceptual hash (see ResponseCache)
+            namespace: Cache level name (see class docstring)
+            access_flush_batch: Buffered lookups that trigger a flush_access()
+            access_flush_seconds: Age of the oldest buffered lookup that triggers a flush_access()
+        """
+        self.path = str(path)
+        self.ttl = ttl_seconds
+        self.perceptual_image_keys = perceptual_image_keys
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.busy_timeout_seconds = busy_timeout_seconds
+        self._clock = clock
+        self._local = threading.local()
+        self.access_flush_batch = max(1, access_flush_batch)
+        self.access_flush_seconds = access_flush_seconds
+        self._access_lock = threading.Lock()
+        self._pending_touches: Dict[str, float] = {}
+        self._pending_expired: Dict[str, float] = {}
+        self._pending_counts: Dict[str, int] = {}
+        self._pending_lookups = 0
+        self._pending_since = 0.0
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+
+        def create_schema(conn: sqlite3.Connection) -> None:
+            for statement in self._SCHEMA:
+                conn.execute(statement)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(entries)")}
+            if "namespace" not in columns:  # files created before namespaces existed
+                conn.execute("ALTER TABLE entries ADD COLUMN namespace TEXT NOT NULL DEFAULT 'default'")
+            # Running totals (files created before they existed are counted once)
+            conn.execute(
+                "INSERT OR IGNORE INTO counters(name, value) SELECT ?, COUNT(*) FROM entries", (self._TOTAL_ENTRIES,)
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO counters(name, value) SELECT ?, COALESCE(SUM(size), 0) FROM entries",
+                (self._TOTAL_BYTES,)
+            )
+
+        self._write(create_schema)
+        _open_sqlite_caches.add(self)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread, per-process connection (connections must not cross a fork)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        # isolation_level=None: autocommit, write transactions are explicit (see _write)
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout_seconds, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_seconds * 1000)}")
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _write(self, operation: Callable[[sqlite3.Connection], Any]) -> Any:
+        """
+        Run operation in a write transaction (takes the database write lock up front).
+
+        Buffered lookups are written first in the same transaction; they are dropped if it fails.
+        """
+        with self._access_lock:
+            touches, expired, counts = self._pending_touches, self._pending_expired, self._pending_counts
+            self._pending_touches, self._pending_expired, self._pending_counts = {}, {}, {}
+            self._pending_lookups = 0
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._apply_access(conn, touches, expired, counts)
+            result = operation(conn)
+            conn.execute("COMMIT")
+            return result
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _apply_access(
+        self,
+        conn: sqlite3.Connection,
+        touches: Dict[str, float],
+        expired: Dict[str, float],
+        counts: Dict[str, int]
+    ) -> None:
+        """Write buffered lookups: LRU touches, deletes of entries seen expired, hit/miss counts."""
+        if touches:
+            conn.executemany(
+                "UPDATE entries SET last_access = MAX(last_access, ?) WHERE key = ?",
+                [(now, key) for key, now in touches.items()]
+            )
+        for key, now in expired.items():
+            row = conn.execute(
+                "SELECT size, namespace FROM entries WHERE key = ? AND expires_at <= ?", (key, now)
+            ).fetchone()
+            if row is not None:  # not replaced by a fresh entry in the meantime
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._adjust_totals(conn, -1, -row[0])
+                self._count(conn, "expirations", 1, row[1])
+        for name, amount in counts.items():
+            self._count(conn, name, amount)
+
+    def flush_access(self) -> None:
+        """Write the buffered LRU touches and hit/miss counts now (best effort)."""
+        if not self._pending_lookups:
+            return
+        try:
+            self._write(lambda conn: None)
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache access flush failed ({self.path}): {e}")
+
+    def __del__(self) -> None:
+        if getattr(self, "_pending_lookups", 0):
+            self.flush_access()
+
+    def _record_access(self, name: str, key: str, now: float, expired: bool = False) -> None:
+        """Buffer one lookup; flush when the batch is full or the oldest buffered lookup is old enough."""
+        with self._access_lock:
+            if self._pending_lookups == 0:
+                self._pending_since = time.monotonic()
+            self._pending_lookups += 1
+            self._pending_counts[name] = self._pending_counts.get(name, 0) + 1
+            if expired:
+                self._pending_expired[key] = now
+            elif name == "hits":
+                self._pending_touches[key] = now
+            due = (
+                self._pending_lookups >= self.access_flush_batch
+                or time.monotonic() - self._pending_since >= self.access_flush_seconds
+            )
+        if due:
+            self.flush_access()
+
+    def _adjust_totals(self, conn: sqlite3.Connection, entries: int, size: int) -> None:
+        """Add to the running entry/byte totals (inside a write transaction)."""
+        conn.executemany(
+            "UPDATE counters SET value = value + ? WHERE name = ?",
+            [(entries, self._TOTAL_ENTRIES), (size, self._TOTAL_BYTES)]
+        )
+
+    def _count(self, conn: sqlite3.Connection, name: str, amount: int = 1, namespace: Optional[str] = None) -> None:
+        """Add to a per-namespace counter (inside a write transaction)."""
+        if amount:
+            conn.execute(
+                "INSERT INTO counters(name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (f"{namespace or self.namespace}:{name}", amount)
+            )
+
+    def _delete_expired(self, conn: sqlite3.Connection, now: float, namespace: Optional[str] = None) -> int:
+        """Delete expired entries (all namespaces if namespace is None), counting them per namespace."""
+        where, params = "expires_at <= ?", [now]
+        if namespace is not None:
+            where += " AND namespace = ?"
+            params.append(namespace)
+        counts = conn.execute(
+            f"SELECT namespace, COUNT(*), SUM(size) FROM entries WHERE {where} GROUP BY namespace", params
+        ).fetchall()
+        if not counts:
+            return 0
+        conn.execute(f"DELETE FROM entries WHERE {where}", params)
+        for entry_namespace, count, _ in counts:
+            self._count(conn, "expirations", count, entry_namespace)
+        self._adjust_totals(conn, -sum(count for _, count, _ in counts), -sum(size for _, _, size in counts))
+        return sum(count for _, count, _ in counts)
+
+    def get(self, text: Optional[str] = None, image_data: Optional[bytes] = None) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve cached response if available and not expired.
+
+        A plain read: the hit's LRU refresh (or the expired entry's delete) and the hit/miss
+        count are buffered and written later in one transaction.
+        """
+        key = self._generate_key(text, image_data)
+        now = self._clock()
+        try:
+            row = self._connection().execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache read failed ({self.path}): {e}")
+            return None
+        if row is None or row[1] <= now:
+            self._record_access("misses", key, now, expired=row is not None)
+            return None
+        self._record_access("hits", key, now)
+        return json.loads(row[0])
+
+    def set(self, text: Optional[str] = None, image_data: Optional[bytes] = None, response: Dict[str, Any] = None) -> None:
+        """
+        Store response in cache, then evict expired and least recently used
+        entries until the byte and entry limits hold.
+        """
+        if response is None:
+            return
+
+        key = self._generate_key(text, image_data)
+        try:
+            value = json.dumps(response, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Response cache skipped (response not serializable): {e}")
+            return
+        if len(value) > self.max_bytes:
+            return
+
+        def store(conn: sqlite3.Connection) -> None:
+            now = self._clock()
+            replaced = conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries(key, namespace, value, size, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, self.namespace, value, len(value), now + self.ttl, now)
+            )
+            if replaced is None:
+                self._adjust_totals(conn, 1, len(value))
+            else:
+                self._adjust_totals(conn, 0, len(value) - replaced[0])
+            self._evict(conn, now)
+
+        try:
+            self._write(store)
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache write failed ({self.path}): {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """
+        Remove expired entries, then LRU entries while over the limits (inside a write transaction).
+
+        The limits are checked against the running totals; only the LRU rows that have to go
+        are read.
+        """
+        self._delete_expired(conn, now)
+
+        totals = dict(conn.execute(
+            "SELECT name, value FROM counters WHERE name IN (?, ?)", (self._TOTAL_ENTRIES, self._TOTAL_BYTES)
+        ).fetchall())
+        count, total = totals.get(self._TOTAL_ENTRIES, 0), totals.get(self._TOTAL_BYTES, 0)
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        victims = 0
+        freed = 0
+        evicted: Dict[str, int] = {}
+        cursor = conn.execute("SELECT size, namespace FROM entries ORDER BY last_access, key")
+        for size, entry_namespace in cursor:
+            if count - victims <= self.max_entries and total - freed <= self.max_bytes:
+                break
+            victims += 1
+            freed += size
+            evicted[entry_namespace] = evicted.get(entry_namespace, 0) + 1
+        cursor.close()
+        conn.execute(
+            "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY last_access, key LIMIT ?)", (victims,)
+        )
+        self._adjust_totals(conn, -victims, -freed)
+        for entry_namespace, amount in evicted.items():
+            self._count(conn, "evictions", amount, entry_namespace)
+
+    def clear(self) -> None:
+        """Clear all entries of this namespace (counters are kept)."""
+        def delete_namespace(conn: sqlite3.Connection) -> None:
+            count, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries WHERE namespace = ?", (self.namespace,)
+            ).fetchone()
+            conn.execute("DELETE FROM entries WHERE namespace = ?", (self.namespace,))
+            self._adjust_totals(conn, -count, -size)
+
+        try:
+            self._write(delete_namespace)
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache clear failed ({self.path}): {e}")
+
+    def clear_expired(self) -> int:
+        """
+        Remove expired cache entries.
+
+        Returns:
+            Number of entries removed
+        """
+        try:
+            return self._write(lambda conn: self._delete_expired(conn, self._clock(), self.namespace))
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache cleanup failed ({self.path}): {e}")
+            return 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics for this namespace (counters are totals across all
+        processes sharing the file; shared_bytes covers every namespace).
+
+        Returns:
+            Dictionary with cache stats
+        """
+        self.flush_access()
+        try:
+            conn = self._connection()
+            total_entries, valid_entries, total_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(expires_at > ?), 0), COALESCE(SUM(size), 0) "
+                "FROM entries WHERE namespace = ?",
+                (self._clock(), self.namespace)
+            ).fetchone()
+            shared_bytes = conn.execute(
+                "SELECT value FROM counters WHERE name = ?", (self._TOTAL_BYTES,)
+            ).fetchone()[0]
+            prefix = f"{self.namespace}:"
+            counters = {
+                name[len(prefix):]: value
+                for name, value in conn.execute("SELECT name, value FROM counters").fetchall()
+                if name.startswith(prefix)
+            }
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache stats failed ({self.path}): {e}")
+            total_entries = valid_entries = total_bytes = shared_bytes = 0
+            counters = {}
+
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        return {
+            "backend": "sqlite",
+            "namespace": self.namespace,
+            "path": self.path,
+            "total_entries": total_entries,
+            "valid_entries": valid_entries,
+            "expired_entries": total_entries - valid_entries,
+            "ttl_seconds": self.ttl,
+            "bytes": total_bytes,
+            "shared_bytes": shared_bytes,
+            "max_bytes": self.max_bytes,
+            "max_entries": self.max_entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses > 0 else 0.0,
+            "evictions": counters.get("evictions", 0),
+            "expirations": counters.get("expirations", 0),
+        }
+
+    def close(self) -> None:
+        """Write the buffered lookups and close this thread's connection."""
+        self.flush_access()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one in-flight call.
+
+    The first caller (leader) runs the function; callers arriving while it runs wait on
+    the same future and get the same outcome. Works across threads (do) and within
+    asyncio (do_async), and threads and coroutines can wait on each other's flights.
+    A failure is raised to every waiter of that flight and nothing is remembered
+    afterwards, so the next call starts fresh (the cache is only written on success by
+    the leader's function). Waiters receive deep copies, so one caller mutating its
+    result cannot affect another.
+    """
+
+    def __init__(self, copy_results: bool = True):
+        """
+        Args:
+            copy_results: Give waiters deep copies of the leader's result
+        """
+        self.copy_results = copy_results
+        self._flights: Dict[str, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def _join_or_lead(self, key: str) -> Tuple[concurrent.futures.Future, bool]:
+        """Return (future, is_leader) for key."""
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = concurrent.futures.Future()
+            self._flights[key] = future
+            self.leaders += 1
+            return future, True
+
+    def _finish(self, key: str, future: concurrent.futures.Future) -> None:
+        with self._lock:
+            if self._flights.get(key) is future:
+                del self._flights[key]
+
+    def _waiter_result(self, value: Any) -> Any:
+        return copy.deepcopy(value) if self.copy_results else value
+
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        """Run func once for all concurrent callers with this key (blocking)."""
+        while True:
+            future, is_leader = self._join_or_lead(key)
+            if is_leader:
+                break
+            try:
+                return self._waiter_result(future.result())
+            except concurrent.futures.CancelledError:
+                continue  # leader was cancelled: try again (possibly as the new leader)
+
+        try:
+            value = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            self._finish(key, future)
+
+    async def do_async(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run the coroutine function once for all concurrent callers with this key."""
+        while True:
+            future, is_leader = self._join_or_lead(key)
+            if is_leader:
+                break
+            try:
+                # asyncio.shield: cancelling this waiter must not cancel the shared flight
+                return self._waiter_result(await asyncio.shield(asyncio.wrap_future(future)))
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # this waiter itself was cancelled
+                # leader was cancelled: try again
+
+        try:
+            value = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            self._finish(key, future)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Flights led, callers coalesced onto an existing flight and flights in progress."""
+        with self._lock:
+            total = self.leaders + self.coalesced
+            return {
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "coalesced_rate": self.coalesced / total if total else 0.0,
+                "in_flight": len(self._flights),
+            }
+
+
+# Global cache instance (1 hour TTL, in-memory)
 response_cache = ResponseCache(ttl_seconds=3600)
 
+# Global coalescing for AI calls (keys from ResponseCache.key_for)
+single_flight = SingleFlight()
+
+_configured_caches: Dict[str, ResponseCache] = {}
+_configured_cache_lock = threading.Lock()
+
+
+def get_response_cache(namespace: str = "default") -> ResponseCache:
+    """
+    Get the configured response cache for a namespace (created on first use).
+
+    All namespaces use the same backend and, for SQLite, the same file and limits.
+
+    Environment:
+        RESPONSE_CACHE_BACKEND: "sqlite" (default) or "memory"
+        RESPONSE_CACHE_PATH: SQLite file path
+        RESPONSE_CACHE_TTL_SECONDS / RESPONSE_CACHE_MAX_BYTES / RESPONSE_CACHE_MAX_ENTRIES: limits
+        RESPONSE_CACHE_PERCEPTUAL: "1" to key images by perceptual hash
+
+    Falls back to the in-memory cache if the SQLite file cannot be opened.
+    """
+    cache = _configured_caches.get(namespace)
+    if cache is not None:
+        return cache
+
+    with _configured_cache_lock:
+        if namespace in _configured_caches:
+            return _configured_caches[namespace]
+
+        backend = os.getenv("RESPONSE_CACHE_BACKEND", DEFAULT_RESPONSE_CACHE_BACKEND).lower()
+        try:
+            ttl_seconds = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", DEFAULT_RESPONSE_CACHE_TTL_SECONDS))
+            max_bytes = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", DEFAULT_RESPONSE_CACHE_MAX_BYTES))
+            max_entries = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", DEFAULT_RESPONSE_CACHE_MAX_ENTRIES))
+        except ValueError:
+            logger.warning("Invalid RESPONSE_CACHE_* value, using defaults")
+            ttl_seconds = DEFAULT_RESPONSE_CACHE_TTL_SECONDS
+            max_bytes = DEFAULT_RESPONSE_CACHE_MAX_BYTES
+            max_entries = DEFAULT_RESPONSE_CACHE_MAX_ENTRIES
+
+        perceptual = os.getenv("RESPONSE_CACHE_PERCEPTUAL", "").lower() in ("1", "true", "yes")
+
+        if backend == "sqlite":
+            path = os.getenv("RESPONSE_CACHE_PATH", DEFAULT_RESPONSE_CACHE_PATH)
+            try:
+                cache = SQLiteResponseCache(
+                    path=path, ttl_seconds=ttl_seconds, max_bytes=max_bytes, max_entries=max_entries,
+                    perceptual_image_keys=perceptual, namespace=namespace
+                )
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Response cache at {path} unavailable ({e}), using in-memory cache")
+                cache = ResponseCache(ttl_seconds=ttl_seconds, perceptual_image_keys=perceptual, namespace=namespace)
+        else:
+            cache = ResponseCache(ttl_seconds=ttl_seconds, perceptual_image_keys=perceptual, namespace=namespace)
+
+        _configured_caches[namespace] = cache
+        return cache
+
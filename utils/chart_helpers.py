@@ -219,3 +219,81 @@ def create_channel_comparison_chart(
     
     return fig
 
+
+
+def create_sensitivity_heatmap(
+    sweep_result: Any,
+    metric: str = "net_margin_percent",
+    x: str = "quantity",
+    y: str = "retail_price",
+    fixed_index: int = 0
+) -> go.Figure:
+    """
+    Create a heatmap from a sensitivity sweep (core.sensitivity.sweep).
+    
+    Args:
+        sweep_result: SweepResult instance
+        metric: Metric to plot (unit_ddp, net_margin_percent, total_profit, verdict, ...)
+        x: Axis on the horizontal axis (quantity, retail_price, fob)
+        y: Axis on the vertical axis
+        fixed_index: Index of the remaining axis to slice at
+        
+    Returns:
+        Plotly Figure object
+    """
+    x_values, y_values, z = sweep_result.grid(metric=metric, x=x, y=y, fixed_index=fixed_index)
+    
+    axis_titles = {"quantity": "Order Quantity", "retail_price": "Retail Price (USD)", "fob": "FOB Price (USD)"}
+    metric_titles = {
+        "unit_ddp": "Unit DDP (USD)",
+        "net_profit_per_unit": "Net Profit per Unit (USD)",
+        "net_margin_percent": "Net Margin (%)",
+        "total_profit": "Total Profit (USD)",
+        "verdict_score": "Verdict Score",
+        "verdict": "Verdict",
+    }
+    
+    heatmap_args: Dict[str, Any] = {}
+    if metric == "verdict":
+        # Discrete STOP / CAUTION / GO colors (same palette as the verdict badge)
+        heatmap_args["colorscale"] = [
+            [0.0, "#ef4444"], [0.33, "#ef4444"],
+            [0.33, "#f59e0b"], [0.67, "#f59e0b"],
+            [0.67, "#10b981"], [1.0, "#10b981"],
+        ]
+        heatmap_args["zmin"], heatmap_args["zmax"] = 0, 2
+        heatmap_args["colorbar"] = dict(tickvals=[0, 1, 2], ticktext=["STOP", "CAUTION", "GO"])
+    elif metric == "unit_ddp":
+        heatmap_args["colorscale"] = "RdYlGn"
+        heatmap_args["reversescale"] = True  # Lower cost = green
+    else:
+        heatmap_args["colorscale"] = "RdYlGn"
+        if metric in ("net_margin_percent", "net_profit_per_unit", "total_profit"):
+            heatmap_args["zmid"] = 0  # Break-even in the middle of the scale
+    
+    fig = go.Figure(go.Heatmap(
+        x=x_values,
+        y=y_values,
+        z=z,
+        hovertemplate=(
+            f"{axis_titles.get(x, x)}: %{{x:,.2f}}<br>"
+            f"{axis_titles.get(y, y)}: %{{y:,.2f}}<br>"
+            f"{metric_titles.get(metric, metric)}: %{{z:,.2f}}<extra></extra>"
+        ),
+        **heatmap_args
+    ))
+    
+    fig.update_layout(
+        title=f"Sensitivity: {metric_titles.get(metric, metric)}",
+        xaxis_title=axis_titles.get(x, x),
+        yaxis_title=axis_titles.get(y, y),
+        height=500,
+        # Dark theme styling
+        plot_bgcolor='#1e293b',
+        paper_bgcolor='#1e293b',
+        font=dict(color='#ffffff', size=12),
+        xaxis=dict(gridcolor='#334155', linecolor='#334155'),
+        yaxis=dict(gridcolor='#334155', linecolor='#334155')
+    )
+    
+    return fig
@@ -4,6 +4,8 @@ Provides better error handling and user experience
 """
 
 from typing import Optional, Callable, Any
+import asyncio
+import random
 import time
 import logging
 from functools import wraps
@@ -13,8 +15,14 @@ from core.errors import (
     AIServiceError,
     ValidationError,
     CostingError,
-    RateLimitExceeded
+    RateLimitExceeded,
+    CircuitOpenError,
+    DeadlineExceeded
 )
+from utils.resilience import remaining_time
+
+# Never retried: deterministic input/output problems, or retrying cannot help
+NON_RETRYABLE_ERRORS = (ParsingError, ValidationError, CostingError, CircuitOpenError, DeadlineExceeded)
 
 logger = logging.getLogger(__name__)
 
@@ -110,44 +118,103 @@ def get_user_friendly_message(error: Exception, lang: str = "en") -> tuple[str,
     return default[0], f"{default[1]}\n\nError details: {str(error)}", default[2]
 
 
+def _retry_wait(error: Exception, non_retryable: tuple, current_delay: float) -> Optional[float]:
+    """Delay before the next attempt, or None if error must not be retried."""
+    if isinstance(error, non_retryable):
+        return None
+    remaining = remaining_time()
+    if remaining is not None and remaining <= current_delay:
+        # Waiting would already reach the deadline (utils.resilience.deadline)
+        return None
+    return current_delay
+
+
 def retry_on_failure(
     max_retries: int = 3,
     delay: float = 1.0,
     backoff: float = 2.0,
-    exceptions: tuple = (AIServiceError, Exception)
+    exceptions: tuple = (AIServiceError,),
+    non_retryable: tuple = NON_RETRYABLE_ERRORS
 ):
     """
     Decorator to retry a function on failure.
     
+    Only `exceptions` are retried, never `non_retryable` ones (parse/validation errors,
+    open circuit, missed deadline). A retry whose backoff would run past the current
+    deadline is not attempted.
+    
     Args:
         max_retries: Maximum number of retry attempts
         delay: Initial delay between retries (seconds)
         backoff: Multiplier for delay after each retry
         exceptions: Tuple of exceptions to catch and retry on
+        non_retryable: Tuple of exceptions raised immediately even if they match exceptions
     """
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         def wrapper(*args, **kwargs) -> Any:
             current_delay = delay
-            last_exception = None
             
             for attempt in range(max_retries + 1):
                 try:
                     return func(*args, **kwargs)
                 except exceptions as e:
-                    last_exception = e
-                    if attempt < max_retries:
-                        logger.warning(
-                            f"Attempt {attempt + 1}/{max_retries + 1} failed for {func.__name__}: {str(e)}. "
-                            f"Retrying in {current_delay:.1f}s..."
-                        )
-                        time.sleep(current_delay)
-                        current_delay *= backoff
-                    else:
-                        logger.error(f"All {max_retries + 1} attempts failed for {func.__name__}: {str(e)}")
+                    wait = _retry_wait(e, non_retryable, current_delay) if attempt < max_retries else None
+                    if wait is None:
+                        logger.error(f"Attempt {attempt + 1}/{max_retries + 1} failed for {func.__name__}, not retrying: {str(e)}")
+                        raise
+                    logger.warning(
+                        f"Attempt {attempt + 1}/{max_retries + 1} failed for {func.__name__}: {str(e)}. "
+                        f"Retrying in {wait:.1f}s..."
+                    )
+                    time.sleep(wait)
+                    current_delay *= backoff
+        return wrapper
+    return decorator
+
+
+def async_retry_on_failure(
+    max_retries: int = 3,
+    delay: float = 1.0,
+    backoff: float = 2.0,
+    exceptions: tuple = (AIServiceError,),
+    jitter: float = 0.1,
+    non_retryable: tuple = NON_RETRYABLE_ERRORS
+):
+    """
+    Decorator to retry a coroutine function on failure without blocking the event loop.
+    
+    Same schedule as retry_on_failure, but waits with asyncio.sleep so other tasks keep
+    running during backoff. A random jitter (fraction of the delay) spreads out retries
+    of many concurrent calls that failed together.
+    
+    Args:
+        max_retries: Maximum number of retry attempts
+        delay: Initial delay between retries (seconds)
+        backoff: Multiplier for delay after each retry
+        exceptions: Tuple of exceptions to catch and retry on
+        jitter: Maximum extra delay as a fraction of the current delay
+        non_retryable: Tuple of exceptions raised immediately even if they match exceptions
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        async def wrapper(*args, **kwargs) -> Any:
+            current_delay = delay
             
-            # All retries exhausted
-            raise last_exception
+            for attempt in range(max_retries + 1):
+                try:
+                    return await func(*args, **kwargs)
+                except exceptions as e:
+                    wait = current_delay * (1 + random.uniform(0, jitter))
+                    if attempt >= max_retries or _retry_wait(e, non_retryable, wait) is None:
+                        logger.error(f"Attempt {attempt + 1}/{max_retries + 1} failed for {func.__name__}, not retrying: {str(e)}")
+                        raise
+                    logger.warning(
+                        f"Attempt {attempt + 1}/{max_retries + 1} failed for {func.__name__}: {str(e)}. "
+                        f"Retrying in {wait:.1f}s..."
+                    )
+                    await asyncio.sleep(wait)
+                    current_delay *= backoff
         return wrapper
     return decorator
 
@@ -0,0 +1,273 @@
+"""
+Fake Gemini - Offline stand-in for google.generativeai.GenerativeModel
+Load-tests and latency experiments for the AI pipeline without spending API quota.
+
+- FakeGenerativeModel answers Stage 1 (single and micro-batched) and Stage 2 prompts with
+  canned, schema-valid JSON derived deterministically from the prompt (Stage 2 numbers
+  pass Layer 3 validation)
+- Latency is drawn from a configurable distribution (fixed / uniform / lognormal) plus a
+  per-output-token cost; errors and malformed (truncated) responses are injected at
+  configurable rates
+- Supports generate_content (including stream=True) and generate_content_async, and
+  reports usage_metadata like the real SDK
+- Tests subclass it and override respond() / usage() for scripted responses; fail_first
+  makes the first calls fail deterministically
+- use_fake_gemini() swaps it in for every `genai.GenerativeModel(...)` call in the process
+  (src.ai_pipeline, src.ai_pipeline_async, core.ai_client) and restores the SDK on exit
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional
+
+import google.generativeai as genai
+
+from utils.pipeline_metrics import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+_BATCH_INPUT_LINE = re.compile(r'^\[(\d+)\] (".*")$', re.MULTILINE)
+_NUMBER = re.compile(r'\d[\d,]*')
+
+
+class FakeGeminiError(ConnectionError):
+    """Injected transient failure (like a 503 from the API)."""
+
+
+@dataclass
+class FakeGeminiConfig:
+    """
+    Behaviour of the fake model.
+
+    Latency per call = base latency (distribution around median_seconds; spread is the
+    uniform half-width as a fraction of the median, or the lognormal sigma) + output tokens
+    * seconds_per_output_token, all multiplied by time_scale (e.g. 0.01 for quick runs).
+    The first fail_first calls fail on top of error_rate; streamed responses come in
+    stream_chunk_chars pieces; report_usage=False leaves usage_metadata unset.
+    """
+    latency: str = "lognormal"
+    median_seconds: float = 0.6
+    spread: float = 0.4
+    seconds_per_output_token: float = 0.004
+    error_rate: float = 0.0
+    malformed_rate: float = 0.0
+    time_scale: float = 1.0
+    seed: Optional[int] = None
+    fail_first: int = 0
+    stream_chunk_chars: int = 64
+    report_usage: bool = True
+
+    def __post_init__(self):
+        if self.latency not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {self.latency} (expected one of {LATENCY_DISTRIBUTIONS})")
+        for name in ("error_rate", "malformed_rate"):
+            if not 0.0 <= getattr(self, name) <= 1.0:
+                raise ValueError(f"{name} must be between 0 and 1, got: {getattr(self, name)}")
+        if self.fail_first < 0 or self.stream_chunk_chars < 1:
+            raise ValueError(
+                f"fail_first must be >= 0 and stream_chunk_chars >= 1, got: {self.fail_first}, {self.stream_chunk_chars}"
+            )
+
+
+class FakeUsageMetadata:
+    def __init__(self, prompt_token_count: int, candidates_token_count: int):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+        self.total_token_count = prompt_token_count + candidates_token_count
+
+
+class FakeResponse:
+    """Response / stream chunk with the SDK's text and usage_metadata attributes."""
+
+    def __init__(self, text: str, usage_metadata: Optional[FakeUsageMetadata] = None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+def _prompt_text(contents: Any) -> str:
+    if isinstance(contents, str):
+        return contents
+    if isinstance(contents, (list, tuple)):
+        return "\n".join(part for part in contents if isinstance(part, str))
+    return ""
+
+
+def _parsed_input(text: str) -> Dict[str, Any]:
+    """Canned Stage 1 output: first words as category, first number as volume."""
+    numbers = [int(number.replace(",", "")) for number in _NUMBER.findall(text)]
+    words = [word for word in re.split(r"\s+", text.strip()) if word and not word[0].isdigit()]
+    return {
+        "product_category": " ".join(words[:3]) or "Unknown",
+        "detected_volume": numbers[0] if numbers else 1000,
+        "target_market": "USA",
+        "sales_channel": "Amazon FBA",
+        "special_requirements": []
+    }
+
+
+def _analysis(prompt: str) -> Dict[str, Any]:
+    """Canned Stage 2 output (schema v1.2) whose total matches the sum of its parts."""
+    rng = random.Random(zlib.crc32(prompt.encode("utf-8")))
+    base = round(rng.uniform(0.4, 4.0), 2)
+    freight = round(rng.uniform(0.05, 0.6), 2)
+    duty = round(base * rng.choice([0.0, 0.05, 0.08, 0.15]), 2)
+    return {
+        "meta": {"schema_version": "v1.2", "model": "gemini-2.5-flash"},
+        "cost_breakdown": {
+            "manufacturing": {"low": round(base * 0.85, 2), "base": base, "high": round(base * 1.2, 2)},
+            "logistics": {"freight": freight, "duty": duty},
+            "total_landed_cost": round(base + freight + duty, 2),
+            "currency": "USD"
+        },
+        "channel_strategy": {
+            "amazon_fba": {"margin": rng.randint(10, 45), "recommendation": "Test with a small FBA batch first"},
+            "wholesale": {"margin": rng.randint(5, 30), "recommendation": "Quote distributors at volume tiers"}
+        },
+        "risk_score": {
+            "regulatory": {"score": rng.randint(10, 70), "reason": "Labeling and import documentation"},
+            "supply_chain": {"score": rng.randint(10, 70), "reason": "Single-supplier lead time"}
+        },
+        "rfq_draft": "Please quote FOB unit price, MOQ, lead time and packaging options."
+    }
+
+
+def canned_response(contents: Any) -> str:
+    """Schema-valid response text for a Stage 1, micro-batched Stage 1 or Stage 2 prompt."""
+    prompt = _prompt_text(contents)
+    if "Senior Sourcing Analyst" in prompt:
+        return json.dumps(_analysis(prompt), ensure_ascii=False)
+    batch_inputs = _BATCH_INPUT_LINE.findall(prompt) if "numbered user input" in prompt else []
+    if batch_inputs:
+        items = [{"index": int(index), **_parsed_input(json.loads(text))} for index, text in batch_inputs]
+        return json.dumps(items, ensure_ascii=False)
+    user_input = prompt.split("User input:", 1)[1] if "User input:" in prompt else prompt
+    return json.dumps(_parsed_input(user_input), ensure_ascii=False)
+
+
+class FakeGenerativeModel:
+    """
+    Drop-in for genai.GenerativeModel. Thread- and asyncio-safe; calls, errors, malformed
+    responses and streamed chunks are counted for reports.
+    """
+
+    def __init__(self, model_name: str = "gemini-2.5-flash", config: Optional[FakeGeminiConfig] = None):
+        self.model_name = model_name
+        self.config = config or FakeGeminiConfig()
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.malformed = 0
+        self.streamed_chunks = 0
+
+    def respond(self, contents: Any) -> str:
+        """Response text for a call (override for scripted responses)."""
+        return canned_response(contents)
+
+    def usage(self, contents: Any, text: str) -> FakeUsageMetadata:
+        """usage_metadata for a call (override for fixed token counts)."""
+        return FakeUsageMetadata(estimate_tokens(contents), estimate_tokens(text))
+
+    def _plan(self, contents: Any) -> Dict[str, Any]:
+        """Draw one call's outcome: response text, latency, injected error."""
+        config = self.config
+        text = self.respond(contents)
+        with self._lock:
+            self.calls += 1
+            if config.latency == "fixed":
+                base = config.median_seconds
+            elif config.latency == "uniform":
+                base = config.median_seconds * (1 + self._rng.uniform(-config.spread, config.spread))
+            else:
+                base = config.median_seconds * math.exp(self._rng.gauss(0.0, config.spread))
+            fail = self._rng.random() < config.error_rate or self.calls <= config.fail_first
+            malformed = not fail and self._rng.random() < config.malformed_rate
+            if fail:
+                self.errors += 1
+            if malformed:
+                self.malformed += 1
+        if malformed:
+            text = text[:max(1, len(text) // 2)]  # truncated output
+        usage = self.usage(contents, text)
+        return {
+            "text": text,
+            "base_seconds": max(0.0, base) * config.time_scale,
+            "token_seconds": config.seconds_per_output_token * config.time_scale,
+            "fail": fail,
+            "output_tokens": usage.candidates_token_count,
+            "usage": usage if config.report_usage else None,
+        }
+
+    def generate_content(self, contents: Any, stream: bool = False, **kwargs: Any) -> Any:
+        plan = self._plan(contents)
+        if not stream:
+            time.sleep(plan["base_seconds"] + plan["token_seconds"] * plan["output_tokens"])
+            if plan["fail"]:
+                raise FakeGeminiError("503 Service Unavailable (fake)")
+            return FakeResponse(plan["text"], plan["usage"])
+        return self._stream(plan)
+
+    def _stream(self, plan: Dict[str, Any]) -> Iterator[FakeResponse]:
+        time.sleep(plan["base_seconds"])
+        if plan["fail"]:
+            raise FakeGeminiError("503 Service Unavailable (fake)")
+        text = plan["text"]
+        chunk_size = self.config.stream_chunk_chars
+        for start in range(0, len(text), chunk_size):
+            chunk = text[start:start + chunk_size]
+            time.sleep(plan["token_seconds"] * estimate_tokens(chunk))
+            last = start + chunk_size >= len(text)
+            with self._lock:
+                self.streamed_chunks += 1
+            yield FakeResponse(chunk, plan["usage"] if last else None)
+
+    async def generate_content_async(self, contents: Any, **kwargs: Any) -> FakeResponse:
+        plan = self._plan(contents)
+        await asyncio.sleep(plan["base_seconds"] + plan["token_seconds"] * plan["output_tokens"])
+        if plan["fail"]:
+            raise FakeGeminiError("503 Service Unavailable (fake)")
+        return FakeResponse(plan["text"], plan["usage"])
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"calls": self.calls, "errors": self.errors, "malformed": self.malformed}
+
+
+@contextmanager
+def use_fake_gemini(config: Optional[FakeGeminiConfig] = None) -> Iterator[FakeGenerativeModel]:
+    """
+    Route every genai.GenerativeModel(...) in the process to one shared FakeGenerativeModel
+    until exit. genai.configure becomes a no-op and GEMINI_API_KEY gets a placeholder if
+    unset, so no API key is needed.
+
+    Example:
+        with use_fake_gemini(FakeGeminiConfig(error_rate=0.05, time_scale=0.1)) as model:
+            analyze_input_pipeline(text="shrimp chips 5000 bags")
+            print(model.get_stats())
+    """
+    model = FakeGenerativeModel(config=config)
+    original_model, original_configure = genai.GenerativeModel, genai.configure
+    genai.GenerativeModel = lambda model_name="gemini-2.5-flash", *args, **kwargs: model
+    genai.configure = lambda *args, **kwargs: None
+    placeholder_key = "GEMINI_API_KEY" not in os.environ
+    if placeholder_key:
+        os.environ["GEMINI_API_KEY"] = "fake-gemini-offline"
+    logger.info("Gemini calls are served by the offline fake model")
+    try:
+        yield model
+    finally:
+        genai.GenerativeModel, genai.configure = original_model, original_configure
+        if placeholder_key:
+            os.environ.pop("GEMINI_API_KEY", None)
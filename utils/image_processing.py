@@ -0,0 +1,161 @@
+"""
+Image Processing - Parallel preparation of uploaded photos for Gemini
+Decodes, downscales and re-encodes every image of a submission on a thread pool.
+
+- Duplicates are dropped by content hash, before decoding (same upload twice) and
+  after re-encoding (uploads that prepare to identical bytes); upload order is kept
+- Images are downscaled to IMAGE_MAX_SIDE on the long side (JPEGs are decoded at
+  reduced scale with draft mode) and re-encoded as JPEG; an original that is already
+  small and compact is sent as-is
+- PIL releases the GIL while decoding / resizing / encoding, so the pool scales with cores
+- Undecodable uploads are skipped with a warning, like the single-image path did
+"""
+
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from utils.cache import content_digest
+
+logger = logging.getLogger(__name__)
+
+# Long-side pixel limit; larger photos gain nothing for product extraction
+# (override with IMAGE_MAX_SIDE)
+DEFAULT_IMAGE_MAX_SIDE = 1536
+# JPEG quality for re-encoded images (override with IMAGE_JPEG_QUALITY)
+DEFAULT_IMAGE_JPEG_QUALITY = 85
+# Threads for image preparation (override with IMAGE_PREP_WORKERS)
+DEFAULT_IMAGE_PREP_WORKERS = 4
+
+_SEND_AS_IS = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+
+_image_executor: Optional[ThreadPoolExecutor] = None
+_image_executor_lock = threading.Lock()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        logger.warning(f"Invalid {name}, using default")
+        return default
+
+
+def _get_image_executor() -> ThreadPoolExecutor:
+    global _image_executor
+    if _image_executor is None:
+        with _image_executor_lock:
+            if _image_executor is None:
+                _image_executor = ThreadPoolExecutor(
+                    max_workers=max(1, _env_int("IMAGE_PREP_WORKERS", DEFAULT_IMAGE_PREP_WORKERS)),
+                    thread_name_prefix="image-prep"
+                )
+    return _image_executor
+
+
+@dataclass
+class PreparedImage:
+    """An image ready to send (data / mime_type), with its size before and after."""
+    data: bytes
+    mime_type: str
+    width: int
+    height: int
+    original_bytes: int
+    digest: str
+
+    def to_part(self) -> Dict[str, Any]:
+        """Gemini inline-data content part (sent without another SDK re-encode)."""
+        return {"mime_type": self.mime_type, "data": self.data}
+
+
+def prepare_image(
+    data: bytes,
+    max_side: Optional[int] = None,
+    quality: Optional[int] = None
+) -> Optional[PreparedImage]:
+    """
+    Decode, downscale and re-encode one image.
+
+    Returns:
+        PreparedImage, or None if the bytes cannot be decoded as an image
+    """
+    max_side = max_side or _env_int("IMAGE_MAX_SIDE", DEFAULT_IMAGE_MAX_SIDE)
+    quality = quality or _env_int("IMAGE_JPEG_QUALITY", DEFAULT_IMAGE_JPEG_QUALITY)
+    try:
+        from PIL import Image, ImageOps
+        with Image.open(io.BytesIO(data)) as image:
+            source_format = image.format
+            upright = image.getexif().get(0x0112, 1) == 1  # EXIF orientation
+            image.draft("RGB", (max_side, max_side))  # JPEG: decode at reduced scale
+            width, height = image.size
+            small_enough = upright and max(width, height) <= max_side
+            if small_enough and source_format in _SEND_AS_IS and len(data) <= width * height // 2:
+                # Already small and compact (~<4 bits per pixel): re-encoding would not pay off
+                return PreparedImage(
+                    data=data, mime_type=_SEND_AS_IS[source_format], width=width, height=height,
+                    original_bytes=len(data), digest=content_digest(data)
+                )
+
+            oriented = ImageOps.exif_transpose(image)
+            if oriented.mode in ("RGBA", "LA") or (oriented.mode == "P" and "transparency" in oriented.info):
+                rgba = oriented.convert("RGBA")
+                converted = Image.new("RGB", rgba.size, (255, 255, 255))
+                converted.paste(rgba, mask=rgba.getchannel("A"))
+            else:
+                converted = oriented.convert("RGB")
+            converted.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+
+            buffer = io.BytesIO()
+            converted.save(buffer, "JPEG", quality=quality, optimize=True)
+    except Exception as e:
+        logger.warning(f"Failed to process image: {e}")
+        return None
+
+    encoded = buffer.getvalue()
+    return PreparedImage(
+        data=encoded, mime_type="image/jpeg", width=converted.width, height=converted.height,
+        original_bytes=len(data), digest=content_digest(encoded)
+    )
+
+
+def prepare_images(
+    images: Sequence[Union[bytes, None]],
+    max_side: Optional[int] = None,
+    quality: Optional[int] = None
+) -> List[PreparedImage]:
+    """
+    Prepare a submission's images in parallel and drop duplicates.
+
+    Args:
+        images: Raw image bytes (empty entries are ignored)
+        max_side, quality: Override IMAGE_MAX_SIDE / IMAGE_JPEG_QUALITY
+
+    Returns:
+        Prepared images in upload order, without duplicates or undecodable uploads
+    """
+    unique: Dict[str, bytes] = {}
+    for data in images:
+        if data:
+            unique.setdefault(content_digest(data), data)
+    if not unique:
+        return []
+
+    uploads = list(unique.values())
+    if len(uploads) == 1:
+        prepared = [prepare_image(uploads[0], max_side, quality)]
+    else:
+        prepared = list(_get_image_executor().map(lambda data: prepare_image(data, max_side, quality), uploads))
+
+    result: List[PreparedImage] = []
+    seen = set()
+    for image in prepared:
+        if image is not None and image.digest not in seen:
+            seen.add(image.digest)
+            result.append(image)
+    if len(result) < len(images):
+        logger.info(f"Prepared {len(result)} of {len(images)} images (duplicates / undecodable dropped)")
+    return result
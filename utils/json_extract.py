@@ -0,0 +1,284 @@
+"""
+JSON Extraction - Single-pass, string-aware JSON object scanner for LLM output
+Finds the first JSON object in noisy model output (markdown fences, prose, logs).
+
+- Linear time: each character is visited once; runs of ordinary characters are
+  skipped with one regex search, and every candidate object is parsed at most twice
+- Braces inside strings are ignored (string-aware, including escapes)
+- Repairs applied in the same pass: trailing commas, single-quoted strings
+- Incremental: JSONObjectScanner.feed() accepts a streamed response chunk by chunk
+  and returns the object as soon as its closing brace arrives; on_member reports
+  each top-level member as soon as its value is complete
+- extract_json_array: batched responses (arrays of objects), keeping the complete
+  elements of a truncated array
+"""
+
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+# Characters that change scanner state inside an object (outside strings)
+_OBJECT_STOP = re.compile(r'[{}\[\]"\',`]')
+# ... inside a double-quoted / single-quoted string
+_DOUBLE_QUOTED_STOP = re.compile(r'["\\]')
+_SINGLE_QUOTED_STOP = re.compile(r'[\'"\\]')
+
+# A single quote opens a string only where a key or value can start
+_VALUE_START = '{[,:'
+
+
+class JSONObjectScanner:
+    """
+    Incremental scanner for the first valid top-level JSON object in a text.
+
+    Feed chunks in order; feed() returns the object once it is complete (and from then
+    on keeps returning it without scanning further). A balanced candidate that is not
+    valid JSON, even after repairs, is skipped and scanning continues after it.
+
+    on_member(key, value) is called for each top-level member of the object as soon
+    as the value is complete, before the object itself is. Members of a candidate that
+    later turns out to be invalid may already have been reported.
+    """
+
+    def __init__(self, on_member: Optional[Callable[[str, Any], None]] = None):
+        self.result: Optional[Dict[str, Any]] = None
+        self._on_member = on_member
+        self._member_start = 0
+        self._depth = 0
+        self._quote: Optional[str] = None
+        self._escape = False
+        self._last_significant = ''
+        self._raw: List[str] = []
+        self._repaired: List[str] = []
+        self._comma_index: Optional[int] = None
+
+    def _start_candidate(self) -> None:
+        self._raw = []
+        self._repaired = []
+        self._comma_index = None
+        self._last_significant = ''
+        self._member_start = 1
+
+    def _member_end(self) -> None:
+        """A top-level member ends here (depth-1 comma or the closing brace, not yet appended)."""
+        end = len(self._repaired)
+        fragment = ''.join(self._repaired[self._member_start:end])
+        self._member_start = end + 1
+        if not fragment.strip():
+            return
+        try:
+            member = json.loads('{' + fragment + '}')
+        except ValueError:
+            return
+        if isinstance(member, dict) and len(member) == 1:
+            key, value = next(iter(member.items()))
+            self._on_member(key, value)
+
+    def _append(self, text: str) -> None:
+        self._raw.append(text)
+        self._repaired.append(text)
+
+    def _escaped_char(self, char: str) -> None:
+        """Character after a backslash inside a string (the backslash is already in _raw)."""
+        self._raw.append(char)
+        if self._quote == "'" and char == "'":
+            self._repaired.append("'")  # \' is not a JSON escape
+        else:
+            self._repaired.append('\\' + char)
+
+    def _complete(self) -> Optional[Dict[str, Any]]:
+        raw = ''.join(self._raw)
+        if raw[1:].lstrip()[:1] not in ('"', "'", '}'):
+            return None  # e.g. "{product}" in prose: cannot be an object
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            repaired = ''.join(self._repaired)
+            if repaired == raw:
+                return None
+            try:
+                value = json.loads(repaired)
+            except ValueError:
+                return None
+        return value if isinstance(value, dict) else None
+
+    def feed(self, chunk: str) -> Optional[Dict[str, Any]]:
+        """
+        Scan the next chunk.
+
+        Returns:
+            The first valid JSON object once complete, otherwise None
+        """
+        if self.result is not None or not chunk:
+            return self.result
+
+        pos = 0
+        length = len(chunk)
+        while pos < length:
+            if self._depth == 0:
+                start = chunk.find('{', pos)
+                if start == -1:
+                    return None
+                self._start_candidate()
+                pos = start
+
+            if self._escape:
+                self._escape = False
+                self._escaped_char(chunk[pos])
+                pos += 1
+                continue
+
+            if self._quote:
+                stop_pattern = _DOUBLE_QUOTED_STOP if self._quote == '"' else _SINGLE_QUOTED_STOP
+                stop = stop_pattern.search(chunk, pos)
+                end = stop.start() if stop else length
+                if end > pos:
+                    self._append(chunk[pos:end])
+                if not stop:
+                    return None
+                char = chunk[end]
+                pos = end + 1
+                self._raw.append(char)
+                if char == '\\':
+                    if pos < length:
+                        self._escaped_char(chunk[pos])
+                        pos += 1
+                    else:
+                        self._escape = True
+                elif char == self._quote:
+                    self._repaired.append('"')
+                    self._quote = None
+                    self._last_significant = '"'
+                else:
+                    self._repaired.append('\\"')  # double quote inside a single-quoted string
+                continue
+
+            stop = _OBJECT_STOP.search(chunk, pos)
+            end = stop.start() if stop else length
+            if end > pos:
+                span = chunk[pos:end]
+                self._append(span)
+                stripped = span.rstrip()
+                if stripped:
+                    self._last_significant = stripped[-1]
+                    self._comma_index = None
+            if not stop:
+                return None
+            char = chunk[end]
+            pos = end + 1
+
+            if char == '`':
+                # A code fence cannot be part of an object: drop the unclosed candidate
+                self._depth = 0
+                continue
+
+            if char in '}]':
+                if self._comma_index is not None:
+                    self._repaired[self._comma_index] = ''  # trailing comma
+                    self._comma_index = None
+                if self._depth == 1 and self._on_member is not None:
+                    self._member_end()
+                self._append(char)
+                self._last_significant = char
+                self._depth -= 1
+                if self._depth == 0:
+                    self.result = self._complete()
+                    if self.result is not None:
+                        return self.result
+                continue
+
+            self._comma_index = None
+            if char == ',':
+                if self._depth == 1 and self._on_member is not None:
+                    self._member_end()
+                self._raw.append(char)
+                self._comma_index = len(self._repaired)
+                self._repaired.append(char)
+            elif char in '{[':
+                self._append(char)
+                self._depth += 1
+            elif char == '"' or self._last_significant in _VALUE_START:
+                self._raw.append(char)
+                self._repaired.append('"')
+                self._quote = char
+            else:
+                self._append(char)  # apostrophe in unquoted text
+            self._last_significant = char
+
+        return None
+
+
+def _fenced_block(text: str) -> Optional[str]:
+    """Content of the markdown code fence (```json preferred) up to the last fence."""
+    start = text.find("```json")
+    if start != -1:
+        start += 7
+    else:
+        start = text.find("```")
+        if start == -1:
+            return None
+        start += 3
+    end = text.rfind("```")
+    return text[start:end].strip() if end > start else None
+
+
+def extract_json(text: Optional[str]) -> Optional[Any]:
+    """
+    Extract JSON from LLM output.
+
+    A response that is entirely JSON (or a fenced block that is entirely JSON) is
+    returned as parsed, arrays included; otherwise the first valid JSON object found
+    by JSONObjectScanner, with trailing-comma and single-quote repairs.
+
+    Returns:
+        Parsed JSON, or None if no JSON object can be found
+    """
+    if not text:
+        return None
+
+    for candidate in (text.strip(), _fenced_block(text) if "```" in text else None):
+        if candidate and candidate[0] in '{[':
+            try:
+                return json.loads(candidate)
+            except ValueError:
+                pass
+
+    return JSONObjectScanner().feed(text)
+
+
+# Start of an array of objects
+_ARRAY_OF_OBJECTS = re.compile(r'\[\s*\{')
+
+
+def extract_json_array(text: Optional[str]) -> Optional[List[Any]]:
+    """
+    Extract a JSON array of objects from LLM output.
+
+    A response that is (or fences) a whole JSON array is returned as parsed. Otherwise
+    the elements of the first array of objects are decoded one by one up to the first
+    invalid one, so the complete elements of a truncated array are kept.
+
+    Returns:
+        List of elements, or None if no array can be found
+    """
+    parsed = extract_json(text)
+    if isinstance(parsed, list):
+        return parsed
+    match = _ARRAY_OF_OBJECTS.search(text or '')
+    if match is None:
+        return None
+
+    decoder = json.JSONDecoder()
+    items: List[Any] = []
+    position = match.start() + 1
+    while True:
+        while position < len(text) and text[position] in ' \t\r\n,':
+            position += 1
+        if position >= len(text) or text[position] == ']':
+            break
+        try:
+            item, position = decoder.raw_decode(text, position)
+        except ValueError:
+            break
+        items.append(item)
+    return items or None
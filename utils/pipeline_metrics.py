@@ -0,0 +1,351 @@
+"""
+Pipeline Metrics - Per-request token, latency and cost accounting for the AI pipeline
+Measures what each analyze_input_pipeline request actually spent instead of guessing.
+
+- PipelineTrace: one request; per stage (stage1, stage2, validation, legacy_conversion)
+  wall time, model calls / retries, input / output tokens, cost and cache level
+- Model calls deep inside a stage report to the active trace through a context variable
+  (record_model_attempt / record_model_usage / record_cache_level), so retries and
+  hedging layers need no extra plumbing; a micro-batched call is shared out among its
+  items (record_batched_call)
+- PipelineMetrics: rolling aggregate with p50 / p95 / p99 (get_pipeline_metrics); failed
+  requests are recorded too, with their outcome and error type (PipelineMetrics.track)
+
+Token counts come from the Gemini response usage_metadata; responses without it (fakes,
+older SDKs) are estimated at ~4 characters per token and flagged tokens_estimated.
+"""
+
+import contextvars
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# gemini-2.5-flash list prices, USD per 1M tokens (override with GEMINI_INPUT_COST_PER_MTOK /
+# GEMINI_OUTPUT_COST_PER_MTOK)
+DEFAULT_INPUT_COST_PER_MTOK = 0.30
+DEFAULT_OUTPUT_COST_PER_MTOK = 2.50
+
+# Requests kept for the percentiles (override with PIPELINE_METRICS_WINDOW)
+DEFAULT_METRICS_WINDOW = 1000
+
+PIPELINE_STAGES = ("stage1", "stage2", "validation", "legacy_conversion")
+
+# Cache levels: "hit" (response cache), "coalesced" (joined an identical in-flight call), "miss"
+CACHE_LEVELS = ("hit", "coalesced", "miss")
+
+_CHARS_PER_TOKEN = 4
+
+_current_stage: contextvars.ContextVar[Optional["StageMetrics"]] = contextvars.ContextVar(
+    "pipeline_stage", default=None
+)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        logger.warning(f"Invalid {name}, using default")
+        return default
+
+
+def token_cost_usd(input_tokens: int, output_tokens: int) -> float:
+    """Gemini cost of a call in USD."""
+    return (
+        input_tokens * _env_float("GEMINI_INPUT_COST_PER_MTOK", DEFAULT_INPUT_COST_PER_MTOK)
+        + output_tokens * _env_float("GEMINI_OUTPUT_COST_PER_MTOK", DEFAULT_OUTPUT_COST_PER_MTOK)
+    ) / 1_000_000
+
+
+def estimate_tokens(contents: Any) -> int:
+    """Rough token count of prompt contents (text parts only; images are not counted)."""
+    if isinstance(contents, str):
+        return (len(contents) + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+    if isinstance(contents, (list, tuple)):
+        return sum(estimate_tokens(part) for part in contents)
+    return 0
+
+
+@dataclass
+class StageMetrics:
+    """What one pipeline stage spent (model_seconds: inside successful model calls, no queueing)."""
+    seconds: float = 0.0
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    tokens_estimated: bool = False
+    model_seconds: float = 0.0
+    cache: Optional[str] = None
+    prompt_tokens_saved: int = 0
+
+    @property
+    def retries(self) -> int:
+        return max(0, self.calls - 1)
+
+    @property
+    def cost_usd(self) -> float:
+        return token_cost_usd(self.input_tokens, self.output_tokens)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "seconds": self.seconds,
+            "calls": self.calls,
+            "retries": self.retries,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "tokens_estimated": self.tokens_estimated,
+            "model_seconds": self.model_seconds,
+            "cost_usd": self.cost_usd,
+            "cache": self.cache,
+            "prompt_tokens_saved": self.prompt_tokens_saved,
+        }
+
+
+class PipelineTrace:
+    """Accounting for one pipeline request; stages are timed with `with trace.stage(name):`."""
+
+    def __init__(self):
+        self.stages: Dict[str, StageMetrics] = {}
+        self._start = time.perf_counter()
+        self.total_seconds: Optional[float] = None
+        self.outcome = "ok"
+        self.error: Optional[str] = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageMetrics]:
+        metrics = self.stages.setdefault(name, StageMetrics())
+        token = _current_stage.set(metrics)
+        start = time.perf_counter()
+        try:
+            yield metrics
+        finally:
+            metrics.seconds += time.perf_counter() - start
+            _current_stage.reset(token)
+
+    def finish(self) -> "PipelineTrace":
+        self.total_seconds = time.perf_counter() - self._start
+        return self
+
+    def fail(self, error: BaseException) -> None:
+        """Mark the request as failed with the exception's type."""
+        self.outcome = "error"
+        self.error = type(error).__name__
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Per-stage metrics plus request totals (attached as result['_pipeline']['metrics'])."""
+        stages = self.stages.values()
+        input_tokens = sum(metrics.input_tokens for metrics in stages)
+        output_tokens = sum(metrics.output_tokens for metrics in stages)
+        return {
+            "stages": {name: metrics.to_dict() for name, metrics in self.stages.items()},
+            "outcome": self.outcome,
+            "error": self.error,
+            "total_seconds": self.total_seconds,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cost_usd": token_cost_usd(input_tokens, output_tokens),
+            "retries": sum(metrics.retries for metrics in stages),
+            "prompt_tokens_saved": sum(metrics.prompt_tokens_saved for metrics in stages),
+        }
+
+
+def record_model_attempt() -> None:
+    """A model call is about to be made in the current stage (counts retries too)."""
+    metrics = _current_stage.get()
+    if metrics is not None:
+        metrics.calls += 1
+
+
+def record_model_usage(contents: Any, response_text: str, usage: Any = None, seconds: float = 0.0) -> None:
+    """Token usage (and duration) of a successful model call in the current stage."""
+    metrics = _current_stage.get()
+    if metrics is None:
+        return
+    metrics.model_seconds += seconds
+    prompt_tokens = getattr(usage, "prompt_token_count", None) if usage is not None else None
+    output_tokens = getattr(usage, "candidates_token_count", None) if usage is not None else None
+    if isinstance(prompt_tokens, int) and isinstance(output_tokens, int):
+        metrics.input_tokens += prompt_tokens
+        metrics.output_tokens += output_tokens
+    else:
+        metrics.input_tokens += estimate_tokens(contents)
+        metrics.output_tokens += estimate_tokens(response_text or "")
+        metrics.tokens_estimated = True
+
+
+def record_batched_call(batch: StageMetrics, items: int, position: int) -> None:
+    """
+    One item's share of a model call made for `items` inputs together (micro-batching).
+
+    Tokens are split evenly (the remainder goes to the first positions) and the call,
+    with its retries, is counted on position 0, so request totals add up to the batch.
+    """
+    metrics = _current_stage.get()
+    if metrics is None:
+        return
+    if position == 0:
+        metrics.calls += batch.calls
+    metrics.model_seconds += batch.model_seconds / items
+    for field in ("input_tokens", "output_tokens"):
+        share, remainder = divmod(getattr(batch, field), items)
+        setattr(metrics, field, getattr(metrics, field) + share + (1 if position < remainder else 0))
+    metrics.tokens_estimated = metrics.tokens_estimated or batch.tokens_estimated
+
+
+def record_prompt_savings(tokens_saved: int) -> None:
+    """Estimated prompt tokens saved by compact prompt building in the current stage."""
+    metrics = _current_stage.get()
+    if metrics is not None:
+        metrics.prompt_tokens_saved = tokens_saved  # a retry rebuilds the same prompt
+
+
+def record_cache_level(level: str) -> None:
+    """How the current stage was answered (one of CACHE_LEVELS)."""
+    metrics = _current_stage.get()
+    if metrics is not None:
+        metrics.cache = level
+
+
+def without_metrics(result: Any) -> Any:
+    """Copy of a pipeline result without result['_pipeline']['metrics'] (for comparing results)."""
+    if not isinstance(result, dict) or not isinstance(result.get("_pipeline"), dict):
+        return result
+    pipeline_info = {key: value for key, value in result["_pipeline"].items() if key != "metrics"}
+    return {**result, "_pipeline": pipeline_info}
+
+
+def percentile(ordered: Sequence[float], percent: float) -> Optional[float]:
+    """Nearest-rank percentile of sorted samples: the ceil(percent / 100 * n)-th smallest (None without samples)."""
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(percent * len(ordered) / 100.0))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def percentiles(samples: Iterable[float]) -> Dict[str, Optional[float]]:
+    """Nearest-rank p50 / p95 / p99 of unsorted samples (None without samples)."""
+    ordered = sorted(samples)
+    return {f"p{percent}": percentile(ordered, percent) for percent in (50, 95, 99)}
+
+
+class PipelineMetrics:
+    """Aggregated pipeline metrics over the last `window` requests (totals over all requests)."""
+
+    def __init__(self, window: Optional[int] = None):
+        if window is None:
+            try:
+                window = int(os.getenv("PIPELINE_METRICS_WINDOW", DEFAULT_METRICS_WINDOW))
+            except ValueError:
+                logger.warning("Invalid PIPELINE_METRICS_WINDOW, using default")
+                window = DEFAULT_METRICS_WINDOW
+        self.window = max(1, window)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._traces: deque = deque(maxlen=self.window)
+            self.requests = 0
+            self.input_tokens = 0
+            self.output_tokens = 0
+            self.cost_usd = 0.0
+            self.retries = 0
+            self.prompt_tokens_saved = 0
+            self.failed_requests = 0
+
+    def record(self, trace: PipelineTrace) -> None:
+        summary = trace.to_dict()
+        with self._lock:
+            self._traces.append(summary)
+            self.requests += 1
+            self.failed_requests += summary["outcome"] != "ok"
+            self.input_tokens += summary["input_tokens"]
+            self.output_tokens += summary["output_tokens"]
+            self.cost_usd += summary["cost_usd"]
+            self.retries += summary["retries"]
+            self.prompt_tokens_saved += summary["prompt_tokens_saved"]
+
+    @contextmanager
+    def track(self, trace: Optional[PipelineTrace] = None) -> Iterator[PipelineTrace]:
+        """
+        Record a request's trace when the block ends, also when it raises (the trace is then
+        marked failed with the exception type, and the exception propagates).
+        """
+        trace = trace or PipelineTrace()
+        try:
+            yield trace
+        except BaseException as e:
+            trace.fail(e)
+            raise
+        finally:
+            if trace.total_seconds is None:
+                trace.finish()
+            self.record(trace)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns:
+            {"requests", "window",
+             "totals": {input_tokens, output_tokens, cost_usd, retries, prompt_tokens_saved,
+                        failed_requests},
+             "errors": {error type: count}, "total_seconds": {p50, p95, p99}, "cost_usd": {...},
+             "stages": {name: {"seconds", "input_tokens", "output_tokens": {p50, p95, p99},
+                               "retries": int, "cache": {level: count}}}}
+            Percentiles and per-stage counts cover the last `window` requests.
+        """
+        with self._lock:
+            traces = list(self._traces)
+            totals = {
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+                "cost_usd": self.cost_usd,
+                "retries": self.retries,
+                "prompt_tokens_saved": self.prompt_tokens_saved,
+                "failed_requests": self.failed_requests,
+            }
+            requests = self.requests
+
+        stages: Dict[str, Any] = {}
+        for name in PIPELINE_STAGES:
+            recorded = [trace["stages"][name] for trace in traces if name in trace["stages"]]
+            if not recorded:
+                continue
+            cache = {level: 0 for level in CACHE_LEVELS}
+            for metrics in recorded:
+                if metrics["cache"] in cache:
+                    cache[metrics["cache"]] += 1
+            stages[name] = {
+                "seconds": percentiles(metrics["seconds"] for metrics in recorded),
+                "input_tokens": percentiles(metrics["input_tokens"] for metrics in recorded),
+                "output_tokens": percentiles(metrics["output_tokens"] for metrics in recorded),
+                "retries": sum(metrics["retries"] for metrics in recorded),
+                "cache": cache,
+            }
+
+        errors: Dict[str, int] = {}
+        for trace in traces:
+            if trace["error"] is not None:
+                errors[trace["error"]] = errors.get(trace["error"], 0) + 1
+
+        return {
+            "requests": requests,
+            "window": len(traces),
+            "totals": totals,
+            "errors": errors,
+            "total_seconds": percentiles(
+                trace["total_seconds"] for trace in traces if trace["total_seconds"] is not None
+            ),
+            "cost_usd": percentiles(trace["cost_usd"] for trace in traces),
+            "stages": stages,
+        }
+
+
+# Global aggregate for analyze_input_pipeline (sync and async)
+pipeline_metrics = PipelineMetrics()
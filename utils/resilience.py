@@ -0,0 +1,384 @@
+"""
+Resilience - Circuit breaker, hedged requests and deadlines for AI calls
+Keeps Gemini outages and slow tails from blocking requests past the SLA.
+
+- CircuitBreaker: fails fast (CircuitOpenError) after consecutive failures, probes again after a cooldown
+- call_with_hedging: starts a second attempt if the first is slower than a latency threshold
+- deadline / remaining_time: per-request time budget honoured by calls and retries
+- ResilientCaller: all three around one client, with a rolling latency window for the hedge threshold
+"""
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from core.errors import CircuitOpenError, DeadlineExceeded
+from utils.pipeline_metrics import percentile
+
+logger = logging.getLogger(__name__)
+
+# Gemini defaults (see get_gemini_caller for the environment overrides)
+DEFAULT_CIRCUIT_FAILURE_THRESHOLD = 5
+DEFAULT_CIRCUIT_RECOVERY_SECONDS = 30.0
+DEFAULT_HEDGE_PERCENTILE = 95.0
+DEFAULT_MIN_HEDGE_DELAY_SECONDS = 0.5
+DEFAULT_CALL_TIMEOUT_SECONDS = 60.0
+DEFAULT_ANALYSIS_SLA_SECONDS = 45.0
+
+# Latency samples needed before the hedge threshold is trusted
+_MIN_LATENCY_SAMPLES = 20
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("resilience_deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Limit everything inside the block to `seconds` from now (None: no limit).
+
+    Nested deadlines never extend an outer one. The deadline is stored in a context
+    variable, so it follows the calling thread / asyncio task.
+    """
+    if seconds is None:
+        yield
+        return
+    until = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(until if outer is None else min(outer, until))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left before the current deadline (None if there is none; may be negative)."""
+    until = _deadline.get()
+    return None if until is None else until - time.monotonic()
+
+
+def _min_timeout(*timeouts: Optional[float]) -> Optional[float]:
+    values = [timeout for timeout in timeouts if timeout is not None]
+    return min(values) if values else None
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed: calls pass; `failure_threshold` consecutive failures open the circuit.
+    open: calls fail immediately with CircuitOpenError for `recovery_timeout` seconds.
+    half_open: one probe call is let through; success closes the circuit, failure reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = DEFAULT_CIRCUIT_FAILURE_THRESHOLD,
+        recovery_timeout: float = DEFAULT_CIRCUIT_RECOVERY_SECONDS,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if failure_threshold < 1:
+            raise ValueError(f"failure_threshold must be at least 1, got: {failure_threshold}")
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.recovery_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def before_call(self) -> None:
+        """
+        Admit a call or fail fast.
+
+        Raises:
+            CircuitOpenError: While open, or while the half-open probe is in flight
+        """
+        with self._lock:
+            if self._state == self.OPEN:
+                waited = self._clock() - self._opened_at
+                if waited < self.recovery_timeout:
+                    self.rejected += 1
+                    raise CircuitOpenError(
+                        retry_after=self.recovery_timeout - waited,
+                        message=f"{self.name} circuit breaker is open"
+                    )
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    self.rejected += 1
+                    raise CircuitOpenError(retry_after=0.0, message=f"{self.name} circuit breaker is probing")
+                self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"{self.name} circuit breaker closed")
+            self._state = self.CLOSED
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._consecutive_failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or (
+                self._state == self.CLOSED and self._consecutive_failures >= self.failure_threshold
+            ):
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self.opened += 1
+                logger.warning(
+                    f"{self.name} circuit breaker opened after {self._consecutive_failures} consecutive failures"
+                )
+
+    def release_probe(self) -> None:
+        """Give back an admitted call that never reached the model (cancelled), without counting an outcome."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "consecutive_failures": self._consecutive_failures,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
+
+
+class LatencyTracker:
+    """Rolling window of call latencies (seconds)."""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Nearest-rank percentile (None without samples)."""
+        with self._lock:
+            samples = sorted(self._samples)
+        return percentile(samples, percent)
+
+
+def call_with_hedging(
+    func: Callable[[], Any],
+    executor: ThreadPoolExecutor,
+    hedge_delay: Optional[float] = None,
+    timeout: Optional[float] = None
+) -> Any:
+    """
+    Run func on the executor; start one more attempt if it has not finished after hedge_delay.
+
+    The first attempt to succeed wins. A failure before the hedge fires is raised at once
+    (retrying is the caller's job); after it fires, the other attempt is still awaited.
+    Attempts that lose or outlive the timeout keep running in the background and their
+    results are discarded.
+
+    Raises:
+        DeadlineExceeded: If no attempt succeeds within timeout
+        Exception: The last attempt's error if all attempts fail
+    """
+    start = time.monotonic()
+    pending = {executor.submit(func)}
+    hedged = hedge_delay is None
+    last_error: Optional[BaseException] = None
+
+    while pending:
+        elapsed = time.monotonic() - start
+        wait_for = None if timeout is None else timeout - elapsed
+        if wait_for is not None and wait_for <= 0:
+            raise DeadlineExceeded(f"AI call did not finish within {timeout:.1f}s")
+        if not hedged:
+            wait_for = _min_timeout(wait_for, max(0.0, hedge_delay - elapsed))
+
+        done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                return future.result()
+            except Exception as e:
+                last_error = e
+
+        if last_error is not None and not hedged:
+            raise last_error
+        if not hedged and time.monotonic() - start >= hedge_delay:
+            logger.info(f"Hedging AI call after {hedge_delay:.2f}s")
+            pending.add(executor.submit(func))
+            hedged = True
+
+    raise last_error
+
+
+class ResilientCaller:
+    """
+    Circuit breaker + optional hedging + deadlines around calls to one service.
+
+    call(func) admits the call through the breaker, bounds it by min(call_timeout,
+    remaining_time()), hedges it after the `hedge_percentile` latency once enough
+    samples exist, and records the outcome. Without a timeout or hedge the call runs
+    inline on the caller's thread.
+    """
+
+    def __init__(
+        self,
+        breaker: CircuitBreaker,
+        hedge: bool = False,
+        hedge_percentile: float = DEFAULT_HEDGE_PERCENTILE,
+        min_hedge_delay: float = DEFAULT_MIN_HEDGE_DELAY_SECONDS,
+        call_timeout: Optional[float] = DEFAULT_CALL_TIMEOUT_SECONDS,
+        latency: Optional[LatencyTracker] = None,
+        max_workers: int = 16
+    ):
+        self.breaker = breaker
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_delay = min_hedge_delay
+        self.call_timeout = call_timeout
+        self.latency = latency or LatencyTracker()
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self._max_workers, thread_name_prefix=f"{self.breaker.name}-call"
+                    )
+        return self._executor
+
+    def hedge_delay(self) -> Optional[float]:
+        """Current hedge threshold (None while hedging is off or latency samples are too few)."""
+        if not self.hedge or len(self.latency) < _MIN_LATENCY_SAMPLES:
+            return None
+        return max(self.min_hedge_delay, self.latency.percentile(self.hedge_percentile))
+
+    def call(self, func: Callable[[], Any], hedge: bool = True) -> Any:
+        """
+        Args:
+            func: The call
+            hedge: False for calls that must not run twice (e.g. streaming with callbacks)
+
+        Raises:
+            CircuitOpenError: Without calling func while the breaker is open
+            DeadlineExceeded: If the call cannot finish before the timeout / deadline
+            Exception: Whatever func raised
+        """
+        timeout = _min_timeout(self.call_timeout, remaining_time())
+        if timeout is not None and timeout <= 0:
+            # func is never called, so the breaker has no outcome to record
+            raise DeadlineExceeded("No time left before the request deadline")
+        self.breaker.before_call()
+        hedge_delay = self.hedge_delay() if hedge else None
+
+        start = time.monotonic()
+        try:
+            if timeout is None and hedge_delay is None:
+                result = func()
+            else:
+                result = call_with_hedging(func, self._get_executor(), hedge_delay=hedge_delay, timeout=timeout)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.release_probe()
+            raise
+        self.latency.record(time.monotonic() - start)
+        self.breaker.record_success()
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.breaker.get_stats(),
+            "hedge_delay": self.hedge_delay(),
+            "p95_latency": self.latency.percentile(95),
+        }
+
+
+def _env_float(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning(f"Invalid {name}, using default")
+        return default
+
+
+def analysis_sla_seconds() -> Optional[float]:
+    """End-to-end time budget for one analysis (ANALYSIS_SLA_SECONDS, 0 disables)."""
+    sla = _env_float("ANALYSIS_SLA_SECONDS", DEFAULT_ANALYSIS_SLA_SECONDS)
+    return sla if sla and sla > 0 else None
+
+
+_gemini_caller: Optional[ResilientCaller] = None
+_gemini_caller_lock = threading.Lock()
+
+
+def get_gemini_caller() -> ResilientCaller:
+    """
+    Shared ResilientCaller for Gemini (created on first use).
+
+    Environment:
+        GEMINI_CIRCUIT_FAILURE_THRESHOLD / GEMINI_CIRCUIT_RECOVERY_SECONDS: breaker settings
+        GEMINI_HEDGE_REQUESTS: "1" to hedge calls slower than GEMINI_HEDGE_PERCENTILE latency
+        GEMINI_CALL_TIMEOUT_SECONDS: per-call timeout (0 disables)
+    """
+    global _gemini_caller
+    if _gemini_caller is None:
+        with _gemini_caller_lock:
+            if _gemini_caller is None:
+                call_timeout = _env_float("GEMINI_CALL_TIMEOUT_SECONDS", DEFAULT_CALL_TIMEOUT_SECONDS)
+                _gemini_caller = ResilientCaller(
+                    breaker=CircuitBreaker(
+                        "gemini",
+                        failure_threshold=max(1, int(_env_float(
+                            "GEMINI_CIRCUIT_FAILURE_THRESHOLD", DEFAULT_CIRCUIT_FAILURE_THRESHOLD
+                        ))),
+                        recovery_timeout=_env_float("GEMINI_CIRCUIT_RECOVERY_SECONDS", DEFAULT_CIRCUIT_RECOVERY_SECONDS)
+                    ),
+                    hedge=os.getenv("GEMINI_HEDGE_REQUESTS", "").lower() in ("1", "true", "yes"),
+                    hedge_percentile=_env_float("GEMINI_HEDGE_PERCENTILE", DEFAULT_HEDGE_PERCENTILE),
+                    call_timeout=call_timeout if call_timeout and call_timeout > 0 else None
+                )
+    return _gemini_caller
+
+
+def reset_gemini_caller() -> None:
+    """Drop the shared Gemini caller (breaker state, latency window); re-reads the environment on next use."""
+    global _gemini_caller
+    with _gemini_caller_lock:
+        _gemini_caller = None